@@ -0,0 +1,94 @@
+"""
+Mede o envio de emails contra um servidor SMTP local de depuração.
+Uso: python manage.py benchmark_email --mensagens 200 --latencia 30
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.mail import get_connection
+
+from utils.emails.servidor_smtp_teste import ServidorSMTPTeste
+from utils.emails.sistema_email import close_pooled_connection, get_pooled_connection, send_many
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara mensagens/s de uma conexão SMTP por email, da conexão reutilizada '
+        'e de send_many() em lote, contra um servidor SMTP local'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mensagens', type=int, default=200, help='Emails por modo (padrão: 200)')
+        parser.add_argument(
+            '--latencia',
+            type=float,
+            default=30,
+            help='Atraso em ms de cada conexão nova, simulando TLS/AUTH (padrão: 30)',
+        )
+
+    def handle(self, *args, **options):
+        total = options['mensagens']
+        if total < 1:
+            raise CommandError('--mensagens deve ser maior que zero')
+
+        mensagens = [
+            {
+                'subject': f'Benchmark {i}',
+                'plain_message': 'Votre devis est disponible.',
+                'html_message': '<p>Votre devis est disponible.</p>',
+                'recipients': [f'client{i}@example.com'],
+            }
+            for i in range(total)
+        ]
+
+        resultados = []
+        with ServidorSMTPTeste(latencia=options['latencia'] / 1000) as servidor:
+            def conexao():
+                return get_connection(
+                    backend='django.core.mail.backends.smtp.EmailBackend',
+                    host=servidor.host,
+                    port=servidor.port,
+                    username='',
+                    password='',
+                    use_tls=False,
+                    use_ssl=False,
+                )
+
+            modos = [
+                # Comportamento anterior: cada email abre (e fecha) a própria conexão
+                ('🐢 Uma conexão por email', lambda: [send_many([m], connection=conexao()) for m in mensagens]),
+                # Fluxos que enviam um email por vez (NotificationService, _send_mail)
+                ('🔁 Conexão reutilizada', lambda: [
+                    send_many([m], connection=get_pooled_connection(conexao())) for m in mensagens
+                ]),
+                ('📦 send_many em lote', lambda: send_many(mensagens, connection=get_pooled_connection(conexao()))),
+            ]
+
+            for nome, executar in modos:
+                close_pooled_connection()
+                conexoes, recebidas = servidor.conexoes, servidor.mensagens
+                inicio = time.perf_counter()
+                executar()
+                segundos = time.perf_counter() - inicio
+                close_pooled_connection()
+
+                resultado = {
+                    'nome': nome,
+                    'enviadas': servidor.mensagens - recebidas,
+                    'conexoes': servidor.conexoes - conexoes,
+                    'segundos': segundos,
+                }
+                resultados.append(resultado)
+                self.stdout.write(
+                    f"{nome}: {resultado['enviadas']} emails em {segundos:.2f}s "
+                    f"({resultado['enviadas'] / segundos:.0f} mensagens/s, {resultado['conexoes']} conexões)"
+                )
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS('📋 RESUMO DA OPERAÇÃO:'))
+        self.stdout.write(f"Emails por modo: {total} (latência de conexão: {options['latencia']:.0f} ms)")
+        for resultado in resultados:
+            self.stdout.write(
+                f"{resultado['nome']}: {resultado['enviadas'] / resultado['segundos']:.0f} mensagens/s"
+            )
+        self.stdout.write('='*50)
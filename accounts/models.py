@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
+from django.db.models.functions import Lower
 from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
 import re
@@ -120,6 +121,10 @@ class User(AbstractUser):
         verbose_name = "Utilisateur"
         verbose_name_plural = "Utilisateurs"
         db_table = "accounts_user"
+        indexes = [
+            # Comparações de email sem diferenciar maiúsculas (vinculação de orçamentos órfãos)
+            models.Index(Lower("email"), name="user_email_lower_idx"),
+        ]
 
     def clean(self):
         """Validação personalizada"""
@@ -1,7 +1,15 @@
-from django.test import SimpleTestCase, override_settings
+import io
+
 from django.core import mail
+from django.core.mail import get_connection
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
 
-from utils.emails.sistema_email import _send_mail, _get_smtp_connection, _is_test_or_dev_backend
+from utils.emails.servidor_smtp_teste import ServidorSMTPTeste
+from utils.emails.sistema_email import (
+    _send_mail, _get_smtp_connection, _is_test_or_dev_backend,
+    close_pooled_connection, get_pooled_connection, send_many,
+)
 
 
 class EmailSystemTests(SimpleTestCase):
@@ -43,3 +51,73 @@ class EmailSystemTests(SimpleTestCase):
         self.assertEqual(len(mail.outbox), before + 1)
         self.assertEqual(mail.outbox[-1].from_email, "smtpuser@example.com")
 
+
+@override_settings(EMAIL_SMTP_IDLE_TIMEOUT=60, EMAIL_SMTP_CHECK_AFTER=5)
+class PooledConnectionTests(SimpleTestCase):
+    """Conexão SMTP reutilizada e send_many contra um servidor SMTP local"""
+
+    def setUp(self):
+        self.servidor = ServidorSMTPTeste()
+        self.servidor.__enter__()
+        self.addCleanup(self.servidor.__exit__)
+        self.addCleanup(close_pooled_connection)
+
+    def _conexao(self):
+        return get_connection(
+            backend="django.core.mail.backends.smtp.EmailBackend",
+            host=self.servidor.host,
+            port=self.servidor.port,
+            username="",
+            password="",
+            use_tls=False,
+            use_ssl=False,
+        )
+
+    def _mensagens(self, quantidade):
+        return [
+            {"subject": f"Msg {i}", "plain_message": "plain", "html_message": "<b>html</b>", "recipients": [f"to{i}@example.com"]}
+            for i in range(quantidade)
+        ]
+
+    def test_reutiliza_conexao(self):
+        for mensagem in self._mensagens(3):
+            self.assertEqual(send_many([mensagem], connection=get_pooled_connection(self._conexao())), 1)
+
+        self.assertEqual(self.servidor.mensagens, 3)
+        self.assertEqual(self.servidor.conexoes, 1)
+        print("✓ 3 emails numa única conexão SMTP")
+
+    def test_send_many_em_lotes(self):
+        enviados = send_many(self._mensagens(25), connection=get_pooled_connection(self._conexao()), batch_size=10)
+
+        self.assertEqual(enviados, 25)
+        self.assertEqual(self.servidor.mensagens, 25)
+        self.assertEqual(self.servidor.conexoes, 1)
+        print("✓ send_many enviou 25 emails em lotes de 10")
+
+    @override_settings(EMAIL_SMTP_IDLE_TIMEOUT=0)
+    def test_reabre_conexao_ociosa(self):
+        primeira = get_pooled_connection(self._conexao())
+        segunda = get_pooled_connection(self._conexao())
+
+        self.assertIsNot(primeira, segunda)
+        self.assertEqual(self.servidor.conexoes, 2)
+        print("✓ Conexão ociosa reaberta")
+
+    @override_settings(EMAIL_SMTP_CHECK_AFTER=0)
+    def test_reabre_conexao_fechada_pelo_servidor(self):
+        get_pooled_connection(self._conexao())
+        self.servidor.derrubar_conexoes()
+
+        conexao = get_pooled_connection(self._conexao())
+        self.assertEqual(send_many(self._mensagens(1), connection=conexao), 1)
+        self.assertEqual(self.servidor.conexoes, 2)
+        print("✓ Conexão derrubada detectada pelo NOOP")
+
+    def test_benchmark(self):
+        saida = io.StringIO()
+        call_command("benchmark_email", mensagens=5, latencia=0, stdout=saida)
+
+        self.assertIn("mensagens/s", saida.getvalue())
+        self.assertEqual(self.servidor.mensagens, 0)
+        print("✓ Benchmark de envio executado")
@@ -216,12 +216,13 @@ def dashboard(request):
             stats = get_admin_stats()
         else:  # COLLABORATOR
             # Estatísticas básicas para colaboradores
-            from orcamentos.models import Projeto, SolicitacaoOrcamento
+            from orcamentos.estatisticas import EstatisticasService
+            projetos = EstatisticasService.projetos_clientes()
             stats = {
-                'collab_projects': Projeto.objects.count(),  # ou filtrar por colaborador se implementado
+                'collab_projects': projetos['total_projects'],  # ou filtrar por colaborador se implementado
                 'collab_tasks': 0,  # implementar sistema de tarefas se necessário
-                'collab_quotes': SolicitacaoOrcamento.objects.filter(status='pendente').count(),
-                'collab_clients': Projeto.objects.values('cliente').distinct().count()
+                'collab_quotes': EstatisticasService.solicitacoes()['pendentes'],
+                'collab_clients': projetos['total_clients']
             }
 
         context = {
@@ -6,6 +6,7 @@ from .models import (
     CommentaireBlog,
     NewsletterSubscriber,
     NewsletterList,
+    NewsletterCampaign,
 )
 
 
@@ -427,28 +428,34 @@ class NewsletterSubscriberAdmin(admin.ModelAdmin):
 
     def send_confirmation_email(self, request, queryset):
         """Enviar email de confirmação para assinantes não confirmados"""
-        unconfirmed = queryset.filter(confirmed=False)
-        count = 0
-
-        for subscriber in unconfirmed:
-            # Aqui você implementaria o envio do email de confirmação
-            # Por exemplo, usando Django's send_mail ou Celery task
-            try:
-                # send_confirmation_email_task.delay(subscriber.id)
-                count += 1
-            except Exception as e:
-                self.message_user(
-                    request,
-                    f"Erro ao enviar email para {subscriber.email}: {str(e)}",
-                    level="ERROR",
-                )
-
+        from django.template.loader import render_to_string
+        from django.utils.html import strip_tags
+        from utils.emails.sistema_email import queue_many
+
+        mensagens = []
+        for subscriber in queryset.filter(confirmed=False).iterator():
+            html_message = render_to_string(
+                "emails/newsletter_confirmation.html", {"subscriber": subscriber}
+            )
+            mensagens.append({
+                "subject": "Confirmation de votre inscription à la newsletter",
+                "plain_message": strip_tags(html_message),
+                "html_message": html_message,
+                "recipients": [subscriber.email],
+            })
+
+        # Fila de saída (ou envio único numa conexão, sem fila)
+        count = queue_many(mensagens) if mensagens else 0
         if count > 0:
             self.message_user(
                 request,
                 f"{count} email(s) de confirmação enviado(s) com sucesso.",
                 level="SUCCESS",
             )
+        elif mensagens:
+            self.message_user(
+                request, "Erro ao enviar os emails de confirmação (ver log).", level="ERROR"
+            )
 
     send_confirmation_email.short_description = "Enviar email de confirmação"
 
@@ -673,3 +680,71 @@ NewsletterSubscriberAdmin.list_filter = [
     ("date_confirmed", admin.DateFieldListFilter),
     ("last_email_sent", admin.DateFieldListFilter),
 ]
+
+
+@admin.register(NewsletterCampaign)
+class NewsletterCampaignAdmin(admin.ModelAdmin):
+    list_display = [
+        "name",
+        "subject",
+        "status",
+        "sent_count",
+        "failed_count",
+        "throughput_display",
+        "started_at",
+        "finished_at",
+    ]
+    list_filter = ["status", "created_at"]
+    search_fields = ["name", "subject"]
+    filter_horizontal = ["lists"]
+    readonly_fields = [
+        "last_subscriber_id",
+        "sent_count",
+        "failed_count",
+        "sending_seconds",
+        "throughput_display",
+        "last_error",
+        "started_at",
+        "finished_at",
+        "created_at",
+        "updated_at",
+    ]
+    actions = ["schedule_campaigns"]
+
+    fieldsets = (
+        ("Campagne", {"fields": ("name", "subject", "html_content")}),
+        ("Destinataires", {"fields": ("lists", "interests", "only_confirmed")}),
+        (
+            "Envoi",
+            {
+                "fields": (
+                    "status",
+                    "last_subscriber_id",
+                    "sent_count",
+                    "failed_count",
+                    "sending_seconds",
+                    "throughput_display",
+                    "last_error",
+                    "started_at",
+                    "finished_at",
+                )
+            },
+        ),
+    )
+
+    def throughput_display(self, obj):
+        """Mensagens por segundo durante o envio"""
+        return f"{obj.messages_per_second:.1f} msg/s"
+
+    throughput_display.short_description = "Débit"
+
+    def schedule_campaigns(self, request, queryset):
+        """Programar o envio (feito pelo comando enviar_campanhas_newsletter)"""
+        updated = queryset.filter(status__in=["brouillon", "interrompue"]).update(status="programmee")
+        self.message_user(
+            request,
+            f"{updated} campanha(s) programada(s). O envio é feito pelo comando enviar_campanhas_newsletter.",
+            level="SUCCESS",
+        )
+
+    schedule_campaigns.short_description = "Programmer l'envoi"
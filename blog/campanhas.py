@@ -0,0 +1,153 @@
+"""
+Disparo de campanhas de newsletter
+
+O template da campanha é compilado uma vez e renderizado por assinante. Os
+assinantes são lidos em ordem de id com iterator(), em blocos, sem carregar
+a lista inteira; cada bloco vai num send_many() pela conexão SMTP
+reutilizada, respeitando NEWSLETTER_MENSAGENS_POR_SEGUNDO.
+
+Depois de cada bloco o progresso (último id, enviados, falhas, tempo) é
+gravado na campanha: se o processo cair, a próxima execução continua do
+último bloco gravado (no pior caso o bloco em andamento é reenviado).
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.db.models import F, Q
+from django.template import Context, Template
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from utils.emails.sistema_email import _get_from_email, get_pooled_connection, send_many
+
+from .models import NewsletterCampaign, NewsletterSubscriber
+
+logger = logging.getLogger(__name__)
+
+
+def assinantes_da_campanha(campanha):
+    """Assinantes ativos que recebem a campanha, a partir do checkpoint, em ordem de id"""
+    assinantes = NewsletterSubscriber.objects.filter(
+        active=True, pk__gt=campanha.last_subscriber_id
+    )
+    if campanha.only_confirmed:
+        assinantes = assinantes.filter(confirmed=True)
+
+    lista_ids = list(campanha.lists.values_list("pk", flat=True))
+    if lista_ids:
+        assinantes = assinantes.filter(
+            pk__in=NewsletterSubscriber.lists.through.objects.filter(
+                newsletterlist_id__in=lista_ids
+            ).values("newslettersubscriber_id")
+        )
+
+    if campanha.interests_list:
+        filtro = Q()
+        for interesse in campanha.interests_list:
+            filtro |= Q(interests__contains=interesse)
+        assinantes = assinantes.filter(filtro)
+
+    return assinantes.order_by("pk").only("pk", "email", "prenom")
+
+
+class DisparadorCampanha:
+    """Envia uma campanha em blocos com checkpoint e limite de taxa"""
+
+    def __init__(self, campanha, tamanho_lote=None, mensagens_por_segundo=None):
+        self.campanha = campanha
+        self.tamanho_lote = tamanho_lote or getattr(settings, "NEWSLETTER_LOTE_TAMANHO", 200)
+        if mensagens_por_segundo is None:
+            mensagens_por_segundo = getattr(settings, "NEWSLETTER_MENSAGENS_POR_SEGUNDO", 20)
+        self.mensagens_por_segundo = mensagens_por_segundo
+        self.template = Template(campanha.html_content)
+        self.remetente = _get_from_email()
+
+    def _email(self, assinante):
+        html = self.template.render(Context({"subscriber": assinante, "campaign": self.campanha}))
+        email = EmailMultiAlternatives(
+            subject=self.campanha.subject,
+            body=strip_tags(html),
+            from_email=self.remetente,
+            to=[assinante.email],
+        )
+        email.attach_alternative(html, "text/html")
+        return email
+
+    def executar(self, limite_lotes=None):
+        """Envia a partir do checkpoint; devolve a campanha atualizada"""
+        campanha = self.campanha
+        campanha.status = "en_cours"
+        campanha.started_at = campanha.started_at or timezone.now()
+        campanha.last_error = ""
+        campanha.save(update_fields=["status", "started_at", "last_error", "updated_at"])
+
+        lote = []
+        lotes = 0
+        for assinante in assinantes_da_campanha(campanha).iterator(chunk_size=self.tamanho_lote):
+            lote.append(assinante)
+            if len(lote) < self.tamanho_lote:
+                continue
+            if not self._enviar_lote(lote):
+                return campanha
+            lote = []
+            lotes += 1
+            if limite_lotes and lotes >= limite_lotes:
+                return campanha
+
+        if lote and not self._enviar_lote(lote):
+            return campanha
+
+        campanha.status = "envoyee"
+        campanha.finished_at = timezone.now()
+        campanha.save(update_fields=["status", "finished_at", "updated_at"])
+        return campanha
+
+    def _enviar_lote(self, lote):
+        campanha = self.campanha
+        inicio = time.perf_counter()
+        try:
+            enviados = send_many(
+                [self._email(assinante) for assinante in lote],
+                connection=get_pooled_connection(),
+                batch_size=len(lote),
+            )
+        except Exception as e:
+            logger.error(f"Campanha {campanha.pk}: erro ao enviar bloco: {e}")
+            enviados, erro = 0, str(e)
+        else:
+            erro = "" if enviados else "nenhum email do bloco foi aceito pelo servidor (ver log)"
+
+        if not enviados:
+            # Servidor fora do ar: parar sem avançar o checkpoint, o bloco será refeito
+            campanha.status = "interrompue"
+            campanha.last_error = erro
+            campanha.save(update_fields=["status", "last_error", "updated_at"])
+            return False
+
+        ids = [assinante.pk for assinante in lote]
+        NewsletterSubscriber.objects.filter(pk__in=ids).update(last_email_sent=timezone.now())
+
+        self._respeitar_taxa(len(lote), time.perf_counter() - inicio)
+        segundos = time.perf_counter() - inicio
+
+        campanha.last_subscriber_id = ids[-1]
+        campanha.sent_count += enviados
+        campanha.failed_count += len(lote) - enviados
+        campanha.sending_seconds += segundos
+        NewsletterCampaign.objects.filter(pk=campanha.pk).update(
+            last_subscriber_id=campanha.last_subscriber_id,
+            sent_count=F("sent_count") + enviados,
+            failed_count=F("failed_count") + (len(lote) - enviados),
+            sending_seconds=F("sending_seconds") + segundos,
+            updated_at=timezone.now(),
+        )
+        return True
+
+    def _respeitar_taxa(self, quantidade, segundos):
+        if self.mensagens_por_segundo:
+            espera = quantidade / self.mensagens_por_segundo - segundos
+            if espera > 0:
+                time.sleep(espera)
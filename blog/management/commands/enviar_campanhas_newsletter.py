@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.campanhas import DisparadorCampanha, assinantes_da_campanha
+from blog.models import NewsletterCampaign
+from utils.emails.sistema_email import close_pooled_connection
+
+
+class Command(BaseCommand):
+    help = (
+        'Envia as campanhas de newsletter programadas (ou as informadas), em blocos '
+        'com limite de taxa, continuando do último bloco gravado se o envio foi interrompido'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('campanhas', nargs='*', type=int, help='IDs das campanhas (padrão: programadas e em andamento)')
+        parser.add_argument('--lote', type=int, help='Emails por bloco (padrão: NEWSLETTER_LOTE_TAMANHO)')
+        parser.add_argument(
+            '--taxa',
+            type=float,
+            help='Máximo de emails por segundo, 0 = sem limite (padrão: NEWSLETTER_MENSAGENS_POR_SEGUNDO)',
+        )
+        parser.add_argument(
+            '--reiniciar',
+            action='store_true',
+            help='Ignora o progresso gravado e envia a campanha desde o início',
+        )
+
+    def handle(self, *args, **options):
+        if options['campanhas']:
+            campanhas = list(NewsletterCampaign.objects.filter(pk__in=options['campanhas']))
+            if len(campanhas) != len(set(options['campanhas'])):
+                raise CommandError('Campanha não encontrada')
+        else:
+            campanhas = list(NewsletterCampaign.objects.filter(status__in=['programmee', 'en_cours']))
+
+        if not campanhas:
+            self.stdout.write(self.style.WARNING('⚠️  Nenhuma campanha para enviar'))
+            return
+
+        try:
+            for campanha in campanhas:
+                if options['reiniciar']:
+                    campanha.last_subscriber_id = campanha.sent_count = campanha.failed_count = 0
+                    campanha.sending_seconds = 0
+                    campanha.save()
+                elif campanha.status == 'envoyee':
+                    self.stdout.write(self.style.WARNING(f"⚠️  Campanha '{campanha}' já enviada (use --reiniciar)"))
+                    continue
+
+                restantes = assinantes_da_campanha(campanha).count()
+                retomada = f" (retomando após o assinante #{campanha.last_subscriber_id})" if campanha.last_subscriber_id else ''
+                self.stdout.write(f"📨 Campanha '{campanha}': {restantes} destinatário(s){retomada}")
+
+                campanha = DisparadorCampanha(
+                    campanha, tamanho_lote=options['lote'], mensagens_por_segundo=options['taxa']
+                ).executar()
+                self.mostrar_resultado(campanha)
+        finally:
+            close_pooled_connection()
+
+    def mostrar_resultado(self, campanha):
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS(f"📋 RESUMO DA CAMPANHA '{campanha}':"))
+        self.stdout.write(f"✅ Enviados: {campanha.sent_count}")
+        self.stdout.write(f"❌ Falhas: {campanha.failed_count}")
+        self.stdout.write(f"⏱️  {campanha.messages_per_second:.1f} mensagens/s em {campanha.sending_seconds:.1f}s")
+        if campanha.status == 'interrompue':
+            self.stdout.write(self.style.ERROR(f"⛔ Interrompida: {campanha.last_error}"))
+            self.stdout.write('   Execute novamente para continuar do último bloco enviado')
+        self.stdout.write('='*50)
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsletterCampaign',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=150, verbose_name='Nom de la campagne')),
+                ('subject', models.CharField(max_length=200, verbose_name='Sujet')),
+                ('html_content', models.TextField(help_text='Template Django: {{ subscriber.full_name }}, {{ subscriber.prenom }}, {{ subscriber.email }}', verbose_name='Contenu HTML')),
+                ('interests', models.CharField(blank=True, help_text='Séparés par des virgules; vide = tous', max_length=255, verbose_name="Centres d'intérêt")),
+                ('only_confirmed', models.BooleanField(default=True, verbose_name='Seulement les emails confirmés')),
+                ('status', models.CharField(choices=[('brouillon', 'Brouillon'), ('programmee', 'Programmée'), ('en_cours', "En cours d'envoi"), ('interrompue', 'Interrompue'), ('envoyee', 'Envoyée')], default='brouillon', max_length=20, verbose_name='Statut')),
+                ('last_subscriber_id', models.PositiveBigIntegerField(default=0, verbose_name='Dernier abonné traité')),
+                ('sent_count', models.PositiveIntegerField(default=0, verbose_name='Emails envoyés')),
+                ('failed_count', models.PositiveIntegerField(default=0, verbose_name='Échecs')),
+                ('sending_seconds', models.FloatField(default=0, verbose_name="Durée d'envoi (s)")),
+                ('last_error', models.TextField(blank=True, verbose_name='Dernière erreur')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name="Début de l'envoi")),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name="Fin de l'envoi")),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('lists', models.ManyToManyField(blank=True, help_text='Vide = tous les abonnés', related_name='campaigns', to='blog.newsletterlist', verbose_name='Listes')),
+            ],
+            options={
+                'verbose_name': 'Campagne de Newsletter',
+                'verbose_name_plural': 'Campagnes de Newsletter',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -296,3 +296,68 @@ class NewsletterSubscriber(models.Model):
         """Retorna os interesses em formato legível"""
         interests_dict = dict(self.INTEREST_CHOICES)
         return [interests_dict.get(interest, interest) for interest in self.interests_list]
+
+
+class NewsletterCampaign(models.Model):
+    """Campanha de newsletter enviada pelo comando enviar_campanhas_newsletter (ver campanhas.py)"""
+
+    STATUS_CHOICES = [
+        ("brouillon", "Brouillon"),
+        ("programmee", "Programmée"),
+        ("en_cours", "En cours d'envoi"),
+        ("interrompue", "Interrompue"),
+        ("envoyee", "Envoyée"),
+    ]
+
+    name = models.CharField(max_length=150, verbose_name="Nom de la campagne")
+    subject = models.CharField(max_length=200, verbose_name="Sujet")
+    html_content = models.TextField(
+        verbose_name="Contenu HTML",
+        help_text="Template Django: {{ subscriber.full_name }}, {{ subscriber.prenom }}, {{ subscriber.email }}",
+    )
+    lists = models.ManyToManyField(
+        NewsletterList,
+        blank=True,
+        related_name="campaigns",
+        verbose_name="Listes",
+        help_text="Vide = tous les abonnés",
+    )
+    interests = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name="Centres d'intérêt",
+        help_text="Séparés par des virgules; vide = tous",
+    )
+    only_confirmed = models.BooleanField(default=True, verbose_name="Seulement les emails confirmés")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="brouillon", verbose_name="Statut")
+
+    # Progresso (checkpoint): o envio recomeça depois do último assinante gravado
+    last_subscriber_id = models.PositiveBigIntegerField(default=0, verbose_name="Dernier abonné traité")
+    sent_count = models.PositiveIntegerField(default=0, verbose_name="Emails envoyés")
+    failed_count = models.PositiveIntegerField(default=0, verbose_name="Échecs")
+    sending_seconds = models.FloatField(default=0, verbose_name="Durée d'envoi (s)")
+    last_error = models.TextField(blank=True, verbose_name="Dernière erreur")
+
+    started_at = models.DateTimeField(blank=True, null=True, verbose_name="Début de l'envoi")
+    finished_at = models.DateTimeField(blank=True, null=True, verbose_name="Fin de l'envoi")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Criado em")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
+
+    class Meta:
+        verbose_name = "Campagne de Newsletter"
+        verbose_name_plural = "Campagnes de Newsletter"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return self.name
+
+    @property
+    def interests_list(self):
+        return [interest.strip() for interest in self.interests.split(",") if interest.strip()]
+
+    @property
+    def messages_per_second(self):
+        """Throughput médio do envio (só o tempo gasto enviando)"""
+        if not self.sending_seconds:
+            return 0
+        return self.sent_count / self.sending_seconds
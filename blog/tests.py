@@ -1,3 +1,103 @@
-from django.test import TestCase
+import io
 
-# Create your tests here.
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from blog.campanhas import DisparadorCampanha, assinantes_da_campanha
+from blog.models import NewsletterCampaign, NewsletterList, NewsletterSubscriber
+from utils.emails.sistema_email import close_pooled_connection
+
+
+@override_settings(NEWSLETTER_MENSAGENS_POR_SEGUNDO=0, DEFAULT_FROM_EMAIL="newsletter@example.com")
+class CampanhaNewsletterTestCase(TestCase):
+    """Disparo de campanhas de newsletter em blocos com checkpoint"""
+
+    def setUp(self):
+        self.addCleanup(close_pooled_connection)
+        self.lista = NewsletterList.objects.create(name="Clients")
+        self.outra_lista = NewsletterList.objects.create(name="Prospects")
+
+        for i in range(12):
+            assinante = NewsletterSubscriber.objects.create(
+                prenom=f"Abonné {i}",
+                email=f"abonne{i}@example.com",
+                interests="peinture_interieur,conseils" if i % 2 else "decoration",
+                confirmed=i != 11,
+                active=i != 10,
+            )
+            assinante.lists.add(self.lista if i < 8 else self.outra_lista)
+
+        self.campanha = NewsletterCampaign.objects.create(
+            name="Printemps",
+            subject="Nos conseils de printemps",
+            html_content="<p>Bonjour {{ subscriber.full_name }},</p><p>Découvrez nos offres.</p>",
+        )
+
+    def test_envio_completo(self):
+        """Todos os assinantes ativos e confirmados recebem o email personalizado"""
+        campanha = DisparadorCampanha(self.campanha, tamanho_lote=4).executar()
+
+        self.assertEqual(campanha.status, "envoyee")
+        self.assertEqual(campanha.sent_count, 10)
+        self.assertEqual(len(mail.outbox), 10)
+        self.assertIn("Bonjour Abonné 0", mail.outbox[0].alternatives[0][0])
+        self.assertEqual(mail.outbox[0].from_email, "newsletter@example.com")
+        self.assertEqual(NewsletterSubscriber.objects.filter(last_email_sent__isnull=False).count(), 10)
+        print(f"✓ Campanha enviada a {campanha.sent_count} abonnés")
+
+    def test_filtros(self):
+        """Listas e centros de interesse restringem os destinatários"""
+        self.campanha.lists.add(self.lista)
+        self.campanha.interests = "conseils"
+        self.campanha.save()
+
+        emails = [s.email for s in assinantes_da_campanha(self.campanha)]
+        self.assertEqual(emails, [f"abonne{i}@example.com" for i in (1, 3, 5, 7)])
+        print("✓ Filtros por lista e interesse")
+
+    def test_retoma_do_checkpoint(self):
+        """Interrompida depois de um bloco, a campanha continua de onde parou"""
+        DisparadorCampanha(self.campanha, tamanho_lote=4).executar(limite_lotes=1)
+        self.campanha.refresh_from_db()
+        self.assertEqual(self.campanha.sent_count, 4)
+        self.assertEqual(self.campanha.status, "en_cours")
+
+        DisparadorCampanha(self.campanha, tamanho_lote=4).executar()
+        self.campanha.refresh_from_db()
+
+        destinatarios = [email.to[0] for email in mail.outbox]
+        self.assertEqual(len(destinatarios), len(set(destinatarios)))
+        self.assertEqual(self.campanha.sent_count, 10)
+        self.assertEqual(self.campanha.status, "envoyee")
+        print("✓ Envio retomado sem repetir destinatários")
+
+    @override_settings(EMAIL_BACKEND="blog.tests.BackendIndisponivel")
+    def test_servidor_indisponivel(self):
+        """Sem servidor, a campanha para sem avançar o checkpoint"""
+        campanha = DisparadorCampanha(self.campanha, tamanho_lote=4).executar()
+
+        self.assertEqual(campanha.status, "interrompue")
+        self.assertEqual(NewsletterCampaign.objects.get().last_subscriber_id, 0)
+        print("✓ Campanha interrompida com o checkpoint preservado")
+
+    def test_comando(self):
+        """O comando envia as campanhas programadas e mostra o throughput"""
+        self.campanha.status = "programmee"
+        self.campanha.save()
+
+        saida = io.StringIO()
+        call_command("enviar_campanhas_newsletter", lote=3, stdout=saida)
+
+        self.assertIn("mensagens/s", saida.getvalue())
+        self.assertEqual(NewsletterCampaign.objects.get().status, "envoyee")
+        self.assertEqual(len(mail.outbox), 10)
+        print("✓ Comando enviou a campanha programada")
+
+
+class BackendIndisponivel(BaseEmailBackend):
+    """Backend de teste que recusa a conexão"""
+
+    def send_messages(self, email_messages):
+        raise ConnectionRefusedError("SMTP indisponível")
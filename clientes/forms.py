@@ -102,18 +102,11 @@ class ClienteForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # Gerar automaticamente o código se é um novo cliente
+        # Código de um novo cliente é reservado pelo contador ao salvar
+        # (a sugestão calculada aqui colidia entre cadastros simultâneos)
         if not self.instance.pk:
-            last_client = Cliente.objects.order_by('id').last()
-            if last_client:
-                try:
-                    last_number = int(last_client.code.replace('CLI', ''))
-                    new_number = last_number + 1
-                except ValueError:
-                    new_number = 1
-            else:
-                new_number = 1
-            self.fields['code'].initial = f'CLI{new_number:03d}'
+            self.fields['code'].required = False
+            self.fields['code'].widget.attrs['placeholder'] = 'Attribué automatiquement (ex: CLI001)'
 
     def clean_taux_tva_defaut(self):
         """Validação corrigida para taxa TVA"""
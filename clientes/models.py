@@ -1,9 +1,10 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import RegexValidator
 from django.conf import settings
 from django.utils import timezone
 from decimal import Decimal
 from orcamentos.models import TipoTVA
+from orcamentos.numeracao import NumeracaoService
 
 class Cliente(models.Model):
     CIVILITE_CHOICES = [
@@ -176,18 +177,42 @@ class Cliente(models.Model):
 
     def save(self, *args, **kwargs):
         """Override save para garantir código único"""
-        if not self.code:
-            last_client = Cliente.objects.order_by('id').last()
-            if last_client:
-                try:
-                    last_number = int(last_client.code.replace('CLI', ''))
-                    new_number = last_number + 1
-                except:
-                    new_number = 1
-            else:
-                new_number = 1
-            self.code = f'CLI{new_number:03d}'
-        super().save(*args, **kwargs)
+        if self.code:
+            super().save(*args, **kwargs)
+            return
+
+        # Código alocado pelo contador atômico, na mesma transação da gravação
+        with transaction.atomic():
+            self.code = self.gerar_codigo()
+            super().save(*args, **kwargs)
+
+    @classmethod
+    def gerar_codigo(cls):
+        """Próximo código CLIxxx (sequência contínua, sem reinício anual)"""
+        return cls.gerar_codigos(1)[0]
+
+    @classmethod
+    def gerar_codigos(cls, quantidade):
+        """Reserva um bloco contíguo de códigos CLIxxx com um único incremento do contador"""
+        return NumeracaoService.proximos_numeros(
+            'CLI', cls, quantidade, largura=3, ano=NumeracaoService.SEM_ANO, campo='code'
+        )
+
+    @classmethod
+    def criar_em_lote(cls, clientes, batch_size=500):
+        """
+        Importa vários clientes de uma vez.
+
+        Os códigos que faltam são reservados num único bloco contíguo e os
+        registros são inseridos com bulk_create (save() não é chamado).
+        """
+        clientes = list(clientes)
+        sem_codigo = [cliente for cliente in clientes if not cliente.code]
+
+        with transaction.atomic():
+            for cliente, code in zip(sem_codigo, cls.gerar_codigos(len(sem_codigo))):
+                cliente.code = code
+            return cls.objects.bulk_create(clientes, batch_size=batch_size)
 
     @classmethod
     def criar_de_usuario(cls, user):
@@ -195,22 +220,8 @@ class Cliente(models.Model):
         if hasattr(user, 'cliente'):
             return user.cliente
 
-        # Gerar código único
-        last_client = cls.objects.order_by('id').last()
-        if last_client:
-            try:
-                last_number = int(last_client.code.replace('CLI', ''))
-                new_number = last_number + 1
-            except:
-                new_number = 1
-        else:
-            new_number = 1
-
-        code = f'CLI{new_number:03d}'
-
         # Criar cliente básico
         cliente = cls.objects.create(
-            code=code,
             nom=user.last_name or 'Nome',
             prenom=user.first_name or '',
             email=user.email,
@@ -12,6 +12,10 @@ sys.path.insert(0, str(project_dir))
 def pytest_configure(config):
     """Configurar Django para os testes"""
     os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    # Logs de auditoria gravados na hora (os testes consultam logo após a ação)
+    os.environ.setdefault("AUDITORIA_ASSINCRONA", "False")
+    # Emails enviados na hora (mail.outbox), sem a fila de saída
+    os.environ.setdefault("EMAIL_OUTBOX_ATIVO", "False")
 
     try:
         django.setup()
@@ -87,6 +87,7 @@ MIDDLEWARE = [
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "allauth.account.middleware.AccountMiddleware",  # Adicionar esta linha
+    "orcamentos.middleware.AuditoriaMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -174,6 +175,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "orcamentos.context_processors.notificacoes",
             ],
         },
     },
@@ -236,6 +238,35 @@ STATICFILES_DIRS = [
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# PDFs de devis já renderizados (MEDIA_ROOT/cache_pdf), limitados em tamanho total
+PDF_CACHE_TAMANHO_MAXIMO = config("PDF_CACHE_TAMANHO_MAXIMO", default=200 * 1024 * 1024, cast=int)
+# Processos do comando exportar_documentos_pdf (0 = um por CPU); as exportações pelo painel não usam pool
+PDF_EXPORTACAO_PROCESSOS = config("PDF_EXPORTACAO_PROCESSOS", default=0, cast=int)
+
+# Cache da configuração (system_config/config_cache.py): segundos entre conferências da versão compartilhada
+SYSTEM_CONFIG_CACHE_VERIFICACAO = config("SYSTEM_CONFIG_CACHE_VERIFICACAO", default=5, cast=float)
+
+# Busca de produtos sem PostgreSQL (orcamentos/busca_produtos.py): segundos entre conferências da
+# versão do índice em memória
+PRODUTOS_BUSCA_VERIFICACAO = config("PRODUTOS_BUSCA_VERIFICACAO", default=5, cast=float)
+
+# Catálogo de cores da API nos-couleurs (home/catalogo_cores.py): segundos entre conferências da
+# versão do catálogo em memória
+COULEURS_CATALOGO_VERIFICACAO = config("COULEURS_CATALOGO_VERIFICACAO", default=5, cast=float)
+
+# Widgets dos dashboards administrativos (orcamentos/estatisticas.py): segundos em cache,
+# com exceções por widget, ex.: {"orfaos_vinculaveis": 300}
+DASHBOARD_CACHE_TTL = config("DASHBOARD_CACHE_TTL", default=60, cast=int)
+DASHBOARD_CACHE_TTL_WIDGETS = {}
+
+# Stream SSE de notificações (orcamentos/notificacao_views.py). Só ativar em deploy ASGI:
+# em WSGI cada aba prenderia um worker e o painel fica no polling com ETag
+NOTIFICACOES_SSE_ATIVO = config("NOTIFICACOES_SSE_ATIVO", default=False, cast=bool)
+# Segundos entre conferências da versão em cache e duração máxima de uma conexão
+# (o navegador reconecta sozinho)
+NOTIFICACOES_SSE_INTERVALO = config("NOTIFICACOES_SSE_INTERVALO", default=2.0, cast=float)
+NOTIFICACOES_SSE_DURACAO = config("NOTIFICACOES_SSE_DURACAO", default=300, cast=float)
+
 
 # Configurações para desenvolvimento
 if DEBUG:
@@ -283,6 +314,30 @@ DEFAULT_FROM_EMAIL = config(
 )
 SERVER_EMAIL = config("SERVER_EMAIL", default="contact@lopespeinture.fr")
 
+# Conexão SMTP reutilizada entre envios (uma por thread do worker):
+# fechada depois de EMAIL_SMTP_IDLE_TIMEOUT segundos parada e conferida com
+# NOOP quando parada há mais de EMAIL_SMTP_CHECK_AFTER segundos
+EMAIL_SMTP_IDLE_TIMEOUT = config("EMAIL_SMTP_IDLE_TIMEOUT", default=60, cast=float)
+EMAIL_SMTP_CHECK_AFTER = config("EMAIL_SMTP_CHECK_AFTER", default=5, cast=float)
+# Mensagens por chamada a send_messages() em send_many()
+EMAIL_BATCH_SIZE = config("EMAIL_BATCH_SIZE", default=50, cast=int)
+
+# Fila de saída (orcamentos/fila_emails.py): os emails são gravados no banco e
+# enviados pelo worker `python manage.py despachar_emails`. Só ativar com o worker
+# rodando (ver README, "Fila de emails"): sem ele nenhum email sai
+EMAIL_OUTBOX_ATIVO = config("EMAIL_OUTBOX_ATIVO", default=False, cast=bool)
+EMAIL_OUTBOX_INTERVALO = config("EMAIL_OUTBOX_INTERVALO", default=2.0, cast=float)
+EMAIL_OUTBOX_MAX_TENTATIVAS = config("EMAIL_OUTBOX_MAX_TENTATIVAS", default=8, cast=int)
+# Espera entre tentativas: base * 2^(tentativa-1) segundos, até o máximo
+EMAIL_OUTBOX_ESPERA_BASE = config("EMAIL_OUTBOX_ESPERA_BASE", default=30, cast=int)
+EMAIL_OUTBOX_ESPERA_MAXIMA = config("EMAIL_OUTBOX_ESPERA_MAXIMA", default=3600, cast=int)
+# Tempo em que um email reservado fica com o worker antes de voltar para a fila
+EMAIL_OUTBOX_RESERVA = config("EMAIL_OUTBOX_RESERVA", default=300, cast=int)
+
+# Campanhas de newsletter (blog/campanhas.py): emails por bloco e limite de taxa (0 = sem limite)
+NEWSLETTER_LOTE_TAMANHO = config("NEWSLETTER_LOTE_TAMANHO", default=200, cast=int)
+NEWSLETTER_MENSAGENS_POR_SEGUNDO = config("NEWSLETTER_MENSAGENS_POR_SEGUNDO", default=20, cast=float)
+
 # Emails de contato
 CONTACT_EMAIL = config("CONTACT_EMAIL", default="contact@lopespeinture.fr")
 QUOTES_EMAIL = config("QUOTES_EMAIL", default="devis@lopespeinture.fr")
@@ -339,6 +394,28 @@ LOGGING = {
     },
 }
 os.makedirs(BASE_DIR / 'logs', exist_ok=True)
+
+# Auditoria: logs gravados em lote por uma thread de fundo (orcamentos/auditoria_fila.py)
+AUDITORIA_ASSINCRONA = config("AUDITORIA_ASSINCRONA", default=True, cast=bool)
+AUDITORIA_LOTE_TAMANHO = config("AUDITORIA_LOTE_TAMANHO", default=200, cast=int)
+AUDITORIA_LOTE_INTERVALO = config("AUDITORIA_LOTE_INTERVALO", default=2.0, cast=float)
+# Logs que não puderam ser gravados no banco ficam aqui até serem reinseridos
+AUDITORIA_SPOOL_DIR = BASE_DIR / "logs" / "auditoria_spool"
+# Retenção: logs mais antigos vão para arquivos mensais .jsonl.gz (comando arquivar_logs_auditoria)
+AUDITORIA_RETENCAO_DIAS = config("AUDITORIA_RETENCAO_DIAS", default=365, cast=int)
+AUDITORIA_ARQUIVO_DIR = BASE_DIR / "logs" / "auditoria_arquivo"
+
+# Tarefas fora da requisição (orcamentos/tarefas.py), ex.: vincular os devis órfãos de um novo cadastro
+TAREFAS_ASSINCRONAS = config("TAREFAS_ASSINCRONAS", default=True, cast=bool)
+TAREFAS_TENTATIVAS = config("TAREFAS_TENTATIVAS", default=3, cast=int)
+# Espera antes da tentativa n: TAREFAS_ESPERA_BASE * 2^(n-1) segundos
+TAREFAS_ESPERA_BASE = config("TAREFAS_ESPERA_BASE", default=2.0, cast=float)
+
+# Notificações lidas há mais de N dias são removidas por `python manage.py limpar_notificacoes`
+# (com --arquivar, copiadas antes para NOTIFICACOES_ARQUIVO_DIR)
+NOTIFICACOES_RETENCAO_DIAS = config("NOTIFICACOES_RETENCAO_DIAS", default=90, cast=int)
+NOTIFICACOES_ARQUIVO_DIR = BASE_DIR / "logs" / "notificacoes_arquivo"
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -365,6 +442,15 @@ if "test" in sys.argv:
     # Usar diretório temporário para media nos testes
     MEDIA_ROOT = tempfile.mkdtemp()
 
+    # Auditoria síncrona: os testes consultam os logs logo após a ação
+    AUDITORIA_ASSINCRONA = False
+
+    # Emails enviados na hora (mail.outbox) em vez de ir para a fila de saída
+    EMAIL_OUTBOX_ATIVO = False
+
+    # Tarefas executadas na hora: os testes verificam a vinculação logo após o cadastro
+    TAREFAS_ASSINCRONAS = False
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 if config("DJANGO_ENV") == "production":
@@ -0,0 +1,183 @@
+"""
+Catálogo de cores servido por api_couleurs (página nos-couleurs)
+
+O catálogo das cores disponíveis é montado uma vez por versão: o JSON da
+resposta completa e o de cada categoria, já comprimidos com gzip, e um ETag
+calculado do conteúdo. Esse blob fica no cache compartilhado
+(`couleurs:catalogo:<versão>`), então só um processo vai ao banco a cada
+alteração; cada processo guarda uma cópia em memória e confere a versão no
+máximo a cada COULEURS_CATALOGO_VERIFICACAO segundos.
+
+Salvar ou apagar uma Couleur ou CategoriaColor troca a versão
+(`couleurs:catalogo:versao`) quando a transação é confirmada.
+
+O filtro por categoria e a busca (sem diferenciar maiúsculas nem acentos:
+"ecru" encontra "Écru") são feitos na cópia em memória. Como em
+system_config/config_cache.py, dentro de uma transação o catálogo é montado
+do banco, sem cache.
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+import time
+import unicodedata
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+
+from .models import CategoriaColor, Couleur
+
+CHAVE_VERSAO = 'couleurs:catalogo:versao'
+CHAVE_CATALOGO = 'couleurs:catalogo:{versao}'
+TEMPO_CACHE = 60 * 60 * 24
+TODAS = 'all'
+# Resultados de busca menores que isso vão sem compressão
+TAMANHO_MINIMO_GZIP = 1024
+
+_local = {'versao': None, 'verificado_em': None, 'catalogo': None}
+_lock = threading.Lock()
+
+
+def normalizar(texto):
+    """Minúsculas e sem acentos"""
+    texto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in texto if not unicodedata.combining(c)).casefold().strip()
+
+
+def _corpos(cores):
+    """(JSON, JSON com gzip) da resposta da API"""
+    corpo = json.dumps({'couleurs': cores}, ensure_ascii=False, separators=(',', ':')).encode()
+    # mtime fixo: o mesmo catálogo gera sempre os mesmos bytes
+    return corpo, gzip.compress(corpo, compresslevel=9, mtime=0)
+
+
+def montar():
+    """Blob do catálogo a partir do banco: cores, slugs, respostas prontas e ETag"""
+    cores, slugs = [], []
+    linhas = Couleur.objects.filter(disponible=True).values_list(
+        'nome', 'codigo', 'rgb_r', 'rgb_g', 'rgb_b', 'hex_color',
+        'categoria__nome', 'categoria__slug', 'description', 'populaire',
+    )
+    for nome, codigo, r, g, b, hex_color, categoria, slug, description, populaire in linhas:
+        cores.append({
+            'name': nome,
+            'code': codigo,
+            'rgb': f'rgb({r}, {g}, {b})',
+            'hex': hex_color,
+            'category': categoria,
+            'description': description,
+            'popular': populaire,
+        })
+        slugs.append(slug)
+
+    respostas = {TODAS: _corpos(cores)}
+    for slug in dict.fromkeys(slugs):
+        respostas[slug] = _corpos([cor for cor, s in zip(cores, slugs) if s == slug])
+
+    return {
+        'cores': cores,
+        'slugs': slugs,
+        'respostas': respostas,
+        'etag': f'W/"{hashlib.md5(respostas[TODAS][0], usedforsecurity=False).hexdigest()}"',
+    }
+
+
+class Catalogo:
+    """Cópia em memória do blob, com os textos de busca normalizados"""
+
+    def __init__(self, dados):
+        self.cores = dados['cores']
+        self.slugs = dados['slugs']
+        self.respostas = dados['respostas']
+        self.etag = dados['etag']
+        self.textos = [normalizar(f"{cor['name']} {cor['code']} {cor['category']}") for cor in self.cores]
+
+    def filtrar(self, categoria=TODAS, busca=''):
+        """Cores da categoria (slug ou 'all') cujo nome, código ou categoria contém a busca"""
+        busca = normalizar(busca)
+        return [
+            cor
+            for cor, slug, texto in zip(self.cores, self.slugs, self.textos)
+            if (categoria == TODAS or slug == categoria) and busca in texto
+        ]
+
+    def corpo(self, categoria=TODAS, busca=''):
+        """(JSON, JSON com gzip ou None) da resposta; sem busca, a resposta pré-calculada"""
+        categoria = categoria or TODAS
+        if not normalizar(busca):
+            if categoria in self.respostas:
+                return self.respostas[categoria]
+            # Categoria sem cores disponíveis (ou inexistente)
+            return _corpos([])
+
+        corpo = json.dumps(
+            {'couleurs': self.filtrar(categoria, busca)}, ensure_ascii=False, separators=(',', ':')
+        ).encode()
+        if len(corpo) < TAMANHO_MINIMO_GZIP:
+            return corpo, None
+        return corpo, gzip.compress(corpo, compresslevel=6)
+
+
+# ------------------------------------------------------------------ versão
+
+def versao_atual():
+    versao = cache.get(CHAVE_VERSAO)
+    if versao is None:
+        # Cache vazio (primeiro acesso ou reinício do Redis): criar uma versão
+        cache.add(CHAVE_VERSAO, uuid.uuid4().hex, None)
+        versao = cache.get(CHAVE_VERSAO)
+    return versao
+
+
+def invalidar():
+    """Nova versão: o catálogo será remontado no próximo acesso"""
+    cache.set(CHAVE_VERSAO, uuid.uuid4().hex, None)
+    _local.update(versao=None, verificado_em=None, catalogo=None)
+
+
+def _carregar(versao):
+    chave = CHAVE_CATALOGO.format(versao=versao)
+    dados = cache.get(chave)
+    if dados is None:
+        dados = montar()
+        cache.set(chave, dados, TEMPO_CACHE)
+    return Catalogo(dados)
+
+
+def catalogo():
+    """Catálogo do processo, recarregado quando a versão compartilhada muda"""
+    if connection.in_atomic_block:
+        return Catalogo(montar())
+
+    agora = time.monotonic()
+    intervalo = getattr(settings, 'COULEURS_CATALOGO_VERIFICACAO', 5)
+    if _local['catalogo'] is not None and agora - _local['verificado_em'] < intervalo:
+        return _local['catalogo']
+
+    versao = versao_atual()
+    if _local['catalogo'] is not None and versao == _local['versao']:
+        _local['verificado_em'] = agora
+        return _local['catalogo']
+
+    with _lock:
+        # Outra thread pode ter recarregado enquanto esta esperava
+        if _local['catalogo'] is None or _local['versao'] != versao:
+            _local.update(catalogo=_carregar(versao), versao=versao)
+        _local['verificado_em'] = agora
+        return _local['catalogo']
+
+
+def _invalidar_por_sinal(sender, **kwargs):
+    transaction.on_commit(invalidar)
+
+
+def conectar():
+    """Liga os sinais de invalidação (chamado em HomeConfig.ready)"""
+    for modelo in (Couleur, CategoriaColor):
+        post_save.connect(_invalidar_por_sinal, sender=modelo, dispatch_uid=f'catalogo_cores_save_{modelo.__name__}')
+        post_delete.connect(_invalidar_por_sinal, sender=modelo, dispatch_uid=f'catalogo_cores_delete_{modelo.__name__}')
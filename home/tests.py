@@ -1,3 +1,104 @@
-from django.test import TestCase
+import gzip
+import json
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from . import catalogo_cores
+from .models import CategoriaColor, Couleur
+
+
+def criar_catalogo():
+    blancs = CategoriaColor.objects.create(nome='Blancs', slug='blancs', ordem=1)
+    facade = CategoriaColor.objects.create(nome='Façade', slug='facade', ordem=2)
+    Couleur.objects.create(nome='Blanc pur', codigo='BL-01', categoria=blancs, rgb_r=255, rgb_g=255, rgb_b=255)
+    Couleur.objects.create(nome='Écru', codigo='BL-02', categoria=blancs, rgb_r=240, rgb_g=234, rgb_b=214, populaire=True)
+    Couleur.objects.create(nome='Ocre', codigo='FA-01', categoria=facade, rgb_r=204, rgb_g=119, rgb_b=34)
+    Couleur.objects.create(nome='Retirée', codigo='FA-02', categoria=facade, rgb_r=0, rgb_g=0, rgb_b=0, disponible=False)
+
+
+def nomes(response):
+    corpo = response.content
+    if response.get('Content-Encoding') == 'gzip':
+        corpo = gzip.decompress(corpo)
+    return [cor['name'] for cor in json.loads(corpo)['couleurs']]
+
+
+class ApiCouleursTestCase(TestCase):
+    """Filtros, compressão e ETag da API de cores"""
+
+    def setUp(self):
+        criar_catalogo()
+        self.url = reverse('home:api_nuancier')
+
+    def test_filtros(self):
+        self.assertEqual(nomes(self.client.get(self.url)), ['Blanc pur', 'Écru', 'Ocre'])
+        self.assertEqual(nomes(self.client.get(self.url, {'categoria': 'facade'})), ['Ocre'])
+        self.assertEqual(nomes(self.client.get(self.url, {'categoria': 'inexistante'})), [])
+
+        # Busca sem acentos no nome, no código e na categoria
+        self.assertEqual(nomes(self.client.get(self.url, {'search': 'ECRU'})), ['Écru'])
+        self.assertEqual(nomes(self.client.get(self.url, {'search': 'fa-'})), ['Ocre'])
+        self.assertEqual(nomes(self.client.get(self.url, {'search': 'façade'})), ['Ocre'])
+        self.assertEqual(nomes(self.client.get(self.url, {'search': 'blanc', 'categoria': 'facade'})), [])
+        print("✓ Filtro por categoria e busca sem acentos")
+
+    def test_formato(self):
+        [ecru] = json.loads(self.client.get(self.url, {'search': 'ecru'}).content)['couleurs']
+        self.assertEqual(ecru, {
+            'name': 'Écru', 'code': 'BL-02', 'rgb': 'rgb(240, 234, 214)', 'hex': '#f0ead6',
+            'category': 'Blancs', 'description': '', 'popular': True,
+        })
+        print("✓ Formato das cores mantido")
+
+    def test_gzip_e_etag(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(nomes(response), ['Blanc pur', 'Écru', 'Ocre'])
+
+        etag = response['ETag']
+        response = self.client.get(self.url, {'categoria': 'blancs'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Couleur.objects.create(nome='Bleu', codigo='FA-03', categoria=CategoriaColor.objects.get(slug='facade'),
+                               rgb_r=0, rgb_g=0, rgb_b=255)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        print("✓ Resposta comprimida e 304 com o mesmo ETag")
+
+
+class CatalogoCompartilhadoTestCase(TransactionTestCase):
+    """Catálogo em cache fora de transação, remontado após alterações"""
+
+    def setUp(self):
+        cache.clear()
+        catalogo_cores.invalidar()
+        self.addCleanup(cache.clear)
+        self.addCleanup(catalogo_cores.invalidar)
+        criar_catalogo()
+        self.url = reverse('home:api_nuancier')
+
+    def test_sem_banco_e_invalidacao(self):
+        self.assertEqual(nomes(self.client.get(self.url)), ['Blanc pur', 'Écru', 'Ocre'])
+
+        # Catálogo em memória: nem a busca nem o filtro vão ao banco
+        with self.assertNumQueries(0):
+            self.assertEqual(nomes(self.client.get(self.url, {'search': 'ocre'})), ['Ocre'])
+
+        # Outro processo (memória vazia) usa o blob do cache compartilhado
+        catalogo_cores._local.update(versao=None, verificado_em=None, catalogo=None)
+        with self.assertNumQueries(0):
+            self.assertEqual(nomes(self.client.get(self.url, {'categoria': 'blancs'})), ['Blanc pur', 'Écru'])
+
+        # Categoria renomeada: nova versão no commit e catálogo remontado
+        facade = CategoriaColor.objects.get(slug='facade')
+        facade.nome = 'Extérieur'
+        facade.save()
+        self.assertEqual(nomes(self.client.get(self.url, {'search': 'exterieur'})), ['Ocre'])
+
+        Couleur.objects.get(codigo='BL-01').delete()
+        self.assertEqual(nomes(self.client.get(self.url)), ['Écru', 'Ocre'])
+        print("✓ Catálogo servido da memória e remontado após alterações")
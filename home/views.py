@@ -1,9 +1,12 @@
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
 from projetos.models import Projeto
 from contato.models import Contato
 from django.db.models import Q
-from .models import CategoriaColor, Couleur
+from . import catalogo_cores
+from .models import CategoriaColor
 
 
 def home(request):
@@ -246,39 +249,25 @@ def nos_couleurs(request):
     return render(request, "pages/nos-couleurs.html", context)
 
 
+def _etag_couleurs(request):
+    return catalogo_cores.catalogo().etag
+
+
+@condition(etag_func=_etag_couleurs)
 def api_couleurs(request):
-    """API para buscar cores via AJAX"""
-    categoria_slug = request.GET.get("categoria", "all")
-    search = request.GET.get("search", "").lower()
-
-    # Base query
-    couleurs = Couleur.objects.filter(disponible=True).select_related("categoria")
-
-    # Filtrar por categoria
-    if categoria_slug != "all":
-        couleurs = couleurs.filter(categoria__slug=categoria_slug)
-
-    # Filtrar por busca
-    if search:
-        couleurs = couleurs.filter(
-            models.Q(nome__icontains=search)
-            | models.Q(codigo__icontains=search)
-            | models.Q(categoria__nome__icontains=search)
-        )
-
-    # Converter para JSON
-    data = []
-    for couleur in couleurs:
-        data.append(
-            {
-                "name": couleur.nome,
-                "code": couleur.codigo,
-                "rgb": couleur.rgb_string,
-                "hex": couleur.hex_color,
-                "category": couleur.categoria.nome,
-                "description": couleur.description,
-                "popular": couleur.populaire,
-            }
-        )
-
-    return JsonResponse({"couleurs": data})
+    """API para buscar cores via AJAX (catálogo pré-calculado em home/catalogo_cores.py)"""
+    corpo, corpo_gzip = catalogo_cores.catalogo().corpo(
+        request.GET.get("categoria", catalogo_cores.TODAS),
+        request.GET.get("search", ""),
+    )
+
+    if corpo_gzip is not None and "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", ""):
+        response = HttpResponse(corpo_gzip, content_type="application/json")
+        response["Content-Encoding"] = "gzip"
+    else:
+        response = HttpResponse(corpo, content_type="application/json")
+
+    patch_vary_headers(response, ["Accept-Encoding"])
+    # O navegador revalida sempre; com o mesmo ETag a resposta é um 304 sem corpo
+    patch_cache_control(response, no_cache=True)
+    return response
@@ -1,14 +1,16 @@
 from django.contrib import admin
 from django.urls import reverse
 from django.utils.html import format_html
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.contrib import messages
 from django.utils import timezone
 from .models import (
     Projeto, SolicitacaoOrcamento, Orcamento, ItemOrcamento, AnexoProjeto,
-    StatusOrcamento, StatusProjeto, Produto, Fornecedor, Notificacao
+    StatusOrcamento, StatusProjeto, Produto, Fornecedor, Notificacao,
+    EmailPendente, StatusEmail
 )
+from .contador_notificacoes import registrar_alteracao
 
 class AnexoProjetoInline(admin.TabularInline):
     model = AnexoProjeto
@@ -142,7 +144,7 @@ class SolicitacaoOrcamentoAdmin(admin.ModelAdmin):
 @admin.register(Orcamento)
 class OrcamentoAdmin(admin.ModelAdmin):
     list_display = [
-        'numero', 'solicitacao_numero', 'cliente_nome', 'total',
+        'numero', 'solicitacao_numero', 'cliente_nome', 'total', 'total_ttc', 'saldo',
         'status', 'data_elaboracao', 'data_envio'
     ]
     list_filter = [
@@ -154,6 +156,7 @@ class OrcamentoAdmin(admin.ModelAdmin):
     ]
     readonly_fields = [
         'numero', 'uuid', 'subtotal', 'valor_desconto', 'total',
+        'total_ttc', 'total_tva', 'total_acomptes_pagos', 'saldo',
         'data_elaboracao', 'data_envio', 'data_resposta_cliente'
     ]
 
@@ -165,7 +168,10 @@ class OrcamentoAdmin(admin.ModelAdmin):
             'fields': ('titulo', 'descricao')
         }),
         ('Valores', {
-            'fields': ('subtotal', 'desconto', 'valor_desconto', 'total'),
+            'fields': (
+                'subtotal', 'desconto', 'valor_desconto', 'total',
+                'total_tva', 'total_ttc', 'total_acomptes_pagos', 'saldo'
+            ),
             'classes': ('collapse',)
         }),
         ('Condições', {
@@ -221,15 +227,21 @@ class OrcamentoAdmin(admin.ModelAdmin):
     enviar_orcamento_action.short_description = "Marcar como enviados"
 
     def gerar_pdf_action(self, request, queryset):
-        """Action para gerar PDFs dos orçamentos"""
-        # Esta funcionalidade pode ser implementada posteriormente
-        self.message_user(
-            request,
-            "Funcionalidade de geração de PDF será implementada em breve.",
-            messages.INFO
+        """Action para baixar os PDFs dos orçamentos selecionados num ZIP"""
+        from .exportacao import ExportacaoDocumentos
+
+        orcamentos = queryset.select_related('solicitacao').order_by('numero')
+        # Sem pool de processos dentro do worker web
+        response = StreamingHttpResponse(
+            ExportacaoDocumentos(processos=1).zip_stream(devis=orcamentos.iterator(chunk_size=100)),
+            content_type='application/zip'
         )
+        response['Content-Disposition'] = (
+            f'attachment; filename="devis_{timezone.localdate():%Y%m%d}.zip"'
+        )
+        return response
 
-    gerar_pdf_action.short_description = "Gerar PDFs"
+    gerar_pdf_action.short_description = "Baixar PDFs (ZIP)"
 
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('solicitacao', 'elaborado_por')
@@ -361,6 +373,7 @@ class NotificacaoAdmin(admin.ModelAdmin):
     actions = ['marcar_como_lida', 'marcar_como_nao_lida']
 
     def marcar_como_lida(self, request, queryset):
+        registrar_alteracao(queryset.filter(lida=False).values_list('usuario_id', flat=True))
         updated = queryset.filter(lida=False).update(
             lida=True,
             read_at=timezone.now()
@@ -373,6 +386,7 @@ class NotificacaoAdmin(admin.ModelAdmin):
     marcar_como_lida.short_description = "Marcar como lidas"
 
     def marcar_como_nao_lida(self, request, queryset):
+        registrar_alteracao(queryset.filter(lida=True).values_list('usuario_id', flat=True))
         updated = queryset.filter(lida=True).update(
             lida=False,
             read_at=None
@@ -387,6 +401,28 @@ class NotificacaoAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('usuario')
 
+@admin.register(EmailPendente)
+class EmailPendenteAdmin(admin.ModelAdmin):
+    list_display = ['assunto', 'destinatarios', 'status', 'tentativas', 'proxima_tentativa', 'created_at', 'enviado_em']
+    list_filter = ['status', 'created_at']
+    search_fields = ['assunto', 'destinatarios']
+    readonly_fields = ['created_at', 'enviado_em', 'bloqueado_ate', 'ultimo_erro', 'tentativas']
+    actions = ['reenviar_agora']
+
+    def reenviar_agora(self, request, queryset):
+        updated = queryset.exclude(status=StatusEmail.ENVIADO).update(
+            status=StatusEmail.PENDENTE,
+            proxima_tentativa=timezone.now(),
+            bloqueado_ate=None,
+            tentativas=0
+        )
+        self.message_user(
+            request,
+            f'{updated} email(s) recolocado(s) na fila.',
+            messages.SUCCESS
+        )
+    reenviar_agora.short_description = "Recolocar na fila agora"
+
 # Customização do Admin Site
 admin.site.site_header = "LOPES PEINTURE - Administration"
 admin.site.site_title = "LOPES PEINTURE Admin"
@@ -8,3 +8,6 @@ class OrcamentosConfig(AppConfig):
     def ready(self):
         """Importar signals quando a aplicação estiver pronta"""
         import orcamentos.signals
+        from . import busca_produtos, estatisticas
+        estatisticas.conectar()
+        busca_produtos.conectar()
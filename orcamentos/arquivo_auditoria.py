@@ -0,0 +1,195 @@
+"""
+Arquivamento dos logs de auditoria antigos
+
+Os logs mais antigos que o período de retenção saem da tabela LogAuditoria
+e vão para arquivos JSONL comprimidos, um por mês (auditoria-AAAA-MM.jsonl.gz),
+na pasta AUDITORIA_ARQUIVO_DIR. A cópia é feita em lotes por chave primária
+(memória constante): cada lote é acrescentado aos arquivos do mês como um
+novo membro gzip e só depois apagado do banco. Se o processo cair entre as
+duas etapas, o lote é arquivado de novo na execução seguinte; a leitura
+descarta as linhas repetidas pelo id.
+
+O arquivo `limite.json` guarda até quando os logs foram arquivados, para que
+AuditoriaManager só abra os arquivos quando o período pedido for anterior a
+essa data. O resumo diário (EstatisticaAuditoriaDiaria) não é arquivado, e
+não é reconstruído para os dias cujos logs já saíram (total ou parcialmente)
+da tabela.
+"""
+
+import gzip
+import json
+import os
+from datetime import time, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .auditoria_fila import CAMPOS_SPOOL
+
+
+class ArquivoAuditoria:
+    """Leitura e escrita dos arquivos mensais de logs de auditoria"""
+
+    PADRAO_ARQUIVO = 'auditoria-{ano:04d}-{mes:02d}.jsonl.gz'
+
+    def __init__(self, pasta=None):
+        self.pasta = Path(
+            pasta or getattr(
+                settings, 'AUDITORIA_ARQUIVO_DIR', Path(settings.BASE_DIR) / 'logs' / 'auditoria_arquivo'
+            )
+        )
+
+    # ------------------------------------------------------------ arquivos
+
+    def caminho_mes(self, ano, mes):
+        return self.pasta / self.PADRAO_ARQUIVO.format(ano=ano, mes=mes)
+
+    def arquivos(self, inicio=None, fim=None):
+        """Arquivos mensais que cobrem o período, do mais recente ao mais antigo"""
+        if not self.pasta.is_dir():
+            return []
+
+        inicio = timezone.localtime(inicio) if inicio is not None else None
+        fim = timezone.localtime(fim) if fim is not None else None
+
+        selecionados = []
+        for arquivo in self.pasta.glob('auditoria-*.jsonl.gz'):
+            try:
+                ano, mes = (int(parte) for parte in arquivo.name[10:17].split('-'))
+            except ValueError:
+                continue
+            if inicio is not None and (ano, mes) < (inicio.year, inicio.month):
+                continue
+            if fim is not None and (ano, mes) > (fim.year, fim.month):
+                continue
+            selecionados.append(((ano, mes), arquivo))
+
+        return [arquivo for _, arquivo in sorted(selecionados, reverse=True)]
+
+    def arquivado_ate(self):
+        """Data limite do último arquivamento (logs anteriores só existem nos arquivos)"""
+        try:
+            with open(self.pasta / 'limite.json', encoding='utf-8') as f:
+                return parse_datetime(json.load(f)['arquivado_ate'])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def primeiro_dia_completo(self):
+        """Primeiro dia (data local) com todos os logs ainda na tabela; None sem arquivamento"""
+        limite = self.arquivado_ate()
+        if limite is None:
+            return None
+        limite = timezone.localtime(limite)
+        # Limite antes da meia-noite: parte daquele dia já está nos arquivos
+        if limite.time() != time.min:
+            return limite.date() + timedelta(days=1)
+        return limite.date()
+
+    def _registrar_limite(self, limite):
+        atual = self.arquivado_ate()
+        if atual is not None and atual >= limite:
+            return
+        temporario = self.pasta / 'limite.json.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump({'arquivado_ate': limite.isoformat()}, f)
+        os.replace(temporario, self.pasta / 'limite.json')
+
+    # ----------------------------------------------------------- escrita
+
+    def arquivar(self, antes_de, tamanho_lote=1000, simular=False):
+        """
+        Move para os arquivos os logs com timestamp anterior a `antes_de`.
+
+        Devolve {'logs': total, 'arquivos': {nome: quantidade}}.
+        """
+        from .auditoria import LogAuditoria
+
+        resultado = {'logs': 0, 'arquivos': {}}
+        pendentes = LogAuditoria.objects.filter(timestamp__lt=antes_de)
+
+        if simular:
+            for item in pendentes.order_by().values('timestamp'):
+                nome = self._nome_para(item['timestamp'])
+                resultado['arquivos'][nome] = resultado['arquivos'].get(nome, 0) + 1
+                resultado['logs'] += 1
+            return resultado
+
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        ultimo_id = 0
+        while True:
+            lote = list(
+                pendentes.filter(pk__gt=ultimo_id)
+                .order_by('pk')
+                .values('id', *CAMPOS_SPOOL)[:tamanho_lote]
+            )
+            if not lote:
+                break
+
+            por_arquivo = {}
+            for registro in lote:
+                por_arquivo.setdefault(self._nome_para(registro['timestamp']), []).append(registro)
+
+            for nome, registros in por_arquivo.items():
+                # 'ab': cada lote vira um novo membro gzip no arquivo do mês
+                with gzip.open(self.pasta / nome, 'ab') as f:
+                    for registro in registros:
+                        registro['timestamp'] = registro['timestamp'].isoformat()
+                        f.write((json.dumps(registro, cls=DjangoJSONEncoder) + '\n').encode('utf-8'))
+                resultado['arquivos'][nome] = resultado['arquivos'].get(nome, 0) + len(registros)
+
+            ids = [registro['id'] for registro in lote]
+            with transaction.atomic():
+                LogAuditoria.objects.filter(pk__in=ids).delete()
+
+            resultado['logs'] += len(lote)
+            ultimo_id = ids[-1]
+
+        if resultado['logs']:
+            self._registrar_limite(antes_de)
+        return resultado
+
+    def _nome_para(self, momento):
+        momento = timezone.localtime(momento)
+        return self.PADRAO_ARQUIVO.format(ano=momento.year, mes=momento.month)
+
+    # ------------------------------------------------------------ leitura
+
+    def buscar(self, inicio=None, fim=None, limite=None, **filtros):
+        """
+        Logs arquivados (instâncias não gravadas de LogAuditoria) que atendem aos
+        filtros de igualdade (ex.: content_type_id=..., object_id=..., usuario_id=...),
+        do mais recente ao mais antigo.
+        """
+        from .auditoria import LogAuditoria
+
+        encontrados = []
+        vistos = set()
+        for arquivo in self.arquivos(inicio, fim):
+            do_arquivo = []
+            with gzip.open(arquivo, 'rt', encoding='utf-8') as f:
+                for linha in f:
+                    if not linha.strip():
+                        continue
+                    registro = json.loads(linha)
+                    if any(registro.get(campo) != valor for campo, valor in filtros.items()):
+                        continue
+                    if registro['id'] in vistos:
+                        continue
+                    momento = parse_datetime(registro['timestamp'])
+                    if (inicio is not None and momento < inicio) or (fim is not None and momento >= fim):
+                        continue
+                    vistos.add(registro['id'])
+                    registro['timestamp'] = momento
+                    do_arquivo.append(LogAuditoria(**registro))
+
+            do_arquivo.sort(key=lambda log: log.timestamp, reverse=True)
+            encontrados.extend(do_arquivo)
+            # Arquivos em ordem decrescente de mês: o limite já foi atingido pelos mais recentes
+            if limite is not None and len(encontrados) >= limite:
+                return encontrados[:limite]
+
+        return encontrados
@@ -1,10 +1,13 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.utils import timezone
 import json
 
+from .auditoria_fila import auditoria_assincrona, escritor_auditoria
+from .contexto_auditoria import ContextoAuditoria, gerar_request_id, obter_requisicao_atual
+
 User = get_user_model()
 
 
@@ -23,6 +26,7 @@ class TipoAcao(models.TextChoices):
     DETECCAO_ORFAO = "deteccao_orfao", "Détection demande orpheline"
     PROCESSAMENTO_LOTE = "processamento_lote", "Traitement en lot"
     NOTIFICACAO_VINCULACAO = "notificacao_vinculacao", "Notification de liaison"
+    TAREFA_VINCULACAO = "tarefa_vinculacao", "Tâche de liaison différée"
     # NOVOS TIPOS PARA FATURAS
     CRIACAO_FATURA = "criacao_fatura", "Création de facture"
     ENVIO_FATURA = "envio_fatura", "Envoi de facture"
@@ -36,16 +40,19 @@ class TipoAcao(models.TextChoices):
 class LogAuditoria(models.Model):
     """Model para auditoria de alterações no sistema"""
 
-    # Identificação da ação
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Identificação da ação (timestamp = momento da ação, não da gravação em lote)
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
     usuario = models.ForeignKey(
         User,
         on_delete=models.SET_NULL,
         null=True,
         blank=True,
-        related_name='logs_auditoria'
+        related_name='logs_auditoria',
+        db_index=False  # coberto pelo índice (usuario, timestamp)
     )
     sessao_id = models.CharField(max_length=40, blank=True)
+    # Liga todos os logs gerados por uma mesma requisição
+    request_id = models.CharField(max_length=64, blank=True, db_index=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(blank=True)
 
@@ -93,10 +100,11 @@ class LogAuditoria(models.Model):
         ordering = ['-timestamp']
         indexes = [
             models.Index(fields=['timestamp']),
-            models.Index(fields=['usuario']),
             models.Index(fields=['acao']),
             models.Index(fields=['modulo']),
-            models.Index(fields=['content_type', 'object_id']),
+            # Caminhos de obter_historico_objeto e obter_atividades_usuario (filtro + ORDER BY timestamp)
+            models.Index(fields=['content_type', 'object_id', 'timestamp']),
+            models.Index(fields=['usuario', 'timestamp']),
         ]
 
     def __str__(self):
@@ -117,6 +125,125 @@ class LogAuditoria(models.Model):
 
         return "; ".join(resumo)
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+
+        # Log novo: gravar e contabilizar no resumo diário na mesma transação
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+            EstatisticaAuditoriaDiaria.contabilizar([self])
+
+
+class EstatisticaAuditoriaDiaria(models.Model):
+    """
+    Resumo diário dos logs de auditoria (dia x ação x módulo x usuário x modelo)
+
+    Mantido incrementalmente a cada log gravado (LogAuditoria.save e gravação
+    em lote do EscritorAuditoria); as estatísticas e relatórios leem daqui em
+    vez de varrer LogAuditoria. O comando consolidar_estatisticas_auditoria
+    reconstrói os dias a partir dos logs brutos.
+    """
+
+    data = models.DateField(verbose_name="Jour")
+    acao = models.CharField(max_length=30, choices=TipoAcao.choices, verbose_name="Action")
+    modulo = models.CharField(max_length=50, verbose_name="Module")
+    usuario = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='estatisticas_auditoria'
+    )
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    total = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Statistique d'audit journalière"
+        verbose_name_plural = "Statistiques d'audit journalières"
+        indexes = [
+            models.Index(fields=['data', 'acao']),
+        ]
+
+    def __str__(self):
+        return f"{self.data:%d/%m/%Y} - {self.get_acao_display()} - {self.total}"
+
+    @staticmethod
+    def chave_do_log(log):
+        """Bucket do log; o dia é o do fuso local (TIME_ZONE)"""
+        return (
+            timezone.localdate(log.timestamp),
+            log.acao,
+            log.modulo,
+            log.usuario_id,
+            log.content_type_id,
+        )
+
+    @classmethod
+    def contabilizar(cls, logs):
+        """Soma os logs aos contadores diários (um UPDATE por bucket distinto)"""
+        contagem = {}
+        for log in logs:
+            chave = cls.chave_do_log(log)
+            contagem[chave] = contagem.get(chave, 0) + 1
+
+        for (data, acao, modulo, usuario_id, content_type_id), quantidade in contagem.items():
+            filtro = {
+                'data': data,
+                'acao': acao,
+                'modulo': modulo,
+                'usuario_id': usuario_id,
+                'content_type_id': content_type_id,
+            }
+            atualizados = cls.objects.filter(**filtro).update(total=models.F('total') + quantidade)
+            if not atualizados:
+                # Corrida na criação só gera uma linha duplicada; as leituras sempre somam
+                cls.objects.create(total=quantidade, **filtro)
+
+    @classmethod
+    def reconstruir(cls, data_inicio, data_fim):
+        """Recalcula os buckets dos dias indicados a partir de LogAuditoria; devolve quantos foram gravados"""
+        from django.db.models.functions import TruncDate
+        from .arquivo_auditoria import ArquivoAuditoria
+
+        # Dias arquivados não estão mais (inteiros) na tabela: manter os buckets que já existem
+        primeiro_dia = ArquivoAuditoria().primeiro_dia_completo()
+        if primeiro_dia is not None and data_inicio < primeiro_dia:
+            data_inicio = primeiro_dia
+        if data_inicio > data_fim:
+            return 0
+
+        agregados = (
+            LogAuditoria.objects
+            .filter(timestamp__date__gte=data_inicio, timestamp__date__lte=data_fim)
+            .annotate(dia=TruncDate('timestamp'))
+            .order_by()
+            .values('dia', 'acao', 'modulo', 'usuario_id', 'content_type_id')
+            .annotate(soma=models.Count('id'))
+        )
+        buckets = [
+            cls(
+                data=item['dia'],
+                acao=item['acao'],
+                modulo=item['modulo'],
+                usuario_id=item['usuario_id'],
+                content_type_id=item['content_type_id'],
+                total=item['soma'],
+            )
+            for item in agregados
+        ]
+
+        with transaction.atomic():
+            cls.do_periodo(data_inicio, data_fim).delete()
+            cls.objects.bulk_create(buckets, batch_size=500)
+
+        return len(buckets)
+
+    @classmethod
+    def do_periodo(cls, data_inicio, data_fim):
+        """Buckets entre duas datas (inclusive)"""
+        return cls.objects.filter(data__gte=data_inicio, data__lte=data_fim)
+
 
 class AuditoriaManager:
     """Manager para facilitar o registro de logs de auditoria"""
@@ -154,25 +281,75 @@ class AuditoriaManager:
             funcionalidade: Nome da funcionalidade
         """
 
-        # Extrair metadados da requisição
-        ip_address = None
-        user_agent = ""
-        sessao_id = ""
+        log = AuditoriaManager._montar_log(
+            usuario=usuario,
+            acao=acao,
+            objeto=objeto,
+            descricao=descricao,
+            contexto=AuditoriaManager.obter_contexto(request),
+            dados_anteriores=dados_anteriores,
+            dados_posteriores=dados_posteriores,
+            campos_alterados=campos_alterados,
+            sucesso=sucesso,
+            erro_mensagem=erro_mensagem,
+            modulo=modulo,
+            funcionalidade=funcionalidade
+        )
+
+        if auditoria_assincrona():
+            # Gravação em lote fora da requisição, só se a transação da ação for confirmada
+            transaction.on_commit(lambda: escritor_auditoria.enfileirar(log))
+        else:
+            log.save()
 
-        if request:
-            ip_address = AuditoriaManager._get_client_ip(request)
-            user_agent = request.META.get('HTTP_USER_AGENT', '')[:500]
-            sessao_id = request.session.session_key or ""
+        return log
 
+    @staticmethod
+    def registrar_em_lote(logs):
+        """
+        Grava vários logs montados com _montar_log de uma vez (bulk_create)
+        em vez de um INSERT por log
+        """
+        if not logs:
+            return logs
+
+        if auditoria_assincrona():
+            def enfileirar():
+                for log in logs:
+                    escritor_auditoria.enfileirar(log)
+            transaction.on_commit(enfileirar)
+        else:
+            with transaction.atomic(savepoint=False):
+                LogAuditoria.objects.bulk_create(logs)
+                EstatisticaAuditoriaDiaria.contabilizar(logs)
+
+        return logs
+
+    @staticmethod
+    def _montar_log(
+        usuario,
+        acao,
+        objeto,
+        descricao,
+        contexto=None,
+        dados_anteriores=None,
+        dados_posteriores=None,
+        campos_alterados=None,
+        sucesso=True,
+        erro_mensagem="",
+        modulo="orcamentos",
+        funcionalidade=""
+    ):
+        """LogAuditoria ainda não gravado; `contexto` vem de obter_contexto"""
         # Determinar o tipo de conteúdo
         content_type = ContentType.objects.get_for_model(objeto)
 
-        # Criar log
-        log = LogAuditoria.objects.create(
+        return LogAuditoria(
             usuario=usuario,
-            sessao_id=sessao_id,
-            ip_address=ip_address,
-            user_agent=user_agent,
+            sessao_id=contexto.sessao_id if contexto else "",
+            request_id=contexto.request_id if contexto else "",
+            ip_address=contexto.ip_address if contexto else None,
+            user_agent=contexto.user_agent if contexto else "",
             acao=acao,
             descricao=descricao,
             content_type=content_type,
@@ -186,7 +363,37 @@ class AuditoriaManager:
             erro_mensagem=erro_mensagem
         )
 
-        return log
+    @staticmethod
+    def obter_contexto(request=None):
+        """
+        Contexto de auditoria de `request` ou da requisição atual (AuditoriaMiddleware).
+
+        Calculado na primeira ação auditada e guardado na própria requisição;
+        None fora de uma requisição (comandos de gerenciamento, tarefas).
+        """
+        if request is None:
+            request = obter_requisicao_atual()
+            if request is None:
+                return None
+
+        contexto = vars(request).get('_contexto_auditoria')
+        if contexto is None:
+            sessao = getattr(request, 'session', None)
+            usuario = getattr(request, 'user', None)
+            contexto = ContextoAuditoria(
+                request_id=vars(request).get('request_id') or gerar_request_id(request),
+                ip_address=AuditoriaManager._get_client_ip(request),
+                user_agent=request.META.get('HTTP_USER_AGENT', '')[:500],
+                sessao_id=(sessao.session_key or "") if sessao is not None else "",
+                usuario_id=usuario.pk if usuario is not None and usuario.is_authenticated else None
+            )
+            request._contexto_auditoria = contexto
+        return contexto
+
+    @staticmethod
+    def obter_logs_requisicao(request_id):
+        """Todos os logs gravados durante uma requisição, em ordem cronológica"""
+        return LogAuditoria.objects.filter(request_id=request_id).order_by('timestamp')
 
     @staticmethod
     def _get_client_ip(request):
@@ -304,28 +511,60 @@ class AuditoriaManager:
         )
 
     @staticmethod
-    def obter_historico_objeto(objeto, limit=50):
-        """Obtém histórico de alterações de um objeto"""
+    def obter_historico_objeto(objeto, limit=50, desde=None):
+        """
+        Obtém histórico de alterações de um objeto
+
+        Com `desde` anterior ao último arquivamento, completa o resultado com
+        os logs dos arquivos comprimidos (devolve então uma lista).
+        """
         content_type = ContentType.objects.get_for_model(objeto)
 
-        return LogAuditoria.objects.filter(
+        logs = LogAuditoria.objects.filter(
             content_type=content_type,
             object_id=objeto.pk
-        ).order_by('-timestamp')[:limit]
+        ).order_by('-timestamp')
+        if desde is not None:
+            logs = logs.filter(timestamp__gte=desde)
+
+        return AuditoriaManager._completar_com_arquivo(
+            logs, desde, limit, content_type_id=content_type.pk, object_id=objeto.pk
+        )
 
     @staticmethod
     def obter_atividades_usuario(usuario, dias=30, limit=100):
-        """Obtém atividades recentes de um usuário"""
+        """Obtém atividades recentes de um usuário (inclui logs arquivados se o período for antigo)"""
         data_limite = timezone.now() - timezone.timedelta(days=dias)
 
-        return LogAuditoria.objects.filter(
+        logs = LogAuditoria.objects.filter(
             usuario=usuario,
             timestamp__gte=data_limite
-        ).order_by('-timestamp')[:limit]
+        ).order_by('-timestamp')
+
+        return AuditoriaManager._completar_com_arquivo(
+            logs, data_limite, limit, usuario_id=usuario.pk
+        )
+
+    @staticmethod
+    def _completar_com_arquivo(logs, desde, limit, **filtros):
+        """Logs da tabela e, se o período começa antes do arquivamento, dos arquivos"""
+        from .arquivo_auditoria import ArquivoAuditoria
+
+        arquivo = ArquivoAuditoria()
+        arquivado_ate = arquivo.arquivado_ate() if desde is not None else None
+        if arquivado_ate is None or desde >= arquivado_ate:
+            return logs[:limit]
+
+        recentes = list(logs[:limit])
+        if len(recentes) < limit:
+            recentes.extend(arquivo.buscar(
+                inicio=desde, fim=arquivado_ate, limite=limit - len(recentes), **filtros
+            ))
+        return recentes
 
     @staticmethod
     def obter_estatisticas_periodo(data_inicio, data_fim):
-        """Obtém estatísticas de atividades em um período"""
+        """Obtém estatísticas de atividades em um período (dias completos, lidos do resumo diário)"""
         # Tornar o intervalo robusto: incluir ações até o momento atual quando data_fim
         # foi calculado antes da criação dos logs durante o teste
         now = timezone.now()
@@ -337,13 +576,13 @@ class AuditoriaManager:
         if inicio > fim:
             inicio, fim = fim, inicio  # garantir ordem válida
 
-        logs = LogAuditoria.objects.filter(
-            timestamp__gte=inicio,
-            timestamp__lte=fim
+        # Lido do resumo diário: o custo depende do número de dias, não de logs
+        buckets = EstatisticaAuditoriaDiaria.do_periodo(
+            AuditoriaManager._data_local(inicio), AuditoriaManager._data_local(fim)
         )
 
         estatisticas = {
-            'total_acoes': logs.count(),
+            'total_acoes': buckets.aggregate(total=models.Sum('total'))['total'] or 0,
             'acoes_por_tipo': {},
             'usuarios_mais_ativos': {},
             'modulos_mais_usados': {},
@@ -351,35 +590,67 @@ class AuditoriaManager:
         }
 
         # Contar ações por tipo
-        for acao, nome in TipoAcao.choices:
-            count = logs.filter(acao=acao).count()
-            if count > 0:
-                estatisticas['acoes_por_tipo'][nome] = count
+        for item in buckets.values('acao').annotate(soma=models.Sum('total')).order_by('-soma'):
+            estatisticas['acoes_por_tipo'][TipoAcao(item['acao']).label] = item['soma']
 
         # Usuários mais ativos
-        usuarios_count = logs.values('usuario__first_name', 'usuario__last_name').annotate(
-            total=models.Count('id')
-        ).order_by('-total')[:10]
+        usuarios_count = buckets.values('usuario__first_name', 'usuario__last_name').annotate(
+            soma=models.Sum('total')
+        ).order_by('-soma')[:10]
 
         for usuario in usuarios_count:
             nome = f"{usuario['usuario__first_name']} {usuario['usuario__last_name']}"
-            estatisticas['usuarios_mais_ativos'][nome] = usuario['total']
+            estatisticas['usuarios_mais_ativos'][nome] = usuario['soma']
 
         # Módulos mais usados
-        modulos_count = logs.values('modulo').annotate(
-            total=models.Count('id')
-        ).order_by('-total')
+        modulos_count = buckets.values('modulo').annotate(
+            soma=models.Sum('total')
+        ).order_by('-soma')
 
         for modulo in modulos_count:
-            estatisticas['modulos_mais_usados'][modulo['modulo']] = modulo['total']
+            estatisticas['modulos_mais_usados'][modulo['modulo']] = modulo['soma']
+
+        # Ações por dia
+        for dia in buckets.values('data').annotate(soma=models.Sum('total')).order_by('data'):
+            estatisticas['acoes_por_dia'][dia['data'].isoformat()] = dia['soma']
 
         return estatisticas
 
+    @staticmethod
+    def _data_local(valor):
+        """Dia (fuso local) de um datetime ou date"""
+        if not hasattr(valor, 'hour'):
+            return valor
+        if timezone.is_naive(valor):
+            valor = timezone.make_aware(valor)
+        return timezone.localdate(valor)
+
     # ============ MÉTODOS ESPECÍFICOS PARA ORÇAMENTOS ÓRFÃOS ============
 
     @staticmethod
     def registrar_vinculacao_orcamento_orfao(usuario, solicitacao, request=None, origem="manual"):
         """Registra vinculação de orçamento órfão a um usuário"""
+        log = AuditoriaManager._log_vinculacao_orfao(
+            usuario, solicitacao, AuditoriaManager.obter_contexto(request), origem
+        )
+        return AuditoriaManager.registrar_em_lote([log])[0]
+
+    @staticmethod
+    def registrar_vinculacoes_orfaos_em_lote(vinculacoes, request=None, origem="manual"):
+        """
+        Registra de uma vez as vinculações de um lote de orçamentos órfãos
+
+        Args:
+            vinculacoes: Lista de pares (usuario, solicitacao)
+        """
+        contexto = AuditoriaManager.obter_contexto(request)
+        return AuditoriaManager.registrar_em_lote([
+            AuditoriaManager._log_vinculacao_orfao(usuario, solicitacao, contexto, origem)
+            for usuario, solicitacao in vinculacoes
+        ])
+
+    @staticmethod
+    def _log_vinculacao_orfao(usuario, solicitacao, contexto, origem):
         dados_anteriores = {'cliente': None, 'email_solicitante': solicitacao.email_solicitante}
         dados_posteriores = {
             'cliente': usuario.id if usuario else None,
@@ -394,12 +665,12 @@ class AuditoriaManager:
             }
         }
 
-        return AuditoriaManager.registrar_acao(
+        return AuditoriaManager._montar_log(
             usuario=usuario,
             acao=TipoAcao.VINCULACAO_ORFAO,
             objeto=solicitacao,
             descricao=f"Liaison automatique de la demande orpheline {solicitacao.numero} à l'utilisateur {usuario.get_full_name() if usuario else 'Unknown'} - Origine: {origem}",
-            request=request,
+            contexto=contexto,
             dados_anteriores=dados_anteriores,
             dados_posteriores=dados_posteriores,
             campos_alterados=campos_alterados,
@@ -477,6 +748,34 @@ class AuditoriaManager:
             funcionalidade="Notification système"
         )
 
+    @staticmethod
+    def registrar_tarefa_vinculacao(usuario, resultado, erro=None, tentativas=1, metodo="signal_cadastro"):
+        """Registra o resultado da vinculação executada em segundo plano após o cadastro"""
+        resultado = resultado or {}
+        dados_tarefa = {
+            'metodo': metodo,
+            'tentativas': tentativas,
+            'orfas_encontradas': resultado.get('encontradas', 0),
+            'orfas_vinculadas': resultado.get('vinculadas', 0),
+            'data_execucao': timezone.now().isoformat()
+        }
+
+        if erro is None:
+            descricao = f"Tâche de liaison terminée: {dados_tarefa['orfas_vinculadas']} demande(s) liée(s) à {usuario.email} ({tentativas} tentative(s))"
+        else:
+            descricao = f"Échec de la tâche de liaison pour {usuario.email} après {tentativas} tentative(s)"
+
+        return AuditoriaManager.registrar_acao(
+            usuario=None,  # Executada pelo sistema
+            acao=TipoAcao.TAREFA_VINCULACAO,
+            objeto=usuario,
+            descricao=descricao,
+            dados_posteriores=dados_tarefa,
+            sucesso=erro is None,
+            erro_mensagem=str(erro) if erro is not None else "",
+            funcionalidade="Tâche différée"
+        )
+
     @staticmethod
     def registrar_mudanca_status_projeto(usuario, projeto, status_anterior, status_novo, request=None):
         """Registra mudança de status de projeto"""
@@ -0,0 +1,205 @@
+"""
+Gravação assíncrona dos logs de auditoria
+
+AuditoriaManager.registrar_acao monta o LogAuditoria na requisição e o
+entrega ao EscritorAuditoria, que acumula os registros numa fila em memória
+e os grava com bulk_create numa thread de fundo (por lote cheio ou a cada
+intervalo). Se o banco estiver indisponível, o lote vai para um arquivo
+JSONL na pasta de spool e é reinserido no próximo lote bem-sucedido (ou
+pelo comando reprocessar_spool_auditoria).
+
+Com AUDITORIA_ASSINCRONA = False (padrão nos testes) o log é gravado na hora.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+# Campos persistidos no spool (na ordem do model)
+CAMPOS_SPOOL = [
+    'timestamp', 'usuario_id', 'sessao_id', 'request_id', 'ip_address', 'user_agent',
+    'acao', 'descricao', 'content_type_id', 'object_id',
+    'dados_anteriores', 'dados_posteriores', 'campos_alterados',
+    'modulo', 'funcionalidade', 'sucesso', 'erro_mensagem',
+]
+
+
+def auditoria_assincrona():
+    return getattr(settings, 'AUDITORIA_ASSINCRONA', False)
+
+
+class EscritorAuditoria:
+    """Fila em memória + thread de fundo que grava os logs em lote"""
+
+    def __init__(self, tamanho_lote=None, intervalo=None, pasta_spool=None, tamanho_fila=10000):
+        self.tamanho_lote = tamanho_lote or getattr(settings, 'AUDITORIA_LOTE_TAMANHO', 200)
+        self.intervalo = intervalo or getattr(settings, 'AUDITORIA_LOTE_INTERVALO', 2.0)
+        self.pasta_spool = Path(
+            pasta_spool or getattr(
+                settings, 'AUDITORIA_SPOOL_DIR', Path(settings.BASE_DIR) / 'logs' / 'auditoria_spool'
+            )
+        )
+        self._fila = queue.Queue(maxsize=tamanho_fila)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    # ------------------------------------------------------------------ fila
+
+    def enfileirar(self, log):
+        """Entrega um LogAuditoria (ainda não gravado) para gravação em lote"""
+        self._garantir_thread()
+        try:
+            self._fila.put_nowait(log)
+        except queue.Full:
+            # Fila cheia: gravar direto em vez de perder o registro
+            logger.warning("Fila de auditoria cheia, gravando log de forma síncrona")
+            self._gravar_lote([log])
+
+    def descarregar(self):
+        """Grava imediatamente tudo o que estiver na fila (usado no encerramento)"""
+        lote = self._retirar_pendentes()
+        if lote:
+            self._gravar_lote(lote)
+
+    def _garantir_thread(self):
+        # Após um fork (gunicorn, multiprocessing) a thread do processo pai não existe no filho
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            if self._pid != os.getpid():
+                self._fila = queue.Queue(maxsize=self._fila.maxsize)
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._executar, name='escritor-auditoria', daemon=True
+            )
+            self._thread.start()
+
+    def _retirar_pendentes(self):
+        lote = []
+        while True:
+            try:
+                lote.append(self._fila.get_nowait())
+            except queue.Empty:
+                break
+        return lote
+
+    def _executar(self):
+        while True:
+            primeiro = self._fila.get()
+
+            # Esperar o lote encher ou o intervalo acabar
+            lote = [primeiro]
+            limite = time.monotonic() + self.intervalo
+            while len(lote) < self.tamanho_lote:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(self._fila.get(timeout=restante))
+                except queue.Empty:
+                    break
+
+            try:
+                self._gravar_lote(lote)
+            except Exception:
+                logger.exception(f"Erro inesperado ao gravar {len(lote)} logs de auditoria")
+            finally:
+                # A thread tem a sua própria conexão; não deixá-la aberta entre lotes
+                connection.close()
+
+    # --------------------------------------------------------------- gravação
+
+    def _gravar_lote(self, lote):
+        try:
+            self._inserir(lote)
+        except DatabaseError as e:
+            logger.error(f"Banco indisponível para auditoria ({e}); {len(lote)} logs enviados ao spool")
+            self._gravar_spool(lote)
+            return False
+
+        if self._existe_spool():
+            self.reprocessar_spool()
+        return True
+
+    # ------------------------------------------------------------------ spool
+
+    def _gravar_spool(self, lote):
+        try:
+            self.pasta_spool.mkdir(parents=True, exist_ok=True)
+            arquivo = self.pasta_spool / f"auditoria-{timezone.now():%Y%m%d}-{os.getpid()}.jsonl"
+            with open(arquivo, 'a', encoding='utf-8') as f:
+                for log in lote:
+                    registro = {campo: getattr(log, campo) for campo in CAMPOS_SPOOL}
+                    # isoformat completo (o DjangoJSONEncoder corta os microssegundos)
+                    registro['timestamp'] = log.timestamp.isoformat()
+                    f.write(json.dumps(registro, cls=DjangoJSONEncoder) + '\n')
+        except OSError as e:
+            logger.error(f"Falha ao gravar spool de auditoria: {e}")
+
+    def _existe_spool(self):
+        return self.pasta_spool.is_dir() and any(self.pasta_spool.glob('*.jsonl'))
+
+    def reprocessar_spool(self):
+        """Reinsere no banco os logs guardados no spool; devolve quantos foram gravados"""
+        from .auditoria import LogAuditoria
+
+        if not self.pasta_spool.is_dir():
+            return 0
+
+        total = 0
+        for arquivo in sorted(self.pasta_spool.glob('*.jsonl')):
+            # Renomear primeiro para que outro processo não reprocesse o mesmo arquivo
+            em_processamento = arquivo.with_suffix('.processando')
+            try:
+                os.rename(arquivo, em_processamento)
+            except OSError:
+                continue
+
+            with open(em_processamento, encoding='utf-8') as f:
+                logs = [self._log_do_spool(LogAuditoria, json.loads(linha)) for linha in f if linha.strip()]
+
+            try:
+                self._inserir(logs)
+            except DatabaseError as e:
+                logger.error(f"Spool de auditoria mantido ({arquivo.name}): {e}")
+                os.rename(em_processamento, arquivo)
+                break
+
+            os.remove(em_processamento)
+            total += len(logs)
+
+        return total
+
+    def _inserir(self, logs):
+        """Insere o lote e atualiza o resumo diário na mesma transação"""
+        from .auditoria import EstatisticaAuditoriaDiaria, LogAuditoria
+
+        with transaction.atomic():
+            LogAuditoria.objects.bulk_create(logs, batch_size=self.tamanho_lote)
+            EstatisticaAuditoriaDiaria.contabilizar(logs)
+
+    @staticmethod
+    def _log_do_spool(modelo, registro):
+        registro['timestamp'] = parse_datetime(registro['timestamp'])
+        return modelo(**registro)
+
+
+escritor_auditoria = EscritorAuditoria()
+atexit.register(escritor_auditoria.descarregar)
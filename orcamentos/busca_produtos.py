@@ -0,0 +1,262 @@
+"""
+Busca de produtos do editor de devis/factures
+
+A consulta e os textos são normalizados (minúsculas, sem acentos: "peinture
+écaillée" encontra "PEINTURE ECAILLEE") e quebrados em termos; um produto
+ativo aparece quando contém todos os termos. Os resultados vêm ordenados:
+referência igual à consulta, referência que começa por ela, produtos em que
+todos os termos são início de palavra e, por fim, os demais.
+
+Dois caminhos, sem varrer a tabela com icontains:
+
+* PostgreSQL com pg_trgm e unaccent (migração 0014): índice GIN de
+  trigramas sobre produto_texto_busca(referencia, descricao), usado pelos
+  LIKE '%termo%'; empates ordenados por similarity().
+* Outros bancos (SQLite): índice em memória dos produtos ativos, por
+  processo — inícios de palavra e trigramas das palavras (termos de 1 ou 2
+  letras só casam com início de palavra). Salvar ou apagar um Produto troca
+  a versão compartilhada (`produtos:busca:versao`) quando a transação é
+  confirmada;
+  cada processo confere a versão no máximo a cada PRODUTOS_BUSCA_VERIFICACAO
+  segundos e reconstrói o índice quando ela muda.
+
+Como em system_config/config_cache.py, buscas feitas dentro de uma
+transação não usam o índice em memória (vão ao banco com icontains).
+"""
+
+import heapq
+import re
+import threading
+import time
+import unicodedata
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Case, CharField, F, FloatField, Func, IntegerField, Q, Value, When
+from django.db.models.signals import post_delete, post_save
+
+from .models import Produto
+
+CHAVE_VERSAO = 'produtos:busca:versao'
+FUNCAO_POSTGRES = 'produto_texto_busca'
+
+# Ligaduras que a decomposição Unicode não separa (a extensão unaccent as trata)
+_LIGADURAS = str.maketrans({'œ': 'oe', 'æ': 'ae', 'Œ': 'oe', 'Æ': 'ae'})
+_TERMO = re.compile(r'\w+')
+
+_local = {'versao': None, 'verificado_em': None, 'indice': None}
+_lock = threading.Lock()
+_postgres = {}
+
+
+def normalizar(texto):
+    """Minúsculas, sem acentos e com espaços simples"""
+    texto = unicodedata.normalize('NFKD', (texto or '').translate(_LIGADURAS))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(texto.casefold().split())
+
+
+def termos(texto):
+    return _TERMO.findall(normalizar(texto))
+
+
+def _trigramas(palavra):
+    return {palavra[i:i + 3] for i in range(len(palavra) - 2)}
+
+
+class IndiceProdutos:
+    """
+    Índice em memória dos produtos ativos
+
+    `prefixos` leva cada início de palavra aos produtos, `trigramas` leva os
+    trigramas das palavras (candidatos para termos que aparecem no meio de
+    uma palavra) e `prefixos_referencia` os inícios da referência. A busca
+    é feita com operações de conjuntos; só os candidatos de trigramas que
+    não são início de palavra são conferidos no texto.
+    """
+
+    def __init__(self, linhas):
+        """`linhas`: iterável de (id, referencia, descricao)"""
+        self.referencias = {}
+        self.textos = {}
+        self.trigramas = defaultdict(set)
+        self.prefixos = defaultdict(set)
+        self.prefixos_referencia = defaultdict(set)
+
+        for pk, referencia, descricao in linhas:
+            referencia = normalizar(referencia)
+            texto = f"{referencia} {normalizar(descricao)}"
+            self.referencias[pk] = referencia
+            self.textos[pk] = texto
+            for palavra in set(_TERMO.findall(texto)):
+                for trigrama in _trigramas(palavra):
+                    self.trigramas[trigrama].add(pk)
+                for tamanho in range(1, len(palavra) + 1):
+                    self.prefixos[palavra[:tamanho]].add(pk)
+            for tamanho in range(1, len(referencia) + 1):
+                self.prefixos_referencia[referencia[:tamanho]].add(pk)
+
+    @classmethod
+    def carregar(cls):
+        return cls(Produto.objects.filter(ativo=True).values_list('pk', 'referencia', 'descricao').iterator())
+
+    def _contendo(self, termo, inicio_de_palavra):
+        """Produtos com o termo em qualquer trecho de palavra (termos curtos: só no início)"""
+        if len(termo) < 3:
+            return inicio_de_palavra
+        conjuntos = sorted((self.trigramas.get(t, set()) for t in _trigramas(termo)), key=len)
+        candidatos = set.intersection(*conjuntos) - inicio_de_palavra
+        return inicio_de_palavra | {pk for pk in candidatos if termo in self.textos[pk]}
+
+    def buscar(self, consulta, limite=10):
+        """Ids dos produtos que contêm todos os termos, do mais para o menos relevante"""
+        lista_termos = termos(consulta)
+        if not lista_termos:
+            return []
+
+        encontrados = inicio_de_palavra = None
+        for termo in sorted(set(lista_termos), key=len, reverse=True):
+            prefixo = self.prefixos.get(termo, set())
+            contendo = self._contendo(termo, prefixo)
+            encontrados = contendo if encontrados is None else encontrados & contendo
+            inicio_de_palavra = prefixo if inicio_de_palavra is None else inicio_de_palavra & prefixo
+            if not encontrados:
+                return []
+
+        # Grupos por relevância; dentro de cada um, ordem da referência
+        consulta_normalizada = normalizar(consulta)
+        referencia_comeca = self.prefixos_referencia.get(consulta_normalizada, set()) & encontrados
+        referencia_igual = {pk for pk in referencia_comeca if self.referencias[pk] == consulta_normalizada}
+        grupos = [
+            referencia_igual,
+            referencia_comeca - referencia_igual,
+            inicio_de_palavra - referencia_comeca,
+            encontrados - inicio_de_palavra - referencia_comeca,
+        ]
+
+        resultado = []
+        for grupo in grupos:
+            resultado += heapq.nsmallest(limite - len(resultado), grupo, key=self.referencias.__getitem__)
+            if len(resultado) >= limite:
+                break
+        return resultado
+
+
+# ------------------------------------------------------------------ versão
+
+def versao_atual():
+    versao = cache.get(CHAVE_VERSAO)
+    if versao is None:
+        # Cache vazio (primeiro acesso ou reinício do Redis): criar uma versão
+        cache.add(CHAVE_VERSAO, uuid.uuid4().hex, None)
+        versao = cache.get(CHAVE_VERSAO)
+    return versao
+
+
+def invalidar():
+    """Nova versão: os índices em memória serão reconstruídos na próxima busca"""
+    cache.set(CHAVE_VERSAO, uuid.uuid4().hex, None)
+    _local.update(versao=None, verificado_em=None, indice=None)
+
+
+def indice():
+    """Índice do processo, reconstruído quando a versão compartilhada muda"""
+    agora = time.monotonic()
+    intervalo = getattr(settings, 'PRODUTOS_BUSCA_VERIFICACAO', 5)
+    if _local['indice'] is not None and agora - _local['verificado_em'] < intervalo:
+        return _local['indice']
+
+    versao = versao_atual()
+    if _local['indice'] is not None and versao == _local['versao']:
+        _local['verificado_em'] = agora
+        return _local['indice']
+
+    with _lock:
+        # Outra thread pode ter reconstruído enquanto esta esperava
+        if _local['indice'] is None or _local['versao'] != versao:
+            _local.update(indice=IndiceProdutos.carregar(), versao=versao)
+        _local['verificado_em'] = agora
+        return _local['indice']
+
+
+def _invalidar_por_sinal(sender, **kwargs):
+    transaction.on_commit(invalidar)
+
+
+def conectar():
+    """Liga os sinais de invalidação (chamado em OrcamentosConfig.ready)"""
+    post_save.connect(_invalidar_por_sinal, sender=Produto, dispatch_uid='busca_produtos_save')
+    post_delete.connect(_invalidar_por_sinal, sender=Produto, dispatch_uid='busca_produtos_delete')
+
+
+# ------------------------------------------------------------------ busca
+
+def trigramas_postgres():
+    """True quando o banco tem a função e o índice de trigramas da migração 0014"""
+    if connection.vendor != 'postgresql':
+        return False
+    if connection.alias not in _postgres:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regprocedure(%s) IS NOT NULL", [f'{FUNCAO_POSTGRES}(text,text)'])
+            _postgres[connection.alias] = cursor.fetchone()[0]
+    return _postgres[connection.alias]
+
+
+def _prioridade_referencia(consulta):
+    return Case(
+        When(referencia__iexact=consulta, then=Value(0)),
+        When(referencia__istartswith=consulta, then=Value(1)),
+        default=Value(2),
+        output_field=IntegerField(),
+    )
+
+
+def _buscar_postgres(consulta, lista_termos, limite):
+    texto = Func(F('referencia'), F('descricao'), function=FUNCAO_POSTGRES, output_field=CharField())
+    produtos = Produto.objects.filter(ativo=True).annotate(texto_busca=texto)
+    for termo in lista_termos:
+        produtos = produtos.filter(texto_busca__contains=termo)
+    return list(
+        produtos.annotate(
+            prioridade=_prioridade_referencia(consulta),
+            similaridade=Func(
+                F('texto_busca'), Value(normalizar(consulta)), function='similarity', output_field=FloatField()
+            ),
+        )
+        .select_related('fornecedor')
+        .order_by('prioridade', '-similaridade', 'referencia')[:limite]
+    )
+
+
+def _buscar_icontains(consulta, limite):
+    filtro = Q()
+    for termo in consulta.split():
+        filtro &= Q(referencia__icontains=termo) | Q(descricao__icontains=termo)
+    return list(
+        Produto.objects.filter(filtro, ativo=True)
+        .annotate(prioridade=_prioridade_referencia(consulta))
+        .select_related('fornecedor')
+        .order_by('prioridade', 'referencia')[:limite]
+    )
+
+
+def buscar_produtos(consulta, limite=10):
+    """Produtos ativos (com fornecedor) que correspondem à consulta, do mais relevante ao menos"""
+    consulta = (consulta or '').strip()
+    lista_termos = termos(consulta)
+    if not lista_termos:
+        return []
+
+    if trigramas_postgres():
+        return _buscar_postgres(consulta, lista_termos, limite)
+
+    if connection.in_atomic_block:
+        return _buscar_icontains(consulta, limite)
+
+    ids = indice().buscar(consulta, limite)
+    produtos = Produto.objects.filter(ativo=True).select_related('fornecedor').in_bulk(ids)
+    # Produto removido ou desativado desde a última conferência da versão: fica de fora
+    return [produtos[pk] for pk in ids if pk in produtos]
@@ -0,0 +1,79 @@
+"""
+Contador de notificações não lidas e versão das notificações por usuário
+
+Os dois valores ficam no cache compartilhado (Redis em produção):
+
+- o contador é mantido com incr/decr quando uma notificação é criada ou lida
+  e recalculado com um COUNT só quando falta no cache (expira em
+  TEMPO_CONTADOR, o que também corrige qualquer desvio);
+- a versão muda a cada alteração e serve de ETag para o polling e de sinal
+  para o stream SSE, que só consulta o banco quando ela muda.
+
+As alterações são aplicadas quando a transação é confirmada.
+"""
+
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+TEMPO_CONTADOR = 5 * 60
+
+
+def _chave_contador(usuario_id):
+    return f"notificacoes:nao_lidas:{usuario_id}"
+
+
+def _chave_versao(usuario_id):
+    return f"notificacoes:versao:{usuario_id}"
+
+
+def contar_nao_lidas(usuario_id):
+    """Notificações não lidas do usuário (COUNT só quando o contador não está em cache)"""
+    from .models import Notificacao
+
+    total = cache.get(_chave_contador(usuario_id))
+    if total is None:
+        total = Notificacao.objects.filter(usuario_id=usuario_id, lida=False).count()
+        cache.set(_chave_contador(usuario_id), total, TEMPO_CONTADOR)
+    return total
+
+
+def versao(usuario_id):
+    """Versão atual das notificações do usuário (muda a cada criação/leitura)"""
+    atual = cache.get(_chave_versao(usuario_id))
+    if atual is None:
+        cache.add(_chave_versao(usuario_id), time.time_ns(), None)
+        atual = cache.get(_chave_versao(usuario_id))
+    return atual
+
+
+def etag(usuario_id):
+    return f"{usuario_id}-{versao(usuario_id)}"
+
+
+def _aplicar(usuario_ids, delta):
+    for usuario_id in usuario_ids:
+        chave = _chave_contador(usuario_id)
+        if delta is None:
+            cache.delete(chave)
+        else:
+            try:
+                if cache.incr(chave, delta) < 0:
+                    cache.delete(chave)
+            except ValueError:
+                # Contador fora do cache: o próximo leitor faz o COUNT
+                pass
+        cache.set(_chave_versao(usuario_id), time.time_ns(), None)
+
+
+def registrar_alteracao(usuario_ids, delta=None):
+    """
+    Atualiza contador e versão dos usuários quando a transação for confirmada.
+
+    `delta`: variação das não lidas (+1 ao criar, -n ao marcar n como lidas);
+    None quando não se sabe (ações em massa): o contador é descartado.
+    """
+    usuario_ids = {usuario_id for usuario_id in usuario_ids if usuario_id}
+    if usuario_ids and delta != 0:
+        transaction.on_commit(lambda: _aplicar(usuario_ids, delta))
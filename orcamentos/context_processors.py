@@ -0,0 +1,6 @@
+from django.conf import settings
+
+
+def notificacoes(request):
+    """Expõe aos templates se o painel deve abrir o stream SSE de notificações"""
+    return {'notificacoes_sse_ativo': getattr(settings, 'NOTIFICACOES_SSE_ATIVO', False)}
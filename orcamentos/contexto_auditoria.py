@@ -0,0 +1,52 @@
+"""
+Contexto de auditoria da requisição atual
+
+O AuditoriaMiddleware guarda a requisição num ContextVar (funciona tanto
+em WSGI/threads quanto em views assíncronas ASGI, ao contrário do antigo
+threading.local) e atribui um request_id. Os metadados usados nos logs
+(IP, user agent, sessão, usuário) são extraídos uma única vez por
+AuditoriaManager.obter_contexto, na primeira ação auditada da requisição,
+e reaproveitados pelas seguintes.
+"""
+
+import re
+import uuid
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+_requisicao_atual = ContextVar('requisicao_auditoria', default=None)
+
+# Aceitar o X-Request-ID de um proxy apenas se for um identificador simples
+_REQUEST_ID_VALIDO = re.compile(r'^[A-Za-z0-9\-_.]{8,64}$')
+
+
+@dataclass(frozen=True)
+class ContextoAuditoria:
+    request_id: str
+    ip_address: Optional[str]
+    user_agent: str
+    sessao_id: str
+    usuario_id: Optional[int]
+
+
+def gerar_request_id(request=None):
+    """Reaproveita o X-Request-ID do proxy ou gera um novo identificador"""
+    recebido = request.META.get('HTTP_X_REQUEST_ID', '') if request is not None else ''
+    if isinstance(recebido, str) and _REQUEST_ID_VALIDO.match(recebido):
+        return recebido
+    return uuid.uuid4().hex
+
+
+def iniciar_requisicao(request):
+    """Marca a requisição como atual; devolve o token para encerrar_requisicao"""
+    request.request_id = gerar_request_id(request)
+    return _requisicao_atual.set(request)
+
+
+def encerrar_requisicao(token):
+    _requisicao_atual.reset(token)
+
+
+def obter_requisicao_atual():
+    return _requisicao_atual.get()
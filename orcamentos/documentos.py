@@ -0,0 +1,239 @@
+"""
+Modelo de documento (view-model) compartilhado por devis e factures
+
+As views HTML/PDF do admin e do cliente, o PDF ReportLab e o link público
+montam o documento a partir da mesma estrutura: linhas já calculadas (TVA
+por linha, PU TTC, remise), totais, taxa de TVA média, acomptes e dados da
+empresa (CompanySettings, com os valores históricos como padrão).
+
+A estrutura é guardada no cache do Django com uma chave que inclui o
+updated_at do documento e o da configuração da empresa. O updated_at do
+devis/facture muda sempre que o cabeçalho, um item ou um acompte muda
+(calcular_totais, atualizar_totais_acomptes e os sinais de exclusão de
+itens), então não é preciso invalidar nada: a versão nova usa outra chave.
+"""
+
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.shortcuts import get_object_or_404
+
+from .models import Orcamento, Facture
+
+# Incrementar quando a estrutura mudar (descarta o que já estiver em cache)
+VERSAO_MODELO = 2
+TEMPO_CACHE = 24 * 60 * 60
+
+# Dados impressos enquanto CompanySettings não estiver preenchido
+EMPRESA_PADRAO = {
+    'name': 'LOPES DE SOUZA fabiano',
+    'address': '261 Chemin de La Castellane',
+    'city': '31790 Saint Sauveur, France',
+    'phone': '+33 7 69 27 37 76',
+    'email': 'contact@lopespeinture.fr',
+    'siret': '978 441 756 00019',
+    'ape': '4334Z',
+    'tva': 'FR35978441756',
+    'site': 'www.lopespeinture.fr'
+}
+
+
+def obter_configuracao_empresa():
+    """CompanySettings do cache da configuração (sem consulta enquanto não mudar)"""
+    from system_config.models import CompanySettings
+    return CompanySettings.get_solo()
+
+
+def valores_empresa(config):
+    """Campos da empresa preenchidos em CompanySettings (vazios quando não configurados)"""
+    return {
+        'name': config.raison_sociale,
+        'address': config.adresse,
+        'postal_city': " ".join(parte for parte in [config.code_postal, config.ville] if parte),
+        'country': config.pays,
+        'phone': config.tel or config.mobile,
+        'email': config.email,
+        'siret': config.siret,
+        'ape': config.code_ape,
+        'tva': config.tva_intra,
+        'site': (config.site_internet or '').replace('https://', '').replace('http://', '').rstrip('/'),
+    }
+
+
+def dados_empresa(config):
+    """Bloco da empresa no formato dos templates, com os valores padrão para campos vazios"""
+    valores = valores_empresa(config)
+    cidade = valores['postal_city']
+    if cidade and valores['country']:
+        cidade = f"{cidade}, {valores['country']}"
+    valores['city'] = cidade
+    return {chave: valores[chave] or padrao for chave, padrao in EMPRESA_PADRAO.items()}
+
+
+class DocumentoService:
+    """Carrega devis/factures e monta (ou reaproveita) o modelo de documento"""
+
+    @staticmethod
+    def carregar_devis(**filtros):
+        """get_object_or_404 com tudo o que os templates de devis acessam numa só consulta"""
+        return get_object_or_404(
+            Orcamento.objects.select_related(
+                'solicitacao', 'solicitacao__cliente', 'solicitacao__cliente__profile', 'elaborado_por'
+            ),
+            **filtros
+        )
+
+    @staticmethod
+    def carregar_facture(**filtros):
+        return get_object_or_404(
+            Facture.objects.select_related(
+                'cliente', 'cliente__profile', 'orcamento', 'orcamento__solicitacao'
+            ),
+            **filtros
+        )
+
+    @staticmethod
+    def modelo_devis(orcamento, config=None):
+        config = config or obter_configuracao_empresa()
+        chave = DocumentoService._chave('devis', orcamento, config)
+        modelo = cache.get(chave)
+        if modelo is None:
+            modelo = DocumentoService._montar_devis(orcamento, config)
+            cache.set(chave, modelo, TEMPO_CACHE)
+        return modelo
+
+    @staticmethod
+    def modelo_facture(facture, config=None):
+        config = config or obter_configuracao_empresa()
+        chave = DocumentoService._chave('facture', facture, config)
+        modelo = cache.get(chave)
+        if modelo is None:
+            modelo = DocumentoService._montar_facture(facture, config)
+            cache.set(chave, modelo, TEMPO_CACHE)
+        return modelo
+
+    @staticmethod
+    def contexto_facture(facture):
+        """Contexto do template fatura_pdf.html (nomes usados pelo template)"""
+        modelo = DocumentoService.modelo_facture(facture)
+        return {
+            'fatura': facture,
+            'items': modelo['items_data'],
+            'subtotal_ht': modelo['subtotal_ht'],
+            'total_taxe': modelo['total_taxe'],
+            'total_ttc': modelo['total_ttc'],
+            'empresa': modelo['company_info'],
+        }
+
+    @staticmethod
+    def _chave(tipo, documento, config):
+        return (
+            f"documento:{tipo}:{documento.pk}:{documento.updated_at.timestamp()}"
+            f":{config.updated_at.timestamp()}:v{VERSAO_MODELO}"
+        )
+
+    @staticmethod
+    def _montar_devis(orcamento, config):
+        linhas = DocumentoService._calcular_linhas(orcamento.itens.all())
+
+        # Desconto global (os totais finais já vêm do model)
+        remise_global = orcamento.desconto or Decimal('0.00')
+        valor_remise = (linhas['subtotal_ht'] * remise_global / 100) if remise_global else Decimal('0.00')
+
+        acomptes = [
+            {'numero': numero, 'status': status, 'valor_ttc': valor_ttc}
+            for numero, status, valor_ttc in orcamento.acomptes.values_list('numero', 'status', 'valor_ttc')
+        ]
+        total_acomptes_ttc = sum((a['valor_ttc'] for a in acomptes), Decimal('0.00'))
+
+        return {
+            'items_data': linhas['items_data'],
+            'subtotal_ht': linhas['subtotal_ht'],
+            'total_taxe': linhas['total_taxe'],
+            'total_ttc_itens': linhas['total_ttc'],
+            'remise_global': remise_global,
+            'valor_remise': valor_remise,
+            'subtotal_apres_remise_ht': orcamento.total,
+            'taxe_finale': orcamento.valor_tva,
+            'subtotal_apres_remise_ttc': orcamento.total_ttc,
+            'taxa_tva_media': DocumentoService._taxa_tva_media(
+                linhas['subtotal_ht'], linhas['total_taxe'], linhas['total_ttc']
+            ),
+            'acomptes': acomptes,
+            'total_acomptes_ttc': total_acomptes_ttc,
+            'solde_ttc': max(Decimal('0.00'), orcamento.total_ttc - total_acomptes_ttc),
+            'company_info': dados_empresa(config),
+            # Valores crus, para quem aplica padrões próprios (PDF ReportLab)
+            'empresa': valores_empresa(config),
+        }
+
+    @staticmethod
+    def _montar_facture(facture, config):
+        linhas = DocumentoService._calcular_linhas(facture.itens.all())
+        return {
+            'items_data': linhas['items_data'],
+            'subtotal_ht': linhas['subtotal_ht'],
+            'total_taxe': linhas['total_taxe'],
+            'total_ttc': linhas['total_ttc'],
+            'taxa_tva_media': DocumentoService._taxa_tva_media(
+                linhas['subtotal_ht'], linhas['total_taxe'], linhas['total_ttc']
+            ),
+            'company_info': dados_empresa(config),
+        }
+
+    @staticmethod
+    def _calcular_linhas(itens):
+        """Linhas do documento e somas HT/TVA/TTC numa única passada"""
+        subtotal_ht = Decimal('0.00')
+        total_taxe = Decimal('0.00')
+        total_ttc = Decimal('0.00')
+
+        items_data = []
+        for i, item in enumerate(itens, 1):
+            # Usar a TVA real do item, não fixa
+            taxa_tva_decimal = Decimal(item.taxa_tva) / 100
+
+            pu_ht = item.preco_unitario_ht
+            total_item_ht = item.total_ht  # Já calculado com remise
+            total_item_ttc = item.total_ttc  # Já calculado com remise e TVA
+            taxe_item = total_item_ttc - total_item_ht
+
+            subtotal_ht += total_item_ht
+            total_taxe += taxe_item
+            total_ttc += total_item_ttc
+
+            items_data.append({
+                'ref': item.referencia or f"REF{i:03d}",
+                'referencia': item.referencia,
+                'designation': item.descricao,
+                'unite': item.get_unidade_display(),
+                'unidade': item.unidade,
+                'quantite': item.quantidade,
+                'pu_ht': pu_ht,
+                'pu_ttc': pu_ht * (1 + taxa_tva_decimal),
+                'remise': (item.quantidade * pu_ht * item.remise_percentual / 100) if item.remise_percentual else Decimal('0.00'),
+                'total_ht': total_item_ht,
+                'total_ttc': total_item_ttc,
+                'taxe': taxe_item,
+                'taxa_tva': item.taxa_tva
+            })
+
+        return {
+            'items_data': items_data,
+            'subtotal_ht': subtotal_ht,
+            'total_taxe': total_taxe,
+            'total_ttc': total_ttc,
+        }
+
+    @staticmethod
+    def _taxa_tva_media(subtotal_ht, total_taxe, total_ttc):
+        """Taxa de TVA média exibida no resumo ("Variável" quando não há base)"""
+        if not (total_ttc > 0 and subtotal_ht > 0):
+            return "Variável"
+
+        percentual_tva = (total_taxe / subtotal_ht) * 100
+        # Se for um valor "redondo", mostrar como percentual fixo
+        for taxa in ('20', '10', '5.5', '0'):
+            if abs(percentual_tva - Decimal(taxa)) < Decimal('0.01'):
+                return taxa
+        return f"{percentual_tva:.1f}"
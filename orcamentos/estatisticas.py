@@ -0,0 +1,208 @@
+"""
+Estatísticas dos dashboards administrativos
+
+Cada widget (bloco de números de um dashboard) é calculado com uma única
+consulta de agregação condicional (Count/Sum com filter=Q(...)) em vez de
+um COUNT por status, e guardado no cache compartilhado por alguns segundos
+(DASHBOARD_CACHE_TTL, ajustável por widget em DASHBOARD_CACHE_TTL_WIDGETS).
+
+Salvar ou apagar um registro dos modelos listados em INVALIDACOES descarta
+os widgets que dependem dele quando a transação é confirmada. Alterações em
+massa (queryset.update) não disparam sinais: aparecem ao fim do TTL.
+
+Como em system_config/config_cache.py, leituras feitas dentro de uma
+transação vão direto ao banco.
+"""
+
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Avg, Count, Q, Sum
+from django.db.models.functions import Lower
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils import timezone
+
+from .models import Orcamento, Projeto, SolicitacaoOrcamento, StatusOrcamento
+
+User = get_user_model()
+
+_AUSENTE = object()
+
+# Modelo -> widgets que dependem dele
+INVALIDACOES = {
+    'orcamentos.SolicitacaoOrcamento': ('solicitacoes', 'orfaos_vinculaveis'),
+    'orcamentos.Orcamento': ('orcamentos',),
+    'orcamentos.Projeto': ('projetos_clientes',),
+    settings.AUTH_USER_MODEL: ('usuarios', 'orfaos_vinculaveis', 'grupos'),
+    'profiles.Profile': ('perfis',),
+    'projetos.Projeto': ('projetos_site',),
+    'auth.Group': ('grupos',),
+}
+
+
+def _chave(widget):
+    return f"dashboard:{widget}"
+
+
+def widget(nome, calcular):
+    """Valor do widget `nome`; `calcular()` só roda quando ele não está em cache"""
+    if connection.in_atomic_block:
+        return calcular()
+
+    valor = cache.get(_chave(nome), _AUSENTE)
+    if valor is _AUSENTE:
+        valor = calcular()
+        ttl = getattr(settings, 'DASHBOARD_CACHE_TTL_WIDGETS', {}).get(
+            nome, getattr(settings, 'DASHBOARD_CACHE_TTL', 60)
+        )
+        cache.set(_chave(nome), valor, ttl)
+    return valor
+
+
+def invalidar(*widgets):
+    """Descarta os widgets quando a transação atual for confirmada"""
+    transaction.on_commit(lambda: cache.delete_many([_chave(nome) for nome in widgets]))
+
+
+def _invalidar_por_modelo(sender, **kwargs):
+    invalidar(*INVALIDACOES[sender._meta.label])
+
+
+def _invalidar_grupos(sender, **kwargs):
+    invalidar('grupos')
+
+
+def conectar():
+    """Liga os sinais de invalidação (chamado em OrcamentosConfig.ready)"""
+    for rotulo in INVALIDACOES:
+        try:
+            modelo = apps.get_model(rotulo)
+        except LookupError:
+            continue
+        post_save.connect(_invalidar_por_modelo, sender=modelo, dispatch_uid=f"dashboard_save_{rotulo}")
+        post_delete.connect(_invalidar_por_modelo, sender=modelo, dispatch_uid=f"dashboard_delete_{rotulo}")
+
+    # Membros e permissões dos grupos
+    for relacao in (User.groups.through, apps.get_model('auth.Group').permissions.through):
+        m2m_changed.connect(_invalidar_grupos, sender=relacao, dispatch_uid=f"dashboard_m2m_{relacao._meta.label}")
+
+
+class EstatisticasService:
+    """Widgets dos dashboards (orçamentos, página inicial e admin do site)"""
+
+    @staticmethod
+    def solicitacoes():
+        return widget('solicitacoes', lambda: SolicitacaoOrcamento.objects.aggregate(
+            total=Count('pk'),
+            pendentes=Count('pk', filter=Q(status=StatusOrcamento.PENDENTE)),
+            orfas=Count('pk', filter=Q(cliente__isnull=True)),
+        ))
+
+    @staticmethod
+    def orcamentos():
+        def calcular():
+            inicio_mes = timezone.localtime().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            aceitos = Q(status=StatusOrcamento.ACEITO)
+            valores = Orcamento.objects.aggregate(
+                enviados=Count('pk', filter=Q(status=StatusOrcamento.ENVIADO)),
+                aceitos=Count('pk', filter=aceitos),
+                receita_mes=Sum('total', filter=aceitos & Q(data_resposta_cliente__gte=inicio_mes)),
+                receita_total=Sum('total', filter=aceitos),
+            )
+            valores['receita_mes'] = valores['receita_mes'] or 0
+            valores['receita_total'] = valores['receita_total'] or 0
+            return valores
+        return widget('orcamentos', calcular)
+
+    @staticmethod
+    def orfaos_vinculaveis():
+        """Emails distintos de solicitações órfãs que já têm uma conta"""
+        # IN (subconsulta) em vez de EXISTS com iexact por linha: o banco monta o
+        # conjunto de emails das contas uma vez
+        emails_contas = User.objects.annotate(email_normalizado=Lower('email')).values('email_normalizado')
+        return widget('orfaos_vinculaveis', lambda: (
+            SolicitacaoOrcamento.objects.filter(cliente__isnull=True)
+            .annotate(email_normalizado=Lower('email_solicitante'))
+            .filter(email_normalizado__in=emails_contas)
+            .values('email_normalizado')
+            .distinct()
+            .count()
+        ))
+
+    @staticmethod
+    def projetos_clientes():
+        return widget('projetos_clientes', lambda: Projeto.objects.aggregate(
+            total_projects=Count('pk'),
+            total_clients=Count('cliente', distinct=True),
+        ))
+
+    @staticmethod
+    def usuarios():
+        return widget('usuarios', lambda: User.objects.aggregate(
+            total_users=Count('pk'),
+            clients=Count('pk', filter=Q(account_type='CLIENT')),
+            collaborators=Count('pk', filter=Q(account_type='COLLABORATOR')),
+            administrators=Count('pk', filter=Q(account_type='ADMINISTRATOR')),
+            active_users=Count('pk', filter=Q(is_active=True)),
+            recent_users=Count('pk', filter=Q(date_joined__gte=timezone.now() - timedelta(days=7))),
+        ))
+
+    @staticmethod
+    def perfis():
+        from profiles.models import Profile
+
+        preenchido = (
+            Q(phone__isnull=False, address__isnull=False, city__isnull=False)
+            & ~Q(phone='', address='', city='')
+        )
+        return widget('perfis', lambda: Profile.objects.aggregate(
+            total_profiles=Count('pk'),
+            complete_profiles=Count('pk', filter=preenchido),
+        ))
+
+    @staticmethod
+    def projetos_site():
+        from projetos.models import Projeto as ProjetoSite
+
+        def calcular():
+            valores = ProjetoSite.objects.aggregate(
+                total_projetos=Count('pk'),
+                projetos_novos=Count('pk', filter=Q(status='nouveau')),
+                projetos_em_curso=Count('pk', filter=Q(status='en_cours')),
+                projetos_terminados=Count('pk', filter=Q(status='termine')),
+                projetos_suspensos=Count('pk', filter=Q(status='suspendu')),
+                projetos_visiveis=Count('pk', filter=Q(visible_site=True)),
+                projetos_recentes=Count('pk', filter=Q(date_creation__gte=timezone.now() - timedelta(days=30))),
+                valor_total_estimado=Sum('prix_estime'),
+                valor_medio_projetos=Avg('prix_estime'),
+            )
+            valores['valor_total_estimado'] = valores['valor_total_estimado'] or 0
+            valores['valor_medio_projetos'] = valores['valor_medio_projetos'] or 0
+            valores['tipos_projetos'] = list(
+                ProjetoSite.objects.order_by().values('type_projet').annotate(count=Count('id')).order_by('-count')
+            )
+            valores['cidades_projetos'] = list(
+                ProjetoSite.objects.order_by().values('ville').annotate(count=Count('id')).order_by('-count')[:5]
+            )
+            return valores
+        return widget('projetos_site', calcular)
+
+    @staticmethod
+    def grupos():
+        from django.contrib.auth.models import Group
+
+        return widget('grupos', lambda: [
+            {
+                'name': grupo.name,
+                'users_count': grupo.users_count,
+                'permissions_count': grupo.permissions_count,
+            }
+            for grupo in Group.objects.annotate(
+                users_count=Count('user', distinct=True),
+                permissions_count=Count('permissions', distinct=True),
+            ).order_by('pk')
+        ])
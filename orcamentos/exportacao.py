@@ -0,0 +1,188 @@
+"""
+Exportação em lote de devis e factures num arquivo ZIP
+
+A renderização (ReportLab para os devis, template HTML para as factures)
+roda num ProcessPoolExecutor: o processo principal consulta o banco e monta
+o modelo de documento, os processos filhos só recebem objetos prontos e
+devolvem os bytes. Cada documento entra no ZIP assim que fica pronto e no
+máximo `em_voo` renderizações ficam pendentes, então a memória usada não
+depende do tamanho do lote.
+
+Os filhos são iniciados com spawn: um fork copiaria o processo web com as
+conexões de banco/cache e as threads abertas. Eles não consultam o banco, então
+as factures devem vir com select_related de cliente, cliente__profile,
+orcamento e orcamento__solicitacao. Nas requisições web (action do
+admin, exportação das factures) a exportação roda com processos=1, sem pool;
+o paralelismo fica para o comando exportar_documentos_pdf.
+
+Devis cujo PDF já está no cache em disco (CachePDF) não são renderizados de
+novo; os PDFs novos são gravados no cache para os próximos downloads.
+"""
+
+import logging
+import multiprocessing
+import os
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+
+from django.conf import settings
+
+from . import exportacao_processos
+from .documentos import DocumentoService
+from .pdf_cache import CachePDF
+from .pdf_generator import OrcamentoPDFGenerator
+
+logger = logging.getLogger(__name__)
+
+
+class _DestinoZip:
+    """Destino não pesquisável do ZipFile: guarda o que foi escrito até ser esvaziado"""
+
+    def __init__(self):
+        self._partes = []
+        self._posicao = 0
+
+    def write(self, dados):
+        self._partes.append(bytes(dados))
+        self._posicao += len(dados)
+        return len(dados)
+
+    def tell(self):
+        return self._posicao
+
+    def flush(self):
+        pass
+
+    def esvaziar(self):
+        dados = b''.join(self._partes)
+        self._partes = []
+        return dados
+
+
+class _Tarefa:
+    __slots__ = ('nome', 'funcao', 'argumentos', 'cache', 'chave', 'conteudo')
+
+    def __init__(self, nome, funcao=None, argumentos=(), cache=None, chave=None, conteudo=None):
+        self.nome = nome
+        self.funcao = funcao
+        self.argumentos = argumentos
+        self.cache = cache
+        self.chave = chave
+        self.conteudo = conteudo
+
+
+class ExportacaoDocumentos:
+    """Renderiza devis/factures em paralelo e grava o resultado num ZIP"""
+
+    def __init__(self, processos=None, em_voo=None):
+        self.processos = max(1, processos or getattr(settings, 'PDF_EXPORTACAO_PROCESSOS', None) or os.cpu_count() or 1)
+        self.em_voo = em_voo or self.processos * 2
+        self.estatisticas = {
+            'documentos': 0,
+            'do_cache': 0,
+            'renderizados': 0,
+            'bytes': 0,
+            'segundos': 0.0,
+        }
+
+    @property
+    def documentos_por_segundo(self):
+        segundos = self.estatisticas['segundos']
+        return self.estatisticas['documentos'] / segundos if segundos else 0.0
+
+    def documentos(self, devis=(), factures=()):
+        """(nome no ZIP, bytes) de cada documento, na ordem em que ficam prontos"""
+        inicio = time.monotonic()
+        try:
+            for nome, conteudo in self._executar(self._tarefas(devis, factures)):
+                self.estatisticas['documentos'] += 1
+                self.estatisticas['bytes'] += len(conteudo)
+                yield nome, conteudo
+        finally:
+            self.estatisticas['segundos'] = time.monotonic() - inicio
+            logger.info(
+                "Exportação: %s documentos (%s do cache) em %.1fs, %.1f doc/s",
+                self.estatisticas['documentos'], self.estatisticas['do_cache'],
+                self.estatisticas['segundos'], self.documentos_por_segundo
+            )
+
+    def zip_stream(self, devis=(), factures=()):
+        """Pedaços do ZIP para StreamingHttpResponse, emitidos a cada documento"""
+        destino = _DestinoZip()
+        with zipfile.ZipFile(destino, 'w', zipfile.ZIP_DEFLATED) as arquivo_zip:
+            for nome, conteudo in self.documentos(devis, factures):
+                arquivo_zip.writestr(nome, conteudo)
+                yield destino.esvaziar()
+        yield destino.esvaziar()
+
+    def gravar_zip(self, caminho, devis=(), factures=()):
+        with zipfile.ZipFile(caminho, 'w', zipfile.ZIP_DEFLATED) as arquivo_zip:
+            for nome, conteudo in self.documentos(devis, factures):
+                arquivo_zip.writestr(nome, conteudo)
+        return self.estatisticas
+
+    def _tarefas(self, devis, factures):
+        cache_devis = CachePDF('devis')
+        for orcamento in devis:
+            modelo = DocumentoService.modelo_devis(orcamento)
+            chave = OrcamentoPDFGenerator.chave_conteudo(orcamento, modelo)
+            nome = f"devis/devis_{orcamento.numero}.pdf"
+            conteudo = cache_devis.ler(chave)
+            if conteudo is not None:
+                yield _Tarefa(nome, conteudo=conteudo)
+            else:
+                yield _Tarefa(nome, exportacao_processos.renderizar_devis, (orcamento, modelo), cache=cache_devis, chave=chave)
+
+        for facture in factures:
+            contexto = DocumentoService.contexto_facture(facture)
+            contexto['data_impressao'] = datetime.now()
+            yield _Tarefa(f"factures/facture_{facture.numero}.html", exportacao_processos.renderizar_facture, (contexto,))
+
+    def _executar(self, tarefas):
+        if self.processos == 1:
+            # Sem pool: útil para lotes pequenos e para depuração
+            for tarefa in tarefas:
+                yield tarefa.nome, self._concluir(tarefa, None)
+            return
+
+        pool = ProcessPoolExecutor(
+            max_workers=self.processos,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=exportacao_processos.inicializar
+        )
+        pendentes = {}
+        try:
+            for tarefa in tarefas:
+                if tarefa.conteudo is not None:
+                    yield tarefa.nome, self._concluir(tarefa, None)
+                    continue
+
+                pendentes[pool.submit(tarefa.funcao, *tarefa.argumentos)] = tarefa
+                if len(pendentes) >= self.em_voo:
+                    yield from self._recolher(pendentes)
+
+            while pendentes:
+                yield from self._recolher(pendentes)
+        finally:
+            # Download interrompido: descartar o que ainda não começou
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _recolher(self, pendentes):
+        prontos, _ = wait(pendentes, return_when=FIRST_COMPLETED)
+        for futuro in prontos:
+            tarefa = pendentes.pop(futuro)
+            yield tarefa.nome, self._concluir(tarefa, futuro.result())
+
+    def _concluir(self, tarefa, conteudo):
+        if tarefa.conteudo is not None:
+            self.estatisticas['do_cache'] += 1
+            return tarefa.conteudo
+
+        if conteudo is None:
+            conteudo = tarefa.funcao(*tarefa.argumentos)
+        self.estatisticas['renderizados'] += 1
+        if tarefa.cache is not None:
+            tarefa.cache.gravar(tarefa.chave, conteudo)
+        return conteudo
@@ -0,0 +1,24 @@
+"""
+Funções executadas nos processos filhos da exportação em lote (exportacao.py)
+
+Com spawn o filho importa este módulo para desempacotar o initializer antes
+de o Django estar configurado, então nada aqui importa models no topo.
+"""
+
+
+def inicializar():
+    """Configura o Django no processo filho"""
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def renderizar_devis(orcamento, modelo):
+    from .pdf_generator import OrcamentoPDFGenerator
+    return OrcamentoPDFGenerator().generate_pdf(orcamento, modelo=modelo)
+
+
+def renderizar_facture(contexto):
+    from django.template.loader import render_to_string
+    return render_to_string('orcamentos/admin/fatura_pdf.html', contexto).encode('utf-8')
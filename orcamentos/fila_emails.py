@@ -0,0 +1,174 @@
+"""
+Fila durável de emails (outbox)
+
+Os helpers de sistema_email e o NotificationService não falam mais com o
+servidor SMTP durante a requisição: gravam um EmailPendente e seguem. A
+linha é gravada na transação de quem pediu o envio, então o email só fica
+visível para o worker quando essa transação é confirmada (e some junto com
+um rollback).
+
+O comando despachar_emails reserva lotes com select_for_update(skip_locked)
+— vários workers não pegam o mesmo email —, envia o lote pela conexão SMTP
+reutilizada e reagenda as falhas com espera exponencial. Um email reservado
+por um worker que morreu volta para a fila quando a reserva vence.
+
+Com EMAIL_OUTBOX_ATIVO = False (padrão, e nos testes) o envio é feito na
+hora; a fila só deve ser ativada onde o worker estiver rodando.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+
+from .models import EmailPendente, StatusEmail
+
+logger = logging.getLogger(__name__)
+
+
+def fila_ativa():
+    return getattr(settings, 'EMAIL_OUTBOX_ATIVO', False)
+
+
+def enfileirar(mensagens, remetente=None):
+    """Grava as mensagens (dicts de sistema_email.send_many) na fila; devolve quantas"""
+    pendentes = EmailPendente.objects.bulk_create([
+        EmailPendente(
+            assunto=str(mensagem['subject'])[:255],
+            mensagem_texto=mensagem['plain_message'] or '',
+            mensagem_html=mensagem.get('html_message') or '',
+            remetente=remetente or '',
+            destinatarios=[str(d) for d in mensagem.get('recipients') or []],
+        )
+        for mensagem in mensagens
+    ])
+    return len(pendentes)
+
+
+def espera_tentativa(tentativas):
+    """Espera antes da próxima tentativa: base * 2^(tentativas-1), limitada ao máximo"""
+    base = getattr(settings, 'EMAIL_OUTBOX_ESPERA_BASE', 30)
+    maxima = getattr(settings, 'EMAIL_OUTBOX_ESPERA_MAXIMA', 3600)
+    return timedelta(seconds=min(base * 2 ** max(tentativas - 1, 0), maxima))
+
+
+def reservar(tamanho_lote):
+    """Reserva até `tamanho_lote` emails disponíveis para este worker"""
+    agora = timezone.now()
+    reserva = timedelta(seconds=getattr(settings, 'EMAIL_OUTBOX_RESERVA', 300))
+    disponiveis = (
+        Q(status=StatusEmail.PENDENTE, proxima_tentativa__lte=agora)
+        | Q(status=StatusEmail.ENVIANDO, bloqueado_ate__lt=agora)
+    )
+
+    with transaction.atomic():
+        ids = list(
+            EmailPendente.objects.select_for_update(skip_locked=True)
+            .filter(disponiveis)
+            .order_by('proxima_tentativa', 'id')
+            .values_list('id', flat=True)[:tamanho_lote]
+        )
+        if not ids:
+            return []
+        # A tentativa conta já na reserva: um worker que morre no meio também gasta uma
+        EmailPendente.objects.filter(id__in=ids).update(
+            status=StatusEmail.ENVIANDO,
+            bloqueado_ate=agora + reserva,
+            tentativas=F('tentativas') + 1,
+        )
+    return list(EmailPendente.objects.filter(id__in=ids).order_by('proxima_tentativa', 'id'))
+
+
+def _registrar_falha(pendente, erro):
+    maximo = getattr(settings, 'EMAIL_OUTBOX_MAX_TENTATIVAS', 8)
+    pendente.ultimo_erro = str(erro)[:2000]
+    pendente.bloqueado_ate = None
+    if pendente.tentativas >= maximo:
+        pendente.status = StatusEmail.FALHOU
+        logger.error(f"Email {pendente.pk} descartado após {pendente.tentativas} tentativas: {erro}")
+    else:
+        pendente.status = StatusEmail.PENDENTE
+        pendente.proxima_tentativa = timezone.now() + espera_tentativa(pendente.tentativas)
+        logger.warning(f"Email {pendente.pk} reagendado (tentativa {pendente.tentativas}): {erro}")
+    pendente.save(update_fields=['status', 'ultimo_erro', 'bloqueado_ate', 'proxima_tentativa'])
+
+
+def despachar_lote(tamanho_lote=None):
+    """Reserva e envia um lote pela mesma conexão; devolve {'enviados': n, 'falhas': n}"""
+    from django.core.mail import EmailMultiAlternatives
+    from utils.emails.sistema_email import close_pooled_connection, get_pooled_connection
+
+    tamanho_lote = tamanho_lote or getattr(settings, 'EMAIL_BATCH_SIZE', 50)
+    pendentes = reservar(tamanho_lote)
+    resultado = {'enviados': 0, 'falhas': 0}
+    if not pendentes:
+        return resultado
+
+    try:
+        conexao = get_pooled_connection()
+    except Exception as e:
+        # Servidor fora do ar: o lote inteiro volta para a fila
+        close_pooled_connection()
+        for pendente in pendentes:
+            _registrar_falha(pendente, e)
+        resultado['falhas'] = len(pendentes)
+        return resultado
+
+    enviados = []
+    for pendente in pendentes:
+        email = EmailMultiAlternatives(
+            subject=pendente.assunto,
+            body=pendente.mensagem_texto,
+            from_email=pendente.remetente or None,
+            to=pendente.destinatarios,
+        )
+        if pendente.mensagem_html:
+            email.attach_alternative(pendente.mensagem_html, 'text/html')
+
+        # Um send_messages por email para saber qual falhou; a conexão é a mesma
+        try:
+            if not conexao.send_messages([email]):
+                raise RuntimeError("o servidor não aceitou a mensagem")
+            enviados.append(pendente.pk)
+        except Exception as e:
+            _registrar_falha(pendente, e)
+            resultado['falhas'] += 1
+            close_pooled_connection()
+            try:
+                conexao = get_pooled_connection()
+            except Exception as erro_conexao:
+                for restante in pendentes[pendentes.index(pendente) + 1:]:
+                    _registrar_falha(restante, erro_conexao)
+                    resultado['falhas'] += 1
+                break
+
+    EmailPendente.objects.filter(pk__in=enviados).update(
+        status=StatusEmail.ENVIADO, enviado_em=timezone.now(), bloqueado_ate=None, ultimo_erro=''
+    )
+    resultado['enviados'] = len(enviados)
+    return resultado
+
+
+def profundidade_fila():
+    """Tamanho da fila por status e idade do email pendente mais antigo"""
+    agora = timezone.now()
+    totais = EmailPendente.objects.aggregate(
+        pendentes=Count('id', filter=Q(status=StatusEmail.PENDENTE)),
+        prontos=Count('id', filter=Q(status=StatusEmail.PENDENTE, proxima_tentativa__lte=agora)),
+        enviando=Count('id', filter=Q(status=StatusEmail.ENVIANDO)),
+        falhas=Count('id', filter=Q(status=StatusEmail.FALHOU)),
+        mais_antigo=Min('created_at', filter=Q(status__in=[StatusEmail.PENDENTE, StatusEmail.ENVIANDO])),
+    )
+    mais_antigo = totais.pop('mais_antigo')
+    totais['idade_segundos'] = (agora - mais_antigo).total_seconds() if mais_antigo else 0
+    return totais
+
+
+def limpar_enviados(dias):
+    """Apaga emails enviados há mais de `dias` dias; devolve quantos"""
+    limite = timezone.now() - timedelta(days=dias)
+    apagados, _ = EmailPendente.objects.filter(status=StatusEmail.ENVIADO, enviado_em__lt=limite).delete()
+    return apagados
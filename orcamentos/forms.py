@@ -486,6 +486,63 @@ class FornecedorForm(forms.ModelForm):
             })
         }
 
+class ImportacaoProdutosForm(forms.Form):
+    """Upload da tabela de preços de um fornecedor (CSV ou XLSX)"""
+
+    fornecedor = forms.ModelChoiceField(
+        queryset=Fornecedor.objects.filter(ativo=True),
+        label='Fournisseur',
+        widget=forms.Select(attrs={
+            'class': 'w-full px-4 py-3 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 focus:border-transparent'
+        })
+    )
+    arquivo = forms.FileField(
+        label='Fichier',
+        help_text='CSV (séparateur ; ou ,) ou XLSX, avec au moins les colonnes Référence et Prix d\'achat',
+        widget=forms.FileInput(attrs={
+            'class': 'w-full px-4 py-3 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 focus:border-transparent',
+            'accept': '.csv,.xlsx'
+        })
+    )
+    simular = forms.BooleanField(
+        label='Simulation (afficher les différences sans importer)',
+        required=False,
+        initial=True,
+        widget=forms.CheckboxInput(attrs={
+            'class': 'rounded border-gray-300 text-blue-600 shadow-sm focus:border-blue-300 focus:ring focus:ring-blue-200 focus:ring-opacity-50'
+        })
+    )
+
+    def clean_arquivo(self):
+        arquivo = self.cleaned_data['arquivo']
+        if not arquivo.name.lower().endswith(('.csv', '.xlsx')):
+            raise forms.ValidationError('Format non supporté : utilisez un fichier CSV ou XLSX.')
+        return arquivo
+
+class ReajustePrecosForm(forms.Form):
+    """Reajuste percentual dos preços de compra de um fornecedor"""
+
+    percentual = forms.DecimalField(
+        label='Révision (%)',
+        max_digits=5,
+        decimal_places=2,
+        min_value=-99.99,
+        max_value=999.99,
+        widget=forms.NumberInput(attrs={
+            'class': 'w-full px-4 py-3 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 focus:border-transparent',
+            'step': '0.01',
+            'placeholder': 'Ex. : 3.5 ou -2'
+        })
+    )
+    simular = forms.BooleanField(
+        label='Simulation (afficher les nouveaux prix sans les appliquer)',
+        required=False,
+        initial=True,
+        widget=forms.CheckboxInput(attrs={
+            'class': 'rounded border-gray-300 text-blue-600 shadow-sm focus:border-blue-300 focus:ring focus:ring-blue-200 focus:ring-opacity-50'
+        })
+    )
+
 class AnexoProjetoForm(forms.ModelForm):
     """Formulário para upload de anexos de projetos"""
 
@@ -0,0 +1,483 @@
+"""
+Importação em lote das tabelas de preços dos fornecedores e reajuste de preços
+
+O arquivo (CSV ou XLSX) é lido linha a linha, sem carregar tudo em memória.
+Cada linha é validada e comparada com o produto de mesma referência; os
+produtos são gravados por lotes: um bulk_create para os novos e, para os
+alterados, um único UPDATE parametrizado executado com executemany (o
+bulk_update do Django monta um CASE por linha e campo, lento em lotes de
+milhares de linhas). Os preços de venda são recalculados com
+Produto.calcular_precos(), a mesma regra de Produto.save().
+
+Só as colunas presentes no arquivo são atualizadas: uma tabela com apenas
+referência e preço de compra atualiza o preço e recalcula HT/TTC mantendo a
+margem de cada produto. Uma referência que já pertence a outro fornecedor é
+recusada.
+
+Com `simular=True` nada é gravado e o resultado traz o mesmo relatório de
+diferenças (novos produtos e campos alterados, antes e depois).
+
+reajustar_precos() aplica um percentual a todos os produtos de um
+fornecedor num único UPDATE, com os preços de venda recalculados no banco.
+"""
+
+import csv
+import io
+import logging
+import os
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.db import connection, transaction
+from django.db.models import Case, DecimalField, F, Value, When
+from django.db.models.functions import Cast, Now, Round
+from django.utils import timezone
+
+from . import busca_produtos
+from .busca_produtos import normalizar
+from .models import Fornecedor, Produto, TipoAtividade, TipoTVA, TipoUnidade
+
+logger = logging.getLogger(__name__)
+
+CENTAVO = Decimal('0.01')
+LIMITE_PRECO = Decimal('100000000')  # max_digits=10, decimal_places=2
+LIMITE_PERCENTUAL = Decimal('1000')  # max_digits=5, decimal_places=2
+
+# Cabeçalhos aceitos (normalizados: minúsculas, sem acentos nem pontuação)
+COLUNAS = {
+    'referencia': {'referencia', 'reference', 'ref', 'code', 'code article'},
+    'descricao': {'descricao', 'designation', 'description', 'libelle'},
+    'preco_compra': {'preco compra', 'prix d achat', 'prix achat', 'prix achat ht', 'prix', 'prix ht'},
+    'margem_percentual': {'margem percentual', 'marge', 'marge %', 'marge ht en %'},
+    'margem_ht': {'margem ht', 'marge ht'},
+    'taxa_tva': {'taxa tva', 'tva', 'taux tva', 'taxe tva'},
+    'unidade': {'unidade', 'unite', 'type d unite'},
+    'atividade': {'atividade', 'activite'},
+    'ativo': {'ativo', 'actif'},
+}
+OBRIGATORIAS = ('referencia', 'preco_compra')
+
+# Campos comparados no relatório de diferenças
+CAMPOS = [
+    'descricao', 'unidade', 'atividade', 'fornecedor_id', 'ativo', 'taxa_tva',
+    'preco_compra', 'margem_percentual', 'margem_ht', 'preco_venda_ht', 'preco_venda_ttc',
+]
+# Campos mostrados para um produto novo
+CAMPOS_RESUMO_NOVO = ('descricao', 'preco_compra', 'preco_venda_ht', 'preco_venda_ttc')
+CAMPOS_PRECO = ('preco_compra', 'margem_percentual', 'margem_ht', 'preco_venda_ht', 'preco_venda_ttc')
+
+_SIM = {'1', 'oui', 'o', 'vrai', 'true', 'x', 'sim', 'yes'}
+_NAO = {'0', 'non', 'n', 'faux', 'false', 'nao', 'no'}
+
+
+def _chave_cabecalho(texto):
+    return re.sub(r"[^\w%]+", ' ', normalizar(str(texto or '')).replace('_', ' ')).strip()
+
+
+_ALIASES = {alias: campo for campo, aliases in COLUNAS.items() for alias in aliases}
+
+
+def mapear_cabecalho(cabecalho):
+    """Posição de cada coluna conhecida; ValueError se faltar uma obrigatória"""
+    posicoes = {}
+    for posicao, titulo in enumerate(cabecalho):
+        campo = _ALIASES.get(_chave_cabecalho(titulo))
+        if campo and campo not in posicoes:
+            posicoes[campo] = posicao
+
+    faltando = [campo for campo in OBRIGATORIAS if campo not in posicoes]
+    if faltando:
+        nomes = ', '.join(str(Produto._meta.get_field(c).verbose_name) for c in faltando)
+        raise ValueError(f"Colonnes obligatoires absentes : {nomes}")
+    return posicoes
+
+
+def encontrar_fornecedor(valor):
+    """Fornecedor pelo id ou pelo nome (sem diferenciar maiúsculas); Fornecedor.DoesNotExist se não houver"""
+    valor = str(valor).strip()
+    if valor.isdigit():
+        return Fornecedor.objects.get(pk=int(valor))
+    return Fornecedor.objects.get(nome__iexact=valor)
+
+
+# ------------------------------------------------------------------ leitura
+
+def _abrir_texto(arquivo):
+    """TextIOWrapper sobre o arquivo binário: UTF-8 (com ou sem BOM) ou, senão, Windows-1252"""
+    amostra = arquivo.read(64 * 1024)
+    arquivo.seek(0)
+    try:
+        amostra.decode('utf-8-sig')
+        codificacao = 'utf-8-sig'
+    except UnicodeDecodeError as e:
+        # Caractere cortado no fim da amostra não conta
+        codificacao = 'utf-8-sig' if e.start >= len(amostra) - 3 else 'cp1252'
+
+    texto = io.TextIOWrapper(arquivo, encoding=codificacao, newline='')
+    try:
+        dialeto = csv.Sniffer().sniff(amostra.decode(codificacao, errors='ignore'), delimiters=';,\t')
+    except csv.Error:
+        dialeto = csv.excel
+    return texto, dialeto
+
+
+def _linhas_csv(arquivo):
+    texto, dialeto = _abrir_texto(arquivo)
+    try:
+        yield from csv.reader(texto, dialeto)
+    finally:
+        # O arquivo de upload continua aberto para quem o passou
+        texto.detach()
+
+
+def _linhas_xlsx(arquivo):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("Import XLSX indisponible (openpyxl non installé) : exportez le fichier en CSV")
+
+    planilha = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        yield from planilha.active.iter_rows(values_only=True)
+    finally:
+        planilha.close()
+
+
+def ler_linhas(arquivo, formato=None, nome=''):
+    """
+    (número da linha, {campo: valor bruto}) de cada linha do arquivo
+
+    `formato` é 'csv' ou 'xlsx'; sem ele, vem da extensão de `nome`.
+    """
+    formato = formato or os.path.splitext(nome)[1].lower().lstrip('.') or 'csv'
+    if formato not in ('csv', 'xlsx'):
+        raise ValueError(f"Format de fichier non supporté : {formato}")
+
+    linhas = _linhas_xlsx(arquivo) if formato == 'xlsx' else _linhas_csv(arquivo)
+    posicoes = None
+    for numero, linha in enumerate(linhas, start=1):
+        if not linha or all(valor in (None, '') for valor in linha):
+            continue
+        if posicoes is None:
+            posicoes = mapear_cabecalho(linha)
+            continue
+        yield numero, {
+            campo: linha[posicao] if posicao < len(linha) else None
+            for campo, posicao in posicoes.items()
+        }
+
+    if posicoes is None:
+        raise ValueError("Fichier vide")
+
+
+# ------------------------------------------------------------------ validação
+
+def _decimal(valor, campo, limite=LIMITE_PRECO):
+    if isinstance(valor, (int, float, Decimal)):
+        numero = Decimal(str(valor))
+    else:
+        texto = re.sub(r'[\s€%]', '', str(valor or ''))
+        if ',' in texto:
+            # Formato francês: 1.234,50
+            texto = texto.replace('.', '').replace(',', '.')
+        try:
+            numero = Decimal(texto)
+        except InvalidOperation:
+            raise ValueError(f"{Produto._meta.get_field(campo).verbose_name} invalide : {valor!r}")
+
+    if not numero.is_finite() or numero < 0 or numero >= limite:
+        raise ValueError(f"{Produto._meta.get_field(campo).verbose_name} hors limites : {valor!r}")
+    return numero
+
+
+def _opcao(valor, choices, campo):
+    chave = normalizar(str(valor or ''))
+    for opcao, rotulo in choices:
+        if chave in (normalizar(opcao), normalizar(rotulo)):
+            return opcao
+    raise ValueError(f"{Produto._meta.get_field(campo).verbose_name} inconnu(e) : {valor!r}")
+
+
+def _taxa_tva(valor):
+    taxa = _decimal(valor, 'taxa_tva', limite=Decimal('100'))
+    for opcao in TipoTVA.values:
+        if Decimal(opcao) == taxa:
+            return opcao
+    raise ValueError(f"Taux de TVA inconnu : {valor!r}")
+
+
+def _booleano(valor):
+    if isinstance(valor, bool):
+        return valor
+    chave = normalizar(str(valor if valor is not None else ''))
+    if chave in _SIM:
+        return True
+    if chave in _NAO:
+        return False
+    raise ValueError(f"Actif invalide : {valor!r}")
+
+
+def validar_linha(valores):
+    """Valores da linha convertidos para os campos de Produto; ValueError na primeira inválida"""
+    referencia = str(valores['referencia'] or '').strip()
+    if not referencia:
+        raise ValueError("Référence vide")
+    if len(referencia) > Produto._meta.get_field('referencia').max_length:
+        raise ValueError("Référence trop longue")
+
+    dados = {
+        'referencia': referencia,
+        'preco_compra': _decimal(valores['preco_compra'], 'preco_compra'),
+    }
+    conversores = {
+        'descricao': lambda v: str(v).strip()[:Produto._meta.get_field('descricao').max_length],
+        'margem_percentual': lambda v: _decimal(v, 'margem_percentual', LIMITE_PERCENTUAL),
+        'margem_ht': lambda v: _decimal(v, 'margem_ht'),
+        'taxa_tva': _taxa_tva,
+        'unidade': lambda v: _opcao(v, TipoUnidade.choices, 'unidade'),
+        'atividade': lambda v: _opcao(v, TipoAtividade.choices, 'atividade'),
+        'ativo': _booleano,
+    }
+    for campo, converter in conversores.items():
+        # Coluna ausente ou célula vazia: o campo não é alterado
+        if valores.get(campo) not in (None, ''):
+            dados[campo] = converter(valores[campo])
+    return dados
+
+
+def aplicar(produto, dados):
+    """Copia os dados da linha para o produto e recalcula os preços como Produto.save()"""
+    for campo, valor in dados.items():
+        setattr(produto, campo, valor)
+    if 'margem_ht' in dados and 'margem_percentual' not in dados:
+        # Margem em valor: o percentual é recalculado a partir dela
+        produto.margem_percentual = Decimal('0')
+
+    produto.calcular_precos()
+    for campo in CAMPOS_PRECO:
+        # Arredondado como o DecimalField grava, para o relatório mostrar o valor final
+        setattr(produto, campo, Decimal(getattr(produto, campo)).quantize(CENTAVO))
+    if produto.margem_percentual >= LIMITE_PERCENTUAL:
+        raise ValueError("Marge en % hors limites")
+
+
+# ------------------------------------------------------------------ importação
+
+def descrever(alteracao):
+    """(rótulo, antes, depois) dos campos de uma alteração, para os relatórios"""
+    campos = alteracao['campos']
+    if alteracao.get('novo'):
+        campos = {campo: campos[campo] for campo in CAMPOS_RESUMO_NOVO}
+    return [
+        (str(Produto._meta.get_field(campo).verbose_name), antes, depois)
+        for campo, (antes, depois) in campos.items()
+    ]
+
+
+def novo_resultado():
+    return {
+        'linhas': 0,
+        'criados': 0,
+        'atualizados': 0,
+        'inalterados': 0,
+        'erros': [],        # (linha, referência, mensagem)
+        'alteracoes': [],   # {'linha', 'referencia', 'novo', 'campos': {campo: (antes, depois)}}
+    }
+
+
+class ImportadorProdutos:
+    """
+    Importa a tabela de preços de um fornecedor
+
+    `ao_processar_lote(resultado, primeira_linha, ultima_linha)` é chamado
+    depois de cada lote (progresso no comando).
+    """
+
+    def __init__(self, fornecedor, tamanho_lote=1000, simular=False, ao_processar_lote=None):
+        self.fornecedor = fornecedor
+        self.tamanho_lote = tamanho_lote
+        self.simular = simular
+        self.ao_processar_lote = ao_processar_lote
+
+    def importar(self, arquivo, formato=None, nome=''):
+        resultado = novo_resultado()
+        vistas = set()
+        lote = []
+
+        for numero, valores in ler_linhas(arquivo, formato, nome):
+            resultado['linhas'] += 1
+            try:
+                dados = validar_linha(valores)
+            except ValueError as e:
+                resultado['erros'].append((numero, str(valores.get('referencia') or ''), str(e)))
+                continue
+
+            if dados['referencia'] in vistas:
+                resultado['erros'].append((numero, dados['referencia'], "Référence en double dans le fichier"))
+                continue
+            vistas.add(dados['referencia'])
+
+            lote.append((numero, dados))
+            if len(lote) >= self.tamanho_lote:
+                self._processar_lote(lote, resultado)
+                lote = []
+
+        if lote:
+            self._processar_lote(lote, resultado)
+        resultado['erros'].sort(key=lambda erro: erro[0])
+
+        if not self.simular and (resultado['criados'] or resultado['atualizados']):
+            # Gravação em lote não dispara os sinais do índice de busca
+            transaction.on_commit(busca_produtos.invalidar)
+        return resultado
+
+    def _processar_lote(self, lote, resultado):
+        existentes = Produto.objects.select_related('fornecedor').in_bulk(
+            [dados['referencia'] for _, dados in lote], field_name='referencia'
+        )
+        novos, alterados, campos_alterados, alteracoes = [], [], set(), []
+
+        for numero, dados in lote:
+            produto = existentes.get(dados['referencia'])
+            if produto and produto.fornecedor_id not in (None, self.fornecedor.pk):
+                resultado['erros'].append(
+                    (numero, dados['referencia'], f"Référence du fournisseur {produto.fornecedor.nome}")
+                )
+                continue
+
+            if produto is None:
+                if not dados.get('descricao'):
+                    resultado['erros'].append((numero, dados['referencia'], "Désignation obligatoire (nouveau produit)"))
+                    continue
+                produto = Produto(fornecedor=self.fornecedor)
+                antes = None
+            else:
+                antes = {campo: getattr(produto, campo) for campo in CAMPOS}
+                produto.fornecedor = self.fornecedor
+
+            try:
+                aplicar(produto, dados)
+            except ValueError as e:
+                resultado['erros'].append((numero, dados['referencia'], str(e)))
+                continue
+
+            if antes is None:
+                novos.append(produto)
+                campos = {campo: (None, getattr(produto, campo)) for campo in CAMPOS}
+            else:
+                campos = {
+                    campo: (antes[campo], getattr(produto, campo))
+                    for campo in CAMPOS
+                    if antes[campo] != getattr(produto, campo)
+                }
+                if not campos:
+                    resultado['inalterados'] += 1
+                    continue
+                alterados.append(produto)
+                campos_alterados.update(campos)
+
+            alteracoes.append({'linha': numero, 'referencia': dados['referencia'], 'novo': antes is None, 'campos': campos})
+
+        if not self.simular and (novos or alterados):
+            try:
+                with transaction.atomic():
+                    Produto.objects.bulk_create(novos)
+                    if alterados:
+                        agora = timezone.now()
+                        for produto in alterados:
+                            produto.updated_at = agora
+                        _atualizar(alterados, [*campos_alterados, 'updated_at'])
+            except Exception as e:
+                logger.error(f"Importação de produtos: lote das linhas {lote[0][0]}..{lote[-1][0]} falhou: {e}")
+                resultado['erros'].append((lote[0][0], '', f"Lot des lignes {lote[0][0]} à {lote[-1][0]} non importé : {e}"))
+                novos, alterados, alteracoes = [], [], []
+
+        resultado['criados'] += len(novos)
+        resultado['atualizados'] += len(alterados)
+        resultado['alteracoes'].extend(alteracoes)
+        if self.ao_processar_lote:
+            self.ao_processar_lote(resultado, lote[0][0], lote[-1][0])
+
+
+def _atualizar(produtos, campos):
+    """UPDATE dos `campos` de cada produto, num só executemany"""
+    meta = Produto._meta
+    quote = connection.ops.quote_name
+    campos = [meta.get_field(campo) for campo in sorted(campos)]
+    sql = (
+        f"UPDATE {quote(meta.db_table)} "
+        f"SET {', '.join(f'{quote(campo.column)} = %s' for campo in campos)} "
+        f"WHERE {quote(meta.pk.column)} = %s"
+    )
+    parametros = [
+        [campo.get_db_prep_save(getattr(produto, campo.attname), connection) for campo in campos] + [produto.pk]
+        for produto in produtos
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, parametros)
+
+
+def importar_produtos(arquivo, fornecedor, formato=None, nome='', simular=False, tamanho_lote=1000):
+    return ImportadorProdutos(fornecedor, tamanho_lote=tamanho_lote, simular=simular).importar(
+        arquivo, formato=formato, nome=nome
+    )
+
+
+# ------------------------------------------------------------------ reajuste
+
+def _precos_reajustados(percentual):
+    """Expressões dos novos preços (mesma regra de Produto.calcular_precos) a partir dos atuais"""
+    preco = DecimalField(max_digits=10, decimal_places=2)
+    calculo = DecimalField(max_digits=20, decimal_places=6)
+
+    fator = Value(Decimal('1') + Decimal(percentual) / 100, output_field=calculo)
+    # Multiplicar em vez de dividir: no SQLite 20 / 100 seria divisão inteira
+    centesimo = Value(Decimal('0.01'), output_field=calculo)
+    preco_compra = Round(F('preco_compra') * fator, 2, output_field=preco)
+    margem = Case(
+        When(margem_percentual__gt=0, then=preco_compra * F('margem_percentual') * centesimo),
+        default=F('margem_ht'),
+        output_field=calculo,
+    )
+    venda_ht = preco_compra + margem
+    taxa = Cast('taxa_tva', output_field=calculo) * centesimo
+    return {
+        'preco_compra': preco_compra,
+        'margem_ht': Round(margem, 2, output_field=preco),
+        'preco_venda_ht': Round(venda_ht, 2, output_field=preco),
+        'preco_venda_ttc': Round(venda_ht * (Value(Decimal('1')) + taxa), 2, output_field=preco),
+    }
+
+
+def reajustar_precos(fornecedor, percentual, simular=False, amostra=20):
+    """
+    Reajusta em `percentual` o preço de compra de todos os produtos do fornecedor
+
+    A margem em % é mantida (a margem em valor acompanha o preço); produtos
+    com margem só em valor a mantêm. Um único UPDATE; com `simular=True`
+    nada é gravado. Retorna {'produtos', 'alteracoes'}, com os `amostra`
+    primeiros produtos (por referência) antes e depois.
+    """
+    percentual = Decimal(percentual)
+    if percentual <= -100:
+        raise ValueError("Le pourcentage doit être supérieur à -100")
+
+    produtos = Produto.objects.filter(fornecedor=fornecedor)
+    novos = _precos_reajustados(percentual)
+
+    previa = produtos.annotate(**{f'novo_{campo}': expressao for campo, expressao in novos.items()})
+    campos = ['referencia', 'descricao', *(f for c in novos for f in (c, f'novo_{c}'))]
+    alteracoes = [
+        {
+            'referencia': linha['referencia'],
+            'descricao': linha['descricao'],
+            'campos': {c: (linha[c], Decimal(linha[f'novo_{c}']).quantize(CENTAVO)) for c in novos},
+        }
+        for linha in previa.order_by('referencia').values(*campos)[:amostra]
+    ]
+
+    if simular:
+        total = produtos.count()
+    else:
+        total = produtos.update(**novos, updated_at=Now())
+    return {'produtos': total, 'alteracoes': alteracoes}
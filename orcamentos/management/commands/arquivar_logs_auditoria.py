@@ -0,0 +1,60 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from orcamentos.arquivo_auditoria import ArquivoAuditoria
+
+
+class Command(BaseCommand):
+    help = 'Move os logs de auditoria mais antigos que o período de retenção para arquivos mensais comprimidos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias',
+            type=int,
+            default=getattr(settings, 'AUDITORIA_RETENCAO_DIAS', 365),
+            help='Manter na tabela os logs dos últimos N dias (padrão: AUDITORIA_RETENCAO_DIAS)',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=1000,
+            help='Número de logs copiados e apagados por lote (padrão: 1000)',
+        )
+        parser.add_argument(
+            '--simular',
+            action='store_true',
+            help='Apenas mostrar quantos logs seriam arquivados, sem alterar nada',
+        )
+
+    def handle(self, *args, **options):
+        if options['dias'] < 1:
+            raise CommandError('--dias deve ser maior que zero')
+
+        # Meia-noite local: um dia fica inteiro na tabela ou inteiro nos arquivos,
+        # e o resumo diário desses dias continua podendo ser reconstruído
+        limite = timezone.make_aware(
+            datetime.combine(timezone.localdate() - timedelta(days=options['dias']), time.min)
+        )
+        arquivo = ArquivoAuditoria()
+
+        if options['simular']:
+            self.stdout.write(self.style.WARNING('🔍 Modo simulação: nenhuma alteração será feita'))
+        self.stdout.write(f"📂 Pasta de arquivos: {arquivo.pasta}")
+        self.stdout.write(f"📅 Arquivando logs anteriores a {timezone.localtime(limite):%d/%m/%Y %H:%M}")
+
+        resultado = arquivo.arquivar(limite, tamanho_lote=options['lote'], simular=options['simular'])
+
+        for nome, quantidade in sorted(resultado['arquivos'].items()):
+            self.stdout.write(f"  🗜️  {nome}: {quantidade} logs")
+
+        # Resumo final
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS('📋 RESUMO DA OPERAÇÃO:'))
+        self.stdout.write(f"📦 Logs arquivados: {resultado['logs']}")
+        self.stdout.write(f"🗂️  Arquivos mensais: {len(resultado['arquivos'])}")
+        if options['simular'] and resultado['logs']:
+            self.stdout.write(self.style.WARNING('💡 Execute sem --simular para arquivar'))
+        self.stdout.write('='*50)
@@ -0,0 +1,109 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from orcamentos.busca_produtos import IndiceProdutos, buscar_produtos, trigramas_postgres
+from orcamentos.models import Produto
+
+PREFIXO = 'BENCH'
+PALAVRAS = [
+    'peinture', 'acrylique', 'glycéro', 'blanche', 'mate', 'satinée', 'brillante', 'enduit', 'lissage',
+    'rebouchage', 'sous-couche', 'impression', 'façade', 'intérieure', 'extérieure', 'bois', 'métal',
+    'plafond', 'mur', 'rouleau', 'pinceau', 'bâche', 'ruban', 'masquage', 'décapant', 'vernis', 'lasure',
+    'anti-humidité', 'fongicide', 'rénovation', 'écaillée', 'primaire', 'accrochage', 'carrelage', 'sol',
+]
+# Consultas como digitadas no editor: prefixos, referências, sem acentos
+CONSULTAS = ['pe', 'pei', 'peint', 'peinture', 'ecaillee', 'facade ext', 'sous-couche', 'BENCH-01234', 'vernis bois', 'zzz']
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede a busca de produtos com N produtos (icontains x índice de busca). '
+        'Os produtos do benchmark são desfeitos no final.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--produtos',
+            type=int,
+            default=20000,
+            help='Quantidade de produtos (padrão: 20000)',
+        )
+        parser.add_argument(
+            '--repeticoes',
+            type=int,
+            default=20,
+            help='Execuções de cada consulta (padrão: 20)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(
+            f"⏱️  Benchmark da busca de produtos com {options['produtos']} produtos..."
+        ))
+        repeticoes = options['repeticoes']
+
+        with transaction.atomic():
+            self.popular(options['produtos'])
+
+            antigo = self.medir(repeticoes, self.buscar_icontains)
+
+            inicio = time.perf_counter()
+            indice = IndiceProdutos.carregar()
+            construcao_ms = (time.perf_counter() - inicio) * 1000
+            em_memoria = self.medir(repeticoes, lambda consulta: Produto.objects.in_bulk(indice.buscar(consulta)))
+
+            postgres = self.medir(repeticoes, buscar_produtos) if trigramas_postgres() else None
+
+            # Nada do benchmark fica no banco
+            transaction.set_rollback(True)
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS('📋 RESULTADO (média por consulta):'))
+        self.stdout.write(f"🐢 icontains: {antigo['media_ms']:.2f} ms (pior: {antigo['pior_ms']:.2f} ms)")
+        self.stdout.write(
+            f"🔎 Índice em memória: {em_memoria['media_ms']:.2f} ms (pior: {em_memoria['pior_ms']:.2f} ms), "
+            f"construído em {construcao_ms:.0f} ms"
+        )
+        if postgres:
+            self.stdout.write(
+                f"🐘 Trigramas PostgreSQL: {postgres['media_ms']:.2f} ms (pior: {postgres['pior_ms']:.2f} ms)"
+            )
+        else:
+            self.stdout.write('🐘 Trigramas PostgreSQL: indisponíveis neste banco')
+        self.stdout.write('💾 Produtos do benchmark desfeitos')
+        self.stdout.write('='*50)
+
+    def popular(self, quantidade):
+        Produto.objects.bulk_create(
+            [
+                Produto(
+                    referencia=f'{PREFIXO}-{i:05d}',
+                    descricao=' '.join(random.sample(PALAVRAS, 4)).capitalize(),
+                    preco_compra=Decimal(random.randint(1, 200)),
+                    ativo=random.random() < 0.95,
+                )
+                for i in range(quantidade)
+            ],
+            batch_size=2000,
+        )
+
+    def medir(self, repeticoes, funcao):
+        tempos = []
+        for consulta in CONSULTAS:
+            inicio = time.perf_counter()
+            for _ in range(repeticoes):
+                funcao(consulta)
+            tempos.append((time.perf_counter() - inicio) * 1000 / repeticoes)
+        return {'media_ms': sum(tempos) / len(tempos), 'pior_ms': max(tempos)}
+
+    def buscar_icontains(self, consulta):
+        """Consulta feita antes por buscar_produtos_ajax"""
+        return list(
+            Produto.objects.filter(ativo=True).filter(
+                Q(referencia__icontains=consulta) | Q(descricao__icontains=consulta)
+            )[:10]
+        )
@@ -0,0 +1,171 @@
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Sum
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from orcamentos.estatisticas import EstatisticasService
+from orcamentos.models import Orcamento, SolicitacaoOrcamento, StatusOrcamento, TipoServico
+
+User = get_user_model()
+
+PREFIXO = 'BENCH'
+CHAVES_WIDGETS = [
+    f'dashboard:{nome}' for nome in ('solicitacoes', 'orcamentos', 'orfaos_vinculaveis', 'projetos_clientes')
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede as estatísticas do dashboard administrativo com N devis (consultas separadas x '
+        'agregação condicional, sem e com cache). Os dados do benchmark são removidos no final.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--devis',
+            type=int,
+            default=100000,
+            help='Quantidade de solicitações com devis (padrão: 100000)',
+        )
+        parser.add_argument(
+            '--repeticoes',
+            type=int,
+            default=5,
+            help='Execuções de cada cenário (padrão: 5)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(
+            f"⏱️  Benchmark do dashboard com {options['devis']} devis..."
+        ))
+
+        try:
+            inicio = time.perf_counter()
+            self.popular(options['devis'])
+            self.stdout.write(f"📥 Dados criados em {time.perf_counter() - inicio:.1f}s")
+
+            repeticoes = options['repeticoes']
+            antigo = self.medir(repeticoes, self.estatisticas_antigas)
+            sem_cache = self.medir(repeticoes, self.estatisticas_novas, limpar_cache=True)
+            com_cache = self.medir(repeticoes, self.estatisticas_novas)
+        finally:
+            self.remover()
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS('📋 RESULTADO (dashboard admin + get_admin_stats):'))
+        for nome, resultado in (
+            ('🐢 Consultas separadas', antigo),
+            ('📊 Agregação condicional', sem_cache),
+            ('⚡ Agregação em cache', com_cache),
+        ):
+            self.stdout.write(
+                f"{nome}: {resultado['tempo_ms']:.1f} ms, {resultado['queries']} queries"
+            )
+        self.stdout.write('🧹 Dados do benchmark removidos')
+        self.stdout.write('='*50)
+
+    def popular(self, quantidade, lote=5000):
+        """Metade das solicitações órfãs; 1 em cada 10 emails órfãos já tem conta"""
+        usuarios = User.objects.bulk_create([
+            User(username=f'{PREFIXO.lower()}.{i}@example.com', email=f'{PREFIXO.lower()}.{i}@example.com')
+            for i in range(2000)
+        ])
+        emails_orfaos = [f'{PREFIXO.lower()}.{i}@example.com' for i in range(0, 20000, 10)]
+        elaborador = usuarios[0]
+        agora = timezone.now()
+        status = [StatusOrcamento.EM_ELABORACAO, StatusOrcamento.ENVIADO, StatusOrcamento.ACEITO, StatusOrcamento.RECUSADO]
+
+        for inicio in range(0, quantidade, lote):
+            indices = range(inicio, min(inicio + lote, quantidade))
+            solicitacoes = SolicitacaoOrcamento.objects.bulk_create([
+                SolicitacaoOrcamento(
+                    numero=f'{PREFIXO}S{i:09d}',
+                    cliente=None if i % 2 else random.choice(usuarios),
+                    nome_solicitante='Benchmark',
+                    email_solicitante=random.choice(emails_orfaos),
+                    telefone_solicitante='0100000000',
+                    endereco='-',
+                    cidade='-',
+                    cep='00000',
+                    tipo_servico=TipoServico.RENOVACAO_COMPLETA,
+                    descricao_servico='Benchmark do dashboard',
+                    status=random.choice([StatusOrcamento.PENDENTE, StatusOrcamento.ENVIADO]),
+                )
+                for i in indices
+            ])
+            Orcamento.objects.bulk_create([
+                Orcamento(
+                    numero=f'{PREFIXO}D{i:09d}',
+                    solicitacao=solicitacao,
+                    elaborado_por=elaborador,
+                    titulo='Benchmark',
+                    descricao='Benchmark do dashboard',
+                    total=Decimal(random.randint(500, 20000)),
+                    prazo_execucao=10,
+                    validade_orcamento=date.today() + timedelta(days=30),
+                    status=random.choice(status),
+                    data_resposta_cliente=agora - timedelta(days=random.randint(0, 365)),
+                )
+                for i, solicitacao in zip(indices, solicitacoes)
+            ])
+
+    def remover(self):
+        # Exclusão direta: os registros do benchmark não têm dependentes
+        Orcamento.objects.filter(numero__startswith=f'{PREFIXO}D')._raw_delete(Orcamento.objects.db)
+        SolicitacaoOrcamento.objects.filter(numero__startswith=f'{PREFIXO}S')._raw_delete(
+            SolicitacaoOrcamento.objects.db
+        )
+        User.objects.filter(username__startswith=f'{PREFIXO.lower()}.').delete()
+        cache.delete_many(CHAVES_WIDGETS)
+
+    def medir(self, repeticoes, funcao, limpar_cache=False):
+        tempos = []
+        consultas = 0
+        for _ in range(repeticoes):
+            if limpar_cache:
+                cache.delete_many(CHAVES_WIDGETS)
+            connection.queries_log.clear()
+            with CaptureQueriesContext(connection) as capturadas:
+                inicio = time.perf_counter()
+                funcao()
+                tempos.append(time.perf_counter() - inicio)
+            consultas = len(capturadas)
+        return {'tempo_ms': sum(tempos) * 1000 / len(tempos), 'queries': consultas}
+
+    def estatisticas_novas(self):
+        from orcamentos.views import get_admin_stats
+
+        EstatisticasService.solicitacoes()
+        EstatisticasService.orcamentos()
+        EstatisticasService.orfaos_vinculaveis()
+        get_admin_stats()
+
+    def estatisticas_antigas(self):
+        """Reprodução das consultas feitas antes pelo admin_dashboard e por get_admin_stats"""
+        from orcamentos.models import Projeto
+
+        SolicitacaoOrcamento.objects.count()
+        SolicitacaoOrcamento.objects.filter(status=StatusOrcamento.PENDENTE).count()
+        Orcamento.objects.filter(status=StatusOrcamento.ENVIADO).count()
+        Orcamento.objects.filter(status=StatusOrcamento.ACEITO).count()
+        orfas = SolicitacaoOrcamento.objects.filter(cliente__isnull=True)
+        orfas.count()
+        emails = set(orfas.values_list('email_solicitante', flat=True))
+        sum(1 for email in emails if User.objects.filter(email__iexact=email).exists())
+        Orcamento.objects.filter(
+            status=StatusOrcamento.ACEITO,
+            data_resposta_cliente__month=timezone.now().month
+        ).aggregate(Sum('total'))
+
+        Projeto.objects.count()
+        Projeto.objects.values('cliente').distinct().count()
+        SolicitacaoOrcamento.objects.filter(status=StatusOrcamento.PENDENTE).count()
+        Orcamento.objects.filter(status=StatusOrcamento.ACEITO).aggregate(Sum('total'))
@@ -0,0 +1,157 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from orcamentos.models import Notificacao, TipoNotificacao
+from orcamentos.retencao_notificacoes import limpar_notificacoes
+from orcamentos.services import NotificationService
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede a consulta de polling, o fan-out para os admins e a retenção com N notificações '
+        'na tabela. Tudo é desfeito no final.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--notificacoes',
+            type=int,
+            default=1000000,
+            help='Quantidade de notificações existentes (padrão: 1000000)',
+        )
+        parser.add_argument(
+            '--usuarios',
+            type=int,
+            default=2000,
+            help='Usuários entre os quais as notificações são distribuídas (padrão: 2000)',
+        )
+        parser.add_argument(
+            '--admins',
+            type=int,
+            default=50,
+            help='Destinatários do fan-out (padrão: 50)',
+        )
+        parser.add_argument(
+            '--dias',
+            type=int,
+            default=90,
+            help='Retenção usada na medição da limpeza (padrão: 90)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(
+            f"⏱️  Benchmark de notificações com {options['notificacoes']} linhas..."
+        ))
+
+        with transaction.atomic():
+            usuarios = self.criar_usuarios(options['usuarios'], options['admins'])
+            inicio = time.perf_counter()
+            self.popular(usuarios, options['notificacoes'])
+            self.stdout.write(f"📥 Tabela populada em {time.perf_counter() - inicio:.1f}s")
+
+            polling = self.medir_polling(random.sample(usuarios, min(200, len(usuarios))))
+            admins = usuarios[:options['admins']]
+            individual = self.medir_fan_out(admins, em_lote=False)
+            em_lote = self.medir_fan_out(admins, em_lote=True)
+
+            inicio = time.perf_counter()
+            limpeza = limpar_notificacoes(timezone.now() - timedelta(days=options['dias']))
+            segundos_limpeza = time.perf_counter() - inicio
+
+            # Nada do benchmark fica no banco
+            transaction.set_rollback(True)
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS('📋 RESULTADO:'))
+        self.stdout.write(
+            f"🔔 Polling (10 não lidas + COUNT): {polling['tempo_ms']:.3f} ms em média, "
+            f"índice {'usado' if polling['indice'] else 'NÃO usado'}"
+        )
+        self.stdout.write(
+            f"👥 Fan-out para {len(admins)} admins: {individual['tempo_ms']:.1f} ms / "
+            f"{individual['queries']} queries (um create por admin) x "
+            f"{em_lote['tempo_ms']:.1f} ms / {em_lote['queries']} queries (bulk_create)"
+        )
+        self.stdout.write(
+            f"🗑️  Retenção: {limpeza['notificacoes']} lidas removidas em {segundos_limpeza:.1f}s "
+            f"({limpeza['notificacoes'] / max(segundos_limpeza, 0.001):.0f}/s)"
+        )
+        self.stdout.write('💾 Alterações do benchmark desfeitas')
+        self.stdout.write('='*50)
+
+    def criar_usuarios(self, quantidade, admins):
+        User.objects.bulk_create(
+            [
+                User(
+                    username=f'benchmark.notificacoes.{i}@example.com',
+                    email=f'benchmark.notificacoes.{i}@example.com',
+                    is_staff=i < admins,
+                )
+                for i in range(quantidade)
+            ],
+            batch_size=1000,
+        )
+        return list(User.objects.filter(username__startswith='benchmark.notificacoes.').order_by('pk'))
+
+    def popular(self, usuarios, quantidade, lote=10000):
+        """Notificações espalhadas no último ano; metade lidas"""
+        agora = timezone.now()
+        campo = Notificacao._meta.get_field('created_at')
+        # created_at é auto_now_add: desligar para gravar datas no passado
+        campo.auto_now_add = False
+        try:
+            for inicio in range(0, quantidade, lote):
+                notificacoes = []
+                for _ in range(min(lote, quantidade - inicio)):
+                    criada = agora - timedelta(minutes=random.randint(0, 365 * 24 * 60))
+                    lida = random.random() < 0.5
+                    notificacoes.append(Notificacao(
+                        usuario=random.choice(usuarios),
+                        tipo=TipoNotificacao.ORCAMENTO_ENVIADO,
+                        titulo='Benchmark',
+                        mensagem='Benchmark de notificações',
+                        lida=lida,
+                        created_at=criada,
+                        read_at=criada + timedelta(hours=1) if lida else None,
+                    ))
+                Notificacao.objects.bulk_create(notificacoes, batch_size=2000)
+        finally:
+            campo.auto_now_add = True
+
+    def medir_polling(self, usuarios):
+        inicio = time.perf_counter()
+        for usuario in usuarios:
+            nao_lidas = Notificacao.objects.filter(usuario=usuario, lida=False)
+            list(nao_lidas.order_by('-created_at')[:10])
+            nao_lidas.count()
+        tempo_ms = (time.perf_counter() - inicio) * 1000 / len(usuarios)
+
+        plano = Notificacao.objects.filter(usuario=usuarios[0], lida=False).order_by('-created_at')[:10].explain()
+        return {'tempo_ms': tempo_ms, 'indice': 'notificacao_nao_lidas_idx' in plano}
+
+    def medir_fan_out(self, admins, em_lote):
+        argumentos = {
+            'tipo': TipoNotificacao.NOVA_SOLICITACAO,
+            'titulo': 'Nouvelle demande de devis',
+            'mensagem': 'Benchmark de fan-out',
+        }
+        # Com DEBUG o log de queries é limitado: esvaziar antes de contar
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as consultas:
+            inicio = time.perf_counter()
+            if em_lote:
+                NotificationService.notificar_usuarios(admins, **argumentos)
+            else:
+                for admin in admins:
+                    NotificationService.criar_notificacao(admin, **argumentos)
+            tempo_ms = (time.perf_counter() - inicio) * 1000
+        return {'tempo_ms': tempo_ms, 'queries': len(consultas)}
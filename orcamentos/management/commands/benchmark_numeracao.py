@@ -0,0 +1,140 @@
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from orcamentos.models import (
+    SolicitacaoOrcamento, Orcamento, AcompteOrcamento, TipoServico
+)
+from orcamentos.numeracao import NumeracaoService
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede o custo de alocação de números de documentos com N documentos já existentes '
+        '(sorteio antigo x contador sequencial). Tudo é desfeito no final.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--documentos',
+            type=int,
+            default=50000,
+            help='Quantidade de acomptes existentes no ano (padrão: 50000)',
+        )
+        parser.add_argument(
+            '--amostras',
+            type=int,
+            default=500,
+            help='Quantidade de números alocados em cada cenário (padrão: 500)',
+        )
+
+    def handle(self, *args, **options):
+        documentos = options['documentos']
+        amostras = options['amostras']
+        ano = timezone.now().year
+
+        # O sorteio antigo usava 5 dígitos (10000-99999): 90 000 números por ano
+        if documentos + amostras > 90000:
+            raise CommandError('O formato antigo só comporta 90 000 números por ano')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'⏱️  Benchmark de numeração com {documentos} documentos existentes...'
+        ))
+
+        with transaction.atomic():
+            orcamento = self.criar_orcamento()
+            self.popular_acomptes(orcamento, documentos, ano)
+
+            antigo = self.medir(amostras, lambda: self.numero_aleatorio(ano))
+            sequencial = self.medir(
+                amostras, lambda: NumeracaoService.proximo_numero('AC', AcompteOrcamento)
+            )
+
+            # Nada do benchmark fica no banco
+            transaction.set_rollback(True)
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS('📋 RESULTADO (por número alocado):'))
+        self.stdout.write(
+            f"🎲 Sorteio + exists(): {antigo['tempo_ms']:.3f} ms, "
+            f"{antigo['queries']:.2f} queries em média (máx. {antigo['max_queries']})"
+        )
+        self.stdout.write(
+            f"🔢 Contador sequencial: {sequencial['tempo_ms']:.3f} ms, "
+            f"{sequencial['queries']:.2f} queries em média (máx. {sequencial['max_queries']})"
+        )
+        self.stdout.write('💾 Alterações do benchmark desfeitas')
+        self.stdout.write('='*50)
+
+    def criar_orcamento(self):
+        usuario = User.objects.create_user(
+            username='benchmark.numeracao@example.com',
+            email='benchmark.numeracao@example.com',
+            password=None,
+        )
+        solicitacao = SolicitacaoOrcamento.objects.create(
+            nome_solicitante='Benchmark',
+            email_solicitante=usuario.email,
+            telefone_solicitante='0100000000',
+            endereco='-',
+            cidade='-',
+            cep='00000',
+            tipo_servico=TipoServico.RENOVACAO_COMPLETA,
+            descricao_servico='Benchmark de numeração'
+        )
+        return Orcamento.objects.create(
+            solicitacao=solicitacao,
+            elaborado_por=usuario,
+            titulo='Benchmark',
+            descricao='Benchmark de numeração',
+            validade_orcamento=date.today() + timedelta(days=30)
+        )
+
+    def popular_acomptes(self, orcamento, documentos, ano):
+        """Insere acomptes com números sorteados, como os gerados pelo formato antigo"""
+        sufixos = random.sample(range(10000, 100000), documentos)
+        acomptes = (
+            AcompteOrcamento(
+                numero=f"AC{ano}{sufixo}",
+                orcamento=orcamento,
+                criado_por=orcamento.elaborado_por,
+                descricao='Benchmark',
+                valor_ht=Decimal('1.00'),
+                valor_ttc=Decimal('1.20'),
+                data_vencimento=date.today()
+            )
+            for sufixo in sufixos
+        )
+        AcompteOrcamento.objects.bulk_create(acomptes, batch_size=2000)
+
+    def numero_aleatorio(self, ano):
+        """Reprodução do gerar_numero antigo (sorteio com verificação de existência)"""
+        while True:
+            numero = f"AC{ano}{random.randint(10000, 99999)}"
+            if not AcompteOrcamento.objects.filter(numero=numero).exists():
+                return numero
+
+    def medir(self, amostras, alocar):
+        tempo_total = 0.0
+        queries = []
+        for _ in range(amostras):
+            with CaptureQueriesContext(connection) as contexto:
+                inicio = time.perf_counter()
+                alocar()
+                tempo_total += time.perf_counter() - inicio
+            queries.append(len(contexto.captured_queries))
+
+        return {
+            'tempo_ms': tempo_total * 1000 / amostras,
+            'queries': sum(queries) / amostras,
+            'max_queries': max(queries),
+        }
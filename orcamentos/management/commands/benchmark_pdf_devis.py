@@ -0,0 +1,133 @@
+import time
+import tracemalloc
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from orcamentos.documentos import DocumentoService, valores_empresa
+from orcamentos.models import (
+    SolicitacaoOrcamento, Orcamento, ItemOrcamento, TipoServico, TipoTVA, TipoUnidade
+)
+from orcamentos.pdf_generator import LINHAS_POR_TABELA, OrcamentoPDFGenerator
+from system_config.models import CompanySettings
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede tempo e pico de memória da geração do PDF de devis com N linhas '
+        '(tabela de itens única x tabelas em blocos). Nada é gravado no banco.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--linhas',
+            type=int,
+            nargs='+',
+            default=[50, 500, 2000],
+            help='Quantidades de itens do devis (padrão: 50 500 2000)',
+        )
+        parser.add_argument(
+            '--linhas-por-tabela',
+            type=int,
+            default=LINHAS_POR_TABELA,
+            help=f'Tamanho dos blocos no modo em blocos (padrão: {LINHAS_POR_TABELA})',
+        )
+
+    def handle(self, *args, **options):
+        if any(linhas < 1 for linhas in options['linhas']) or options['linhas_por_tabela'] < 1:
+            raise CommandError('As quantidades devem ser maiores que zero')
+
+        modos = [
+            ('📄 Tabela única', None),
+            ('📑 Em blocos', options['linhas_por_tabela']),
+        ]
+
+        resultados = []
+        for linhas in options['linhas']:
+            orcamento, modelo = self.devis_ficticio(linhas)
+            self.stdout.write(self.style.SUCCESS(f"⏱️  Devis com {linhas} linhas..."))
+            for nome, linhas_por_tabela in modos:
+                medicao = self.medir(OrcamentoPDFGenerator(linhas_por_tabela), orcamento, modelo)
+                resultados.append((linhas, nome, medicao))
+                self.stdout.write(
+                    f"  {nome}: {medicao['segundos']:.2f}s, pico {medicao['pico_mb']:.1f} MB"
+                )
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS('📋 RESULTADO:'))
+        for linhas, nome, medicao in resultados:
+            self.stdout.write(
+                f"{linhas:>6} linhas | {nome}: {medicao['segundos']:.2f}s, "
+                f"pico {medicao['pico_mb']:.1f} MB, PDF {medicao['tamanho_kb']:.0f} KB"
+            )
+        self.stdout.write('='*50)
+
+    def devis_ficticio(self, linhas):
+        """Devis e modelo de documento montados só em memória"""
+        solicitacao = SolicitacaoOrcamento(
+            nome_solicitante='Benchmark',
+            email_solicitante='benchmark@example.com',
+            telefone_solicitante='0100000000',
+            endereco='1 Rue du Benchmark',
+            cidade='Toulouse',
+            cep='31000',
+            tipo_servico=TipoServico.RENOVACAO_COMPLETA,
+            descricao_servico='Ravalement de façade'
+        )
+        orcamento = Orcamento(
+            solicitacao=solicitacao,
+            numero='DEV-BENCHMARK',
+            titulo='Ravalement de façade',
+            descricao='Benchmark de geração de PDF',
+            prazo_execucao=30,
+            validade_orcamento=date.today() + timedelta(days=30),
+            data_elaboracao=timezone.now()
+        )
+
+        unidades = [TipoUnidade.M2, TipoUnidade.ML, TipoUnidade.PIECE, TipoUnidade.FORFAIT]
+        itens = []
+        for i in range(linhas):
+            item = ItemOrcamento(
+                orcamento=orcamento,
+                referencia=f"FAC-{i:04d}",
+                descricao=f"Façade {i // 20 + 1} - élément {i % 20 + 1} : préparation, enduit et 2 couches de peinture",
+                unidade=unidades[i % len(unidades)],
+                quantidade=Decimal('12.50'),
+                preco_unitario_ht=Decimal('18.90'),
+                taxa_tva=TipoTVA.TVA_20
+            )
+            item.calcular_valores()
+            itens.append(item)
+
+        linhas_modelo = DocumentoService._calcular_linhas(itens)
+        orcamento.subtotal = orcamento.total = linhas_modelo['subtotal_ht']
+        orcamento.total_ttc = linhas_modelo['total_ttc']
+
+        modelo = {
+            'items_data': linhas_modelo['items_data'],
+            'acomptes': [],
+            'total_acomptes_ttc': Decimal('0.00'),
+            'empresa': valores_empresa(CompanySettings()),
+        }
+        return orcamento, modelo
+
+    def medir(self, gerador, orcamento, modelo):
+        # Tempo sem tracemalloc (que deixa a geração bem mais lenta), depois o pico de memória
+        inicio = time.perf_counter()
+        conteudo = gerador.generate_pdf(orcamento, modelo=modelo)
+        segundos = time.perf_counter() - inicio
+
+        tracemalloc.start()
+        try:
+            gerador.generate_pdf(orcamento, modelo=modelo)
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'segundos': segundos,
+            'pico_mb': pico / (1024 * 1024),
+            'tamanho_kb': len(conteudo) / 1024,
+        }
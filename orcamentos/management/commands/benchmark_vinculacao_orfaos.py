@@ -0,0 +1,120 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from orcamentos.auditoria import AuditoriaManager
+from orcamentos.models import SolicitacaoOrcamento, TipoServico
+from orcamentos.vinculacao_orfaos import VinculadorOrfaos, anotar_contas, solicitacoes_orfas
+
+User = get_user_model()
+
+PREFIXO = 'BENCHV'
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede a vinculação de N solicitações órfãs (uma consulta e um save por linha x '
+        'VinculadorOrfaos). Tudo é desfeito no final.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--orfas',
+            type=int,
+            default=20000,
+            help='Quantidade de solicitações órfãs (padrão: 20000)',
+        )
+        parser.add_argument(
+            '--usuarios',
+            type=int,
+            default=5000,
+            help='Contas existentes; metade dos emails órfãos tem conta (padrão: 5000)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(
+            f"⏱️  Benchmark da vinculação com {options['orfas']} solicitações órfãs..."
+        ))
+
+        with transaction.atomic():
+            self.popular(options['orfas'], options['usuarios'])
+
+            plano = anotar_contas(solicitacoes_orfas()).values('pk', 'conta_id')[:1].explain()
+            indice = 'user_email_lower_idx' in plano
+
+            ponto = transaction.savepoint()
+            antigo = self.medir(self.vincular_por_linha)
+            transaction.savepoint_rollback(ponto)
+            novo = self.medir(lambda: VinculadorOrfaos(origem='benchmark').vincular()['vinculadas'])
+
+            # Nada do benchmark fica no banco
+            transaction.set_rollback(True)
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS('📋 RESULTADO:'))
+        for nome, resultado in (('🐢 Por linha', antigo), ('🔗 Em lotes', novo)):
+            self.stdout.write(
+                f"{nome}: {resultado['vinculadas']} vinculadas em {resultado['tempo_ms']:.0f} ms, "
+                f"{resultado['queries']} queries"
+            )
+        self.stdout.write(f"📇 Índice Lower(email) das contas {'usado' if indice else 'NÃO usado'}")
+        self.stdout.write('💾 Alterações do benchmark desfeitas')
+        self.stdout.write('='*50)
+
+    def popular(self, orfas, usuarios):
+        User.objects.bulk_create(
+            [
+                User(username=f'{PREFIXO.lower()}.{i}@example.com', email=f'{PREFIXO.lower()}.{i}@example.com')
+                for i in range(usuarios)
+            ],
+            batch_size=1000,
+        )
+        # Emails com maiúsculas diferentes das contas; os ímpares acima de `usuarios` não têm conta
+        SolicitacaoOrcamento.objects.bulk_create(
+            [
+                SolicitacaoOrcamento(
+                    numero=f'{PREFIXO}{i:09d}',
+                    nome_solicitante='Benchmark',
+                    email_solicitante=f'{PREFIXO}.{i % (usuarios * 2)}@Example.com',
+                    telefone_solicitante='0100000000',
+                    endereco='-',
+                    cidade='-',
+                    cep='00000',
+                    tipo_servico=TipoServico.RENOVACAO_COMPLETA,
+                    descricao_servico='Benchmark da vinculação',
+                )
+                for i in range(orfas)
+            ],
+            batch_size=2000,
+        )
+
+    def medir(self, funcao):
+        # Contador próprio: o log de queries do DEBUG guarda no máximo 9000
+        consultas = []
+
+        def contar(execute, sql, params, many, context):
+            consultas.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(contar):
+            inicio = time.perf_counter()
+            vinculadas = funcao()
+            tempo_ms = (time.perf_counter() - inicio) * 1000
+        return {'tempo_ms': tempo_ms, 'queries': len(consultas), 'vinculadas': vinculadas}
+
+    def vincular_por_linha(self):
+        """Reprodução do laço antigo do comando vincular_orcamentos_orfaos"""
+        vinculadas = 0
+        for solicitacao in SolicitacaoOrcamento.objects.filter(cliente__isnull=True):
+            usuarios = User.objects.filter(email__iexact=solicitacao.email_solicitante)
+            if usuarios.exists():
+                usuario = usuarios.first()
+                AuditoriaManager.registrar_vinculacao_orcamento_orfao(
+                    usuario=usuario, solicitacao=solicitacao, origem='benchmark'
+                )
+                solicitacao.cliente = usuario
+                solicitacao.save()
+                vinculadas += 1
+        return vinculadas
@@ -0,0 +1,86 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from orcamentos.arquivo_auditoria import ArquivoAuditoria
+from orcamentos.auditoria import EstatisticaAuditoriaDiaria, LogAuditoria
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói o resumo diário da auditoria (EstatisticaAuditoriaDiaria) a partir dos logs brutos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--desde',
+            help='Primeiro dia a reconstruir (AAAA-MM-DD). Padrão: dia do log mais antigo',
+        )
+        parser.add_argument(
+            '--ate',
+            help='Último dia a reconstruir (AAAA-MM-DD). Padrão: hoje',
+        )
+        parser.add_argument(
+            '--dias-por-lote',
+            type=int,
+            default=31,
+            help='Quantidade de dias reconstruídos por transação (padrão: 31)',
+        )
+
+    def handle(self, *args, **options):
+        desde = self._data(options['desde'], '--desde')
+        ate = self._data(options['ate'], '--ate') or timezone.localdate()
+        dias_por_lote = max(1, options['dias_por_lote'])
+
+        if desde is None:
+            limites = LogAuditoria.objects.aggregate(inicio=Min('timestamp'), fim=Max('timestamp'))
+            if limites['inicio'] is None:
+                self.stdout.write(self.style.WARNING('⚠️  Nenhum log de auditoria encontrado'))
+                return
+            desde = timezone.localdate(limites['inicio'])
+
+        # Os logs dos dias arquivados saíram da tabela: reconstruí-los apagaria o resumo
+        primeiro_dia = ArquivoAuditoria().primeiro_dia_completo()
+        if primeiro_dia is not None and desde < primeiro_dia:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️  Logs arquivados até {primeiro_dia - timedelta(days=1):%d/%m/%Y}: "
+                f"reconstruindo a partir de {primeiro_dia:%d/%m/%Y}"
+            ))
+            desde = primeiro_dia
+            if desde > ate:
+                self.stdout.write(self.style.WARNING('⚠️  Nenhum dia a reconstruir após o arquivamento'))
+                return
+
+        if desde > ate:
+            raise CommandError('--desde deve ser anterior a --ate')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"🔄 Reconstruindo resumo diário de {desde:%d/%m/%Y} a {ate:%d/%m/%Y}..."
+        ))
+
+        total_buckets = 0
+        lotes = 0
+        inicio = desde
+        while inicio <= ate:
+            fim = min(inicio + timedelta(days=dias_por_lote - 1), ate)
+            gravados = EstatisticaAuditoriaDiaria.reconstruir(inicio, fim)
+            total_buckets += gravados
+            lotes += 1
+            self.stdout.write(f"  📅 {inicio:%d/%m/%Y} - {fim:%d/%m/%Y}: {gravados} buckets")
+            inicio = fim + timedelta(days=1)
+
+        # Resumo final
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS('📋 RESUMO DA OPERAÇÃO:'))
+        self.stdout.write(f"📆 Dias reconstruídos: {(ate - desde).days + 1}")
+        self.stdout.write(f"📦 Lotes: {lotes}")
+        self.stdout.write(f"📊 Buckets gravados: {total_buckets}")
+        self.stdout.write('='*50)
+
+    def _data(self, valor, opcao):
+        if not valor:
+            return None
+        try:
+            return date.fromisoformat(valor)
+        except ValueError:
+            raise CommandError(f"{opcao}: data inválida '{valor}' (use AAAA-MM-DD)")
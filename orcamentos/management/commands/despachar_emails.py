@@ -0,0 +1,97 @@
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from orcamentos.fila_emails import despachar_lote, limpar_enviados, profundidade_fila
+from utils.emails.sistema_email import close_pooled_connection
+
+
+class Command(BaseCommand):
+    help = (
+        'Worker da fila de saída de emails: reserva lotes, envia numa conexão SMTP '
+        'reutilizada e reagenda as falhas com espera exponencial'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--uma-vez',
+            action='store_true',
+            help='Esvazia os emails prontos e termina (para cron)',
+        )
+        parser.add_argument('--lote', type=int, help='Emails por lote (padrão: EMAIL_BATCH_SIZE)')
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            help='Segundos de espera com a fila vazia (padrão: EMAIL_OUTBOX_INTERVALO)',
+        )
+        parser.add_argument(
+            '--status',
+            action='store_true',
+            help='Apenas mostra a profundidade da fila',
+        )
+        parser.add_argument(
+            '--limpar-dias',
+            type=int,
+            help='Apaga antes os emails enviados há mais de N dias',
+        )
+
+    def handle(self, *args, **options):
+        if options['status']:
+            self.mostrar_fila()
+            return
+
+        if options['limpar_dias']:
+            apagados = limpar_enviados(options['limpar_dias'])
+            self.stdout.write(f"🧹 {apagados} email(s) enviado(s) removido(s) da fila")
+
+        intervalo = options['intervalo'] or getattr(settings, 'EMAIL_OUTBOX_INTERVALO', 2.0)
+        self._parar = False
+        if not options['uma_vez']:
+            signal.signal(signal.SIGTERM, self.parar)
+            signal.signal(signal.SIGINT, self.parar)
+            self.stdout.write(self.style.SUCCESS(f"📮 Worker de emails iniciado (intervalo {intervalo}s)"))
+
+        enviados = falhas = 0
+        inicio = time.perf_counter()
+        try:
+            while not self._parar:
+                resultado = despachar_lote(options['lote'])
+                enviados += resultado['enviados']
+                falhas += resultado['falhas']
+                if resultado['enviados'] or resultado['falhas']:
+                    self.stdout.write(
+                        f"📤 Lote: {resultado['enviados']} enviado(s), {resultado['falhas']} falha(s)"
+                    )
+                    continue
+                if options['uma_vez']:
+                    break
+                # Fila vazia: fechar a conexão em vez de deixá-la ociosa
+                close_pooled_connection()
+                time.sleep(intervalo)
+        finally:
+            close_pooled_connection()
+
+        segundos = time.perf_counter() - inicio
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS('📋 RESUMO DA OPERAÇÃO:'))
+        self.stdout.write(f"✅ Enviados: {enviados}")
+        self.stdout.write(f"❌ Falhas (reagendadas ou descartadas): {falhas}")
+        if enviados:
+            self.stdout.write(f"⏱️  {enviados / segundos:.1f} emails/s")
+        self.stdout.write('='*50)
+        self.mostrar_fila()
+
+    def mostrar_fila(self):
+        fila = profundidade_fila()
+        self.stdout.write(
+            f"📊 Fila: {fila['pendentes']} pendente(s) ({fila['prontos']} pronto(s) para envio), "
+            f"{fila['enviando']} em envio, {fila['falhas']} em falha definitiva"
+        )
+        if fila['idade_segundos']:
+            self.stdout.write(f"⏳ Email mais antigo aguardando há {fila['idade_segundos']:.0f}s")
+
+    def parar(self, *args):
+        self.stdout.write(self.style.WARNING('⏹️  Encerrando após o lote atual...'))
+        self._parar = True
@@ -0,0 +1,108 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from orcamentos.exportacao import ExportacaoDocumentos
+from orcamentos.models import Facture, Orcamento
+
+
+class Command(BaseCommand):
+    help = 'Exporta devis (PDF) e factures de um período num arquivo ZIP, renderizando em paralelo'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tipo',
+            choices=['devis', 'factures', 'todos'],
+            default='factures',
+            help='Documentos exportados (padrão: factures)',
+        )
+        parser.add_argument(
+            '--desde',
+            help='Primeiro dia do período (AAAA-MM-DD): emissão das factures, elaboração dos devis',
+        )
+        parser.add_argument(
+            '--ate',
+            help='Último dia do período (AAAA-MM-DD)',
+        )
+        parser.add_argument(
+            '--status',
+            help='Exportar apenas documentos com este status',
+        )
+        parser.add_argument(
+            '--saida',
+            help='Arquivo ZIP gerado (padrão: documentos_AAAAMMDD.zip)',
+        )
+        parser.add_argument(
+            '--processos',
+            type=int,
+            default=None,
+            help='Processos de renderização (padrão: PDF_EXPORTACAO_PROCESSOS ou um por CPU)',
+        )
+
+    def handle(self, *args, **options):
+        desde = self._data(options['desde'], '--desde')
+        ate = self._data(options['ate'], '--ate')
+        if desde and ate and desde > ate:
+            raise CommandError('--desde deve ser anterior a --ate')
+
+        devis = Orcamento.objects.none()
+        factures = Facture.objects.none()
+        if options['tipo'] in ('devis', 'todos'):
+            devis = Orcamento.objects.select_related('solicitacao').order_by('numero')
+            if desde:
+                devis = devis.filter(data_elaboracao__date__gte=desde)
+            if ate:
+                devis = devis.filter(data_elaboracao__date__lte=ate)
+            if options['status']:
+                devis = devis.filter(status=options['status'])
+        if options['tipo'] in ('factures', 'todos'):
+            factures = Facture.objects.select_related(
+                'cliente', 'cliente__profile', 'orcamento', 'orcamento__solicitacao'
+            ).order_by('numero')
+            if desde:
+                factures = factures.filter(data_emissao__gte=desde)
+            if ate:
+                factures = factures.filter(data_emissao__lte=ate)
+            if options['status']:
+                factures = factures.filter(status=options['status'])
+
+        total_devis = devis.count()
+        total_factures = factures.count()
+        if not total_devis and not total_factures:
+            self.stdout.write(self.style.WARNING('⚠️  Nenhum documento encontrado para os filtros informados'))
+            return
+
+        saida = options['saida'] or f"documentos_{timezone.localdate():%Y%m%d}.zip"
+        exportacao = ExportacaoDocumentos(processos=options['processos'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"🖨️  Exportando {total_devis} devis e {total_factures} factures com {exportacao.processos} processo(s)..."
+        ))
+
+        estatisticas = exportacao.gravar_zip(
+            saida,
+            devis=devis.iterator(chunk_size=100),
+            factures=factures.iterator(chunk_size=100),
+        )
+
+        # Resumo final
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS('📋 RESUMO DA OPERAÇÃO:'))
+        self.stdout.write(f"📦 Arquivo: {saida}")
+        self.stdout.write(f"📄 Documentos: {estatisticas['documentos']}")
+        self.stdout.write(f"♻️  Reaproveitados do cache: {estatisticas['do_cache']}")
+        self.stdout.write(f"🖨️  Renderizados: {estatisticas['renderizados']}")
+        self.stdout.write(f"💾 Tamanho dos documentos: {estatisticas['bytes'] / (1024 * 1024):.1f} MB")
+        self.stdout.write(
+            f"⏱️  Tempo: {estatisticas['segundos']:.1f}s ({exportacao.documentos_por_segundo:.1f} documentos/s)"
+        )
+        self.stdout.write('='*50)
+
+    def _data(self, valor, opcao):
+        if not valor:
+            return None
+        try:
+            return date.fromisoformat(valor)
+        except ValueError:
+            raise CommandError(f"{opcao}: data inválida '{valor}' (use AAAA-MM-DD)")
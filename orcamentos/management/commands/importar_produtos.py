@@ -0,0 +1,103 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from orcamentos import importacao_produtos
+from orcamentos.models import Fornecedor
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa a tabela de preços de um fornecedor (CSV ou XLSX): cria ou atualiza '
+        'os produtos pela referência, em lotes, com os preços de venda recalculados'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help='Caminho do arquivo CSV ou XLSX')
+        parser.add_argument(
+            '--fornecedor',
+            required=True,
+            help='Id ou nome do fornecedor dono da tabela',
+        )
+        parser.add_argument(
+            '--formato',
+            choices=['csv', 'xlsx'],
+            help='Formato do arquivo (padrão: pela extensão)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Executar sem fazer alterações (apenas mostrar as diferenças)',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=1000,
+            help='Produtos gravados por bulk_create/bulk_update (padrão: 1000)',
+        )
+        parser.add_argument(
+            '--detalhes',
+            type=int,
+            default=50,
+            help='Diferenças exibidas produto a produto (padrão: 50)',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        try:
+            fornecedor = importacao_produtos.encontrar_fornecedor(options['fornecedor'])
+        except (Fornecedor.DoesNotExist, Fornecedor.MultipleObjectsReturned):
+            raise CommandError(f"Fornecedor não encontrado: {options['fornecedor']}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"📥 Importando {options['arquivo']} para o fornecedor {fornecedor.nome}..."
+        ))
+
+        importador = importacao_produtos.ImportadorProdutos(
+            fornecedor,
+            tamanho_lote=options['lote'],
+            simular=dry_run,
+            ao_processar_lote=self.exibir_lote,
+        )
+        try:
+            with open(options['arquivo'], 'rb') as arquivo:
+                resultado = importador.importar(arquivo, formato=options['formato'], nome=options['arquivo'])
+        except OSError as e:
+            raise CommandError(f"Erro ao abrir o arquivo: {e}")
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        alteracoes = resultado['alteracoes']
+        if alteracoes and options['detalhes']:
+            self.stdout.write('\n🔎 Diferenças:')
+            for alteracao in alteracoes[:options['detalhes']]:
+                marcador = '🆕' if alteracao['novo'] else '✏️ '
+                campos = ', '.join(
+                    f"{rotulo}: {antes if antes is not None else '—'} → {depois}"
+                    for rotulo, antes, depois in importacao_produtos.descrever(alteracao)
+                )
+                self.stdout.write(f"{marcador} Linha {alteracao['linha']} {alteracao['referencia']}: {campos}")
+            if len(alteracoes) > options['detalhes']:
+                self.stdout.write(f"   ... e mais {len(alteracoes) - options['detalhes']} produto(s)")
+
+        for linha, referencia, mensagem in resultado['erros']:
+            self.stdout.write(self.style.ERROR(f"❌ Linha {linha} {referencia}: {mensagem}"))
+
+        # Resumo final
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS('📋 RESUMO DA OPERAÇÃO:'))
+        self.stdout.write(f"📄 Linhas lidas: {resultado['linhas']}")
+        self.stdout.write(f"🆕 Produtos criados: {resultado['criados']}")
+        self.stdout.write(f"✏️  Produtos atualizados: {resultado['atualizados']}")
+        self.stdout.write(f"➖ Produtos inalterados: {resultado['inalterados']}")
+        self.stdout.write(f"❌ Linhas com erro: {len(resultado['erros'])}")
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING('⚠️  MODO DRY-RUN: Nenhuma alteração foi feita no banco de dados'))
+            self.stdout.write('💡 Execute novamente sem --dry-run para aplicar as alterações')
+
+        self.stdout.write('='*50)
+
+    def exibir_lote(self, resultado, primeira_linha, ultima_linha):
+        self.stdout.write(
+            f"📦 Linhas {primeira_linha}..{ultima_linha}: "
+            f"{resultado['criados']} novos, {resultado['atualizados']} atualizados até aqui"
+        )
@@ -0,0 +1,69 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from orcamentos.retencao_notificacoes import limpar_notificacoes, pasta_arquivo
+
+
+class Command(BaseCommand):
+    help = 'Remove em lotes as notificações lidas há mais tempo que o período de retenção'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias',
+            type=int,
+            default=getattr(settings, 'NOTIFICACOES_RETENCAO_DIAS', 90),
+            help='Manter as notificações lidas nos últimos N dias (padrão: NOTIFICACOES_RETENCAO_DIAS)',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=5000,
+            help='Número de notificações apagadas por lote (padrão: 5000)',
+        )
+        parser.add_argument(
+            '--arquivar',
+            action='store_true',
+            help='Copiar as notificações para arquivos mensais .jsonl.gz antes de apagar',
+        )
+        parser.add_argument(
+            '--simular',
+            action='store_true',
+            help='Apenas mostrar quantas notificações seriam removidas, sem alterar nada',
+        )
+
+    def handle(self, *args, **options):
+        if options['dias'] < 1:
+            raise CommandError('--dias deve ser maior que zero')
+
+        limite = timezone.now() - timezone.timedelta(days=options['dias'])
+
+        if options['simular']:
+            self.stdout.write(self.style.WARNING('🔍 Modo simulação: nenhuma alteração será feita'))
+        if options['arquivar']:
+            self.stdout.write(f"📂 Pasta de arquivos: {pasta_arquivo()}")
+        self.stdout.write(f"📅 Removendo notificações lidas antes de {timezone.localtime(limite):%d/%m/%Y %H:%M}")
+
+        inicio = timezone.now()
+        resultado = limpar_notificacoes(
+            limite,
+            tamanho_lote=options['lote'],
+            arquivar=options['arquivar'],
+            simular=options['simular'],
+        )
+        segundos = (timezone.now() - inicio).total_seconds()
+
+        for nome, quantidade in sorted(resultado['arquivos'].items()):
+            self.stdout.write(f"  🗜️  {nome}: {quantidade} notificações")
+
+        # Resumo final
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS('📋 RESUMO DA OPERAÇÃO:'))
+        self.stdout.write(f"🗑️  Notificações removidas: {resultado['notificacoes']}")
+        if options['arquivar']:
+            self.stdout.write(f"🗂️  Arquivos mensais: {len(resultado['arquivos'])}")
+        if resultado['notificacoes'] and not options['simular']:
+            self.stdout.write(f"⏱️  {resultado['notificacoes'] / max(segundos, 0.001):.0f} notificações/s")
+        if options['simular'] and resultado['notificacoes']:
+            self.stdout.write(self.style.WARNING('💡 Execute sem --simular para remover'))
+        self.stdout.write('='*50)
@@ -0,0 +1,77 @@
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+
+from orcamentos import importacao_produtos
+from orcamentos.models import Fornecedor
+
+
+class Command(BaseCommand):
+    help = (
+        'Reajusta em % o preço de compra de todos os produtos de um fornecedor, '
+        'recalculando margem, HT e TTC num único UPDATE'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fornecedor',
+            required=True,
+            help='Id ou nome do fornecedor',
+        )
+        parser.add_argument(
+            '--percentual',
+            required=True,
+            help='Reajuste em % (ex.: 3.5 ou -2)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Executar sem fazer alterações (apenas mostrar os novos preços)',
+        )
+        parser.add_argument(
+            '--amostra',
+            type=int,
+            default=20,
+            help='Produtos exibidos antes/depois (padrão: 20)',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        try:
+            fornecedor = importacao_produtos.encontrar_fornecedor(options['fornecedor'])
+        except (Fornecedor.DoesNotExist, Fornecedor.MultipleObjectsReturned):
+            raise CommandError(f"Fornecedor não encontrado: {options['fornecedor']}")
+        try:
+            percentual = Decimal(options['percentual'].replace(',', '.'))
+        except InvalidOperation:
+            raise CommandError(f"--percentual inválido: {options['percentual']}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"💶 Reajustando em {percentual}% os preços de {fornecedor.nome}..."
+        ))
+
+        try:
+            resultado = importacao_produtos.reajustar_precos(
+                fornecedor, percentual, simular=dry_run, amostra=options['amostra']
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for alteracao in resultado['alteracoes']:
+            campos = ', '.join(
+                f"{rotulo}: {antes} → {depois}"
+                for rotulo, antes, depois in importacao_produtos.descrever(alteracao)
+            )
+            self.stdout.write(f"✏️  {alteracao['referencia']}: {campos}")
+
+        # Resumo final
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS('📋 RESUMO DA OPERAÇÃO:'))
+        self.stdout.write(f"🏭 Fornecedor: {fornecedor.nome}")
+        self.stdout.write(f"📦 Produtos reajustados: {resultado['produtos']}")
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING('⚠️  MODO DRY-RUN: Nenhuma alteração foi feita no banco de dados'))
+            self.stdout.write('💡 Execute novamente sem --dry-run para aplicar as alterações')
+
+        self.stdout.write('='*50)
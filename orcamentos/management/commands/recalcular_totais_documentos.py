@@ -0,0 +1,145 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import OuterRef, Subquery, Sum, DecimalField
+
+from orcamentos.models import (
+    Orcamento, ItemOrcamento, Facture, ItemFacture, AcompteOrcamento, StatusAcompte
+)
+
+CAMPOS_ORCAMENTO = [
+    'subtotal', 'valor_desconto', 'total', 'total_ttc', 'total_tva',
+    'total_acomptes_pagos', 'saldo'
+]
+CAMPOS_FACTURE = ['subtotal', 'valor_desconto', 'total', 'total_ttc', 'valor_tva']
+
+
+def _soma_por_documento(queryset, campo_documento, campo_valor):
+    """Subquery com a soma de um campo dos filhos de cada documento"""
+    return Subquery(
+        queryset.filter(**{campo_documento: OuterRef('pk')})
+        .order_by()
+        .values(campo_documento)
+        .annotate(soma=Sum(campo_valor))
+        .values('soma'),
+        output_field=DecimalField(max_digits=12, decimal_places=2)
+    )
+
+
+class Command(BaseCommand):
+    help = 'Recalcula (ou verifica) os totais persistidos de devis e factures a partir dos itens e acomptes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verificar',
+            action='store_true',
+            help='Apenas verificar se os totais gravados estão corretos, sem alterar nada',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Número de documentos gravados por lote (padrão: 500)',
+        )
+
+    def handle(self, *args, **options):
+        verificar = options['verificar']
+        batch_size = options['batch_size']
+
+        if verificar:
+            self.stdout.write(self.style.WARNING('🔍 Modo verificação: nenhuma alteração será feita'))
+        else:
+            self.stdout.write(self.style.SUCCESS('🔄 Recalculando totais persistidos...'))
+
+        orcamentos_qs = Orcamento.objects.annotate(
+            soma_ht=_soma_por_documento(ItemOrcamento.objects.all(), 'orcamento', 'total_ht'),
+            soma_ttc=_soma_por_documento(ItemOrcamento.objects.all(), 'orcamento', 'total_ttc'),
+            soma_acomptes=_soma_por_documento(
+                AcompteOrcamento.objects.filter(status=StatusAcompte.PAGO), 'orcamento', 'valor_ttc'
+            ),
+        ).only('pk', 'numero', 'desconto', *CAMPOS_ORCAMENTO)
+
+        factures_qs = Facture.objects.annotate(
+            soma_ht=_soma_por_documento(ItemFacture.objects.all(), 'facture', 'total_ht'),
+            soma_ttc=_soma_por_documento(ItemFacture.objects.all(), 'facture', 'total_ttc'),
+        ).only('pk', 'numero', 'desconto', *CAMPOS_FACTURE)
+
+        total_orcamentos, divergentes_orcamentos = self.processar(
+            orcamentos_qs, Orcamento, CAMPOS_ORCAMENTO, self.recalcular_orcamento,
+            verificar, batch_size
+        )
+        total_factures, divergentes_factures = self.processar(
+            factures_qs, Facture, CAMPOS_FACTURE, self.recalcular_facture,
+            verificar, batch_size
+        )
+
+        # Resumo final
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS('📋 RESUMO DA OPERAÇÃO:'))
+        self.stdout.write(f"📄 Devis analisados: {total_orcamentos}")
+        self.stdout.write(f"⚠️  Devis com totais divergentes: {divergentes_orcamentos}")
+        self.stdout.write(f"🧾 Factures analisadas: {total_factures}")
+        self.stdout.write(f"⚠️  Factures com totais divergentes: {divergentes_factures}")
+
+        if verificar:
+            if divergentes_orcamentos or divergentes_factures:
+                self.stdout.write(self.style.WARNING('💡 Execute novamente sem --verificar para corrigir os totais'))
+            else:
+                self.stdout.write(self.style.SUCCESS('✅ Todos os totais gravados estão corretos'))
+        else:
+            self.stdout.write(self.style.SUCCESS('✅ Totais divergentes corrigidos'))
+
+        self.stdout.write('='*50)
+
+    def processar(self, queryset, modelo, campos, recalcular, verificar, batch_size):
+        """Percorre os documentos em streaming e grava as correções por lotes"""
+        total = 0
+        divergentes = 0
+        lote = []
+
+        for documento in queryset.iterator(chunk_size=batch_size):
+            total += 1
+            antes = {campo: getattr(documento, campo) for campo in campos}
+            recalcular(documento)
+            depois = {campo: getattr(documento, campo) for campo in campos}
+
+            if antes == depois:
+                continue
+
+            divergentes += 1
+            diferencas = ', '.join(
+                f"{campo}: {antes[campo]} → {depois[campo]}"
+                for campo in campos if antes[campo] != depois[campo]
+            )
+            self.stdout.write(f"  {documento.numero}: {diferencas}")
+
+            if not verificar:
+                lote.append(documento)
+                if len(lote) >= batch_size:
+                    self.gravar_lote(modelo, lote, campos)
+                    lote = []
+
+        if lote:
+            self.gravar_lote(modelo, lote, campos)
+
+        return total, divergentes
+
+    def gravar_lote(self, modelo, lote, campos):
+        with transaction.atomic():
+            modelo.objects.bulk_update(lote, campos)
+
+    def recalcular_orcamento(self, orcamento):
+        orcamento.total_acomptes_pagos = orcamento.soma_acomptes or Decimal('0.00')
+        orcamento.aplicar_totais(orcamento.soma_ht, orcamento.soma_ttc)
+        self.quantizar(orcamento, CAMPOS_ORCAMENTO)
+
+    def recalcular_facture(self, facture):
+        facture.aplicar_totais(facture.soma_ht, facture.soma_ttc)
+        self.quantizar(facture, CAMPOS_FACTURE)
+
+    def quantizar(self, documento, campos):
+        """Arredonda para 2 casas, como o banco grava, para que a comparação seja estável"""
+        for campo in campos:
+            valor = Decimal(getattr(documento, campo) or 0)
+            setattr(documento, campo, valor.quantize(Decimal('0.01')))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from orcamentos.auditoria_fila import escritor_auditoria
+
+
+class Command(BaseCommand):
+    help = 'Reinsere no banco os logs de auditoria guardados no spool quando o banco estava indisponível'
+
+    def handle(self, *args, **options):
+        pasta = escritor_auditoria.pasta_spool
+        self.stdout.write(f"📂 Pasta de spool: {pasta}")
+
+        total = escritor_auditoria.reprocessar_spool()
+
+        if total:
+            self.stdout.write(self.style.SUCCESS(f"✅ {total} logs de auditoria reinseridos"))
+        else:
+            self.stdout.write(self.style.WARNING('⚠️  Nenhum log pendente no spool'))
+
+        pendentes = list(pasta.glob('*.jsonl')) if pasta.is_dir() else []
+        if pendentes:
+            self.stdout.write(self.style.ERROR(
+                f"❌ {len(pendentes)} arquivo(s) ainda pendente(s): banco indisponível?"
+            ))
@@ -1,8 +1,8 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
-from orcamentos.models import SolicitacaoOrcamento
 from orcamentos.services import NotificationService
 from orcamentos.auditoria import AuditoriaManager, TipoAcao
+from orcamentos import vinculacao_orfaos
 
 User = get_user_model()
 
@@ -25,22 +25,26 @@ class Command(BaseCommand):
             action='store_true',
             help='Enviar notificações para usuários sobre orçamentos vinculados',
         )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=1000,
+            help='Solicitações vinculadas por UPDATE (padrão: 1000)',
+        )
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
         email_especifico = options['email']
         enviar_notificacoes = options['notify']
+        self.dry_run = dry_run
 
         self.stdout.write(self.style.SUCCESS('🔍 Iniciando busca por orçamentos órfãos...'))
 
         # Filtrar solicitações órfãs
-        query = SolicitacaoOrcamento.objects.filter(cliente__isnull=True)
-
         if email_especifico:
-            query = query.filter(email_solicitante__iexact=email_especifico)
             self.stdout.write(f"📧 Processando apenas email: {email_especifico}")
 
-        solicitacoes_orfas = query.select_related()
+        solicitacoes_orfas = vinculacao_orfaos.solicitacoes_orfas(email_especifico)
         total_orfas = solicitacoes_orfas.count()
 
         if total_orfas == 0:
@@ -49,55 +53,18 @@ class Command(BaseCommand):
 
         self.stdout.write(f"📊 Encontradas {total_orfas} solicitações órfãs")
 
-        # Processar cada solicitação órfã
-        vinculadas = 0
-        usuarios_notificados = set()
-        emails_processados = set()
-
-        for solicitacao in solicitacoes_orfas:
-            try:
-                # Tentar encontrar usuário com mesmo email
-                usuarios = User.objects.filter(email__iexact=solicitacao.email_solicitante)
-
-                if usuarios.exists():
-                    usuario = usuarios.first()
-                    emails_processados.add(solicitacao.email_solicitante)
-
-                    if not dry_run:
-                        # Registrar vinculação na auditoria
-                        AuditoriaManager.registrar_vinculacao_orcamento_orfao(
-                            usuario=usuario,
-                            solicitacao=solicitacao,
-                            origem="comando_gerenciamento"
-                        )
-
-                        solicitacao.cliente = usuario
-                        solicitacao.save()
-
-                    vinculadas += 1
-                    usuarios_notificados.add(usuario.email)
-
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f"✅ {'[DRY-RUN] ' if dry_run else ''}Vinculada solicitação {solicitacao.numero} "
-                            f"({solicitacao.email_solicitante}) ao usuário {usuario.email}"
-                        )
-                    )
-
-                else:
-                    self.stdout.write(
-                        self.style.WARNING(
-                            f"⚠️  Usuário não encontrado para email: {solicitacao.email_solicitante} "
-                            f"(Solicitação: {solicitacao.numero})"
-                        )
-                    )
+        # Órfãs e contas casadas numa consulta; um UPDATE e um bulk_create de auditoria por lote
+        vinculador = vinculacao_orfaos.VinculadorOrfaos(
+            origem="comando_gerenciamento",
+            tamanho_lote=options['lote'],
+            simular=dry_run,
+            ao_processar_lote=self.exibir_lote,
+        )
+        resultado = vinculador.vincular(solicitacoes_orfas)
 
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(
-                        f"❌ Erro ao processar solicitação {solicitacao.numero}: {str(e)}"
-                    )
-                )
+        vinculadas = resultado['vinculadas']
+        emails_processados = resultado['emails']
+        usuarios_vinculados = User.objects.in_bulk(resultado['por_usuario'].keys())
 
         # Registrar processamento em lote na auditoria
         if not dry_run and vinculadas > 0:
@@ -110,17 +77,12 @@ class Command(BaseCommand):
             )
 
         # Enviar notificações se solicitado
-        if enviar_notificacoes and not dry_run and usuarios_notificados:
+        if enviar_notificacoes and not dry_run and usuarios_vinculados:
             self.stdout.write('\n📧 Enviando notificações...')
 
-            for email in usuarios_notificados:
+            for usuario_id, quantidade in resultado['por_usuario'].items():
+                usuario = usuarios_vinculados[usuario_id]
                 try:
-                    usuario = User.objects.get(email__iexact=email)
-                    quantidade = SolicitacaoOrcamento.objects.filter(
-                        cliente=usuario,
-                        email_solicitante__iexact=email
-                    ).count()
-
                     NotificationService.notificar_orcamentos_vinculados(usuario, quantidade)
 
                     # Registrar notificação na auditoria
@@ -132,12 +94,12 @@ class Command(BaseCommand):
 
                     self.stdout.write(
                         self.style.SUCCESS(
-                            f"📬 Notificação enviada para {email} ({quantidade} orçamentos)"
+                            f"📬 Notificação enviada para {usuario.email} ({quantidade} orçamentos)"
                         )
                     )
                 except Exception as e:
                     self.stdout.write(
-                        self.style.ERROR(f"❌ Erro ao notificar {email}: {str(e)}")
+                        self.style.ERROR(f"❌ Erro ao notificar {usuario.email}: {str(e)}")
                     )
 
         # Resumo final
@@ -145,7 +107,7 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS('📋 RESUMO DA OPERAÇÃO:'))
         self.stdout.write(f"🔍 Total de solicitações órfãs encontradas: {total_orfas}")
         self.stdout.write(f"🔗 Solicitações vinculadas: {vinculadas}")
-        self.stdout.write(f"👥 Usuários únicos beneficiados: {len(usuarios_notificados)}")
+        self.stdout.write(f"👥 Usuários únicos beneficiados: {len(usuarios_vinculados)}")
         self.stdout.write(f"📧 Emails processados: {len(emails_processados)}")
 
         if dry_run:
@@ -158,3 +120,28 @@ class Command(BaseCommand):
             self.stdout.write(self.style.SUCCESS('📝 Todas as operações foram registradas nos logs de auditoria'))
 
         self.stdout.write('='*50)
+
+    def exibir_lote(self, linhas, usuarios, erro):
+        """Uma linha por solicitação do lote processado pelo VinculadorOrfaos"""
+        if erro is not None:
+            self.stdout.write(
+                self.style.ERROR(
+                    f"❌ Erro ao processar lote {linhas[0]['numero']}..{linhas[-1]['numero']}: {str(erro)}"
+                )
+            )
+
+        for linha in linhas:
+            if not linha['conta_id']:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"⚠️  Usuário não encontrado para email: {linha['email_solicitante']} "
+                        f"(Solicitação: {linha['numero']})"
+                    )
+                )
+            elif erro is None:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"✅ {'[DRY-RUN] ' if self.dry_run else ''}Vinculada solicitação {linha['numero']} "
+                        f"({linha['email_solicitante']}) ao usuário {usuarios[linha['conta_id']].email}"
+                    )
+                )
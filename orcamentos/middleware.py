@@ -1,31 +1,47 @@
-from django.utils.deprecation import MiddlewareMixin
-from django.contrib.contenttypes.models import ContentType
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from orcamentos.auditoria import AuditoriaManager, TipoAcao
-import threading
-
-# Thread local para armazenar dados da requisição atual
-_thread_locals = threading.local()
-
-
-class AuditoriaMiddleware(MiddlewareMixin):
-    """Middleware para integração automática do sistema de auditoria"""
-
-    def process_request(self, request):
-        """Armazena dados da requisição para uso nos models"""
-        # Armazenar request no thread local
-        _thread_locals.request = request
-        _thread_locals.user = getattr(request, 'user', None)
-
-        return None
-
-    def process_response(self, request, response):
-        """Limpa dados do thread local após a requisição"""
-        # Limpar thread locals
-        if hasattr(_thread_locals, 'request'):
-            del _thread_locals.request
-        if hasattr(_thread_locals, 'user'):
-            del _thread_locals.user
+from orcamentos.contexto_auditoria import (
+    iniciar_requisicao, encerrar_requisicao, obter_requisicao_atual
+)
+from orcamentos.rastreamento import RastreadorCamposMixin
+
+
+class AuditoriaMiddleware:
+    """
+    Middleware para integração automática do sistema de auditoria
+
+    Guarda a requisição atual num ContextVar (válido também em views
+    assíncronas) e atribui um request_id, devolvido no cabeçalho
+    X-Request-ID e gravado em todos os logs de auditoria da requisição.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = iniciar_requisicao(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            encerrar_requisicao(token)
+        response['X-Request-ID'] = request.request_id
+        return response
 
+    async def __acall__(self, request):
+        token = iniciar_requisicao(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            encerrar_requisicao(token)
+        response['X-Request-ID'] = request.request_id
         return response
 
     def process_exception(self, request, exception):
@@ -52,17 +68,17 @@ class AuditoriaMiddleware(MiddlewareMixin):
 
 
 def get_current_request():
-    """Retorna a requisição atual do thread local"""
-    return getattr(_thread_locals, 'request', None)
+    """Retorna a requisição atual (contexto da requisição, não da thread)"""
+    return obter_requisicao_atual()
 
 
 def get_current_user():
-    """Retorna o usuário atual do thread local"""
-    return getattr(_thread_locals, 'user', None)
+    """Retorna o usuário da requisição atual"""
+    return getattr(obter_requisicao_atual(), 'user', None)
 
 
 # Mixin para models que precisam de auditoria automática
-class AuditoriaMixin:
+class AuditoriaMixin(RastreadorCamposMixin):
     """Mixin para adicionar auditoria automática aos models"""
 
     def save(self, *args, **kwargs):
@@ -72,13 +88,19 @@ class AuditoriaMixin:
         if current_user and current_user.is_authenticated:
             self._current_user = current_user
 
-        # Capturar estado anterior se for uma atualização
-        if self.pk:
-            try:
-                estado_anterior = self.__class__.objects.get(pk=self.pk)
-                self._estado_anterior = estado_anterior
-            except self.__class__.DoesNotExist:
-                self._estado_anterior = None
+        # Alterações calculadas em memória a partir do snapshot do carregamento
+        if self.pk and self.tem_snapshot():
+            self._campos_alterados = self.campos_alterados()
+        elif self.pk:
+            # Sem snapshot (instância montada à mão): comparar com o banco
+            anterior = self.__class__.objects.filter(pk=self.pk).first()
+            if anterior is not None:
+                self._snapshot_campos = anterior.valores_carregados()
+                self._campos_alterados = self.campos_alterados()
+            else:
+                self._campos_alterados = {}
+        else:
+            self._campos_alterados = {}
 
         # Executar save normal
         super().save(*args, **kwargs)
@@ -0,0 +1,113 @@
+# Generated by Django 5.2.6 on 2026-10-18 01:12
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import DecimalField, OuterRef, Subquery, Sum
+
+TAMANHO_LOTE = 500
+
+
+def _soma(modelo, campo_documento, campo_valor, **filtros):
+    """Subquery com a soma de um campo dos filhos de cada documento"""
+    return Subquery(
+        modelo.objects.filter(**{campo_documento: OuterRef('pk')}, **filtros)
+        .order_by()
+        .values(campo_documento)
+        .annotate(soma=Sum(campo_valor))
+        .values('soma'),
+        output_field=DecimalField(max_digits=12, decimal_places=2)
+    )
+
+
+def _preencher(modelo, queryset, aplicar, campos):
+    """Percorre os documentos por faixas de pk e grava os totais de cada lote"""
+    ultimo_pk = 0
+    while True:
+        lote = list(queryset.filter(pk__gt=ultimo_pk).order_by('pk')[:TAMANHO_LOTE])
+        if not lote:
+            return
+        for documento in lote:
+            aplicar(documento)
+        modelo.objects.bulk_update(lote, campos)
+        ultimo_pk = lote[-1].pk
+
+
+def preencher_totais(apps, schema_editor):
+    """Grava os novos totais dos documentos existentes com o mesmo cálculo dos models"""
+    # Os models históricos não têm métodos: aplicar_totais dos models atuais só lê e
+    # preenche atributos, então pode ser usado nas instâncias históricas
+    from orcamentos.models import Facture as FactureAtual, Orcamento as OrcamentoAtual, StatusAcompte
+
+    Orcamento = apps.get_model('orcamentos', 'Orcamento')
+    ItemOrcamento = apps.get_model('orcamentos', 'ItemOrcamento')
+    AcompteOrcamento = apps.get_model('orcamentos', 'AcompteOrcamento')
+    Facture = apps.get_model('orcamentos', 'Facture')
+    ItemFacture = apps.get_model('orcamentos', 'ItemFacture')
+
+    def aplicar_orcamento(orcamento):
+        orcamento.total_acomptes_pagos = orcamento.soma_acomptes or Decimal('0.00')
+        OrcamentoAtual.aplicar_totais(orcamento, orcamento.soma_ht, orcamento.soma_ttc)
+
+    def aplicar_facture(facture):
+        FactureAtual.aplicar_totais(facture, facture.soma_ht, facture.soma_ttc)
+
+    _preencher(
+        Orcamento,
+        Orcamento.objects.annotate(
+            soma_ht=_soma(ItemOrcamento, 'orcamento', 'total_ht'),
+            soma_ttc=_soma(ItemOrcamento, 'orcamento', 'total_ttc'),
+            soma_acomptes=_soma(AcompteOrcamento, 'orcamento', 'valor_ttc', status=StatusAcompte.PAGO),
+        ),
+        aplicar_orcamento,
+        ['subtotal', 'valor_desconto', 'total', 'total_ttc', 'total_tva', 'total_acomptes_pagos', 'saldo'],
+    )
+    _preencher(
+        Facture,
+        Facture.objects.annotate(
+            soma_ht=_soma(ItemFacture, 'facture', 'total_ht'),
+            soma_ttc=_soma(ItemFacture, 'facture', 'total_ttc'),
+        ),
+        aplicar_facture,
+        ['subtotal', 'valor_desconto', 'total', 'total_ttc', 'valor_tva'],
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orcamentos', '0002_agendamentoorcamento'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='facture',
+            name='total_ttc',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=10, verbose_name='Total TTC'),
+        ),
+        migrations.AddField(
+            model_name='facture',
+            name='valor_tva',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=10, verbose_name='Montant TVA'),
+        ),
+        migrations.AddField(
+            model_name='orcamento',
+            name='saldo',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=10, verbose_name='Solde à payer'),
+        ),
+        migrations.AddField(
+            model_name='orcamento',
+            name='total_acomptes_pagos',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=10, verbose_name='Acomptes payés'),
+        ),
+        migrations.AddField(
+            model_name='orcamento',
+            name='total_ttc',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=10, verbose_name='Total TTC'),
+        ),
+        migrations.AddField(
+            model_name='orcamento',
+            name='total_tva',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=10, verbose_name='Total TVA'),
+        ),
+        migrations.RunPython(preencher_totais, migrations.RunPython.noop),
+    ]
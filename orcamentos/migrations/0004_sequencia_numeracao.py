@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-18 01:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orcamentos', '0003_totais_persistidos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SequenciaNumeracao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefixo', models.CharField(max_length=10, verbose_name='Préfixe')),
+                ('ano', models.PositiveIntegerField(verbose_name='Année')),
+                ('ultimo_numero', models.PositiveIntegerField(default=0, verbose_name='Dernier numéro attribué')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Séquence de numérotation',
+                'verbose_name_plural': 'Séquences de numérotation',
+                'ordering': ['prefixo', '-ano'],
+                'unique_together': {('prefixo', 'ano')},
+            },
+        ),
+    ]
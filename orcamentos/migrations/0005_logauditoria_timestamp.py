@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-18 01:32
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orcamentos', '0004_sequencia_numeracao'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='logauditoria',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
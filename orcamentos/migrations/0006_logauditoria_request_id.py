@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 01:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orcamentos', '0005_logauditoria_timestamp'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='logauditoria',
+            name='request_id',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
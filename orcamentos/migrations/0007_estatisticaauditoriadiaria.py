@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-18 01:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('orcamentos', '0006_logauditoria_request_id'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstatisticaAuditoriaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField(verbose_name='Jour')),
+                ('acao', models.CharField(choices=[('criacao', 'Création'), ('edicao', 'Modification'), ('exclusao', 'Suppression'), ('visualizacao', 'Consultation'), ('envio', 'Envoi'), ('aprovacao', 'Approbation'), ('rejeicao', 'Rejet'), ('cancelamento', 'Annulation'), ('download', 'Téléchargement'), ('vinculacao_orfao', 'Liaison demande orpheline'), ('deteccao_orfao', 'Détection demande orpheline'), ('processamento_lote', 'Traitement en lot'), ('notificacao_vinculacao', 'Notification de liaison'), ('criacao_fatura', 'Création de facture'), ('envio_fatura', 'Envoi de facture'), ('pagamento_fatura', 'Paiement de facture'), ('visualizacao_fatura', 'Consultation de facture'), ('download_fatura_pdf', 'Téléchargement PDF facture'), ('edicao_fatura', 'Modification de facture'), ('anulacao_fatura', 'Annulation de facture')], max_length=30, verbose_name='Action')),
+                ('modulo', models.CharField(max_length=50, verbose_name='Module')),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='estatisticas_auditoria', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': "Statistique d'audit journalière",
+                'verbose_name_plural': "Statistiques d'audit journalières",
+                'indexes': [models.Index(fields=['data', 'acao'], name='orcamentos__data_acd4b5_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-18 01:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('orcamentos', '0007_estatisticaauditoriadiaria'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='logauditoria',
+            name='orcamentos__usuario_3c0485_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='logauditoria',
+            name='orcamentos__content_eab749_idx',
+        ),
+        migrations.AlterField(
+            model_name='logauditoria',
+            name='usuario',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='logs_auditoria', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='logauditoria',
+            index=models.Index(fields=['content_type', 'object_id', 'timestamp'], name='orcamentos__content_95b86b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='logauditoria',
+            index=models.Index(fields=['usuario', 'timestamp'], name='orcamentos__usuario_a1751b_idx'),
+        ),
+    ]
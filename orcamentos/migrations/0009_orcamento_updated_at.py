@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orcamentos', '0008_logauditoria_indices_retencao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orcamento',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
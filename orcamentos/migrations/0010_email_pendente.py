@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:48
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orcamentos', '0009_orcamento_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailPendente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('assunto', models.CharField(max_length=255, verbose_name='Sujet')),
+                ('mensagem_texto', models.TextField(verbose_name='Message (texte)')),
+                ('mensagem_html', models.TextField(blank=True, verbose_name='Message (HTML)')),
+                ('remetente', models.CharField(blank=True, max_length=254, verbose_name='Expéditeur')),
+                ('destinatarios', models.JSONField(default=list, verbose_name='Destinataires')),
+                ('status', models.CharField(choices=[('pendente', 'En attente'), ('enviando', "En cours d'envoi"), ('enviado', 'Envoyé'), ('falhou', 'Échec définitif')], default='pendente', max_length=10, verbose_name='Statut')),
+                ('tentativas', models.PositiveSmallIntegerField(default=0, verbose_name='Tentatives')),
+                ('proxima_tentativa', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Prochaine tentative')),
+                ('bloqueado_ate', models.DateTimeField(blank=True, null=True)),
+                ('ultimo_erro', models.TextField(blank=True, verbose_name='Dernière erreur')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('enviado_em', models.DateTimeField(blank=True, null=True, verbose_name='Envoyé le')),
+            ],
+            options={
+                'verbose_name': 'Email en attente',
+                'verbose_name_plural': 'Emails en attente',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'proxima_tentativa'], name='email_fila_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 03:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orcamentos', '0010_email_pendente'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notificacao',
+            index=models.Index(condition=models.Q(('lida', False)), fields=['usuario', '-created_at'], name='notificacao_nao_lidas_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificacao',
+            index=models.Index(condition=models.Q(('lida', True)), fields=['read_at'], name='notificacao_lida_idx'),
+        ),
+    ]
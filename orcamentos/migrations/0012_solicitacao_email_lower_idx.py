@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-18 03:39
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orcamentos', '0011_notificacao_indices'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='solicitacaoorcamento',
+            index=models.Index(django.db.models.functions.text.Lower('email_solicitante'), name='solicitacao_email_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 03:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orcamentos', '0012_solicitacao_email_lower_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='estatisticaauditoriadiaria',
+            name='acao',
+            field=models.CharField(choices=[('criacao', 'Création'), ('edicao', 'Modification'), ('exclusao', 'Suppression'), ('visualizacao', 'Consultation'), ('envio', 'Envoi'), ('aprovacao', 'Approbation'), ('rejeicao', 'Rejet'), ('cancelamento', 'Annulation'), ('download', 'Téléchargement'), ('vinculacao_orfao', 'Liaison demande orpheline'), ('deteccao_orfao', 'Détection demande orpheline'), ('processamento_lote', 'Traitement en lot'), ('notificacao_vinculacao', 'Notification de liaison'), ('tarefa_vinculacao', 'Tâche de liaison différée'), ('criacao_fatura', 'Création de facture'), ('envio_fatura', 'Envoi de facture'), ('pagamento_fatura', 'Paiement de facture'), ('visualizacao_fatura', 'Consultation de facture'), ('download_fatura_pdf', 'Téléchargement PDF facture'), ('edicao_fatura', 'Modification de facture'), ('anulacao_fatura', 'Annulation de facture')], max_length=30, verbose_name='Action'),
+        ),
+        migrations.AlterField(
+            model_name='logauditoria',
+            name='acao',
+            field=models.CharField(choices=[('criacao', 'Création'), ('edicao', 'Modification'), ('exclusao', 'Suppression'), ('visualizacao', 'Consultation'), ('envio', 'Envoi'), ('aprovacao', 'Approbation'), ('rejeicao', 'Rejet'), ('cancelamento', 'Annulation'), ('download', 'Téléchargement'), ('vinculacao_orfao', 'Liaison demande orpheline'), ('deteccao_orfao', 'Détection demande orpheline'), ('processamento_lote', 'Traitement en lot'), ('notificacao_vinculacao', 'Notification de liaison'), ('tarefa_vinculacao', 'Tâche de liaison différée'), ('criacao_fatura', 'Création de facture'), ('envio_fatura', 'Envoi de facture'), ('pagamento_fatura', 'Paiement de facture'), ('visualizacao_fatura', 'Consultation de facture'), ('download_fatura_pdf', 'Téléchargement PDF facture'), ('edicao_fatura', 'Modification de facture'), ('anulacao_fatura', 'Annulation de facture')], max_length=30, verbose_name='Action'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+import logging
+
+from django.db import DatabaseError, migrations, transaction
+
+logger = logging.getLogger(__name__)
+
+# Texto normalizado da busca (orcamentos/busca_produtos.py): minúsculas e sem acentos.
+# IMMUTABLE para poder ser usado no índice; o dicionário é passado explicitamente
+CRIAR_FUNCAO = """
+CREATE OR REPLACE FUNCTION produto_texto_busca(referencia text, descricao text)
+RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$
+    SELECT lower(unaccent('unaccent'::regdictionary, coalesce(referencia, '') || ' ' || coalesce(descricao, '')))
+$$
+"""
+
+CRIAR_INDICE = """
+CREATE INDEX IF NOT EXISTS produto_busca_trgm_idx
+ON orcamentos_produto USING gin (produto_texto_busca(referencia, descricao) gin_trgm_ops)
+WHERE ativo
+"""
+
+
+def criar_indice_trigramas(apps, schema_editor):
+    """Só no PostgreSQL; sem permissão para as extensões a busca usa o índice em memória"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    except DatabaseError as e:
+        logger.warning(f"Extensões pg_trgm/unaccent indisponíveis ({e}); busca de produtos sem índice de trigramas")
+        return
+
+    schema_editor.execute(CRIAR_FUNCAO)
+    schema_editor.execute(CRIAR_INDICE)
+
+
+def remover_indice_trigramas(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS produto_busca_trgm_idx")
+    schema_editor.execute("DROP FUNCTION IF EXISTS produto_texto_busca(text, text)")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orcamentos', '0013_tipo_acao_tarefa_vinculacao'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indice_trigramas, remover_indice_trigramas),
+    ]
@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Sum, Value
+from django.db.models.functions import Lower
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.core.validators import EmailValidator, RegexValidator
@@ -6,6 +8,10 @@ import uuid
 from decimal import Decimal
 from datetime import timedelta
 
+from .contador_notificacoes import registrar_alteracao
+from .numeracao import NumeracaoService
+from .rastreamento import RastreadorCamposMixin
+
 User = get_user_model()
 
 class StatusOrcamento(models.TextChoices):
@@ -105,6 +111,12 @@ class TipoNotificacao(models.TextChoices):
     FATURA_ENVIADA = "fatura_enviada", "Facture envoyée"
     FATURA_PAGA = "fatura_paga", "Facture payée"
 
+class StatusEmail(models.TextChoices):
+    PENDENTE = "pendente", "En attente"
+    ENVIANDO = "enviando", "En cours d'envoi"
+    ENVIADO = "enviado", "Envoyé"
+    FALHOU = "falhou", "Échec définitif"
+
 # ================== NOVO: Agendamento de Horário ==================
 class TipoAgendamento(models.TextChoices):
     VISITA_TECHNIQUE = "visita", "Visite technique sur site"
@@ -143,7 +155,14 @@ class AgendamentoOrcamento(models.Model):
 # ================== FIM NOVO ==================
 
 # Model para projetos criados por clientes logados
-class Projeto(models.Model):
+class Projeto(RastreadorCamposMixin, models.Model):
+    # Campos cujo estado anterior é registrado na auditoria
+    campos_rastreados = [
+        'titulo', 'descricao', 'tipo_servico', 'status', 'urgencia',
+        'endereco_projeto', 'cidade_projeto', 'area_aproximada',
+        'orcamento_estimado', 'data_inicio_desejada'
+    ]
+
     # Identificação
     uuid = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
     cliente = models.ForeignKey(User, on_delete=models.CASCADE, related_name='projetos')
@@ -228,7 +247,13 @@ class Projeto(models.Model):
         return f"{self.titulo} - {self.cliente.first_name} {self.cliente.last_name}"
 
 # Model para solicitações de orçamento (público e de projetos)
-class SolicitacaoOrcamento(models.Model):
+class SolicitacaoOrcamento(RastreadorCamposMixin, models.Model):
+    campos_rastreados = [
+        'numero', 'status', 'nome_solicitante', 'email_solicitante',
+        'telefone_solicitante', 'tipo_servico', 'descricao_servico',
+        'urgencia', 'orcamento_maximo'
+    ]
+
     # Identificação
     numero = models.CharField(max_length=20, unique=True, editable=False)
     uuid = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
@@ -320,19 +345,23 @@ class SolicitacaoOrcamento(models.Model):
         verbose_name = "Demande de devis"
         verbose_name_plural = "Demandes de devis"
         ordering = ['-created_at']
+        indexes = [
+            # Vinculação de órfãs: busca pelo email normalizado (Lower), não por iexact
+            models.Index(Lower('email_solicitante'), name='solicitacao_email_lower_idx'),
+        ]
 
     def save(self, *args, **kwargs):
-        if not self.numero:
+        # Número alocado na mesma transação da gravação (sequência sem buracos)
+        if self.numero:
+            super().save(*args, **kwargs)
+            return
+
+        with transaction.atomic():
             self.numero = self.gerar_numero()
-        super().save(*args, **kwargs)
+            super().save(*args, **kwargs)
 
     def gerar_numero(self):
-        import random
-        import string
-        while True:
-            numero = f"DEV{timezone.now().year}{random.randint(1000, 9999)}"
-            if not SolicitacaoOrcamento.objects.filter(numero=numero).exists():
-                return numero
+        return NumeracaoService.proximo_numero('DEV', SolicitacaoOrcamento, largura=4)
 
     def __str__(self):
         if self.projeto:
@@ -340,7 +369,15 @@ class SolicitacaoOrcamento(models.Model):
         return f"Devis {self.numero} - {self.nome_solicitante}"
 
 # Model para orçamentos elaborados pelos admins
-class Orcamento(models.Model):
+class Orcamento(RastreadorCamposMixin, models.Model):
+    campos_rastreados = [
+        'numero', 'status', 'titulo', 'subtotal', 'desconto',
+        'total', 'prazo_execucao', 'validade_orcamento',
+        'condicoes_pagamento', 'data_envio', 'data_resposta_cliente'
+    ]
+    # Gravados só por atualizar_totais_acomptes (e o saldo também por calcular_totais)
+    CAMPOS_ACOMPTES = ['total_acomptes_pagos', 'saldo']
+
     # Identificação
     numero = models.CharField(max_length=20, unique=True, editable=False)
     uuid = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
@@ -389,6 +426,36 @@ class Orcamento(models.Model):
         verbose_name="Total"
     )
 
+    # Agregados persistidos (mantidos por calcular_totais e atualizar_totais_acomptes)
+    total_ttc = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        editable=False,
+        verbose_name="Total TTC"
+    )
+    total_tva = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        editable=False,
+        verbose_name="Total TVA"
+    )
+    total_acomptes_pagos = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        editable=False,
+        verbose_name="Acomptes payés"
+    )
+    saldo = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        editable=False,
+        verbose_name="Solde à payer"
+    )
+
     # Prazos
     prazo_execucao = models.PositiveIntegerField(
         verbose_name="Délai d'exécution (jours)"
@@ -429,6 +496,8 @@ class Orcamento(models.Model):
     data_elaboracao = models.DateTimeField(auto_now_add=True)
     data_envio = models.DateTimeField(null=True, blank=True)
     data_resposta_cliente = models.DateTimeField(null=True, blank=True)
+    # Versão do documento: muda também quando itens ou acomptes mudam (ver orcamentos/documentos.py)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = "Devis"
@@ -496,29 +565,46 @@ class Orcamento(models.Model):
                 # Caso especial de migração antiga com TextField
                 self.condicoes_pagamento = 'comptant'
 
-        if not self.numero:
+        if self.numero:
+            if not self._state.adding and not args and kwargs.get('update_fields') is None \
+                    and not kwargs.get('force_insert'):
+                # Acomptes pagos e saldo só são gravados por calcular_totais e
+                # atualizar_totais_acomptes: esta instância pode ser anterior a um acompte
+                kwargs['update_fields'] = [
+                    campo.name for campo in self._meta.concrete_fields
+                    if not campo.primary_key and campo.name not in self.CAMPOS_ACOMPTES
+                ]
+            super().save(*args, **kwargs)
+            return
+
+        with transaction.atomic():
             self.numero = self.gerar_numero()
-        super().save(*args, **kwargs)
+            super().save(*args, **kwargs)
 
     def gerar_numero(self):
-        import random
-        while True:
-            numero = f"OR{timezone.now().year}{random.randint(10000, 99999)}"
-            if not Orcamento.objects.filter(numero=numero).exists():
-                return numero
+        return NumeracaoService.proximo_numero('OR', Orcamento)
 
     def calcular_totais(self):
-        """Calcula os totais do orçamento com base nos itens"""
-        # Somar todos os valores dos itens
-        total_ht_itens = Decimal('0.00')
-        total_ttc_itens = Decimal('0.00')
-
-        for item in self.itens.all():
-            total_ht_itens += item.total_ht
-            total_ttc_itens += item.total_ttc
+        """Calcula os totais do orçamento com uma única agregação sobre os itens"""
+        totais = self.itens.aggregate(total_ht=Sum('total_ht'), total_ttc=Sum('total_ttc'))
+        self.aplicar_totais(totais['total_ht'], totais['total_ttc'])
+
+        # Saldo calculado no banco a partir dos acomptes gravados, não dos desta instância
+        # (F('total_ttc') no mesmo UPDATE leria o total anterior)
+        campos = ['subtotal', 'valor_desconto', 'total', 'total_ttc', 'total_tva']
+        self.updated_at = timezone.now()
+        Orcamento.objects.filter(pk=self.pk).update(
+            **{campo: getattr(self, campo) for campo in campos},
+            saldo=Value(self.total_ttc, output_field=models.DecimalField()) - F('total_acomptes_pagos'),
+            updated_at=self.updated_at
+        )
+        self._registrar_snapshot(campos)
+        self.refresh_from_db(fields=self.CAMPOS_ACOMPTES)
 
+    def aplicar_totais(self, total_ht_itens, total_ttc_itens):
+        """Preenche os totais do cabeçalho a partir das somas HT/TTC dos itens (sem gravar)"""
         # Calcular subtotal (HT)
-        self.subtotal = total_ht_itens
+        self.subtotal = total_ht_itens or Decimal('0.00')
 
         # Aplicar desconto global sobre HT
         self.valor_desconto = (self.subtotal * self.desconto) / 100
@@ -527,34 +613,64 @@ class Orcamento(models.Model):
         # O total final deve ser HT com desconto
         self.total = total_ht_com_desconto
 
-        self.save(update_fields=['subtotal', 'valor_desconto', 'total'])
-
-    @property
-    def total_ttc(self):
-        """Retorna o total TTC calculado baseado nos itens com desconto aplicado"""
-        # Somar TTC de todos os itens
-        total_ttc_itens = sum(item.total_ttc for item in self.itens.all())
-
         # Aplicar desconto proporcional no TTC também
+        total_ttc_itens = total_ttc_itens or Decimal('0.00')
         if self.desconto > 0 and total_ttc_itens > 0:
-            valor_desconto_ttc = (total_ttc_itens * self.desconto) / 100
-            return total_ttc_itens - valor_desconto_ttc
-
-        return total_ttc_itens
+            total_ttc_itens -= (total_ttc_itens * self.desconto) / 100
+        self.total_ttc = total_ttc_itens
+        self.total_tva = self.total_ttc - self.total
+        self.saldo = self.total_ttc - self.total_acomptes_pagos
+
+    def atualizar_totais_acomptes(self):
+        """Recalcula o total de acomptes pagos e o saldo persistidos"""
+        total_pago = self.acomptes.filter(status=StatusAcompte.PAGO).aggregate(
+            total=Sum('valor_ttc')
+        )['total'] or Decimal('0.00')
+
+        # Saldo calculado no próprio UPDATE para não depender de uma instância desatualizada
+        self.updated_at = timezone.now()
+        Orcamento.objects.filter(pk=self.pk).update(
+            total_acomptes_pagos=total_pago,
+            saldo=F('total_ttc') - total_pago,
+            updated_at=self.updated_at
+        )
+        self.refresh_from_db(fields=self.CAMPOS_ACOMPTES)
+
+    def adicionar_itens(self, itens):
+        """
+        Grava um conjunto de itens de uma só vez.
+
+        Os valores de cada linha são calculados em memória, as linhas são
+        inseridas com um único bulk_create e os totais do devis são
+        recalculados uma única vez no final.
+        """
+        novos_itens = []
+        for item in itens:
+            item.orcamento = self
+            item.calcular_valores()
+            novos_itens.append(item)
+
+        with transaction.atomic():
+            criados = ItemOrcamento.objects.bulk_create(novos_itens)
+            self.calcular_totais()
+        return criados
+
+    def substituir_itens(self, itens):
+        """Substitui todas as linhas do devis numa única transação"""
+        with transaction.atomic():
+            self.itens.all().delete()
+            return self.adicionar_itens(itens)
 
     @property
     def valor_tva(self):
         """Retorna o valor total da TVA com desconto aplicado"""
-        return self.total_ttc - self.total
+        return self.total_tva
 
     # === PROPRIEDADES AUXILIARES PARA TEMPLATES ===
     @property
     def subtotal_ttc(self):
         """Subtotal TTC antes do desconto global (soma do total_ttc dos itens)."""
-        total = Decimal('0.00')
-        for item in self.itens.all():
-            total += item.total_ttc
-        return total
+        return self.itens.aggregate(total=Sum('total_ttc'))['total'] or Decimal('0.00')
 
     @property
     def valor_desconto_ttc(self):
@@ -566,15 +682,13 @@ class Orcamento(models.Model):
     @property
     def total_compras(self):
         """Retorna o total de compras (custo dos produtos)"""
-        total = Decimal('0.00')
-        for item in self.itens.all():
-            total += item.quantidade * item.preco_compra_unitario
-        return total
-
-    @property
-    def total_acomptes_pagos(self):
-        """Retorna o total de acomptes já pagos"""
-        return sum(acompte.valor_ttc for acompte in self.acomptes.filter(status=StatusAcompte.PAGO))
+        total = self.itens.aggregate(
+            total=Sum(
+                F('quantidade') * F('preco_compra_unitario'),
+                output_field=models.DecimalField(max_digits=20, decimal_places=4)
+            )
+        )['total']
+        return total or Decimal('0.00')
 
     @property
     def total_acomptes_pendentes(self):
@@ -584,7 +698,7 @@ class Orcamento(models.Model):
     @property
     def saldo_em_aberto(self):
         """Retorna o saldo em aberto do orçamento (Total TTC - Acomptes pagos)"""
-        return self.total_ttc - self.total_acomptes_pagos
+        return self.saldo
 
     @property
     def total_acomptes_ttc(self):
@@ -626,7 +740,13 @@ class Orcamento(models.Model):
         return f"Devis {self.numero}"
 
 # Model para itens do orçamento
-class ItemOrcamento(models.Model):
+class ItemOrcamento(RastreadorCamposMixin, models.Model):
+    campos_rastreados = [
+        'referencia', 'descricao', 'quantidade', 'preco_unitario_ht',
+        'preco_unitario_ttc', 'total_ht', 'total_ttc', 'taxa_tva',
+        'remise_percentual'
+    ]
+
     orcamento = models.ForeignKey(
         Orcamento,
         on_delete=models.CASCADE,
@@ -719,7 +839,8 @@ class ItemOrcamento(models.Model):
         verbose_name_plural = "Itens du devis"
         ordering = ['ordem', 'id']
 
-    def save(self, *args, **kwargs):
+    def calcular_valores(self):
+        """Calcula P.U TTC e totais HT/TTC da linha (sem acesso ao banco)"""
         # Calcular preço unitário TTC
         taxa_decimal = Decimal(self.taxa_tva) / 100
         self.preco_unitario_ttc = self.preco_unitario_ht * (1 + taxa_decimal)
@@ -735,10 +856,13 @@ class ItemOrcamento(models.Model):
         valor_tva = self.total_ht * taxa_decimal
         self.total_ttc = self.total_ht + valor_tva
 
+    def save(self, *args, recalcular_orcamento=True, **kwargs):
+        self.calcular_valores()
+
         super().save(*args, **kwargs)
 
-        # Recalcular total do orçamento
-        if hasattr(self, 'orcamento'):
+        # Recalcular total do orçamento (pode ser adiado em gravações em lote)
+        if recalcular_orcamento and hasattr(self, 'orcamento'):
             self.orcamento.calcular_totais()
 
     @property
@@ -810,6 +934,22 @@ class Facture(models.Model):
         verbose_name="Total"
     )
 
+    # Agregados persistidos (mantidos por calcular_totais)
+    total_ttc = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        editable=False,
+        verbose_name="Total TTC"
+    )
+    valor_tva = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        editable=False,
+        verbose_name="Montant TVA"
+    )
+
     # Datas importantes
     data_emissao = models.DateField(
         default=timezone.now,
@@ -863,46 +1003,38 @@ class Facture(models.Model):
         ordering = ['-data_criacao']
 
     def save(self, *args, **kwargs):
-        if not self.numero:
+        # Numeração legal das factures: contínua, alocada junto com a gravação
+        if self.numero:
+            super().save(*args, **kwargs)
+            return
+
+        with transaction.atomic():
             self.numero = self.gerar_numero()
-        super().save(*args, **kwargs)
+            super().save(*args, **kwargs)
 
     def gerar_numero(self):
-        import random
-        while True:
-            numero = f"FA{timezone.now().year}{random.randint(10000, 99999)}"
-            if not Facture.objects.filter(numero=numero).exists():
-                return numero
+        return NumeracaoService.proximo_numero('FA', Facture)
 
     def calcular_totais(self):
-        """Calcula os totais da fatura com base nos itens"""
-        total_ht_itens = Decimal('0.00')
-        total_ttc_itens = Decimal('0.00')
+        """Calcula os totais da fatura com uma única agregação sobre os itens"""
+        totais = self.itens.aggregate(total_ht=Sum('total_ht'), total_ttc=Sum('total_ttc'))
+        self.aplicar_totais(totais['total_ht'], totais['total_ttc'])
 
-        for item in self.itens.all():
-            total_ht_itens += item.total_ht
-            total_ttc_itens += item.total_ttc
+        self.save(update_fields=['subtotal', 'valor_desconto', 'total', 'total_ttc', 'valor_tva', 'updated_at'])
 
-        self.subtotal = total_ht_itens
+    def aplicar_totais(self, total_ht_itens, total_ttc_itens):
+        """Preenche os totais da fatura a partir das somas HT/TTC dos itens (sem gravar)"""
+        self.subtotal = total_ht_itens or Decimal('0.00')
         self.valor_desconto = (self.subtotal * self.desconto) / 100
         total_ht_com_desconto = self.subtotal - self.valor_desconto
         self.total = total_ht_com_desconto
 
-        self.save(update_fields=['subtotal', 'valor_desconto', 'total'])
-
-    @property
-    def total_ttc(self):
-        """Retorna o total TTC calculado baseado nos itens com desconto aplicado"""
-        total_ttc_itens = sum(item.total_ttc for item in self.itens.all())
+        # Aplicar desconto proporcional no TTC também
+        total_ttc_itens = total_ttc_itens or Decimal('0.00')
         if self.desconto > 0 and total_ttc_itens > 0:
-            valor_desconto_ttc = (total_ttc_itens * self.desconto) / 100
-            return total_ttc_itens - valor_desconto_ttc
-        return total_ttc_itens
-
-    @property
-    def valor_tva(self):
-        """Retorna o valor total da TVA com desconto aplicado"""
-        return self.total_ttc - self.total
+            total_ttc_itens -= (total_ttc_itens * self.desconto) / 100
+        self.total_ttc = total_ttc_itens
+        self.valor_tva = self.total_ttc - self.total
 
     @property
     def is_em_atraso(self):
@@ -1147,22 +1279,23 @@ class AcompteOrcamento(models.Model):
         unique_together = ['orcamento', 'numero']
     
     def save(self, *args, **kwargs):
-        if not self.numero:
-            self.numero = self.gerar_numero()
-        
         # Calcular valores se não foram definidos
         if not self.valor_ht and self.percentual and self.orcamento:
             self.calcular_valores()
-        
-        super().save(*args, **kwargs)
+
+        if self.numero:
+            super().save(*args, **kwargs)
+        else:
+            with transaction.atomic():
+                self.numero = self.gerar_numero()
+                super().save(*args, **kwargs)
+
+        # Manter acomptes pagos e saldo persistidos no devis
+        self.orcamento.atualizar_totais_acomptes()
     
     def gerar_numero(self):
-        """Gera número único para o acompte"""
-        import random
-        while True:
-            numero = f"AC{timezone.now().year}{random.randint(10000, 99999)}"
-            if not AcompteOrcamento.objects.filter(numero=numero).exists():
-                return numero
+        """Gera o próximo número sequencial do acompte"""
+        return NumeracaoService.proximo_numero('AC', AcompteOrcamento)
     
     def calcular_valores(self):
         """Calcula os valores do acompte baseado no percentual"""
@@ -1299,12 +1432,25 @@ class Notificacao(models.Model):
         verbose_name = "Notification"
         verbose_name_plural = "Notifications"
         ordering = ['-created_at']
+        indexes = [
+            # Polling/stream: não lidas do usuário, mais recentes primeiro. Parcial
+            # (lida=False) em vez de (usuario, lida, created_at): o SQLite não usa a
+            # coluna lida do índice composto para o filtro NOT lida que o Django gera
+            models.Index(
+                fields=['usuario', '-created_at'],
+                condition=models.Q(lida=False),
+                name='notificacao_nao_lidas_idx'
+            ),
+            # Retenção: lidas por data de leitura
+            models.Index(fields=['read_at'], condition=models.Q(lida=True), name='notificacao_lida_idx'),
+        ]
 
     def marcar_como_lida(self):
         if not self.lida:
             self.lida = True
             self.read_at = timezone.now()
             self.save(update_fields=['lida', 'read_at'])
+            registrar_alteracao([self.usuario_id], -1)
 
     def get_icon(self) -> str:
         """Return a FontAwesome class for this notification type (for templates)."""
@@ -1324,6 +1470,54 @@ class Notificacao(models.Model):
     def __str__(self):
         return f"{self.titulo} - {self.usuario.email}"
 
+class SequenciaNumeracao(models.Model):
+    """Contador por prefixo e ano usado na numeração sequencial dos documentos"""
+    prefixo = models.CharField(max_length=10, verbose_name="Préfixe")
+    ano = models.PositiveIntegerField(verbose_name="Année")
+    ultimo_numero = models.PositiveIntegerField(default=0, verbose_name="Dernier numéro attribué")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Séquence de numérotation"
+        verbose_name_plural = "Séquences de numérotation"
+        unique_together = ['prefixo', 'ano']
+        ordering = ['prefixo', '-ano']
+
+    def __str__(self):
+        return f"{self.prefixo}{self.ano} → {self.ultimo_numero}"
+
+class EmailPendente(models.Model):
+    """Email na fila de saída, enviado pelo comando despachar_emails (ver fila_emails.py)"""
+    assunto = models.CharField(max_length=255, verbose_name="Sujet")
+    mensagem_texto = models.TextField(verbose_name="Message (texte)")
+    mensagem_html = models.TextField(blank=True, verbose_name="Message (HTML)")
+    remetente = models.CharField(max_length=254, blank=True, verbose_name="Expéditeur")
+    destinatarios = models.JSONField(default=list, verbose_name="Destinataires")
+
+    status = models.CharField(
+        max_length=10, choices=StatusEmail.choices, default=StatusEmail.PENDENTE, verbose_name="Statut"
+    )
+    tentativas = models.PositiveSmallIntegerField(default=0, verbose_name="Tentatives")
+    proxima_tentativa = models.DateTimeField(default=timezone.now, verbose_name="Prochaine tentative")
+    # Prazo da reserva feita por um worker; vencido, o email volta a ficar disponível
+    bloqueado_ate = models.DateTimeField(null=True, blank=True)
+    ultimo_erro = models.TextField(blank=True, verbose_name="Dernière erreur")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    enviado_em = models.DateTimeField(null=True, blank=True, verbose_name="Envoyé le")
+
+    class Meta:
+        verbose_name = "Email en attente"
+        verbose_name_plural = "Emails en attente"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'proxima_tentativa'], name='email_fila_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.assunto} → {', '.join(self.destinatarios)}"
+
+
 # Model para gestão de produtos e serviços
 class Fornecedor(models.Model):
     nome = models.CharField(max_length=200, verbose_name="Nom du fournisseur")
@@ -1441,7 +1635,8 @@ class Produto(models.Model):
         verbose_name_plural = "Produits"
         ordering = ['referencia']
 
-    def save(self, *args, **kwargs):
+    def calcular_precos(self):
+        """Margem, preço de venda HT e TTC a partir do preço de compra (sem gravar)"""
         # Calcular preço de venda HT baseado na margem
         if self.margem_percentual > 0:
             self.margem_ht = (self.preco_compra * self.margem_percentual) / 100
@@ -1456,6 +1651,8 @@ class Produto(models.Model):
         if self.preco_compra > 0 and self.margem_percentual == 0:
             self.margem_percentual = (self.margem_ht / self.preco_compra) * 100
 
+    def save(self, *args, **kwargs):
+        self.calcular_precos()
         super().save(*args, **kwargs)
 
     def __str__(self):
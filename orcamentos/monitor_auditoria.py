@@ -3,6 +3,7 @@ import django
 import logging
 from datetime import datetime, timedelta
 from django.utils import timezone
+from django.db.models import Sum
 from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 from django.contrib.contenttypes.models import ContentType
@@ -13,7 +14,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 django.setup()
 
 from orcamentos.models import Projeto, SolicitacaoOrcamento, Orcamento, ItemOrcamento
-from orcamentos.auditoria import AuditoriaManager, LogAuditoria, TipoAcao
+from orcamentos.auditoria import AuditoriaManager, EstatisticaAuditoriaDiaria, LogAuditoria, TipoAcao
 
 # Configurar logging
 logging.basicConfig(
@@ -67,8 +68,16 @@ class MonitorOrcamentos:
     def pre_save_handler(self, sender, instance, **kwargs):
         """Captura estado anterior do objeto antes da alteração"""
         if instance.pk:  # Só para objetos existentes
+            # Estado registrado no carregamento/último save: nenhum SELECT extra
+            valores = instance.valores_carregados() if hasattr(instance, 'valores_carregados') else None
+            if valores is not None:
+                instance._dados_anteriores = self.serializar_valores(
+                    sender.__name__, valores, instance.pk
+                )
+                return
+
             try:
-                # Buscar estado anterior
+                # Instância sem snapshot (ex.: criada com pk manual): buscar estado anterior
                 estado_anterior = sender.objects.get(pk=instance.pk)
 
                 # Serializar dados anteriores
@@ -142,53 +151,33 @@ class MonitorOrcamentos:
 
     def serializar_objeto(self, obj):
         """Serializa objeto para JSON mantendo informações relevantes"""
-        dados = {}
+        campos = self.campos_relevantes(obj.__class__)
+        valores = {campo: getattr(obj, campo) for campo in campos if hasattr(obj, campo)}
+        return self.serializar_valores(obj.__class__.__name__, valores, obj.pk)
 
-        # Campos que queremos rastrear
-        campos_relevantes = {
-            'Projeto': [
-                'titulo', 'descricao', 'tipo_servico', 'status', 'urgencia',
-                'endereco_projeto', 'cidade_projeto', 'area_aproximada',
-                'orcamento_estimado', 'data_inicio_desejada'
-            ],
-            'SolicitacaoOrcamento': [
-                'numero', 'status', 'nome_solicitante', 'email_solicitante',
-                'telefone_solicitante', 'tipo_servico', 'descricao_servico',
-                'urgencia', 'orcamento_maximo'
-            ],
-            'Orcamento': [
-                'numero', 'status', 'titulo', 'subtotal', 'desconto',
-                'total', 'prazo_execucao', 'validade_orcamento',
-                'condicoes_pagamento', 'data_envio', 'data_resposta_cliente'
-            ],
-            'ItemOrcamento': [
-                'referencia', 'descricao', 'quantidade', 'preco_unitario_ht',
-                'preco_unitario_ttc', 'total_ht', 'total_ttc', 'taxa_tva',
-                'remise_percentual'
-            ]
-        }
+    def campos_relevantes(self, modelo):
+        """Campos que queremos rastrear (declarados no próprio model)"""
+        return getattr(modelo, 'campos_rastreados', None) or []
 
-        nome_modelo = obj.__class__.__name__
-        campos = campos_relevantes.get(nome_modelo, [])
-
-        for campo in campos:
-            if hasattr(obj, campo):
-                valor = getattr(obj, campo)
+    def serializar_valores(self, nome_modelo, valores, pk):
+        """Serializa um dict {campo: valor} no formato gravado nos logs"""
+        dados = {}
 
-                # Serializar tipos especiais
-                if hasattr(valor, 'isoformat'):  # Data/DateTime
-                    valor = valor.isoformat()
-                elif hasattr(valor, 'quantize'):  # Decimal
-                    valor = str(valor)
-                elif valor is None:
-                    valor = None
-                else:
-                    valor = str(valor)
+        for campo, valor in valores.items():
+            # Serializar tipos especiais
+            if hasattr(valor, 'isoformat'):  # Data/DateTime
+                valor = valor.isoformat()
+            elif hasattr(valor, 'quantize'):  # Decimal
+                valor = str(valor)
+            elif valor is None:
+                valor = None
+            else:
+                valor = str(valor)
 
-                dados[campo] = valor
+            dados[campo] = valor
 
         # Adicionar metadados
-        dados['_id'] = obj.pk
+        dados['_id'] = pk
         dados['_modelo'] = nome_modelo
         dados['_timestamp'] = timezone.now().isoformat()
 
@@ -212,41 +201,50 @@ class MonitorOrcamentos:
 
         return alteracoes
 
-    def gerar_relatorio_diario(self):
+    def gerar_relatorio_diario(self, limite_detalhes=100):
         """Gera relatório diário de atividades"""
-        hoje = timezone.now().date()
+        hoje = timezone.localdate()
         inicio_dia = timezone.make_aware(datetime.combine(hoje, datetime.min.time()))
         fim_dia = timezone.make_aware(datetime.combine(hoje, datetime.max.time()))
 
-        logs_hoje = LogAuditoria.objects.filter(
-            timestamp__gte=inicio_dia,
-            timestamp__lte=fim_dia
-        ).select_related('usuario', 'content_type')
+        # Contadores vêm do resumo diário; só os detalhes leem os logs
+        buckets = EstatisticaAuditoriaDiaria.do_periodo(hoje, hoje)
 
         relatorio = {
             'data': hoje.isoformat(),
-            'total_atividades': logs_hoje.count(),
+            'total_atividades': buckets.aggregate(total=Sum('total'))['total'] or 0,
             'atividades_por_tipo': {},
-            'usuarios_ativos': set(),
+            'usuarios_ativos': [],
             'modelos_afetados': {},
             'atividades_detalhadas': []
         }
 
-        for log in logs_hoje:
-            try:
-                # Contar por tipo de ação
-                acao = log.get_acao_display()
-                relatorio['atividades_por_tipo'][acao] = relatorio['atividades_por_tipo'].get(acao, 0) + 1
+        # Contar por tipo de ação
+        for item in buckets.values('acao').annotate(soma=Sum('total')).order_by('-soma'):
+            relatorio['atividades_por_tipo'][TipoAcao(item['acao']).label] = item['soma']
 
-                # Usuários ativos
-                if log.usuario:
-                    relatorio['usuarios_ativos'].add(log.usuario.get_full_name())
+        # Usuários ativos
+        usuarios = buckets.filter(usuario__isnull=False).values(
+            'usuario__first_name', 'usuario__last_name'
+        ).distinct()
+        relatorio['usuarios_ativos'] = sorted({
+            f"{u['usuario__first_name']} {u['usuario__last_name']}".strip() for u in usuarios
+        })
+
+        # Modelos afetados
+        for item in buckets.values('content_type__model').annotate(soma=Sum('total')).order_by('-soma'):
+            relatorio['modelos_afetados'][item['content_type__model']] = item['soma']
 
-                # Modelos afetados - com tratamento de erro
-                if log.content_type:
-                    modelo = log.content_type.model
-                    relatorio['modelos_afetados'][modelo] = relatorio['modelos_afetados'].get(modelo, 0) + 1
+        # Detalhes das atividades mais recentes
+        logs_hoje = LogAuditoria.objects.filter(
+            timestamp__gte=inicio_dia,
+            timestamp__lte=fim_dia
+        ).select_related('usuario', 'content_type')
+        if limite_detalhes is not None:
+            logs_hoje = logs_hoje[:limite_detalhes]
 
+        for log in logs_hoje:
+            try:
                 # Detalhes da atividade - com tratamento de erro
                 try:
                     objeto_str = str(log.objeto_afetado) if log.objeto_afetado else 'N/A'
@@ -256,7 +254,7 @@ class MonitorOrcamentos:
                 relatorio['atividades_detalhadas'].append({
                     'timestamp': log.timestamp.isoformat(),
                     'usuario': log.usuario.get_full_name() if log.usuario else 'Anonyme',
-                    'acao': acao,
+                    'acao': log.get_acao_display(),
                     'objeto': objeto_str,
                     'descricao': log.descricao,
                     'alteracoes': log.resumo_alteracao
@@ -265,53 +263,51 @@ class MonitorOrcamentos:
                 logger.error(f"Erro ao processar log {log.id}: {e}")
                 continue
 
-        # Converter set para list para JSON
-        relatorio['usuarios_ativos'] = list(relatorio['usuarios_ativos'])
-
         return relatorio
 
     def gerar_relatorio_semanal(self):
         """Gera relatório semanal de atividades"""
-        hoje = timezone.now().date()
+        hoje = timezone.localdate()
         inicio_semana = hoje - timedelta(days=7)
 
-        logs_semana = LogAuditoria.objects.filter(
-            timestamp__gte=inicio_semana
-        )
+        buckets = EstatisticaAuditoriaDiaria.do_periodo(inicio_semana, hoje)
 
         relatorio = {
             'periodo': f"{inicio_semana.isoformat()} - {hoje.isoformat()}",
-            'total_atividades': logs_semana.count(),
+            'total_atividades': buckets.aggregate(total=Sum('total'))['total'] or 0,
             'estatisticas_diarias': {},
             'usuarios_mais_ativos': {},
             'modelos_mais_alterados': {},
             'acoes_mais_frequentes': {}
         }
 
-        # Estatísticas diárias
+        # Estatísticas diárias (dias sem atividade aparecem com 0)
+        por_dia = dict(buckets.values_list('data').annotate(soma=Sum('total')))
         for i in range(8):
             data = hoje - timedelta(days=i)
-            inicio_dia = timezone.make_aware(datetime.combine(data, datetime.min.time()))
-            fim_dia = timezone.make_aware(datetime.combine(data, datetime.max.time()))
-
-            count = logs_semana.filter(
-                timestamp__gte=inicio_dia,
-                timestamp__lte=fim_dia
-            ).count()
-
-            relatorio['estatisticas_diarias'][data.isoformat()] = count
+            relatorio['estatisticas_diarias'][data.isoformat()] = por_dia.get(data, 0)
 
         # Usuários mais ativos
-        from django.db.models import Count
-        usuarios = logs_semana.values(
+        usuarios = buckets.values(
             'usuario__first_name', 'usuario__last_name'
         ).annotate(
-            total=Count('id')
-        ).order_by('-total')[:5]
+            soma=Sum('total')
+        ).order_by('-soma')[:5]
 
         for usuario in usuarios:
             nome = f"{usuario['usuario__first_name']} {usuario['usuario__last_name']}"
-            relatorio['usuarios_mais_ativos'][nome] = usuario['total']
+            relatorio['usuarios_mais_ativos'][nome] = usuario['soma']
+
+        # Modelos mais alterados
+        modelos = buckets.filter(acao=TipoAcao.EDICAO).values('content_type__model').annotate(
+            soma=Sum('total')
+        ).order_by('-soma')[:5]
+        for item in modelos:
+            relatorio['modelos_mais_alterados'][item['content_type__model']] = item['soma']
+
+        # Ações mais frequentes
+        for item in buckets.values('acao').annotate(soma=Sum('total')).order_by('-soma')[:5]:
+            relatorio['acoes_mais_frequentes'][TipoAcao(item['acao']).label] = item['soma']
 
         return relatorio
 
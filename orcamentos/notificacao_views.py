@@ -1,12 +1,50 @@
 # ============ SISTEMA DE NOTIFICAÇÕES ============
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Max
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from . import contador_notificacoes
+
+# Comentário enviado quando o stream fica ocioso, para proxies não fecharem a conexão
+INTERVALO_HEARTBEAT = 15
+
+
+def etag_notificacoes(request, *args, **kwargs):
+	"""ETag das notificações do usuário: só muda quando uma notificação é criada ou lida"""
+	return contador_notificacoes.etag(request.user.id)
+
+
+def dados_notificacao(notif):
+	return {
+		'id': notif.id,
+		'tipo': notif.tipo,
+		'titulo': notif.titulo,
+		'mensagem': notif.mensagem,
+		'url_acao': notif.url_acao or '#',
+		'created_at': notif.created_at.strftime('%d/%m/%Y %H:%M'),
+		'icon': get_notification_icon(notif.tipo)
+	}
 
 
 @login_required
+@condition(etag_func=etag_notificacoes)
 def get_user_notifications(request):
-	"""API endpoint para buscar notificações do usuário"""
+	"""
+	API endpoint para buscar notificações do usuário
+
+	Clientes que continuam no polling enviam If-None-Match e recebem 304 sem
+	nenhuma consulta às notificações enquanto nada mudar.
+	"""
 	from .models import Notificacao
 	
 	# Buscar notificações não lidas do usuário
@@ -15,29 +53,96 @@ def get_user_notifications(request):
 		lida=False
 	).order_by('-created_at')[:10]
 	
-	# Contar total de não lidas
-	total_nao_lidas = Notificacao.objects.filter(
-		usuario=request.user,
-		lida=False
-	).count()
-	
-	# Preparar dados para JSON
-	notifications_data = []
-	for notif in notificacoes:
-		notifications_data.append({
-			'id': notif.id,
-			'tipo': notif.tipo,
-			'titulo': notif.titulo,
-			'mensagem': notif.mensagem,
-			'url_acao': notif.url_acao or '#',
-			'created_at': notif.created_at.strftime('%d/%m/%Y %H:%M'),
-			'icon': get_notification_icon(notif.tipo)
-		})
-	
-	return JsonResponse({
-		'notifications': notifications_data,
-		'total_unread': total_nao_lidas
+	response = JsonResponse({
+		'notifications': [dados_notificacao(notif) for notif in notificacoes],
+		'total_unread': contador_notificacoes.contar_nao_lidas(request.user.id)
 	})
+	patch_cache_control(response, private=True, no_cache=True)
+	return response
+
+
+def _evento(nome, dados, id_evento):
+	return f"id: {id_evento}\nevent: {nome}\ndata: {json.dumps(dados)}\n\n"
+
+
+def _eventos_pendentes(usuario_id, estado):
+	"""
+	Um ciclo do stream: só consulta o banco se a versão em cache mudou.
+
+	Envia as notificações não lidas criadas depois do último id entregue e o
+	contador atualizado.
+	"""
+	from .models import Notificacao
+
+	versao = contador_notificacoes.versao(usuario_id)
+	if versao == estado['versao']:
+		return ''
+	estado['versao'] = versao
+
+	novas = list(Notificacao.objects.filter(
+		usuario_id=usuario_id,
+		lida=False,
+		pk__gt=estado['ultimo_id']
+	).order_by('-pk')[:10])
+
+	eventos = []
+	for notif in reversed(novas):
+		estado['ultimo_id'] = notif.pk
+		eventos.append(_evento('notificacao', dados_notificacao(notif), notif.pk))
+	eventos.append(_evento(
+		'contador',
+		{'total_unread': contador_notificacoes.contar_nao_lidas(usuario_id)},
+		estado['ultimo_id']
+	))
+	return ''.join(eventos)
+
+
+async def _stream_asgi(usuario_id, estado, intervalo, duracao):
+	fim = time.monotonic() + duracao
+	ultimo_envio = time.monotonic()
+	yield 'retry: 5000\n\n'
+	while time.monotonic() < fim:
+		eventos = await sync_to_async(_eventos_pendentes)(usuario_id, estado)
+		if eventos or time.monotonic() - ultimo_envio >= INTERVALO_HEARTBEAT:
+			yield eventos or ': ping\n\n'
+			ultimo_envio = time.monotonic()
+		await asyncio.sleep(intervalo)
+
+
+@login_required
+def notifications_stream(request):
+	"""
+	Stream Server-Sent Events com as novas notificações e o contador de não lidas
+
+	Só existe com ASGI e NOTIFICACOES_SSE_ATIVO: o stream é um gerador
+	assíncrono e não prende nenhuma thread entre as verificações. Em WSGI cada
+	aba aberta ocuparia um worker durante NOTIFICACOES_SSE_DURACAO, então a
+	resposta é 204 (o EventSource não reconecta) e o painel continua no polling
+	com ETag. A conexão termina após NOTIFICACOES_SSE_DURACAO; o EventSource
+	reconecta enviando Last-Event-ID e recebe o que perdeu.
+	"""
+	from .models import Notificacao
+
+	if not (getattr(settings, 'NOTIFICACOES_SSE_ATIVO', False) and isinstance(request, ASGIRequest)):
+		return HttpResponse(status=204)
+
+	try:
+		ultimo_id = int(request.headers.get('Last-Event-ID', ''))
+	except ValueError:
+		ultimo_id = Notificacao.objects.filter(usuario=request.user).aggregate(
+			ultimo=Max('pk')
+		)['ultimo'] or 0
+
+	estado = {'versao': None, 'ultimo_id': ultimo_id}
+	intervalo = getattr(settings, 'NOTIFICACOES_SSE_INTERVALO', 2.0)
+	duracao = getattr(settings, 'NOTIFICACOES_SSE_DURACAO', 300)
+
+	response = StreamingHttpResponse(
+		_stream_asgi(request.user.id, estado, intervalo, duracao), content_type='text/event-stream'
+	)
+	response['Cache-Control'] = 'no-cache'
+	response['X-Accel-Buffering'] = 'no'
+	return response
 
 
 @login_required
@@ -51,9 +156,7 @@ def mark_notification_read(request, notification_id):
 				id=notification_id,
 				usuario=request.user
 			)
-			notificacao.lida = True
-			notificacao.read_at = timezone.now()
-			notificacao.save()
+			notificacao.marcar_como_lida()
 			
 			return JsonResponse({'success': True})
 		except Notificacao.DoesNotExist:
@@ -68,13 +171,14 @@ def mark_all_notifications_read(request):
 	from .models import Notificacao
 	
 	if request.method == 'POST':
-		Notificacao.objects.filter(
+		marcadas = Notificacao.objects.filter(
 			usuario=request.user,
 			lida=False
 		).update(
 			lida=True,
 			read_at=timezone.now()
 		)
+		contador_notificacoes.registrar_alteracao([request.user.id], -marcadas)
 		
 		return JsonResponse({'success': True})
 	
@@ -1,9 +1,12 @@
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import condition, require_http_methods
 from django.core.paginator import Paginator
+from django.utils.cache import patch_cache_control
 from .models import Notificacao
+from . import contador_notificacoes
+from .notificacao_views import etag_notificacoes
 from django.utils import timezone
 
 @login_required
@@ -43,22 +46,21 @@ def marcar_notificacao_lida(request, notificacao_id):
 def marcar_todas_lidas(request):
     """Marcar todas as notificações como lidas"""
     try:
-        Notificacao.objects.filter(
+        marcadas = Notificacao.objects.filter(
             usuario=request.user,
             lida=False
         ).update(lida=True, read_at=timezone.now())
+        contador_notificacoes.registrar_alteracao([request.user.id], -marcadas)
 
         return JsonResponse({'success': True})
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)})
 
 @login_required
+@condition(etag_func=etag_notificacoes)
 def get_notificacoes_nao_lidas(request):
-    """Retorna o número de notificações não lidas via AJAX"""
-    count = Notificacao.objects.filter(
-        usuario=request.user,
-        lida=False
-    ).count()
+    """Retorna o número de notificações não lidas via AJAX (304 se nada mudou)"""
+    count = contador_notificacoes.contar_nao_lidas(request.user.id)
 
     notificacoes_recentes = Notificacao.objects.filter(
         usuario=request.user,
@@ -76,7 +78,9 @@ def get_notificacoes_nao_lidas(request):
             'created_at': notif.created_at.strftime('%d/%m/%Y %H:%M')
         })
 
-    return JsonResponse({
+    response = JsonResponse({
         'count': count,
         'notificacoes': notificacoes_data
     })
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,105 @@
+"""
+Numeração sequencial dos documentos (demandes, devis, factures, acomptes)
+e dos códigos de cliente
+
+Cada prefixo tem uma linha de contador por ano em SequenciaNumeracao (ou
+uma única linha com ano SEM_ANO para sequências contínuas, como CLIxxx).
+A alocação incrementa o contador com um UPDATE atômico (que bloqueia a
+linha até o fim da transação) e lê o valor de volta: custo constante, sem
+sorteio e sem colisão entre workers concorrentes.
+
+A alocação deve acontecer na mesma transação que grava o documento: se a
+gravação falhar, o incremento é desfeito junto e a sequência não fica com
+buracos (exigência para as factures).
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Length
+from django.utils import timezone
+
+
+class NumeracaoService:
+    """Serviço de alocação de números sequenciais por prefixo e ano"""
+
+    # Sequências que não reiniciam a cada ano
+    SEM_ANO = 0
+
+    @staticmethod
+    def proximo_numero(prefixo, modelo, largura=5, ano=None, campo='numero'):
+        """
+        Aloca o próximo número do prefixo para o ano (padrão: ano corrente).
+
+        `modelo` é o model dono do campo `campo`; só é consultado na
+        primeira alocação do ano, para continuar depois dos números já
+        existentes (inclusive os antigos, gerados aleatoriamente).
+        """
+        return NumeracaoService.proximos_numeros(
+            prefixo, modelo, 1, largura=largura, ano=ano, campo=campo
+        )[0]
+
+    @staticmethod
+    def proximos_numeros(prefixo, modelo, quantidade, largura=5, ano=None, campo='numero'):
+        """Reserva um bloco contíguo de `quantidade` números com um único incremento"""
+        if quantidade <= 0:
+            return []
+
+        if ano is None:
+            ano = timezone.now().year
+        ultimo = NumeracaoService._incrementar(prefixo, ano, modelo, campo, quantidade)
+        return [
+            NumeracaoService.formatar(prefixo, ano, valor, largura)
+            for valor in range(ultimo - quantidade + 1, ultimo + 1)
+        ]
+
+    @staticmethod
+    def formatar(prefixo, ano, valor, largura=5):
+        return f"{NumeracaoService._inicio(prefixo, ano)}{valor:0{largura}d}"
+
+    @staticmethod
+    def _inicio(prefixo, ano):
+        return prefixo if ano == NumeracaoService.SEM_ANO else f"{prefixo}{ano}"
+
+    @staticmethod
+    def _incrementar(prefixo, ano, modelo, campo, quantidade):
+        """Soma `quantidade` ao contador e devolve o último valor reservado"""
+        from .models import SequenciaNumeracao
+
+        # Sem savepoint próprio: o caminho normal é só UPDATE + SELECT
+        with transaction.atomic(savepoint=False):
+            contadores = SequenciaNumeracao.objects.filter(prefixo=prefixo, ano=ano)
+
+            # O UPDATE bloqueia a linha do contador até o commit da transação
+            if contadores.update(ultimo_numero=F('ultimo_numero') + quantidade):
+                return contadores.values_list('ultimo_numero', flat=True).get()
+
+            ultimo = NumeracaoService._maior_numero_existente(prefixo, ano, modelo, campo) + quantidade
+            try:
+                with transaction.atomic():
+                    SequenciaNumeracao.objects.create(
+                        prefixo=prefixo, ano=ano, ultimo_numero=ultimo
+                    )
+                return ultimo
+            except IntegrityError:
+                # Outro worker criou o contador ao mesmo tempo: usar o dele
+                contadores.update(ultimo_numero=F('ultimo_numero') + quantidade)
+                return contadores.values_list('ultimo_numero', flat=True).get()
+
+    @staticmethod
+    def _maior_numero_existente(prefixo, ano, modelo, campo):
+        """Maior sufixo numérico já usado por `modelo` para o prefixo/ano"""
+        if modelo is None:
+            return 0
+
+        inicio = NumeracaoService._inicio(prefixo, ano)
+        # Números mais longos são maiores; entre iguais, a ordem alfabética basta
+        ultimo = (
+            modelo.objects.filter(**{f'{campo}__regex': rf'^{inicio}[0-9]+$'})
+            .order_by(Length(campo).desc(), f'-{campo}')
+            .values_list(campo, flat=True)
+            .first()
+        )
+        if not ultimo:
+            return 0
+
+        return int(ultimo[len(inicio):])
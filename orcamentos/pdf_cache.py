@@ -0,0 +1,114 @@
+"""
+Cache em disco dos PDFs gerados
+
+Cada documento é guardado em MEDIA_ROOT/cache_pdf/<tipo>/<hash>.pdf, onde o
+hash resume todo o conteúdo impresso (ver OrcamentoPDFGenerator.chave_conteudo).
+Qualquer alteração no devis gera outra chave, então não há invalidação
+explícita: as versões antigas deixam de ser lidas e saem pelo limite de
+tamanho (LRU pela data de modificação, renovada a cada leitura).
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+
+
+def hash_conteudo(dados):
+    """sha256 estável de uma estrutura JSON (Decimal/date convertidos com str)"""
+    serializado = json.dumps(dados, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(serializado.encode('utf-8')).hexdigest()
+
+
+class CachePDF:
+    """PDFs renderizados guardados em disco, com limite de tamanho total"""
+
+    def __init__(self, tipo, pasta=None, tamanho_maximo=None):
+        self.pasta = Path(
+            pasta or getattr(settings, 'PDF_CACHE_DIR', None) or Path(settings.MEDIA_ROOT) / 'cache_pdf'
+        ) / tipo
+        self.tamanho_maximo = tamanho_maximo or getattr(
+            settings, 'PDF_CACHE_TAMANHO_MAXIMO', 200 * 1024 * 1024
+        )
+
+    def caminho(self, chave):
+        return self.pasta / f"{chave}.pdf"
+
+    def abrir(self, chave, gerar):
+        """
+        Arquivo aberto (modo binário) com o PDF da chave.
+
+        Se não estiver em cache, `gerar()` deve devolver os bytes do PDF.
+        """
+        caminho = self.caminho(chave)
+        try:
+            arquivo = open(caminho, 'rb')
+        except FileNotFoundError:
+            self.gravar(chave, gerar())
+            # O arquivo pode ser removido pela limpeza de outro processo; o handle aberto continua válido
+            return open(caminho, 'rb')
+
+        # Renovar a posição no LRU
+        try:
+            os.utime(caminho)
+        except OSError:
+            pass
+        return arquivo
+
+    def ler(self, chave):
+        """Bytes do PDF em cache, ou None se a chave não estiver guardada"""
+        try:
+            with open(self.caminho(chave), 'rb') as arquivo:
+                conteudo = arquivo.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(self.caminho(chave))
+        except OSError:
+            pass
+        return conteudo
+
+    def obter(self, chave, gerar):
+        """Bytes do PDF da chave (gerado e guardado se necessário)"""
+        with self.abrir(chave, gerar) as arquivo:
+            return arquivo.read()
+
+    def gravar(self, chave, conteudo):
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        # Escrita atômica: quem lê nunca vê um PDF pela metade
+        descritor, temporario = tempfile.mkstemp(dir=self.pasta, suffix='.tmp')
+        with os.fdopen(descritor, 'wb') as f:
+            f.write(conteudo)
+        os.replace(temporario, self.caminho(chave))
+        self.limpar(manter=self.caminho(chave))
+
+    def limpar(self, manter=None):
+        """Remove os PDFs menos usados até o total ficar abaixo do limite; devolve quantos saíram"""
+        arquivos = []
+        total = 0
+        for entrada in os.scandir(self.pasta):
+            if not entrada.name.endswith('.pdf'):
+                continue
+            try:
+                info = entrada.stat()
+            except FileNotFoundError:
+                continue
+            arquivos.append((info.st_mtime, info.st_size, entrada.path))
+            total += info.st_size
+
+        removidos = 0
+        for _, tamanho, caminho in sorted(arquivos):
+            if total <= self.tamanho_maximo:
+                break
+            if manter is not None and caminho == str(manter):
+                continue
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+            total -= tamanho
+            removidos += 1
+        return removidos
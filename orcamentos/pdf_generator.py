@@ -9,78 +9,230 @@ from reportlab.lib import colors
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from io import BytesIO
+from xml.sax.saxutils import escape
 from datetime import datetime
 import os
 
-
-class OrcamentoPDFGenerator:
-    def __init__(self):
-        self.styles = getSampleStyleSheet()
-        self.setup_custom_styles()
-
-    def setup_custom_styles(self):
-        """Configurar estilos customizados"""
-        # Título principal
-        self.styles.add(
-            ParagraphStyle(
-                name="CustomTitle",
-                parent=self.styles["Heading1"],
-                fontSize=24,
-                spaceAfter=20,
-                alignment=TA_CENTER,
-                textColor=colors.HexColor("#2c5aa0"),
-                fontName="Helvetica-Bold",
-            )
+from .documentos import DocumentoService
+from .pdf_cache import CachePDF, hash_conteudo
+
+
+# Dados impressos no devis quando o campo correspondente de CompanySettings está vazio
+EMPRESA = {
+    "nome": "LOPES PEINTURE",
+    "endereco": "261 Chemin de la Castellane",
+    "cidade": "31790 ST SAUVEUR",
+    "pais": "France",
+    "telefone": "+33 07 69 27 37 76",
+    "email": "contact@lopespeinture.fr",
+    "site": "www.lopespeinture.fr",
+    "pagamento": "PAIEMENT PAR VIREMENT BANCAIRE LOPES DE SOUZA FABIANO (EI) IBAN FR76 1027 8022 3400 0206 6300 131",
+}
+
+
+
+def empresa_pdf(valores):
+    """Bloco da empresa do PDF a partir dos valores de CompanySettings (ver documentos.valores_empresa)"""
+    # Os valores entram em markup de Paragraph
+    dados = {
+        "nome": valores["name"] or EMPRESA["nome"],
+        "endereco": valores["address"] or EMPRESA["endereco"],
+        "cidade": valores["postal_city"] or EMPRESA["cidade"],
+        "pais": valores["country"] or EMPRESA["pais"],
+        "telefone": valores["phone"] or EMPRESA["telefone"],
+        "email": valores["email"] or EMPRESA["email"],
+        "site": valores["site"] or EMPRESA["site"],
+        "pagamento": EMPRESA["pagamento"],
+    }
+    return {chave: escape(valor) for chave, valor in dados.items()}
+
+
+# Incrementar quando o layout mudar: invalida os PDFs já guardados em cache
+VERSAO_LAYOUT = 2
+
+# Tabela de itens: linhas por bloco (cerca de uma página A4 de linhas simples)
+LINHAS_POR_TABELA = 35
+LARGURAS_ITENS = [3 * cm, 7.2 * cm, 1.8 * cm, 1.5 * cm, 2.5 * cm, 2.5 * cm]
+CABECALHO_ITENS = ["Référence", "Description", "Qté", "Unité", "Prix Unit. HT", "Total HT"]
+
+
+def _criar_estilos():
+    """Folha de estilos do devis (criada uma vez por processo)"""
+    styles = getSampleStyleSheet()
+
+    # Título principal
+    styles.add(
+        ParagraphStyle(
+            name="CustomTitle",
+            parent=styles["Heading1"],
+            fontSize=24,
+            spaceAfter=20,
+            alignment=TA_CENTER,
+            textColor=colors.HexColor("#2c5aa0"),
+            fontName="Helvetica-Bold",
         )
-
-        # Subtítulo
-        self.styles.add(
-            ParagraphStyle(
-                name="CustomSubtitle",
-                parent=self.styles["Heading2"],
-                fontSize=16,
-                spaceAfter=12,
-                textColor=colors.HexColor("#666666"),
-                alignment=TA_CENTER,
-            )
+    )
+
+    # Subtítulo
+    styles.add(
+        ParagraphStyle(
+            name="CustomSubtitle",
+            parent=styles["Heading2"],
+            fontSize=16,
+            spaceAfter=12,
+            textColor=colors.HexColor("#666666"),
+            alignment=TA_CENTER,
         )
-
-        # Cabeçalho de seção
-        self.styles.add(
-            ParagraphStyle(
-                name="SectionHeader",
-                parent=self.styles["Heading3"],
-                fontSize=14,
-                spaceAfter=10,
-                textColor=colors.HexColor("#2c5aa0"),
-                fontName="Helvetica-Bold",
-            )
+    )
+
+    # Cabeçalho de seção
+    styles.add(
+        ParagraphStyle(
+            name="SectionHeader",
+            parent=styles["Heading3"],
+            fontSize=14,
+            spaceAfter=10,
+            textColor=colors.HexColor("#2c5aa0"),
+            fontName="Helvetica-Bold",
         )
-
-        # Texto normal
-        self.styles.add(
-            ParagraphStyle(
-                name="CustomNormal",
-                parent=self.styles["Normal"],
-                fontSize=10,
-                spaceAfter=6,
-                fontName="Helvetica",
-            )
+    )
+
+    # Texto normal
+    styles.add(
+        ParagraphStyle(
+            name="CustomNormal",
+            parent=styles["Normal"],
+            fontSize=10,
+            spaceAfter=6,
+            fontName="Helvetica",
         )
-
-        # Texto pequeno
-        self.styles.add(
-            ParagraphStyle(
-                name="CustomSmall",
-                parent=self.styles["Normal"],
-                fontSize=8,
-                textColor=colors.grey,
-                fontName="Helvetica",
-            )
+    )
+
+    # Texto pequeno
+    styles.add(
+        ParagraphStyle(
+            name="CustomSmall",
+            parent=styles["Normal"],
+            fontSize=8,
+            textColor=colors.grey,
+            fontName="Helvetica",
         )
+    )
+
+    # Rodapé
+    styles.add(
+        ParagraphStyle(
+            name="Footer",
+            parent=styles["CustomNormal"],
+            fontSize=9,
+            alignment=TA_CENTER,
+        )
+    )
+
+    # Agradecimento
+    styles.add(
+        ParagraphStyle(
+            name="ThankYou",
+            parent=styles["CustomNormal"],
+            fontSize=10,
+            textColor=colors.HexColor("#2c5aa0"),
+            alignment=TA_CENTER,
+            fontName="Helvetica-Oblique",
+        )
+    )
+
+    return styles
 
-    def generate_pdf(self, orcamento):
-        """Gerar PDF do orçamento usando ReportLab"""
+
+# Compartilhada por todas as instâncias: os estilos são só lidos durante a geração
+ESTILOS_PDF = _criar_estilos()
+
+# Estilo da tabela de itens, aplicado a todos os blocos
+ESTILO_TABELA_ITENS = TableStyle(
+    [
+        # Cabeçalho
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#2c5aa0")),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("FONTSIZE", (0, 0), (-1, 0), 10),
+        ("ALIGN", (0, 0), (-1, 0), "CENTER"),
+        # Dados
+        ("FONTNAME", (0, 1), (-1, -1), "Helvetica"),
+        ("FONTSIZE", (0, 1), (-1, -1), 9),
+        (
+            "ALIGN",
+            (2, 1),
+            (-1, -1),
+            "CENTER",
+        ),  # Quantidade, unidade, preços centralizados
+        (
+            "ALIGN",
+            (0, 1),
+            (1, -1),
+            "LEFT",
+        ),  # Referência e descrição à esquerda
+        # Bordas
+        ("GRID", (0, 0), (-1, -1), 1, colors.black),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        # Cores alternadas nas linhas
+        (
+            "ROWBACKGROUNDS",
+            (0, 1),
+            (-1, -1),
+            [colors.white, colors.HexColor("#f8f9fa")],
+        ),
+        # Total HT em negrito (células de texto simples)
+        ("FONTNAME", (5, 1), (5, -1), "Helvetica-Bold"),
+    ]
+)
+
+
+class OrcamentoPDFGenerator:
+    def __init__(self, linhas_por_tabela=LINHAS_POR_TABELA):
+        self.styles = ESTILOS_PDF
+        self.modelo = None
+        self.empresa = None
+        # None: tabela de itens única (modo anterior)
+        self.linhas_por_tabela = linhas_por_tabela
+
+    @staticmethod
+    def chave_conteudo(orcamento, modelo=None):
+        """Hash de tudo o que é impresso no devis (chave do cache de PDFs)"""
+        solicitacao = orcamento.solicitacao
+        # Itens e acomptes vêm do modelo de documento (sem consulta quando já está em cache)
+        modelo = modelo or DocumentoService.modelo_devis(orcamento)
+        dados = {
+            "layout": VERSAO_LAYOUT,
+            "empresa": empresa_pdf(modelo["empresa"]),
+            "orcamento": [
+                orcamento.numero, orcamento.titulo, orcamento.descricao,
+                orcamento.data_elaboracao, orcamento.validade_orcamento,
+                orcamento.subtotal, orcamento.total, orcamento.total_ttc,
+                orcamento.condicoes_pagamento,
+            ],
+            "cliente": [
+                solicitacao.nome_solicitante, solicitacao.email_solicitante,
+                solicitacao.telefone_solicitante, solicitacao.endereco,
+                solicitacao.cidade, solicitacao.cep,
+            ],
+            "itens": [
+                [item["referencia"], item["designation"], item["quantite"], item["unidade"],
+                 item["pu_ht"], item["total_ht"]]
+                for item in modelo["items_data"]
+            ],
+            "acomptes": [[a["numero"], a["valor_ttc"]] for a in modelo["acomptes"]],
+        }
+        return hash_conteudo(dados)
+
+    def generate_pdf(self, orcamento, modelo=None):
+        """
+        Gerar PDF do orçamento usando ReportLab
+
+        `modelo` é o modelo de documento já montado (DocumentoService.modelo_devis);
+        a exportação em lote o envia pronto para os processos filhos não consultarem o banco.
+        """
+        self.modelo = modelo or DocumentoService.modelo_devis(orcamento)
+        self.empresa = empresa_pdf(self.modelo["empresa"])
         buffer = BytesIO()
         doc = SimpleDocTemplate(
             buffer,
@@ -153,7 +305,7 @@ class OrcamentoPDFGenerator:
 
         data = [
             [
-                Paragraph("<b>LOPES PEINTURE</b>", self.styles["SectionHeader"]),
+                Paragraph(f"<b>{self.empresa['nome']}</b>", self.styles["SectionHeader"]),
                 Paragraph(
                     f"<b>{cliente_nome}</b>",
                     self.styles["SectionHeader"],
@@ -161,7 +313,7 @@ class OrcamentoPDFGenerator:
             ],
             [
                 Paragraph(
-                    "261 Chemin de la Castellane<br/>31790 ST SAUVEUR",
+                    f"{self.empresa['endereco']}<br/>{self.empresa['cidade']}",
                     self.styles["CustomNormal"],
                 ),
                 Paragraph(
@@ -171,7 +323,7 @@ class OrcamentoPDFGenerator:
             ],
             [
                 Paragraph(
-                    "Tél: +33 07 69 27 37 76<br/>contact@lopespeinture.fr",
+                    f"Tél: {self.empresa['telefone']}<br/>{self.empresa['email']}",
                     self.styles["CustomNormal"],
                 ),
                 Paragraph(
@@ -180,7 +332,7 @@ class OrcamentoPDFGenerator:
                 ),
             ],
             [
-                Paragraph("www.lopespeinture.fr", self.styles["CustomNormal"]),
+                Paragraph(self.empresa["site"], self.styles["CustomNormal"]),
                 Paragraph("", self.styles["CustomNormal"]),
             ],
         ]
@@ -292,7 +444,56 @@ class OrcamentoPDFGenerator:
         return elements
 
     def _build_items_table(self, orcamento):
-        """Construir tabela de itens"""
+        """
+        Construir tabela de itens
+
+        Os itens são divididos em tabelas de até `linhas_por_tabela` linhas, cada uma
+        com o cabeçalho repetido: o ReportLab recalcula a tabela inteira a cada quebra
+        de página, então uma tabela única de centenas de linhas fica cada vez mais cara.
+        Só a descrição (e referências longas) usa Paragraph; o resto é texto simples.
+        """
+        if not self.linhas_por_tabela:
+            return self._build_items_table_unica(orcamento)
+
+        elements = [
+            Paragraph("DÉTAIL DES PRESTATIONS", self.styles["SectionHeader"]),
+            Spacer(1, 10),
+        ]
+
+        itens = self.modelo["items_data"]
+        if not itens:
+            elements.append(self._tabela_itens([[
+                Paragraph("<i>Aucun item ajouté à ce devis</i>", self.styles["CustomNormal"]),
+                "", "", "", "", "",
+            ]]))
+
+        for inicio in range(0, len(itens), self.linhas_por_tabela):
+            elements.append(self._tabela_itens([
+                self._linha_item(item) for item in itens[inicio:inicio + self.linhas_por_tabela]
+            ]))
+
+        elements.append(Spacer(1, 20))
+        return elements
+
+    def _tabela_itens(self, linhas):
+        table = Table([CABECALHO_ITENS] + linhas, colWidths=LARGURAS_ITENS, repeatRows=1)
+        table.setStyle(ESTILO_TABELA_ITENS)
+        return table
+
+    def _linha_item(self, item):
+        estilo = self.styles["CustomNormal"]
+        referencia = item["referencia"] or "N/A"
+        return [
+            Paragraph(escape(referencia), estilo) if len(referencia) > 16 else referencia,
+            Paragraph(escape(item["designation"]), estilo),
+            str(item["quantite"]),
+            item["unidade"],
+            f"{item['pu_ht']:.2f} €",
+            f"{item['total_ht']:.2f} €",
+        ]
+
+    def _build_items_table_unica(self, orcamento):
+        """Tabela de itens única, com um Paragraph por célula (modo anterior, usado no benchmark)"""
         elements = []
 
         # Título da seção
@@ -313,21 +514,21 @@ class OrcamentoPDFGenerator:
         ]
 
         # Itens
-        for item in orcamento.itens.all():
-            ref_text = item.referencia if item.referencia else "N/A"
-            description = Paragraph(item.descricao, self.styles["CustomNormal"])
+        for item in self.modelo["items_data"]:
+            ref_text = item["referencia"] if item["referencia"] else "N/A"
+            description = Paragraph(item["designation"], self.styles["CustomNormal"])
 
             data.append(
                 [
                     Paragraph(ref_text, self.styles["CustomNormal"]),
                     description,
-                    Paragraph(str(item.quantidade), self.styles["CustomNormal"]),
-                    Paragraph(item.unidade, self.styles["CustomNormal"]),
+                    Paragraph(str(item["quantite"]), self.styles["CustomNormal"]),
+                    Paragraph(item["unidade"], self.styles["CustomNormal"]),
                     Paragraph(
-                        f"{item.preco_unitario_ht:.2f} €", self.styles["CustomNormal"]
+                        f"{item['pu_ht']:.2f} €", self.styles["CustomNormal"]
                     ),
                     Paragraph(
-                        f"<b>{item.total_ht:.2f} €</b>", self.styles["CustomNormal"]
+                        f"<b>{item['total_ht']:.2f} €</b>", self.styles["CustomNormal"]
                     ),
                 ]
             )
@@ -349,46 +550,8 @@ class OrcamentoPDFGenerator:
             )
 
         # Criar tabela
-        table = Table(
-            data, colWidths=[3 * cm, 7.2 * cm, 1.8 * cm, 1.5 * cm, 2.5 * cm, 2.5 * cm]
-        )
-        table.setStyle(
-            TableStyle(
-                [
-                    # Cabeçalho
-                    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#2c5aa0")),
-                    ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-                    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                    ("FONTSIZE", (0, 0), (-1, 0), 10),
-                    ("ALIGN", (0, 0), (-1, 0), "CENTER"),
-                    # Dados
-                    ("FONTNAME", (0, 1), (-1, -1), "Helvetica"),
-                    ("FONTSIZE", (0, 1), (-1, -1), 9),
-                    (
-                        "ALIGN",
-                        (2, 1),
-                        (-1, -1),
-                        "CENTER",
-                    ),  # Quantidade, unidade, preços centralizados
-                    (
-                        "ALIGN",
-                        (0, 1),
-                        (1, -1),
-                        "LEFT",
-                    ),  # Referência e descrição à esquerda
-                    # Bordas
-                    ("GRID", (0, 0), (-1, -1), 1, colors.black),
-                    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                    # Cores alternadas nas linhas
-                    (
-                        "ROWBACKGROUNDS",
-                        (0, 1),
-                        (-1, -1),
-                        [colors.white, colors.HexColor("#f8f9fa")],
-                    ),
-                ]
-            )
-        )
+        table = Table(data, colWidths=LARGURAS_ITENS)
+        table.setStyle(ESTILO_TABELA_ITENS)
 
         elements.append(table)
         elements.append(Spacer(1, 20))
@@ -410,11 +573,7 @@ class OrcamentoPDFGenerator:
         valor_tva = getattr(orcamento, 'valor_tva', total_ttc - total_ht)
 
         # Acomptes
-        try:
-            from decimal import Decimal
-            total_acomptes_ttc = sum((a.valor_ttc for a in orcamento.acomptes.all()), Decimal('0.00'))
-        except Exception:
-            total_acomptes_ttc = 0
+        total_acomptes_ttc = self.modelo["total_acomptes_ttc"]
         solde_ttc = max(0, float(total_ttc) - float(total_acomptes_ttc))
 
         # Tabela de totais
@@ -530,7 +689,7 @@ class OrcamentoPDFGenerator:
         signature_data = [
             [
                 Paragraph("<b>Bon pour accord:</b>", self.styles["CustomNormal"]),
-                Paragraph("<b>LOPES PEINTURE</b>", self.styles["CustomNormal"]),
+                Paragraph(f"<b>{self.empresa['nome']}</b>", self.styles["CustomNormal"]),
             ],
             [
                 Paragraph("Date: ________________", self.styles["CustomNormal"]),
@@ -570,14 +729,9 @@ class OrcamentoPDFGenerator:
         # Informações da empresa no rodapé
         elements.append(Spacer(1, 10))
         footer = Paragraph(
-            "<i>LOPES PEINTURE - 261 Chemin de la Castellane - 31790 ST SAUVEUR - France<br/>Tél: +33 07 69 27 37 76 - contact@lopespeinture.fr - www.lopespeinture.fr <br/> PAIEMENT PAR VIREMENT BANCAIRE LOPES DE SOUZA FABIANO (EI) IBAN FR76 1027 8022 3400 0206 6300 131</i>",
-            ParagraphStyle(
-                name="Footer",
-                parent=self.styles["CustomNormal"],
-                fontSize=9,
-                alignment=TA_CENTER,
-                # textColor=colors.HexColor("#2c5aa0"),
-            ),
+            f"<i>{self.empresa['nome']} - {self.empresa['endereco']} - {self.empresa['cidade']} - {self.empresa['pais']}<br/>"
+            f"Tél: {self.empresa['telefone']} - {self.empresa['email']} - {self.empresa['site']} <br/> {self.empresa['pagamento']}</i>",
+            self.styles["Footer"],
         )
 
         elements.append(footer)
@@ -587,14 +741,7 @@ class OrcamentoPDFGenerator:
         elements.append(Spacer(1, 10))
         thank_you = Paragraph(
             "<i>Merci de votre confiance !</i>",
-            ParagraphStyle(
-                name="ThankYou",
-                parent=self.styles["CustomNormal"],
-                fontSize=10,
-                textColor=colors.HexColor("#2c5aa0"),
-                alignment=TA_CENTER,
-                fontName="Helvetica-Oblique",
-            ),
+            self.styles["ThankYou"],
         )
         elements.append(thank_you)
 
@@ -604,7 +751,16 @@ class OrcamentoPDFGenerator:
 def gerar_pdf_orcamento(orcamento):
     """
     Função wrapper para gerar PDF do orçamento
-    Retorna um buffer BytesIO com o PDF gerado
+    Retorna os bytes do PDF (gerado só se o conteúdo mudou desde o último download)
     """
+    with abrir_pdf_orcamento(orcamento) as arquivo:
+        return arquivo.read()
+
+
+def abrir_pdf_orcamento(orcamento):
+    """Arquivo do PDF em cache (aberto em modo binário), pronto para FileResponse"""
     generator = OrcamentoPDFGenerator()
-    return generator.generate_pdf(orcamento)
+    return CachePDF("devis").abrir(
+        generator.chave_conteudo(orcamento),
+        lambda: generator.generate_pdf(orcamento),
+    )
@@ -9,7 +9,9 @@ from decimal import Decimal
 import json
 
 from .models import Produto, Fornecedor, ItemOrcamento
-from .forms import ProdutoForm, FornecedorForm
+from .forms import ProdutoForm, FornecedorForm, ImportacaoProdutosForm, ReajustePrecosForm
+from . import importacao_produtos
+from .busca_produtos import buscar_produtos
 
 def is_admin_user(user):
     return user.is_authenticated and (user.is_staff or user.is_superuser)
@@ -139,12 +141,7 @@ def buscar_produtos_ajax(request):
     if len(query) < 2:
         return JsonResponse({'produtos': []})
 
-    produtos = Produto.objects.filter(
-        ativo=True
-    ).filter(
-        Q(referencia__icontains=query) |
-        Q(descricao__icontains=query)
-    )[:10]
+    produtos = buscar_produtos(query, limite=10)
 
     produtos_data = []
     for produto in produtos:
@@ -261,3 +258,90 @@ def editar_fornecedor(request, fornecedor_id):
     }
 
     return render(request, 'orcamentos/fornecedores/form.html', context)
+
+# Diferenças exibidas na página (o total vem no resumo)
+LIMITE_RELATORIO = 200
+
+def _relatorio(alteracoes):
+    return [
+        {**alteracao, 'campos': importacao_produtos.descrever(alteracao)}
+        for alteracao in alteracoes[:LIMITE_RELATORIO]
+    ]
+
+@login_required
+@user_passes_test(is_admin_user)
+def importar_produtos(request):
+    """Importar a tabela de preços de um fornecedor (CSV/XLSX), com simulação"""
+    resultado = None
+
+    if request.method == 'POST':
+        form = ImportacaoProdutosForm(request.POST, request.FILES)
+        if form.is_valid():
+            arquivo = form.cleaned_data['arquivo']
+            fornecedor = form.cleaned_data['fornecedor']
+            simular = form.cleaned_data['simular']
+            try:
+                resultado = importacao_produtos.importar_produtos(
+                    arquivo, fornecedor, nome=arquivo.name, simular=simular
+                )
+            except ValueError as e:
+                messages.error(request, f'Erro na importação: {e}')
+            else:
+                if simular:
+                    messages.info(request, 'Simulação: nenhum produto foi gravado.')
+                else:
+                    messages.success(
+                        request,
+                        f"{resultado['criados']} produto(s) criado(s) e {resultado['atualizados']} "
+                        f"atualizado(s) para {fornecedor.nome}."
+                    )
+        else:
+            messages.error(request, 'Erro na importação. Verifique os dados.')
+    else:
+        form = ImportacaoProdutosForm()
+
+    context = {
+        'form': form,
+        'resultado': resultado,
+        'alteracoes': _relatorio(resultado['alteracoes']) if resultado else [],
+        'limite_relatorio': LIMITE_RELATORIO,
+        'title': 'Importer des produits',
+    }
+
+    return render(request, 'orcamentos/produtos/importar.html', context)
+
+@login_required
+@user_passes_test(is_admin_user)
+def reajustar_precos_fornecedor(request, fornecedor_id):
+    """Reajustar em % os preços de todos os produtos de um fornecedor"""
+    fornecedor = get_object_or_404(Fornecedor, id=fornecedor_id)
+    resultado = None
+
+    if request.method == 'POST':
+        form = ReajustePrecosForm(request.POST)
+        if form.is_valid():
+            percentual = form.cleaned_data['percentual']
+            simular = form.cleaned_data['simular']
+            resultado = importacao_produtos.reajustar_precos(fornecedor, percentual, simular=simular)
+            if not simular:
+                messages.success(
+                    request,
+                    f"Preços de {resultado['produtos']} produto(s) de {fornecedor.nome} reajustados em {percentual}%."
+                )
+                return redirect(f"{reverse('orcamentos:lista_produtos')}?fornecedor={fornecedor.id}")
+            messages.info(request, 'Simulação: nenhum preço foi alterado.')
+        else:
+            messages.error(request, 'Erro no reajuste. Verifique os dados.')
+    else:
+        form = ReajustePrecosForm()
+
+    context = {
+        'form': form,
+        'fornecedor': fornecedor,
+        'resultado': resultado,
+        'alteracoes': _relatorio(resultado['alteracoes']) if resultado else [],
+        'total_produtos': fornecedor.produtos.count(),
+        'title': f'Réviser les prix - {fornecedor.nome}',
+    }
+
+    return render(request, 'orcamentos/fornecedores/reajustar_precos.html', context)
@@ -0,0 +1,90 @@
+"""
+Rastreamento de alterações em memória para a auditoria
+
+RastreadorCamposMixin guarda um retrato (snapshot) dos valores dos campos
+no momento em que a instância é carregada do banco (from_db) e depois de
+cada save(). As diferenças são calculadas comparando esse retrato com os
+valores atuais, sem o SELECT extra que a auditoria fazia antes de cada
+UPDATE.
+
+Por padrão todos os campos concretos são rastreados; um model pode
+restringir a lista declarando `campos_rastreados`.
+"""
+
+import copy
+
+
+class RastreadorCamposMixin:
+    """Mixin de model que registra os valores carregados para calcular diffs sem consulta"""
+
+    # Lista de nomes de campos a rastrear (None = todos os campos concretos)
+    campos_rastreados = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._registrar_snapshot()
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Depois de gravar, o estado salvo passa a ser a referência dos próximos diffs
+        self._registrar_snapshot(kwargs.get('update_fields'))
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        fields = kwargs.get('fields', args[1] if len(args) > 1 else None)
+        self._registrar_snapshot(fields)
+
+    @classmethod
+    def _campos_do_snapshot(cls):
+        campos = cls._meta.concrete_fields
+        if cls.campos_rastreados is not None:
+            nomes = set(cls.campos_rastreados)
+            campos = [campo for campo in campos if campo.name in nomes]
+        return campos
+
+    def _registrar_snapshot(self, apenas=None):
+        """Guarda os valores atuais dos campos rastreados que estão carregados"""
+        snapshot = self.__dict__.get('_snapshot_campos')
+        if snapshot is None or apenas is None:
+            snapshot = {}
+            apenas = None
+        else:
+            apenas = set(apenas)
+
+        for campo in self._campos_do_snapshot():
+            if apenas is not None and campo.name not in apenas and campo.attname not in apenas:
+                continue
+            # Campos adiados (defer/only) não entram: não sabemos o valor no banco
+            if campo.attname in self.__dict__:
+                valor = self.__dict__[campo.attname]
+                # JSON mutável: copiar para detectar alterações feitas no próprio objeto
+                if isinstance(valor, (dict, list)):
+                    valor = copy.deepcopy(valor)
+                snapshot[campo.name] = valor
+
+        self._snapshot_campos = snapshot
+
+    def tem_snapshot(self):
+        return self.__dict__.get('_snapshot_campos') is not None
+
+    def valores_carregados(self):
+        """Valores dos campos rastreados no último carregamento/gravação (ou None)"""
+        snapshot = self.__dict__.get('_snapshot_campos')
+        return dict(snapshot) if snapshot is not None else None
+
+    def campos_alterados(self):
+        """Dict {campo: {'anterior': ..., 'novo': ...}} calculado em memória"""
+        snapshot = self.__dict__.get('_snapshot_campos') or {}
+        alteracoes = {}
+        for campo in self._campos_do_snapshot():
+            if campo.name not in snapshot:
+                continue
+            valor_novo = getattr(self, campo.attname)
+            if snapshot[campo.name] != valor_novo:
+                alteracoes[campo.name] = {
+                    'anterior': snapshot[campo.name],
+                    'novo': valor_novo
+                }
+        return alteracoes
@@ -0,0 +1,111 @@
+"""
+Retenção das notificações
+
+As notificações lidas há mais de NOTIFICACOES_RETENCAO_DIAS saem da tabela
+em lotes de chaves primárias (memória constante, transações curtas). Com
+`arquivar=True` cada lote é antes acrescentado, como um novo membro gzip, ao
+arquivo mensal notificacoes-AAAA-MM.jsonl.gz (mês de criação) em
+NOTIFICACOES_ARQUIVO_DIR.
+
+As não lidas nunca são removidas. Como só lidas são apagadas, os contadores
+de não lidas (contador_notificacoes) não mudam e a exclusão é feita direto
+em SQL, sem carregar os objetos para os sinais de post_delete.
+"""
+
+import gzip
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Notificacao
+
+CAMPOS_ARQUIVO = (
+    'id', 'usuario_id', 'tipo', 'titulo', 'mensagem', 'url_acao',
+    'solicitacao_id', 'orcamento_id', 'projeto_id', 'created_at', 'read_at',
+)
+
+
+def pasta_arquivo():
+    return Path(getattr(
+        settings, 'NOTIFICACOES_ARQUIVO_DIR', Path(settings.BASE_DIR) / 'logs' / 'notificacoes_arquivo'
+    ))
+
+
+def notificacoes_expiradas(antes_de):
+    """Notificações lidas antes de `antes_de` (ou lidas sem data e criadas antes)"""
+    return Notificacao.objects.filter(lida=True).filter(
+        Q(read_at__lt=antes_de) | Q(read_at__isnull=True, created_at__lt=antes_de)
+    )
+
+
+def _arquivar(registros, pasta):
+    por_arquivo = {}
+    for registro in registros:
+        momento = timezone.localtime(registro['created_at'])
+        nome = f'notificacoes-{momento.year:04d}-{momento.month:02d}.jsonl.gz'
+        por_arquivo.setdefault(nome, []).append(registro)
+
+    for nome, lote in por_arquivo.items():
+        with gzip.open(pasta / nome, 'ab') as f:
+            f.write(''.join(
+                json.dumps(registro, cls=DjangoJSONEncoder) + '\n' for registro in lote
+            ).encode('utf-8'))
+    return {nome: len(lote) for nome, lote in por_arquivo.items()}
+
+
+def _apagar_lidas(ids):
+    """DELETE direto das notificações `ids` que continuam lidas; devolve quantas saíram"""
+    quote = connection.ops.quote_name
+    meta = Notificacao._meta
+    sql = (
+        f"DELETE FROM {quote(meta.db_table)} "
+        f"WHERE {quote(meta.pk.column)} IN ({', '.join(['%s'] * len(ids))}) "
+        f"AND {quote(meta.get_field('lida').column)} = %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*ids, True])
+        return cursor.rowcount
+
+
+def limpar_notificacoes(antes_de, tamanho_lote=5000, arquivar=False, simular=False):
+    """
+    Remove as notificações lidas antes de `antes_de`.
+
+    Devolve {'notificacoes': total, 'arquivos': {nome: quantidade}}.
+    """
+    resultado = {'notificacoes': 0, 'arquivos': {}}
+    expiradas = notificacoes_expiradas(antes_de)
+
+    if simular:
+        resultado['notificacoes'] = expiradas.count()
+        return resultado
+
+    pasta = pasta_arquivo()
+    if arquivar:
+        pasta.mkdir(parents=True, exist_ok=True)
+
+    while True:
+        # Os lotes já removidos somem do filtro: basta pegar os próximos
+        if arquivar:
+            registros = list(expiradas.order_by().values(*CAMPOS_ARQUIVO)[:tamanho_lote])
+            ids = [registro['id'] for registro in registros]
+        else:
+            ids = list(expiradas.order_by().values_list('pk', flat=True)[:tamanho_lote])
+        if not ids:
+            break
+
+        if arquivar:
+            for nome, quantidade in _arquivar(registros, pasta).items():
+                resultado['arquivos'][nome] = resultado['arquivos'].get(nome, 0) + quantidade
+
+        with transaction.atomic():
+            # lida=True de novo: ignora as que voltaram a não lidas nesse meio tempo
+            apagadas = _apagar_lidas(ids)
+        resultado['notificacoes'] += apagadas
+
+    return resultado
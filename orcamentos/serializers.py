@@ -168,8 +168,7 @@ class OrcamentoCreateSerializer(serializers.ModelSerializer):
         orcamento = Orcamento.objects.create(**validated_data)
 
         # Criar itens se fornecidos
-        for item_data in itens_data:
-            ItemOrcamento.objects.create(orcamento=orcamento, **item_data)
+        orcamento.adicionar_itens([ItemOrcamento(**item_data) for item_data in itens_data])
 
         # Criar histórico
         HistoricoOrcamento.objects.create(
@@ -212,12 +211,8 @@ class OrcamentoUpdateSerializer(serializers.ModelSerializer):
 
         # Atualizar itens se fornecidos
         if itens_data is not None:
-            # Remover itens existentes
-            instance.itens.all().delete()
-
-            # Criar novos itens
-            for item_data in itens_data:
-                ItemOrcamento.objects.create(orcamento=instance, **item_data)
+            # Substituir itens existentes
+            instance.substituir_itens([ItemOrcamento(**item_data) for item_data in itens_data])
 
         # Criar histórico
         HistoricoOrcamento.objects.create(
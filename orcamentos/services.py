@@ -5,8 +5,9 @@ from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.core.signing import TimestampSigner
 from .models import Notificacao, TipoNotificacao
+from .contador_notificacoes import registrar_alteracao
 # Novo: usar conexão e remetente centralizados
-from utils.emails.sistema_email import _get_smtp_connection, _get_from_email
+from utils.emails.sistema_email import get_pooled_connection, _get_from_email, queue_many
 
 User = get_user_model()
 
@@ -26,6 +27,32 @@ class NotificationService:
         )
         return notificacao
 
+    @staticmethod
+    def notificar_usuarios(usuarios, tipo, titulo, mensagem, url_acao=None, **kwargs):
+        """
+        Criar a mesma notificação para vários usuários com bulk_create
+
+        Um INSERT por lote em vez de um por usuário. bulk_create não dispara
+        post_save: os contadores de não lidas são atualizados aqui.
+        """
+        usuario_ids = [getattr(usuario, 'pk', usuario) for usuario in usuarios]
+        notificacoes = Notificacao.objects.bulk_create(
+            [
+                Notificacao(
+                    usuario_id=usuario_id,
+                    tipo=tipo,
+                    titulo=titulo,
+                    mensagem=mensagem,
+                    url_acao=url_acao,
+                    **kwargs
+                )
+                for usuario_id in usuario_ids
+            ],
+            batch_size=500
+        )
+        registrar_alteracao(usuario_ids, 1)
+        return notificacoes
+
     @staticmethod
     def enviar_email_nova_solicitacao(solicitacao):
         """Enviar email para admins sobre nova solicitação"""
@@ -37,35 +64,30 @@ class NotificationService:
             'site_url': getattr(settings, 'SITE_URL', 'http://localhost:8000')
         }
 
-        # Conexão e from_email padronizados
-        connection = _get_smtp_connection()
-        from_email = _get_from_email() or settings.DEFAULT_FROM_EMAIL
-
-        for admin in admins:
-            # Criar notificação visual - URL corrigida
-            NotificationService.criar_notificacao(
-                usuario=admin,
-                tipo=TipoNotificacao.NOVA_SOLICITACAO,
-                titulo=f"Nouvelle demande de devis #{solicitacao.numero}",
-                mensagem=f"Une nouvelle demande de devis a été reçue de {solicitacao.nome_solicitante}",
-                url_acao=f"/devis/admin/solicitacoes/{solicitacao.numero}/",
-                solicitacao=solicitacao
-            )
+        # Notificação visual para todos os admins (um único INSERT)
+        NotificationService.notificar_usuarios(
+            admins,
+            tipo=TipoNotificacao.NOVA_SOLICITACAO,
+            titulo=f"Nouvelle demande de devis #{solicitacao.numero}",
+            mensagem=f"Une nouvelle demande de devis a été reçue de {solicitacao.nome_solicitante}",
+            url_acao=f"/devis/admin/solicitacoes/{solicitacao.numero}/",
+            solicitacao=solicitacao
+        )
 
-            # Enviar email
-            try:
-                html_content = render_to_string('orcamentos/emails/nova_solicitacao_admin.html', context)
-                send_mail(
-                    subject=f"Nouvelle demande de devis #{solicitacao.numero}",
-                    message=f"Une nouvelle demande de devis a été reçue de {solicitacao.nome_solicitante}",
-                    from_email=from_email,
-                    recipient_list=[admin.email],
-                    html_message=html_content,
-                    fail_silently=False,
-                    connection=connection,
-                )
-            except Exception as e:
-                print(f"Erro ao enviar email para {admin.email}: {e}")
+        # Emails para a fila de saída (enviados juntos, numa única conexão SMTP)
+        try:
+            html_content = render_to_string('orcamentos/emails/nova_solicitacao_admin.html', context)
+            queue_many([
+                {
+                    'subject': f"Nouvelle demande de devis #{solicitacao.numero}",
+                    'plain_message': f"Une nouvelle demande de devis a été reçue de {solicitacao.nome_solicitante}",
+                    'html_message': html_content,
+                    'recipients': [admin.email],
+                }
+                for admin in admins
+            ])
+        except Exception as e:
+            print(f"Erro ao enviar emails para os admins: {e}")
 
     @staticmethod
     def enviar_email_orcamento_enviado(orcamento):
@@ -108,22 +130,15 @@ class NotificationService:
                 orcamento=orcamento
             )
 
-        # Conexão e from_email padronizados
-        connection = _get_smtp_connection()
-        from_email = _get_from_email() or settings.DEFAULT_FROM_EMAIL
-
-        # Enviar email (sempre para o email do solicitante)
+        # Email para a fila de saída (sempre para o email do solicitante)
         try:
             html_content = render_to_string('orcamentos/emails/orcamento_enviado_cliente.html', context)
-            send_mail(
-                subject=f"Votre devis #{orcamento.numero} - LOPES PEINTURE",
-                message=f"Votre devis #{orcamento.numero} est maintenant disponible",
-                from_email=from_email,
-                recipient_list=[orcamento.solicitacao.email_solicitante],
-                html_message=html_content,
-                fail_silently=False,
-                connection=connection,
-            )
+            queue_many([{
+                'subject': f"Votre devis #{orcamento.numero} - LOPES PEINTURE",
+                'plain_message': f"Votre devis #{orcamento.numero} est maintenant disponible",
+                'html_message': html_content,
+                'recipients': [orcamento.solicitacao.email_solicitante],
+            }])
         except Exception as e:
             print(f"Erro ao enviar email para {orcamento.solicitacao.email_solicitante}: {e}")
 
@@ -137,34 +152,30 @@ class NotificationService:
             'site_url': getattr(settings, 'SITE_URL', 'http://localhost:8000')
         }
 
-        connection = _get_smtp_connection()
-        from_email = _get_from_email() or settings.DEFAULT_FROM_EMAIL
-
-        for admin in admins:
-            # Criar notificação visual - URL corrigida
-            NotificationService.criar_notificacao(
-                usuario=admin,
-                tipo=TipoNotificacao.ORCAMENTO_ACEITO,
-                titulo=f"Devis #{orcamento.numero} accepté!",
-                mensagem=f"Le devis #{orcamento.numero} a été accepté par {orcamento.solicitacao.nome_solicitante}",
-                url_acao=f"/devis/admin/orcamentos/{orcamento.numero}/",
-                orcamento=orcamento
-            )
+        # Notificação visual para todos os admins (um único INSERT)
+        NotificationService.notificar_usuarios(
+            admins,
+            tipo=TipoNotificacao.ORCAMENTO_ACEITO,
+            titulo=f"Devis #{orcamento.numero} accepté!",
+            mensagem=f"Le devis #{orcamento.numero} a été accepté par {orcamento.solicitacao.nome_solicitante}",
+            url_acao=f"/devis/admin/orcamentos/{orcamento.numero}/",
+            orcamento=orcamento
+        )
 
-            # Enviar email
-            try:
-                html_content = render_to_string('orcamentos/emails/orcamento_aceito_admin.html', context)
-                send_mail(
-                    subject=f"Devis #{orcamento.numero} accepté - LOPES PEINTURE",
-                    message=f"Le devis #{orcamento.numero} a été accepté",
-                    from_email=from_email,
-                    recipient_list=[admin.email],
-                    html_message=html_content,
-                    fail_silently=False,
-                    connection=connection,
-                )
-            except Exception as e:
-                print(f"Erro ao enviar email para {admin.email}: {e}")
+        # Emails para a fila de saída (enviados juntos, numa única conexão SMTP)
+        try:
+            html_content = render_to_string('orcamentos/emails/orcamento_aceito_admin.html', context)
+            queue_many([
+                {
+                    'subject': f"Devis #{orcamento.numero} accepté - LOPES PEINTURE",
+                    'plain_message': f"Le devis #{orcamento.numero} a été accepté",
+                    'html_message': html_content,
+                    'recipients': [admin.email],
+                }
+                for admin in admins
+            ])
+        except Exception as e:
+            print(f"Erro ao enviar emails para os admins: {e}")
 
     @staticmethod
     def enviar_email_orcamento_recusado(orcamento):
@@ -176,49 +187,44 @@ class NotificationService:
             'site_url': getattr(settings, 'SITE_URL', 'http://localhost:8000')
         }
 
-        connection = _get_smtp_connection()
-        from_email = _get_from_email() or settings.DEFAULT_FROM_EMAIL
-
-        for admin in admins:
-            # Criar notificação visual - URL corrigida
-            NotificationService.criar_notificacao(
-                usuario=admin,
-                tipo=TipoNotificacao.ORCAMENTO_RECUSADO,
-                titulo=f"Devis #{orcamento.numero} refusé",
-                mensagem=f"Le devis #{orcamento.numero} a été refusé par {orcamento.solicitacao.nome_solicitante}",
-                url_acao=f"/devis/admin/orcamentos/{orcamento.numero}/",
-                orcamento=orcamento
-            )
+        # Notificação visual para todos os admins (um único INSERT)
+        NotificationService.notificar_usuarios(
+            admins,
+            tipo=TipoNotificacao.ORCAMENTO_RECUSADO,
+            titulo=f"Devis #{orcamento.numero} refusé",
+            mensagem=f"Le devis #{orcamento.numero} a été refusé par {orcamento.solicitacao.nome_solicitante}",
+            url_acao=f"/devis/admin/orcamentos/{orcamento.numero}/",
+            orcamento=orcamento
+        )
 
-            # Enviar email
-            try:
-                html_content = render_to_string('orcamentos/emails/orcamento_recusado_admin.html', context)
-                send_mail(
-                    subject=f"Devis #{orcamento.numero} refusé - LOPES PEINTURE",
-                    message=f"Le devis #{orcamento.numero} a été refusé",
-                    from_email=from_email,
-                    recipient_list=[admin.email],
-                    html_message=html_content,
-                    fail_silently=False,
-                    connection=connection,
-                )
-            except Exception as e:
-                print(f"Erro ao enviar email para {admin.email}: {e}")
+        # Emails para a fila de saída (enviados juntos, numa única conexão SMTP)
+        try:
+            html_content = render_to_string('orcamentos/emails/orcamento_recusado_admin.html', context)
+            queue_many([
+                {
+                    'subject': f"Devis #{orcamento.numero} refusé - LOPES PEINTURE",
+                    'plain_message': f"Le devis #{orcamento.numero} a été refusé",
+                    'html_message': html_content,
+                    'recipients': [admin.email],
+                }
+                for admin in admins
+            ])
+        except Exception as e:
+            print(f"Erro ao enviar emails para os admins: {e}")
 
     @staticmethod
     def notificar_projeto_criado(projeto):
         """Notificar sobre novo projeto criado"""
         admins = User.objects.filter(is_staff=True)
 
-        for admin in admins:
-            NotificationService.criar_notificacao(
-                usuario=admin,
-                tipo=TipoNotificacao.PROJETO_CRIADO,
-                titulo=f"Nouveau projeto: {projeto.titulo}",
-                mensagem=f"Un novo projeto a été criado por {projeto.cliente.first_name} {projeto.cliente.last_name}",
-                url_acao=f"/devis/admin/projetos/{projeto.uuid}/",
-                projeto=projeto
-            )
+        NotificationService.notificar_usuarios(
+            admins.values_list('pk', flat=True),
+            tipo=TipoNotificacao.PROJETO_CRIADO,
+            titulo=f"Nouveau projeto: {projeto.titulo}",
+            mensagem=f"Un novo projeto a été criado por {projeto.cliente.first_name} {projeto.cliente.last_name}",
+            url_acao=f"/devis/admin/projetos/{projeto.uuid}/",
+            projeto=projeto
+        )
 
     @staticmethod
     def notificar_orcamentos_vinculados(usuario, quantidade):
@@ -262,7 +268,7 @@ class NotificationService:
                 f"{'s' if plural else ''} à votre compte."
             )
 
-            connection = _get_smtp_connection()
+            connection = get_pooled_connection()
             from_email = _get_from_email() or settings.DEFAULT_FROM_EMAIL
 
             # Passar recipient_list e fail_silently como kwargs para satisfazer asserts dos testes
@@ -286,27 +292,7 @@ class NotificationService:
         Função utilitária para processar orçamentos órfãos em lote.
         Pode ser executada via comando de management.
         """
-        from .models import SolicitacaoOrcamento
-
-        # Buscar todas as solicitações órfãs
-        solicitacoes_orfas = SolicitacaoOrcamento.objects.filter(cliente__isnull=True)
-
-        processadas = 0
-        for solicitacao in solicitacoes_orfas:
-            try:
-                # Tentar encontrar usuário com mesmo email
-                usuario = User.objects.get(email__iexact=solicitacao.email_solicitante)
-                solicitacao.cliente = usuario
-                solicitacao.save()
-                processadas += 1
-            except User.DoesNotExist:
-                continue
-            except User.MultipleObjectsReturned:
-                # Se houver múltiplos usuários com mesmo email, pegar o primeiro
-                usuario = User.objects.filter(email__iexact=solicitacao.email_solicitante).first()
-                if usuario:
-                    solicitacao.cliente = usuario
-                    solicitacao.save()
-                    processadas += 1
-
-        return processadas
+        from .vinculacao_orfaos import VinculadorOrfaos
+
+        # Uma consulta casa órfãs e contas pelo email normalizado; um UPDATE por lote
+        return VinculadorOrfaos(origem="servico_notificacao").vincular()['vinculadas']
@@ -1,10 +1,15 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from django.contrib import messages
-from .models import SolicitacaoOrcamento
+from django.utils import timezone
+from .models import SolicitacaoOrcamento, AcompteOrcamento, Orcamento, ItemOrcamento, Facture, ItemFacture, Notificacao
+from .contador_notificacoes import registrar_alteracao
 from .auditoria import AuditoriaManager, TipoAcao
+from . import vinculacao_orfaos
+from .tarefas import executar_apos_commit
 import logging
+from functools import partial
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -13,80 +18,68 @@ logger = logging.getLogger(__name__)
 def vincular_orcamentos_orfaos(sender, instance, created, **kwargs):
     """
     Signal que é executado quando um usuário é criado.
-    Vincula automaticamente orçamentos solicitados anteriormente com o mesmo email.
+    Vincula automaticamente orçamentos solicitados anteriormente com o mesmo email
+    (em segundo plano, ver vinculacao_orfaos.vincular_orfaos_do_cadastro).
     """
     if created and instance.email:
-        # Buscar solicitações órfãs (sem cliente) com o mesmo email
-        solicitacoes_orfas = SolicitacaoOrcamento.objects.filter(
-            cliente__isnull=True,
-            email_solicitante__iexact=instance.email
+        # Depois do commit e fora da requisição: o cadastro não espera a vinculação
+        executar_apos_commit(
+            vinculacao_orfaos.vincular_orfaos_do_cadastro,
+            instance.pk,
+            ao_concluir=partial(vinculacao_orfaos.registrar_resultado_cadastro, instance.pk)
         )
 
-        if solicitacoes_orfas.exists():
-            count = solicitacoes_orfas.count()
+@receiver(post_save, sender=Notificacao)
+def atualizar_contador_notificacoes(sender, instance, created, update_fields=None, **kwargs):
+    """Nova notificação não lida incrementa o contador do usuário (marcar_como_lida decrementa)"""
+    if created:
+        if not instance.lida:
+            registrar_alteracao([instance.usuario_id], 1)
+    elif update_fields is None:
+        # Edição completa (ex.: admin): o estado anterior é desconhecido, recontar
+        registrar_alteracao([instance.usuario_id])
 
-            # Registrar detecção na auditoria
-            AuditoriaManager.registrar_deteccao_orcamento_orfao(
-                usuario=instance,
-                email=instance.email,
-                quantidade_encontrada=count
-            )
 
-            # Vincular as solicitações ao novo usuário e auditar cada vinculação
-            for solicitacao in solicitacoes_orfas:
-                # Registrar vinculação individual na auditoria
-                AuditoriaManager.registrar_vinculacao_orcamento_orfao(
-                    usuario=instance,
-                    solicitacao=solicitacao,
-                    origem="signal_cadastro"
-                )
+@receiver(post_delete, sender=Notificacao)
+def atualizar_contador_notificacoes_exclusao(sender, instance, **kwargs):
+    if not instance.lida:
+        registrar_alteracao([instance.usuario_id], -1)
 
-            # Fazer a vinculação no banco
-            solicitacoes_orfas.update(cliente=instance)
-
-            logger.info(
-                f"Vinculadas {count} solicitações órfãs ao usuário {instance.email} (ID: {instance.id})"
-            )
-
-            # Criar uma notificação para o usuário sobre os orçamentos encontrados
-            from .services import NotificationService
-            try:
-                NotificationService.notificar_orcamentos_vinculados(instance, count)
+@receiver(post_delete, sender=AcompteOrcamento)
+def atualizar_totais_acomptes_apos_exclusao(sender, instance, **kwargs):
+    """
+    Mantém os agregados de acomptes do devis após a exclusão de um acompte
+    (inclusive exclusões em massa via queryset, que não chamam Model.delete).
+    """
+    orcamento = Orcamento.objects.filter(pk=instance.orcamento_id).first()
+    if orcamento:
+        orcamento.atualizar_totais_acomptes()
 
-                # Registrar notificação na auditoria
-                AuditoriaManager.registrar_notificacao_vinculacao(
-                    usuario_notificado=instance,
-                    quantidade_orcamentos=count,
-                    metodo_vinculacao="signal_automatico"
-                )
-            except Exception as e:
-                logger.error(f"Erro ao notificar sobre orçamentos vinculados: {e}")
+@receiver(post_delete, sender=ItemOrcamento)
+def marcar_orcamento_alterado(sender, instance, **kwargs):
+    """Linha removida: nova versão do devis (invalida o modelo de documento em cache)"""
+    Orcamento.objects.filter(pk=instance.orcamento_id).update(updated_at=timezone.now())
 
-        else:
-            logger.info(f"Nenhum orçamento órfão encontrado para {instance.email}")
+@receiver(post_delete, sender=ItemFacture)
+def marcar_facture_alterada(sender, instance, **kwargs):
+    """Linha removida: nova versão da facture (invalida o modelo de documento em cache)"""
+    Facture.objects.filter(pk=instance.facture_id).update(updated_at=timezone.now())
 
 def verificar_e_vincular_orcamentos_existentes(email, usuario):
     """
     Função utilitária para verificar e vincular orçamentos existentes.
     Pode ser chamada manualmente se necessário.
     """
-    solicitacoes_orfas = SolicitacaoOrcamento.objects.filter(
-        cliente__isnull=True,
-        email_solicitante__iexact=email
-    )
-
     vinculadas = []
-    for solicitacao in solicitacoes_orfas:
-        # Registrar vinculação na auditoria antes de fazer a alteração
-        AuditoriaManager.registrar_vinculacao_orcamento_orfao(
-            usuario=usuario,
-            solicitacao=solicitacao,
-            origem="manual_admin"
-        )
 
-        solicitacao.cliente = usuario
-        solicitacao.save()
-        vinculadas.append(solicitacao.numero)
+    def registrar_numeros(linhas, usuarios, erro):
+        if erro is None:
+            vinculadas.extend(linha['numero'] for linha in linhas)
+
+    # Auditoria de cada vinculação gravada em lote junto com o UPDATE
+    vinculacao_orfaos.VinculadorOrfaos(origem="manual_admin", ao_processar_lote=registrar_numeros).vincular(
+        vinculacao_orfaos.solicitacoes_orfas(email), usuario=usuario
+    )
 
     # Se houve vinculações, registrar o processamento geral
     if vinculadas:
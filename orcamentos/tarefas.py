@@ -0,0 +1,191 @@
+"""
+Tarefas executadas fora da requisição
+
+Trabalho que não precisa atrasar a resposta (ex.: vincular as solicitações
+órfãs de um novo cadastro) é agendado com `executar_apos_commit`: quando a
+transação de quem pediu é confirmada, a tarefa entra numa fila em memória e
+é executada por uma thread de fundo do próprio processo. Uma tarefa que
+levanta exceção é tentada de novo até TAREFAS_TENTATIVAS vezes, com espera
+exponencial (TAREFAS_ESPERA_BASE * 2^n segundos); `ao_concluir` recebe o
+resultado ou o último erro.
+
+A fila não é durável: o que estiver pendente quando o processo termina é
+executado no atexit, e uma tarefa perdida num kill deve ser recuperável por
+um comando (para os órfãos, vincular_orcamentos_orfaos).
+
+Com TAREFAS_ASSINCRONAS = False (padrão nos testes) a tarefa roda na hora,
+dentro da chamada, e as novas tentativas são feitas sem espera para não
+atrasar a requisição. A função pode consultar `tarefa_atual()` (ex.: para
+registrar algo só na primeira tentativa).
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+
+_em_execucao = threading.local()
+
+
+def tarefas_assincronas():
+    return getattr(settings, 'TAREFAS_ASSINCRONAS', False)
+
+
+def tarefa_atual():
+    """Tarefa em execução nesta thread (None fora do executor)"""
+    return getattr(_em_execucao, 'tarefa', None)
+
+
+@dataclass
+class Tarefa:
+    funcao: object
+    args: tuple = ()
+    tentativas: int = 3
+    ao_concluir: object = None
+    tentativa: int = field(default=0, init=False)
+
+    @property
+    def nome(self):
+        return getattr(self.funcao, '__name__', repr(self.funcao))
+
+
+class ExecutorTarefas:
+    """Fila em memória + thread de fundo que executa as tarefas com novas tentativas"""
+
+    def __init__(self, espera_base=None, tamanho_fila=1000):
+        self.espera_base = espera_base
+        self._fila = queue.Queue(maxsize=tamanho_fila)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def agendar(self, tarefa):
+        """Entrega a tarefa à thread de fundo"""
+        self._garantir_thread()
+        try:
+            self._fila.put_nowait(tarefa)
+        except queue.Full:
+            # Fila cheia: executar na hora em vez de perder a tarefa
+            logger.warning(f"Fila de tarefas cheia, executando {tarefa.nome} de forma síncrona")
+            self.executar(tarefa, esperar=False)
+
+    def descarregar(self):
+        """Executa tudo o que estiver na fila (usado no encerramento)"""
+        while True:
+            try:
+                tarefa = self._fila.get_nowait()
+            except queue.Empty:
+                break
+            self.executar(tarefa)
+
+    def espera(self, tentativa):
+        base = self.espera_base if self.espera_base is not None else getattr(settings, 'TAREFAS_ESPERA_BASE', 2.0)
+        return min(base * 2 ** (tentativa - 1), 60)
+
+    def executar(self, tarefa, esperar=True):
+        """
+        Executa a tarefa, tentando de novo em caso de exceção; devolve o resultado ou None
+
+        Com esperar=False (execução dentro da requisição) as novas tentativas são imediatas.
+        """
+        while True:
+            tarefa.tentativa += 1
+            try:
+                resultado = self._chamar(tarefa)
+            except Exception as e:
+                if tarefa.tentativa >= tarefa.tentativas:
+                    logger.exception(f"Tarefa {tarefa.nome} falhou após {tarefa.tentativa} tentativas")
+                    self._concluir(tarefa, None, e)
+                    return None
+
+                espera = self.espera(tarefa.tentativa) if esperar else 0
+                logger.warning(
+                    f"Tarefa {tarefa.nome} falhou (tentativa {tarefa.tentativa}/{tarefa.tentativas}): "
+                    f"{e}; nova tentativa em {espera:.1f}s"
+                )
+                # Uma conexão quebrada não serve para a próxima tentativa
+                if not connection.in_atomic_block:
+                    connection.close()
+                if espera:
+                    time.sleep(espera)
+            else:
+                self._concluir(tarefa, resultado, None)
+                return resultado
+
+    @staticmethod
+    def _chamar(tarefa):
+        anterior = tarefa_atual()
+        _em_execucao.tarefa = tarefa
+        try:
+            return tarefa.funcao(*tarefa.args)
+        finally:
+            _em_execucao.tarefa = anterior
+
+    @staticmethod
+    def _concluir(tarefa, resultado, erro):
+        if tarefa.ao_concluir is None:
+            return
+        try:
+            tarefa.ao_concluir(resultado, erro, tarefa.tentativa)
+        except Exception:
+            logger.exception(f"Erro ao registrar o resultado da tarefa {tarefa.nome}")
+
+    def _garantir_thread(self):
+        # Após um fork (gunicorn, multiprocessing) a thread do processo pai não existe no filho
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            if self._pid != os.getpid():
+                self._fila = queue.Queue(maxsize=self._fila.maxsize)
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._executar_fila, name='executor-tarefas', daemon=True)
+            self._thread.start()
+
+    def _executar_fila(self):
+        while True:
+            tarefa = self._fila.get()
+            try:
+                self.executar(tarefa)
+            except Exception:
+                logger.exception(f"Erro inesperado na tarefa {tarefa.nome}")
+            finally:
+                # A thread tem a sua própria conexão; não deixá-la aberta entre tarefas
+                connection.close()
+
+
+executor_tarefas = ExecutorTarefas()
+atexit.register(executor_tarefas.descarregar)
+
+
+def executar_apos_commit(funcao, *args, tentativas=None, ao_concluir=None):
+    """
+    Agenda `funcao(*args)` para depois da confirmação da transação atual
+
+    Args:
+        tentativas: Execuções no máximo (padrão: TAREFAS_TENTATIVAS)
+        ao_concluir: Chamado com (resultado, erro, tentativas) ao fim
+    """
+    tarefa = Tarefa(
+        funcao=funcao,
+        args=args,
+        tentativas=tentativas or getattr(settings, 'TAREFAS_TENTATIVAS', 3),
+        ao_concluir=ao_concluir,
+    )
+
+    if tarefas_assincronas():
+        transaction.on_commit(lambda: executor_tarefas.agendar(tarefa))
+    else:
+        executor_tarefas.executar(tarefa, esperar=False)
+    return tarefa
@@ -0,0 +1,155 @@
+import gzip
+import json
+import shutil
+import tempfile
+from datetime import datetime, time, timedelta
+from io import StringIO
+
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.utils import timezone
+
+from orcamentos.arquivo_auditoria import ArquivoAuditoria
+from orcamentos.auditoria import AuditoriaManager, EstatisticaAuditoriaDiaria, LogAuditoria, TipoAcao
+
+User = get_user_model()
+
+
+class ArquivoAuditoriaTestCase(TestCase):
+    """Testes do arquivamento dos logs de auditoria antigos"""
+
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.pasta, ignore_errors=True)
+        configuracao = override_settings(AUDITORIA_ARQUIVO_DIR=self.pasta)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+        self.user = User.objects.create_user(
+            username='arquivo@test.com',
+            email='arquivo@test.com',
+            password='testpass123',
+            account_type='ADMINISTRATOR'
+        )
+
+    def _registrar(self, dias_atras, descricao):
+        log = AuditoriaManager.registrar_acao(
+            usuario=self.user,
+            acao=TipoAcao.VISUALIZACAO,
+            objeto=self.user,
+            descricao=descricao,
+            funcionalidade='Teste'
+        )
+        LogAuditoria.objects.filter(pk=log.pk).update(
+            timestamp=timezone.now() - timedelta(days=dias_atras)
+        )
+        return log
+
+    def test_comando_arquiva_por_mes(self):
+        """Logs antigos vão para arquivos .jsonl.gz mensais e saem da tabela"""
+        antigos = [self._registrar(400 + i * 40, f'Antigo {i}') for i in range(3)]
+        recente = self._registrar(5, 'Recente')
+
+        out = StringIO()
+        call_command('arquivar_logs_auditoria', '--dias', '365', '--lote', '2', stdout=out)
+
+        self.assertEqual(list(LogAuditoria.objects.values_list('pk', flat=True)), [recente.pk])
+
+        arquivos = ArquivoAuditoria().arquivos()
+        self.assertEqual(len(arquivos), 3)
+        linhas = []
+        for arquivo in arquivos:
+            with gzip.open(arquivo, 'rt', encoding='utf-8') as f:
+                linhas.extend(json.loads(linha) for linha in f)
+        self.assertEqual(sorted(linha['id'] for linha in linhas), sorted(log.pk for log in antigos))
+        self.assertIn('Logs arquivados: 3', out.getvalue())
+        print(f"✓ {len(linhas)} logs arquivados em {len(arquivos)} arquivos mensais")
+
+    def test_limite_na_meia_noite_preserva_resumo(self):
+        """O corte cai na meia-noite local e o resumo dos dias arquivados não é reconstruído"""
+        self._registrar(366, 'Arquivado')
+        self._registrar(364, 'Na tabela')
+
+        call_command('arquivar_logs_auditoria', '--dias', '365', stdout=StringIO())
+
+        dia_limite = timezone.localdate() - timedelta(days=365)
+        limite = timezone.localtime(ArquivoAuditoria().arquivado_ate())
+        self.assertEqual((limite.date(), limite.time()), (dia_limite, time.min))
+        self.assertEqual(ArquivoAuditoria().primeiro_dia_completo(), dia_limite)
+
+        dia_arquivado = timezone.localdate() - timedelta(days=366)
+        EstatisticaAuditoriaDiaria.objects.all().delete()
+        EstatisticaAuditoriaDiaria.objects.create(
+            data=dia_arquivado, acao=TipoAcao.VISUALIZACAO, modulo='Teste',
+            usuario=self.user, content_type=ContentType.objects.get_for_model(self.user), total=1
+        )
+
+        out = StringIO()
+        call_command('consolidar_estatisticas_auditoria', '--desde', f'{dia_arquivado:%Y-%m-%d}', stdout=out)
+
+        self.assertIn(f'reconstruindo a partir de {dia_limite:%d/%m/%Y}', out.getvalue())
+        self.assertTrue(EstatisticaAuditoriaDiaria.objects.filter(data=dia_arquivado, total=1).exists())
+        self.assertEqual(EstatisticaAuditoriaDiaria.objects.filter(data__gte=dia_limite).count(), 1)
+        print("✓ Arquivamento na meia-noite e resumo dos dias arquivados preservado")
+
+    def test_limite_antigo_fora_da_meia_noite(self):
+        """Um limite gravado no meio do dia deixa esse dia fora da reconstrução"""
+        arquivo = ArquivoAuditoria()
+        arquivo.pasta.mkdir(parents=True, exist_ok=True)
+        ontem = timezone.localdate() - timedelta(days=1)
+        arquivo._registrar_limite(timezone.make_aware(datetime.combine(ontem, time(14, 30))))
+
+        self.assertEqual(arquivo.primeiro_dia_completo(), timezone.localdate())
+        self.assertEqual(EstatisticaAuditoriaDiaria.reconstruir(ontem, ontem), 0)
+        print("✓ Dia parcialmente arquivado não é reconstruído")
+
+    def test_simulacao_nao_altera(self):
+        """--simular só conta os logs"""
+        self._registrar(400, 'Antigo')
+
+        call_command('arquivar_logs_auditoria', '--simular', stdout=StringIO())
+
+        self.assertEqual(LogAuditoria.objects.count(), 1)
+        self.assertEqual(ArquivoAuditoria().arquivos(), [])
+        print("✓ Simulação sem alterações")
+
+    def test_leitura_inclui_arquivos(self):
+        """Períodos anteriores ao arquivamento são lidos também dos arquivos"""
+        antigo = self._registrar(400, 'Antigo')
+        self._registrar(1, 'Recente')
+        ArquivoAuditoria().arquivar(timezone.now() - timedelta(days=365))
+
+        # Período recente: só a tabela (QuerySet)
+        recentes = AuditoriaManager.obter_atividades_usuario(self.user, dias=30)
+        self.assertEqual([log.descricao for log in recentes], ['Recente'])
+
+        # Período antigo: tabela + arquivo, do mais recente ao mais antigo
+        atividades = AuditoriaManager.obter_atividades_usuario(self.user, dias=500)
+        self.assertEqual([log.descricao for log in atividades], ['Recente', 'Antigo'])
+        self.assertEqual(atividades[1].pk, antigo.pk)
+        self.assertEqual(atividades[1].get_acao_display(), 'Consultation')
+
+        historico = AuditoriaManager.obter_historico_objeto(
+            self.user, desde=timezone.now() - timedelta(days=500)
+        )
+        self.assertEqual(len(historico), 2)
+        print(f"✓ Leitura transparente: {len(atividades)} atividades")
+
+    def test_linhas_repetidas_ignoradas(self):
+        """Um lote arquivado duas vezes (queda antes do DELETE) não duplica a leitura"""
+        self._registrar(400, 'Antigo')
+        arquivo = ArquivoAuditoria()
+        registro = LogAuditoria.objects.values('id', 'timestamp').get()
+        arquivo.arquivar(timezone.now() - timedelta(days=365))
+
+        caminho = arquivo.arquivos()[0]
+        with gzip.open(caminho, 'rt', encoding='utf-8') as f:
+            linha = f.readline()
+        with gzip.open(caminho, 'ab') as f:
+            f.write(linha.encode('utf-8'))
+
+        encontrados = arquivo.buscar(usuario_id=self.user.pk)
+        self.assertEqual([log.pk for log in encontrados], [registro['id']])
+        print("✓ Linhas repetidas descartadas")
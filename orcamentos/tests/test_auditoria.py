@@ -2,11 +2,11 @@ from django.test import TestCase, Client
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
 from django.utils import timezone
-from datetime import timedelta
+from datetime import date, datetime, timedelta, timezone as dt_timezone
 from unittest.mock import patch, MagicMock
 
 from orcamentos.models import Projeto, SolicitacaoOrcamento, Orcamento
-from orcamentos.auditoria import AuditoriaManager, LogAuditoria, TipoAcao
+from orcamentos.auditoria import AuditoriaManager, EstatisticaAuditoriaDiaria, LogAuditoria, TipoAcao
 from orcamentos.monitor_auditoria import MonitorOrcamentos
 
 User = get_user_model()
@@ -326,6 +326,24 @@ class AuditoriaTestCase(TestCase):
 
         print(f"✓ Relatório semanal: {relatorio['total_atividades']} atividades")
 
+    def test_relatorios_usam_o_dia_local(self):
+        """Logo após a meia-noite em Paris (ainda véspera em UTC) os relatórios leem o dia local"""
+        EstatisticaAuditoriaDiaria.objects.all().delete()
+        EstatisticaAuditoriaDiaria.objects.create(
+            data=date(2025, 6, 11), acao=TipoAcao.VISUALIZACAO, modulo='Teste',
+            usuario=self.user, content_type=ContentType.objects.get_for_model(self.user), total=3
+        )
+        monitor = MonitorOrcamentos()
+
+        # 00:30 em Paris = 22:30 UTC do dia anterior
+        with patch('django.utils.timezone.now', return_value=datetime(2025, 6, 10, 22, 30, tzinfo=dt_timezone.utc)):
+            diario = monitor.gerar_relatorio_diario()
+            semanal = monitor.gerar_relatorio_semanal()
+
+        self.assertEqual((diario['data'], diario['total_atividades']), ('2025-06-11', 3))
+        self.assertEqual(semanal['estatisticas_diarias']['2025-06-11'], 3)
+        print("✓ Relatórios diário e semanal no dia local")
+
     @patch('orcamentos.auditoria.AuditoriaManager._get_client_ip')
     def test_metadados_requisicao(self, mock_get_ip):
         """Teste captura de metadados da requisição"""
@@ -0,0 +1,125 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError
+from django.utils import timezone
+
+from orcamentos.auditoria import AuditoriaManager, LogAuditoria, TipoAcao
+from orcamentos.auditoria_fila import EscritorAuditoria
+
+User = get_user_model()
+
+
+class EscritorSemThread(EscritorAuditoria):
+    """Escritor sem a thread de fundo: o banco em memória dos testes não é visível em outras threads"""
+
+    def _garantir_thread(self):
+        pass
+
+
+class EscritorAuditoriaTestCase(TestCase):
+    """Testes da gravação assíncrona/em lote dos logs de auditoria"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='audit@test.com',
+            email='audit@test.com',
+            password='testpass123',
+            account_type='ADMINISTRATOR'
+        )
+        self.pasta_spool = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.pasta_spool, ignore_errors=True)
+        self.escritor = EscritorSemThread(tamanho_lote=100, intervalo=0.1, pasta_spool=self.pasta_spool)
+
+    def _registrar(self, descricao='Ação'):
+        return AuditoriaManager.registrar_acao(
+            usuario=self.user,
+            acao=TipoAcao.VISUALIZACAO,
+            objeto=self.user,
+            descricao=descricao,
+            funcionalidade='Teste'
+        )
+
+    def test_modo_sincrono_grava_na_hora(self):
+        """Sem AUDITORIA_ASSINCRONA o log é gravado dentro da chamada"""
+        log = self._registrar()
+
+        self.assertIsNotNone(log.pk)
+        self.assertTrue(LogAuditoria.objects.filter(pk=log.pk).exists())
+        print("✓ Modo síncrono grava imediatamente")
+
+    @override_settings(AUDITORIA_ASSINCRONA=True)
+    def test_modo_assincrono_grava_em_lote(self):
+        """Os logs só são enfileirados no commit e gravados juntos pelo escritor"""
+        inicio = timezone.now()
+
+        with patch('orcamentos.auditoria.escritor_auditoria', self.escritor):
+            with self.captureOnCommitCallbacks(execute=True):
+                for i in range(50):
+                    self._registrar(f'Ação {i}')
+
+                # Nada é gravado dentro da requisição
+                self.assertEqual(LogAuditoria.objects.count(), 0)
+
+        # Um INSERT para os 50 logs + UPDATE/INSERT do bucket diário, numa transação
+        with self.assertNumQueries(5):
+            self.escritor.descarregar()
+
+        self.assertEqual(LogAuditoria.objects.count(), 50)
+        # timestamp guarda o momento da ação, não o da gravação
+        self.assertTrue(LogAuditoria.objects.filter(timestamp__gte=inicio).exists())
+        print("✓ Logs gravados em lote")
+
+    @override_settings(AUDITORIA_ASSINCRONA=True)
+    def test_transacao_desfeita_nao_gera_log(self):
+        """Uma ação cuja transação é desfeita não é auditada"""
+        with patch('orcamentos.auditoria.escritor_auditoria', self.escritor):
+            with self.captureOnCommitCallbacks(execute=False) as callbacks:
+                self._registrar()
+
+        # Callbacks não executados simulam o rollback
+        self.assertEqual(len(callbacks), 1)
+        self.escritor.descarregar()
+        self.assertEqual(LogAuditoria.objects.count(), 0)
+        print("✓ Rollback descarta o log")
+
+    def test_banco_indisponivel_usa_spool(self):
+        """Um lote que falha vai para o spool e é reinserido depois"""
+        ontem = timezone.now() - timedelta(days=1)
+        lote = []
+        for i in range(3):
+            log = LogAuditoria(
+                usuario=self.user,
+                acao=TipoAcao.EDICAO,
+                descricao=f'Edição {i}',
+                content_type_id=self._content_type_id(),
+                object_id=self.user.pk,
+                dados_posteriores={'campo': i},
+                modulo='orcamentos',
+                funcionalidade='Teste',
+                timestamp=ontem
+            )
+            lote.append(log)
+
+        with patch.object(LogAuditoria.objects, 'bulk_create', side_effect=DatabaseError('offline')):
+            self.assertFalse(self.escritor._gravar_lote(lote))
+
+        self.assertEqual(LogAuditoria.objects.count(), 0)
+        self.assertTrue(self.escritor._existe_spool())
+
+        self.assertEqual(self.escritor.reprocessar_spool(), 3)
+        self.assertFalse(self.escritor._existe_spool())
+
+        gravados = LogAuditoria.objects.order_by('descricao')
+        self.assertEqual(gravados.count(), 3)
+        self.assertEqual(gravados[0].dados_posteriores, {'campo': 0})
+        self.assertEqual(gravados[0].timestamp, ontem)
+        print("✓ Spool em arquivo reinserido no banco")
+
+    def _content_type_id(self):
+        from django.contrib.contenttypes.models import ContentType
+        return ContentType.objects.get_for_model(User).pk
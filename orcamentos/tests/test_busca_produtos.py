@@ -0,0 +1,101 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from orcamentos import busca_produtos
+from orcamentos.busca_produtos import IndiceProdutos, buscar_produtos, normalizar
+from orcamentos.models import Produto
+
+User = get_user_model()
+
+PRODUTOS = [
+    (1, 'PEI-001', 'Peinture acrylique blanche mate'),
+    (2, 'PEI-0012', 'Peinture écaillée rénovation'),
+    (3, 'SOU-010', 'Sous-couche pour peinture'),
+    (4, 'ENd-200', "Enduit de lissage cœur de mur"),
+    (5, 'PIN-050', 'Pinceau plat 50 mm'),
+]
+
+
+class IndiceProdutosTestCase(SimpleTestCase):
+    """Índice em memória: termos sem acentos, prefixos e ordenação"""
+
+    def setUp(self):
+        self.indice = IndiceProdutos(PRODUTOS)
+
+    def test_normalizar(self):
+        self.assertEqual(normalizar('  Peinture  ÉCAILLÉE '), 'peinture ecaillee')
+        self.assertEqual(normalizar('Cœur'), 'coeur')
+        print("✓ Normalização sem acentos e ligaduras")
+
+    def test_sem_acentos(self):
+        self.assertEqual(self.indice.buscar('ecaillee'), [2])
+        self.assertEqual(self.indice.buscar('RÉNOV'), [2])
+        self.assertEqual(self.indice.buscar('coeur'), [4])
+        print("✓ Busca sem diferenciar acentos")
+
+    def test_todos_os_termos(self):
+        self.assertEqual(self.indice.buscar('peinture blanche'), [1])
+        self.assertEqual(self.indice.buscar('peinture inexistant'), [])
+        print("✓ Todos os termos precisam estar no produto")
+
+    def test_ordenacao(self):
+        # Referência igual, referência que começa pela consulta, início de palavra, trecho
+        self.assertEqual(self.indice.buscar('pei-001'), [1, 2])
+        self.assertEqual(self.indice.buscar('peinture'), [1, 2, 3])
+        self.assertEqual(self.indice.buscar('einture'), [1, 2, 3])
+        print("✓ Resultados ordenados por relevância")
+
+    def test_termos_curtos_por_prefixo(self):
+        self.assertEqual(self.indice.buscar('pi'), [5])
+        self.assertEqual(self.indice.buscar('pinceau 50'), [5])
+        print("✓ Termos curtos casam com início de palavra")
+
+
+class BuscaProdutosTestCase(TestCase):
+    """Dentro de uma transação a busca vai ao banco"""
+
+    def test_busca_em_transacao(self):
+        Produto.objects.create(referencia='PEI-001', descricao='Peinture blanche', preco_compra=Decimal('10'))
+        Produto.objects.create(referencia='XPEI-002', descricao='Peinture', preco_compra=Decimal('10'))
+        Produto.objects.create(referencia='PEI-003', descricao='Peinture', preco_compra=Decimal('10'), ativo=False)
+
+        self.assertEqual([p.referencia for p in buscar_produtos('pei')], ['PEI-001', 'XPEI-002'])
+        print("✓ Busca com icontains dentro de transação")
+
+
+class IndiceCompartilhadoTestCase(TransactionTestCase):
+    """Índice em memória fora de transação, reconstruído após alterações"""
+
+    def setUp(self):
+        cache.clear()
+        busca_produtos.invalidar()
+        self.addCleanup(cache.clear)
+        self.addCleanup(busca_produtos.invalidar)
+        self.admin = User.objects.create_user(
+            username='admin@test.com', email='admin@test.com', password='x', is_staff=True
+        )
+        Produto.objects.create(referencia='PEI-001', descricao='Peinture écaillée', preco_compra=Decimal('10'))
+
+    def test_view_e_invalidacao(self):
+        self.client.force_login(self.admin)
+        url = reverse('orcamentos:buscar_produtos_ajax')
+
+        response = self.client.get(url, {'q': 'ecaille'})
+        self.assertEqual([p['referencia'] for p in response.json()['produtos']], ['PEI-001'])
+
+        # Índice em memória: sem consulta de busca na tabela, só a carga dos produtos encontrados
+        with self.assertNumQueries(1):
+            buscar_produtos('ecaille')
+
+        # Novo produto: a versão muda no commit e o índice é reconstruído
+        Produto.objects.create(referencia='PEI-002', descricao='Peinture mate', preco_compra=Decimal('10'))
+        response = self.client.get(url, {'q': 'peinture'})
+        self.assertEqual([p['referencia'] for p in response.json()['produtos']], ['PEI-001', 'PEI-002'])
+
+        Produto.objects.filter(referencia='PEI-001').get().delete()
+        self.assertEqual([p.referencia for p in buscar_produtos('peinture')], ['PEI-002'])
+        print("✓ Índice em memória reconstruído após alterações")
@@ -7,6 +7,7 @@ from io import StringIO
 from unittest.mock import patch
 from orcamentos.models import SolicitacaoOrcamento, StatusOrcamento, Orcamento
 from orcamentos.management.commands.vincular_orcamentos_orfaos import Command
+from orcamentos.vinculacao_orfaos import VinculadorOrfaos
 
 User = get_user_model()
 
@@ -261,8 +262,8 @@ class VincularOrcamentosOrfaosCommandTestCase(TestCase):
         # Capturar output
         out = StringIO()
 
-        # Simular erro deletando o usuário durante o teste
-        with patch.object(SolicitacaoOrcamento, 'save', side_effect=Exception('Erro de banco')):
+        # Simular erro no UPDATE do lote
+        with patch.object(VinculadorOrfaos, '_vincular_lote', side_effect=Exception('Erro de banco')):
             call_command('vincular_orcamentos_orfaos', stdout=out)
 
         # Verificar que o erro foi capturado no output
@@ -495,8 +496,8 @@ class CommandErrorHandlingTestCase(TestCase):
 
         out = StringIO()
 
-        # Simular erro na operação save
-        with patch.object(SolicitacaoOrcamento, 'save', side_effect=Exception('Database error')):
+        # Simular erro na gravação do lote
+        with patch.object(VinculadorOrfaos, '_vincular_lote', side_effect=Exception('Database error')):
             # Comando deve continuar executando mesmo com erros
             call_command('vincular_orcamentos_orfaos', stdout=out)
 
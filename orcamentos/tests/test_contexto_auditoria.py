@@ -0,0 +1,113 @@
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import TestCase, RequestFactory
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.backends.db import SessionStore
+from django.http import HttpResponse
+
+from orcamentos.auditoria import AuditoriaManager, LogAuditoria, TipoAcao
+from orcamentos.contexto_auditoria import obter_requisicao_atual
+from orcamentos.middleware import AuditoriaMiddleware, get_current_user
+
+User = get_user_model()
+
+
+class ContextoAuditoriaTestCase(TestCase):
+    """Testes do contexto de auditoria por requisição"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='contexto@test.com',
+            email='contexto@test.com',
+            password='testpass123',
+            account_type='ADMINISTRATOR'
+        )
+        self.factory = RequestFactory()
+
+    def _request(self, **extra):
+        request = self.factory.get('/devis/admin/', HTTP_USER_AGENT='Navigateur Test', **extra)
+        request.user = self.user
+        request.session = SessionStore()
+        request.session.create()
+        return request
+
+    def _registrar(self, descricao):
+        # Sem `request`: os metadados vêm da requisição atual
+        AuditoriaManager.registrar_acao(
+            usuario=self.user,
+            acao=TipoAcao.VISUALIZACAO,
+            objeto=self.user,
+            descricao=descricao
+        )
+
+    def test_logs_da_requisicao_compartilham_contexto(self):
+        """Várias ações numa requisição reutilizam o mesmo contexto e request_id"""
+        def view(request):
+            self._registrar('Primeira ação')
+            self._registrar('Segunda ação')
+            return HttpResponse('ok')
+
+        request = self._request(REMOTE_ADDR='10.0.0.5')
+        with patch.object(
+            AuditoriaManager, '_get_client_ip', wraps=AuditoriaManager._get_client_ip
+        ) as get_ip:
+            response = AuditoriaMiddleware(view)(request)
+
+        # Metadados extraídos uma única vez
+        self.assertEqual(get_ip.call_count, 1)
+
+        request_id = response['X-Request-ID']
+        logs = AuditoriaManager.obter_logs_requisicao(request_id)
+        self.assertEqual(
+            [log.descricao for log in logs], ['Primeira ação', 'Segunda ação']
+        )
+        for log in logs:
+            self.assertEqual(log.ip_address, '10.0.0.5')
+            self.assertEqual(log.user_agent, 'Navigateur Test')
+            self.assertEqual(log.sessao_id, request.session.session_key)
+
+        # Fora da requisição não há contexto
+        self.assertIsNone(obter_requisicao_atual())
+        self.assertIsNone(AuditoriaManager.obter_contexto())
+        print(f"✓ {logs.count()} logs ligados ao request_id {request_id}")
+
+    def test_request_id_do_proxy(self):
+        """Um X-Request-ID válido recebido do proxy é reaproveitado"""
+        request = self._request(HTTP_X_REQUEST_ID='proxy-1234abcd')
+        response = AuditoriaMiddleware(lambda r: HttpResponse('ok'))(request)
+        self.assertEqual(response['X-Request-ID'], 'proxy-1234abcd')
+
+        request = self._request(HTTP_X_REQUEST_ID='<script>')
+        response = AuditoriaMiddleware(lambda r: HttpResponse('ok'))(request)
+        self.assertNotEqual(response['X-Request-ID'], '<script>')
+        print("✓ X-Request-ID do proxy validado")
+
+    def test_contexto_em_view_assincrona(self):
+        """O contexto também é visível em views assíncronas (ASGI)"""
+        vistos = {}
+
+        async def view(request):
+            vistos['request'] = obter_requisicao_atual()
+            vistos['usuario'] = get_current_user()
+            await sync_to_async(self._registrar)('Ação assíncrona')
+            return HttpResponse('ok')
+
+        request = self._request()
+        middleware = AuditoriaMiddleware(view)
+        response = async_to_sync(middleware)(request)
+
+        self.assertIs(vistos['request'], request)
+        self.assertEqual(vistos['usuario'], self.user)
+        log = LogAuditoria.objects.get(descricao='Ação assíncrona')
+        self.assertEqual(log.request_id, response['X-Request-ID'])
+        print("✓ Contexto disponível em views assíncronas")
+
+    def test_sem_requisicao(self):
+        """Ações fora de requisição (comandos) gravam sem metadados"""
+        self._registrar('Comando')
+
+        log = LogAuditoria.objects.get(descricao='Comando')
+        self.assertEqual(log.request_id, '')
+        self.assertIsNone(log.ip_address)
+        print("✓ Log sem requisição")
@@ -0,0 +1,223 @@
+import shutil
+import tempfile
+from decimal import Decimal
+from datetime import date, timedelta
+
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.signing import TimestampSigner
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from orcamentos.documentos import DocumentoService, EMPRESA_PADRAO
+from orcamentos.models import (
+    SolicitacaoOrcamento, Orcamento, ItemOrcamento, AcompteOrcamento,
+    Facture, ItemFacture, TipoServico, TipoTVA, StatusOrcamento
+)
+from system_config.models import CompanySettings
+
+User = get_user_model()
+
+
+class DocumentoServiceTestCase(TestCase):
+    """Modelo de documento compartilhado pelas views de devis e factures"""
+
+    def setUp(self):
+        cache.clear()
+        self.pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.pasta, ignore_errors=True)
+        configuracao = override_settings(PDF_CACHE_DIR=self.pasta)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+        self.admin = User.objects.create_user(
+            username='doc.admin@test.com',
+            email='doc.admin@test.com',
+            password='testpass123',
+            account_type='ADMINISTRATOR',
+            is_staff=True
+        )
+        self.cliente = User.objects.create_user(
+            username='doc.cliente@test.com',
+            email='doc.cliente@test.com',
+            password='testpass123',
+            account_type='CLIENT',
+            first_name='Marie',
+            last_name='Durand'
+        )
+        solicitacao = SolicitacaoOrcamento.objects.create(
+            cliente=self.cliente,
+            nome_solicitante='Marie Durand',
+            email_solicitante='doc.cliente@test.com',
+            telefone_solicitante='0102030405',
+            endereco='1 Rue Test',
+            cidade='Toulouse',
+            cep='31000',
+            tipo_servico=TipoServico.RENOVACAO_COMPLETA,
+            descricao_servico='Rénovation'
+        )
+        self.orcamento = Orcamento.objects.create(
+            solicitacao=solicitacao,
+            elaborado_por=self.admin,
+            titulo='Devis document',
+            descricao='Desc',
+            prazo_execucao=30,
+            validade_orcamento=date.today() + timedelta(days=30),
+            status=StatusOrcamento.ENVIADO
+        )
+        self._adicionar_itens_devis(3)
+
+        self.fatura = Facture.objects.create(
+            orcamento=self.orcamento,
+            cliente=self.cliente,
+            elaborado_por=self.admin,
+            titulo='Facture document',
+            descricao='Desc',
+            data_vencimento=date.today() + timedelta(days=30)
+        )
+        self._adicionar_itens_fatura(3)
+
+    def _adicionar_itens_devis(self, quantidade):
+        for i in range(quantidade):
+            ItemOrcamento.objects.create(
+                orcamento=self.orcamento,
+                descricao=f'Prestation {i}',
+                quantidade=Decimal('2.00'),
+                preco_unitario_ht=Decimal('50.00'),
+                taxa_tva=TipoTVA.TVA_20
+            )
+
+    def _adicionar_itens_fatura(self, quantidade):
+        for i in range(quantidade):
+            ItemFacture.objects.create(
+                facture=self.fatura,
+                descricao=f'Prestation {i}',
+                quantidade=Decimal('1.00'),
+                preco_unitario_ht=Decimal('100.00'),
+                taxa_tva=TipoTVA.TVA_20
+            )
+
+    def _consultas(self, url, usuario=None):
+        """Consultas SQL de um GET (depois do login, fora da contagem)"""
+        if usuario:
+            self.client.force_login(usuario)
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+                response.close()
+        self.assertEqual(response.status_code, 200)
+        return [q['sql'] for q in consultas.captured_queries]
+
+    @staticmethod
+    def _em_tabela(consultas, tabela):
+        return [sql for sql in consultas if f'FROM "{tabela}"' in sql]
+
+    def _verificar_endpoint(self, url, usuario, tabelas_filhas, adicionar_itens):
+        # Primeira visita cria sessão, configuração da empresa etc.; fora da comparação
+        self._consultas(url, usuario)
+        cache.clear()
+
+        primeira = self._consultas(url, usuario)
+        for tabela in tabelas_filhas:
+            self.assertLessEqual(len(self._em_tabela(primeira, tabela)), 1, tabela)
+
+        # Segunda visita: modelo em cache, nenhuma leitura de itens/acomptes
+        segunda = self._consultas(url, usuario)
+        for tabela in tabelas_filhas:
+            self.assertEqual(self._em_tabela(segunda, tabela), [], tabela)
+        self.assertLess(len(segunda), len(primeira))
+
+        # Mais itens não significam mais consultas (sem N+1)
+        adicionar_itens(5)
+        cache.clear()
+        self.assertEqual(len(self._consultas(url, usuario)), len(primeira))
+        return len(primeira), len(segunda)
+
+    def test_cliente_devis_pdf(self):
+        url = reverse('orcamentos:cliente_devis_pdf', args=[self.orcamento.numero])
+        primeira, segunda = self._verificar_endpoint(
+            url, self.cliente,
+            ['orcamentos_itemorcamento', 'orcamentos_acompteorcamento'],
+            self._adicionar_itens_devis
+        )
+        print(f"✓ cliente_devis_pdf: {primeira} consultas, {segunda} com o modelo em cache")
+
+    def test_admin_orcamento_pdf_html(self):
+        url = reverse('orcamentos:admin_orcamento_pdf_html', args=[self.orcamento.numero])
+        primeira, segunda = self._verificar_endpoint(
+            url, self.admin,
+            ['orcamentos_itemorcamento', 'orcamentos_acompteorcamento'],
+            self._adicionar_itens_devis
+        )
+        print(f"✓ admin_orcamento_pdf_html: {primeira} consultas, {segunda} com o modelo em cache")
+
+    def test_admin_fatura_pdf(self):
+        url = reverse('orcamentos:admin_fatura_pdf', args=[self.fatura.numero])
+        primeira, segunda = self._verificar_endpoint(
+            url, self.admin, ['orcamentos_itemfacture'], self._adicionar_itens_fatura
+        )
+        print(f"✓ admin_fatura_pdf: {primeira} consultas, {segunda} com o modelo em cache")
+
+    def test_orcamento_publico_pdf(self):
+        token = TimestampSigner().sign(f"{self.orcamento.uuid}:pdf")
+        url = reverse('orcamentos:orcamento_publico_pdf', kwargs={'uuid': self.orcamento.uuid}) + f"?token={token}"
+
+        primeira = self._consultas(url)
+        segunda = self._consultas(url)
+
+        self.assertEqual(self._em_tabela(segunda, 'orcamentos_itemorcamento'), [])
+        self.assertEqual(self._em_tabela(segunda, 'orcamentos_acompteorcamento'), [])
+        self.assertLess(len(segunda), len(primeira))
+        print(f"✓ orcamento_publico_pdf: {len(primeira)} consultas, {len(segunda)} com PDF e modelo em cache")
+
+    def test_versao_muda_com_itens_e_acomptes(self):
+        """Editar/excluir itens ou registrar acomptes gera um modelo novo"""
+        modelo = DocumentoService.modelo_devis(self.orcamento)
+        self.assertEqual(len(modelo['items_data']), 3)
+
+        item = self.orcamento.itens.first()
+        item.quantidade = Decimal('4.00')
+        item.save()
+        self.orcamento.refresh_from_db()
+        modelo = DocumentoService.modelo_devis(self.orcamento)
+        self.assertEqual(modelo['subtotal_ht'], Decimal('400.00'))
+
+        self.orcamento.itens.last().delete()
+        self.orcamento.refresh_from_db()
+        modelo = DocumentoService.modelo_devis(self.orcamento)
+        self.assertEqual(len(modelo['items_data']), 2)
+
+        AcompteOrcamento.objects.create(
+            orcamento=self.orcamento,
+            criado_por=self.admin,
+            percentual=Decimal('30.00'),
+            data_vencimento=date.today() + timedelta(days=10)
+        )
+        self.orcamento.refresh_from_db()
+        modelo = DocumentoService.modelo_devis(self.orcamento)
+        self.assertEqual(len(modelo['acomptes']), 1)
+        self.assertEqual(modelo['solde_ttc'], self.orcamento.total_ttc - modelo['total_acomptes_ttc'])
+
+        self.fatura.itens.first().delete()
+        self.fatura.refresh_from_db()
+        self.assertEqual(len(DocumentoService.modelo_facture(self.fatura)['items_data']), 2)
+        print("✓ Modelo reconstruído após alterações em itens e acomptes")
+
+    def test_dados_da_empresa(self):
+        """Os documentos usam CompanySettings, com os valores históricos como padrão"""
+        modelo = DocumentoService.modelo_facture(self.fatura)
+        self.assertEqual(modelo['company_info'], EMPRESA_PADRAO)
+
+        config = CompanySettings.get_solo()
+        config.raison_sociale = 'Peinture Test SARL'
+        config.siret = '123 456 789 00010'
+        config.save()
+
+        modelo = DocumentoService.modelo_facture(self.fatura)
+        self.assertEqual(modelo['company_info']['name'], 'Peinture Test SARL')
+        self.assertEqual(modelo['company_info']['siret'], '123 456 789 00010')
+        self.assertEqual(modelo['company_info']['email'], EMPRESA_PADRAO['email'])
+        print("✓ Dados da empresa vindos da configuração")
@@ -0,0 +1,114 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.utils import timezone
+
+from orcamentos.auditoria import (
+    AuditoriaManager, EstatisticaAuditoriaDiaria, LogAuditoria, TipoAcao
+)
+from orcamentos.auditoria_fila import EscritorAuditoria
+
+User = get_user_model()
+
+
+class EstatisticasAuditoriaTestCase(TestCase):
+    """Testes do resumo diário usado pelas estatísticas de auditoria"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='stats@test.com',
+            email='stats@test.com',
+            password='testpass123',
+            first_name='Stats',
+            last_name='User',
+            account_type='ADMINISTRATOR'
+        )
+        ContentType.objects.get_for_model(User)
+
+    def _registrar(self, acao=TipoAcao.VISUALIZACAO, quantidade=1):
+        for i in range(quantidade):
+            AuditoriaManager.registrar_acao(
+                usuario=self.user,
+                acao=acao,
+                objeto=self.user,
+                descricao=f'Ação {i}',
+                funcionalidade='Teste'
+            )
+
+    def _periodo(self):
+        agora = timezone.now()
+        return agora - timedelta(days=1), agora
+
+    def test_contadores_incrementais(self):
+        """Cada log gravado soma no bucket do dia"""
+        self._registrar(quantidade=3)
+        self._registrar(acao=TipoAcao.EDICAO, quantidade=2)
+
+        buckets = EstatisticaAuditoriaDiaria.objects.filter(usuario=self.user)
+        self.assertEqual(buckets.count(), 2)
+        self.assertEqual(buckets.get(acao=TipoAcao.VISUALIZACAO).total, 3)
+        self.assertEqual(buckets.get(acao=TipoAcao.EDICAO).data, timezone.localdate())
+
+        stats = AuditoriaManager.obter_estatisticas_periodo(*self._periodo())
+        self.assertEqual(stats['total_acoes'], 5)
+        self.assertEqual(stats['acoes_por_tipo'], {'Consultation': 3, 'Modification': 2})
+        self.assertEqual(stats['usuarios_mais_ativos'], {'Stats User': 5})
+        self.assertEqual(stats['modulos_mais_usados'], {'orcamentos': 5})
+        self.assertEqual(stats['acoes_por_dia'], {timezone.localdate().isoformat(): 5})
+        print(f"✓ Estatísticas do resumo: {stats['acoes_por_tipo']}")
+
+    def test_consultas_independentes_do_volume(self):
+        """O número de consultas não cresce com a quantidade de logs"""
+        self._registrar(quantidade=2)
+        with self.assertNumQueries(5):
+            AuditoriaManager.obter_estatisticas_periodo(*self._periodo())
+
+        self._registrar(quantidade=40)
+        with self.assertNumQueries(5):
+            stats = AuditoriaManager.obter_estatisticas_periodo(*self._periodo())
+
+        self.assertEqual(stats['total_acoes'], 42)
+        self.assertEqual(EstatisticaAuditoriaDiaria.objects.count(), 1)
+        print("✓ Estatísticas com 5 consultas para 2 ou 42 logs")
+
+    def test_lote_do_escritor(self):
+        """A gravação em lote soma um UPDATE por bucket, não por log"""
+        content_type = ContentType.objects.get_for_model(User)
+        logs = [
+            LogAuditoria(
+                usuario=self.user,
+                acao=TipoAcao.DOWNLOAD,
+                descricao=f'Lote {i}',
+                content_type=content_type,
+                object_id=self.user.pk,
+                modulo='orcamentos',
+                funcionalidade='Teste'
+            )
+            for i in range(10)
+        ]
+
+        EscritorAuditoria(pasta_spool='/tmp')._inserir(logs)
+
+        bucket = EstatisticaAuditoriaDiaria.objects.get(acao=TipoAcao.DOWNLOAD)
+        self.assertEqual(bucket.total, 10)
+        print("✓ Lote de 10 logs contabilizado num único bucket")
+
+    def test_reconstruir_a_partir_dos_logs(self):
+        """O comando recalcula os buckets a partir dos logs brutos"""
+        self._registrar(quantidade=4)
+        hoje = timezone.localdate()
+
+        # Simular resumo corrompido/ausente
+        EstatisticaAuditoriaDiaria.objects.update(total=99)
+
+        out = StringIO()
+        call_command('consolidar_estatisticas_auditoria', stdout=out)
+
+        bucket = EstatisticaAuditoriaDiaria.objects.get(data=hoje)
+        self.assertEqual(bucket.total, 4)
+        self.assertIn('RESUMO DA OPERAÇÃO', out.getvalue())
+        print(f"✓ Resumo reconstruído: {bucket.total} ações em {hoje}")
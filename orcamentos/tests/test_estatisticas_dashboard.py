@@ -0,0 +1,124 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from orcamentos.estatisticas import EstatisticasService
+from orcamentos.models import Orcamento, SolicitacaoOrcamento, StatusOrcamento, TipoServico
+
+User = get_user_model()
+
+
+def criar_solicitacao(email, cliente=None, status=StatusOrcamento.PENDENTE):
+    return SolicitacaoOrcamento.objects.create(
+        nome_solicitante='Client',
+        email_solicitante=email,
+        telefone_solicitante='0102030405',
+        endereco='1 Rue',
+        cidade='Paris',
+        cep='75001',
+        tipo_servico=TipoServico.RENOVACAO_COMPLETA,
+        descricao_servico='Peinture',
+        cliente=cliente,
+        status=status,
+    )
+
+
+def criar_orcamento(solicitacao, status, total, respondido=None):
+    return Orcamento.objects.create(
+        solicitacao=solicitacao,
+        titulo='Devis',
+        descricao='Peinture',
+        total=Decimal(total),
+        prazo_execucao=5,
+        validade_orcamento=date.today() + timedelta(days=30),
+        status=status,
+        data_resposta_cliente=respondido,
+    )
+
+
+class EstatisticasDashboardTestCase(TestCase):
+    """Widgets agregados dos dashboards"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username='admin@test.com', email='admin@test.com', password='x', account_type='ADMINISTRATOR'
+        )
+        self.cliente = User.objects.create_user(
+            username='marie@test.com', email='Marie@Test.com', password='x'
+        )
+        criar_solicitacao('marie@test.com')
+        criar_solicitacao('MARIE@test.com')
+        criar_solicitacao('inconnu@test.com')
+        vinculada = criar_solicitacao('marie@test.com', cliente=self.cliente, status=StatusOrcamento.ENVIADO)
+        outra = criar_solicitacao('marie@test.com', cliente=self.cliente, status=StatusOrcamento.ENVIADO)
+
+        criar_orcamento(vinculada, StatusOrcamento.ACEITO, '1000.00', respondido=timezone.now())
+        criar_orcamento(outra, StatusOrcamento.ACEITO, '500.00', respondido=timezone.now() - timedelta(days=400))
+
+    def test_widgets_orcamentos(self):
+        """Uma consulta por widget com os mesmos números das consultas separadas"""
+        with self.assertNumQueries(3):
+            solicitacoes = EstatisticasService.solicitacoes()
+            orcamentos = EstatisticasService.orcamentos()
+            vinculaveis = EstatisticasService.orfaos_vinculaveis()
+
+        self.assertEqual(solicitacoes, {'total': 5, 'pendentes': 3, 'orfas': 3})
+        self.assertEqual(orcamentos['aceitos'], 2)
+        self.assertEqual(orcamentos['enviados'], 0)
+        # Receita do mês: só o devis aceito neste mês (o outro é do ano anterior)
+        self.assertEqual(orcamentos['receita_mes'], Decimal('1000.00'))
+        self.assertEqual(orcamentos['receita_total'], Decimal('1500.00'))
+        # Um email vinculável, mesmo escrito com maiúsculas diferentes
+        self.assertEqual(vinculaveis, 1)
+        print("✓ Widgets de orçamentos em 3 consultas")
+
+    def test_admin_dashboard(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('orcamentos:admin_dashboard'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_solicitacoes'], 5)
+        self.assertEqual(response.context['orcamentos_aceitos'], 2)
+        self.assertEqual(response.context['orfaos_vincuLaveis'], 1)
+        print("✓ Dashboard admin com estatísticas agregadas")
+
+    def test_admin_do_site(self):
+        grupo = Group.objects.create(name='Peintres')
+        grupo.user_set.add(self.cliente)
+        self.client.force_login(self.admin)
+
+        response = self.client.get('/admin/')
+
+        stats = response.context['stats']
+        self.assertEqual(stats['total_users'], 2)
+        self.assertEqual(stats['clients'], 1)
+        self.assertEqual(stats['administrators'], 1)
+        self.assertIn({'name': 'Peintres', 'users_count': 1, 'permissions_count': 0}, stats['groups_stats'])
+        print("✓ Índice do admin com estatísticas agregadas")
+
+
+class CacheEstatisticasTestCase(TransactionTestCase):
+    """Cache dos widgets fora de transação e invalidação pelos sinais"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_cache_e_invalidacao(self):
+        criar_solicitacao('a@test.com')
+        self.assertEqual(EstatisticasService.solicitacoes()['total'], 1)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(EstatisticasService.solicitacoes()['total'], 1)
+
+        # Nova solicitação: o widget é descartado quando a transação é confirmada
+        criar_solicitacao('b@test.com')
+        self.assertEqual(EstatisticasService.solicitacoes()['total'], 2)
+        self.assertEqual(EstatisticasService.solicitacoes()['orfas'], 2)
+        print("✓ Widget em cache descartado após alteração")
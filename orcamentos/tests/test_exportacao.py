@@ -0,0 +1,186 @@
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+from decimal import Decimal
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from django.contrib import admin
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from orcamentos.admin import OrcamentoAdmin
+from orcamentos.exportacao import ExportacaoDocumentos
+from orcamentos.models import (
+    SolicitacaoOrcamento, Orcamento, ItemOrcamento, Facture, ItemFacture,
+    TipoServico, TipoTVA
+)
+from orcamentos.pdf_generator import OrcamentoPDFGenerator, gerar_pdf_orcamento
+
+User = get_user_model()
+
+
+class ExportacaoDocumentosTestCase(TestCase):
+    """Exportação em lote de devis/factures num ZIP"""
+
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.pasta, ignore_errors=True)
+        configuracao = override_settings(PDF_CACHE_DIR=os.path.join(self.pasta, 'cache'))
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+        self.admin = User.objects.create_user(
+            username='export@test.com',
+            email='export@test.com',
+            password='testpass123',
+            account_type='ADMINISTRATOR',
+            is_staff=True,
+            is_superuser=True
+        )
+        self.cliente = User.objects.create_user(
+            username='export.cliente@test.com',
+            email='export.cliente@test.com',
+            password='testpass123',
+            account_type='CLIENT'
+        )
+        self.orcamentos = []
+        for i in range(3):
+            solicitacao = SolicitacaoOrcamento.objects.create(
+                nome_solicitante=f'Cliente {i}',
+                email_solicitante=f'cliente{i}@email.com',
+                telefone_solicitante='0102030405',
+                endereco='Endereço Test',
+                cidade='Paris',
+                cep='75001',
+                tipo_servico=TipoServico.RENOVACAO_COMPLETA,
+                descricao_servico='Rénovation'
+            )
+            orcamento = Orcamento.objects.create(
+                solicitacao=solicitacao,
+                elaborado_por=self.admin,
+                titulo=f'Devis {i}',
+                descricao='Desc',
+                prazo_execucao=30,
+                validade_orcamento=date.today() + timedelta(days=30)
+            )
+            ItemOrcamento.objects.create(
+                orcamento=orcamento,
+                descricao='Peinture',
+                quantidade=Decimal('2.00'),
+                preco_unitario_ht=Decimal('50.00'),
+                taxa_tva=TipoTVA.TVA_20
+            )
+            self.orcamentos.append(orcamento)
+
+        self.faturas = []
+        for i in range(2):
+            fatura = Facture.objects.create(
+                cliente=self.cliente,
+                elaborado_por=self.admin,
+                titulo=f'Facture {i}',
+                descricao='Desc',
+                data_emissao=date(2025, 2, 10 + i),
+                data_vencimento=date(2025, 3, 10)
+            )
+            ItemFacture.objects.create(
+                facture=fatura,
+                descricao='Peinture',
+                quantidade=Decimal('1.00'),
+                preco_unitario_ht=Decimal('100.00'),
+                taxa_tva=TipoTVA.TVA_20
+            )
+            self.faturas.append(fatura)
+
+    def _orcamentos(self):
+        return Orcamento.objects.select_related('solicitacao').order_by('numero')
+
+    def test_zip_com_pool_de_processos(self):
+        """Os documentos renderizados nos processos filhos chegam inteiros ao ZIP"""
+        destino = os.path.join(self.pasta, 'lote.zip')
+        exportacao = ExportacaoDocumentos(processos=2)
+        factures = Facture.objects.select_related('cliente', 'cliente__profile', 'orcamento', 'orcamento__solicitacao')
+        estatisticas = exportacao.gravar_zip(destino, devis=self._orcamentos(), factures=factures)
+
+        with zipfile.ZipFile(destino) as arquivo_zip:
+            nomes = sorted(arquivo_zip.namelist())
+            pdf = arquivo_zip.read(f'devis/devis_{self.orcamentos[0].numero}.pdf')
+            html = arquivo_zip.read(f'factures/facture_{self.faturas[0].numero}.html').decode('utf-8')
+
+        self.assertEqual(len(nomes), 5)
+        self.assertTrue(pdf.startswith(b'%PDF'))
+        self.assertIn(self.faturas[0].numero, html)
+        self.assertEqual(estatisticas['renderizados'], 5)
+        print(f"✓ {len(nomes)} documentos em {estatisticas['segundos']:.2f}s com 2 processos")
+
+    def test_reaproveita_pdfs_em_cache(self):
+        """Devis já baixados saem do cache em disco; os novos passam a ficar em cache"""
+        gerar_pdf_orcamento(self._orcamentos().first())
+
+        exportacao = ExportacaoDocumentos(processos=1)
+        with patch.object(
+            OrcamentoPDFGenerator, 'generate_pdf', autospec=True,
+            side_effect=OrcamentoPDFGenerator.generate_pdf
+        ) as gerar:
+            list(exportacao.documentos(devis=self._orcamentos()))
+        self.assertEqual(gerar.call_count, 2)
+        self.assertEqual(exportacao.estatisticas['do_cache'], 1)
+
+        segunda = ExportacaoDocumentos(processos=1)
+        list(segunda.documentos(devis=self._orcamentos()))
+        self.assertEqual(segunda.estatisticas['do_cache'], 3)
+        self.assertEqual(segunda.estatisticas['renderizados'], 0)
+        print("✓ Renders em cache reaproveitados")
+
+    def test_zip_stream_valido(self):
+        """O ZIP emitido em pedaços (sem seek) é um arquivo válido"""
+        pedacos = list(ExportacaoDocumentos(processos=1).zip_stream(devis=self._orcamentos()))
+
+        self.assertGreater(len(pedacos), 3)
+        with zipfile.ZipFile(io.BytesIO(b''.join(pedacos))) as arquivo_zip:
+            self.assertIsNone(arquivo_zip.testzip())
+            self.assertEqual(len(arquivo_zip.namelist()), 3)
+        print(f"✓ ZIP transmitido em {len(pedacos)} pedaços")
+
+    def test_action_do_admin(self):
+        """A action do OrcamentoAdmin devolve o ZIP dos devis selecionados"""
+        request = RequestFactory().post('/')
+        request.user = self.admin
+        selecionados = Orcamento.objects.filter(pk__in=[self.orcamentos[0].pk, self.orcamentos[2].pk])
+
+        response = OrcamentoAdmin(Orcamento, admin.site).gerar_pdf_action(request, selecionados)
+        conteudo = b''.join(response.streaming_content)
+
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        with zipfile.ZipFile(io.BytesIO(conteudo)) as arquivo_zip:
+            self.assertEqual(len(arquivo_zip.namelist()), 2)
+        print("✓ Action do admin exporta os devis selecionados")
+
+    def test_exportacao_das_faturas_filtradas(self):
+        """O botão da lista de faturas exporta apenas o período filtrado"""
+        self.client.force_login(self.admin)
+        response = self.client.get(
+            reverse('orcamentos:admin_faturas_exportar'), {'desde': '2025-02-11', 'ate': '2025-03-31'}
+        )
+        conteudo = b''.join(response.streaming_content)
+
+        with zipfile.ZipFile(io.BytesIO(conteudo)) as arquivo_zip:
+            self.assertEqual(arquivo_zip.namelist(), [f'factures/facture_{self.faturas[1].numero}.html'])
+        print("✓ Exportação respeita o período")
+
+    def test_comando(self):
+        """O comando grava o ZIP e mostra o throughput"""
+        destino = os.path.join(self.pasta, 'trimestre.zip')
+        saida = io.StringIO()
+        call_command(
+            'exportar_documentos_pdf', tipo='todos', saida=destino, processos=1, stdout=saida
+        )
+
+        self.assertIn('documentos/s', saida.getvalue())
+        with zipfile.ZipFile(destino) as arquivo_zip:
+            self.assertEqual(len(arquivo_zip.namelist()), 5)
+        print("✓ Comando exportou 5 documentos")
@@ -0,0 +1,165 @@
+import io
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.db import DatabaseError, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from orcamentos.fila_emails import despachar_lote, enfileirar, profundidade_fila
+from orcamentos.models import EmailPendente, SolicitacaoOrcamento, StatusEmail, TipoServico
+from orcamentos.services import NotificationService
+from utils.emails.sistema_email import _send_mail, close_pooled_connection
+
+User = get_user_model()
+
+
+class BackendQueFalha(BaseEmailBackend):
+    """Backend de teste que recusa todos os envios"""
+
+    def send_messages(self, email_messages):
+        raise ConnectionRefusedError('SMTP indisponível')
+
+
+@override_settings(
+    EMAIL_OUTBOX_ATIVO=True,
+    EMAIL_OUTBOX_ESPERA_BASE=30,
+    EMAIL_OUTBOX_MAX_TENTATIVAS=3,
+    DEFAULT_FROM_EMAIL='contact@example.com',
+)
+class FilaEmailsTestCase(TestCase):
+    """Fila de saída de emails e worker despachar_emails"""
+
+    def setUp(self):
+        self.addCleanup(close_pooled_connection)
+
+    def _enfileirar(self, quantidade=1):
+        for i in range(quantidade):
+            _send_mail(
+                subject=f'Sujet {i}',
+                plain_message='Texte',
+                html_message='<p>Texte</p>',
+                recipients=[f'client{i}@example.com'],
+            )
+
+    def test_enfileira_sem_enviar(self):
+        """_send_mail grava na fila e o worker envia depois"""
+        self._enfileirar(3)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(profundidade_fila()['prontos'], 3)
+
+        resultado = despachar_lote()
+
+        self.assertEqual(resultado, {'enviados': 3, 'falhas': 0})
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(mail.outbox[0].from_email, 'contact@example.com')
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+        self.assertFalse(EmailPendente.objects.exclude(status=StatusEmail.ENVIADO).exists())
+        print("✓ Emails enfileirados e enviados pelo worker")
+
+    def test_rollback_descarta(self):
+        """O email só existe se a transação de quem o pediu for confirmada"""
+        with transaction.atomic():
+            self._enfileirar()
+            transaction.set_rollback(True)
+
+        self.assertFalse(EmailPendente.objects.exists())
+        print("✓ Rollback descarta o email")
+
+    def test_falha_na_fila_envia_na_hora(self):
+        """Uma falha ao enfileirar desfaz só o savepoint e o email sai por send_many"""
+        def enfileirar_com_falha(mensagens, remetente=None):
+            enfileirar(mensagens, remetente=remetente)
+            raise DatabaseError('falha no meio da inserção')
+
+        with transaction.atomic():
+            with patch('orcamentos.fila_emails.enfileirar', enfileirar_com_falha):
+                self._enfileirar()
+            # A transação de quem chamou continua utilizável
+            self.assertFalse(EmailPendente.objects.exists())
+
+        self.assertEqual(len(mail.outbox), 1)
+        print("✓ Falha na fila desfaz só o savepoint e envia na hora")
+
+    @override_settings(EMAIL_BACKEND='orcamentos.tests.test_fila_emails.BackendQueFalha')
+    def test_espera_exponencial(self):
+        """Falhas são reagendadas com espera crescente até o descarte"""
+        self._enfileirar()
+        pendente = EmailPendente.objects.get()
+
+        esperas = []
+        for _ in range(3):
+            EmailPendente.objects.filter(pk=pendente.pk).update(proxima_tentativa=timezone.now())
+            antes = timezone.now()
+            self.assertEqual(despachar_lote()['falhas'], 1)
+            pendente.refresh_from_db()
+            esperas.append(round((pendente.proxima_tentativa - antes).total_seconds()))
+
+        self.assertEqual(esperas[:2], [30, 60])
+        self.assertEqual(pendente.status, StatusEmail.FALHOU)
+        self.assertIn('SMTP indisponível', pendente.ultimo_erro)
+        print(f"✓ Esperas {esperas[:2]} e descarte após 3 tentativas")
+
+    def test_reserva_vencida_volta_para_fila(self):
+        """Email reservado por um worker que morreu é enviado por outro"""
+        self._enfileirar()
+        EmailPendente.objects.update(
+            status=StatusEmail.ENVIANDO, tentativas=1, bloqueado_ate=timezone.now() - timedelta(seconds=1)
+        )
+
+        self.assertEqual(despachar_lote()['enviados'], 1)
+        self.assertEqual(EmailPendente.objects.get().tentativas, 2)
+        print("✓ Reserva vencida reaproveitada")
+
+    def test_reserva_ativa_nao_e_repetida(self):
+        """Emails já reservados por outro worker não entram no lote"""
+        self._enfileirar(2)
+        primeiro = EmailPendente.objects.order_by('id').first()
+        EmailPendente.objects.filter(pk=primeiro.pk).update(
+            status=StatusEmail.ENVIANDO, bloqueado_ate=timezone.now() + timedelta(minutes=5)
+        )
+
+        self.assertEqual(despachar_lote()['enviados'], 1)
+        self.assertEqual(mail.outbox[0].to, ['client1@example.com'])
+        print("✓ Email reservado não é enviado duas vezes")
+
+    def test_notificacao_admins_enfileirada(self):
+        """NotificationService não envia durante a requisição"""
+        for i in range(2):
+            User.objects.create_user(
+                username=f'admin{i}@test.com', email=f'admin{i}@test.com', password='x', is_staff=True
+            )
+        solicitacao = SolicitacaoOrcamento.objects.create(
+            nome_solicitante='Client',
+            email_solicitante='client@example.com',
+            telefone_solicitante='0102030405',
+            endereco='1 Rue',
+            cidade='Paris',
+            cep='75001',
+            tipo_servico=TipoServico.RENOVACAO_COMPLETA,
+            descricao_servico='Peinture'
+        )
+
+        NotificationService.enviar_email_nova_solicitacao(solicitacao)
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(
+            sorted(d for e in EmailPendente.objects.all() for d in e.destinatarios),
+            ['admin0@test.com', 'admin1@test.com']
+        )
+        print("✓ Emails dos admins na fila")
+
+    def test_comando(self):
+        """despachar_emails --uma-vez esvazia a fila e mostra a profundidade"""
+        self._enfileirar(4)
+        saida = io.StringIO()
+        call_command('despachar_emails', uma_vez=True, lote=3, stdout=saida)
+
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertIn('Enviados: 4', saida.getvalue())
+        self.assertIn('0 pendente(s)', saida.getvalue())
+        print("✓ Comando despachou 4 emails em 2 lotes")
@@ -0,0 +1,197 @@
+import io
+import os
+import tempfile
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from orcamentos.importacao_produtos import ImportadorProdutos, importar_produtos, reajustar_precos
+from orcamentos.models import Fornecedor, Produto
+
+User = get_user_model()
+
+
+def arquivo_csv(texto, codificacao='utf-8'):
+    return io.BytesIO(texto.encode(codificacao))
+
+
+class ImportacaoProdutosTestCase(TestCase):
+    """Importação em lote da tabela de preços de um fornecedor"""
+
+    def setUp(self):
+        self.fornecedor = Fornecedor.objects.create(nome='Tollens')
+        self.outro = Fornecedor.objects.create(nome='Zolpan')
+        self.existente = Produto.objects.create(
+            referencia='TOL-001', descricao='Peinture mate', preco_compra=Decimal('10.00'),
+            margem_percentual=Decimal('50'), fornecedor=self.fornecedor,
+        )
+
+    def test_cria_e_atualiza(self):
+        arquivo = arquivo_csv(
+            "Référence;Désignation;Prix d'achat;TVA\n"
+            "TOL-001;Peinture mate;12,00;20\n"
+            "TOL-002;Sous-couche;8,40;10\n"
+        )
+        resultado = importar_produtos(arquivo, self.fornecedor, nome='tarif.csv')
+
+        self.assertEqual((resultado['criados'], resultado['atualizados'], resultado['erros']), (1, 1, []))
+
+        # Mesmos preços que Produto.save() calcularia, margem em % mantida
+        self.existente.refresh_from_db()
+        self.assertEqual(self.existente.preco_venda_ht, Decimal('18.00'))
+        self.assertEqual(self.existente.preco_venda_ttc, Decimal('21.60'))
+
+        novo = Produto.objects.get(referencia='TOL-002')
+        self.assertEqual(novo.fornecedor, self.fornecedor)
+        self.assertEqual((novo.taxa_tva, novo.preco_venda_ttc), ('10', Decimal('9.24')))
+
+        [alteracao] = [a for a in resultado['alteracoes'] if not a['novo']]
+        self.assertEqual(alteracao['campos']['preco_compra'], (Decimal('10.00'), Decimal('12.00')))
+        self.assertNotIn('descricao', alteracao['campos'])
+        print("✓ Produtos criados e atualizados com preços recalculados")
+
+    def test_simulacao_nao_grava(self):
+        arquivo = arquivo_csv("referencia,descricao,preco_compra\nTOL-001,Peinture mate,99\nTOL-003,Rouleau,4\n")
+        resultado = importar_produtos(arquivo, self.fornecedor, nome='tarif.csv', simular=True)
+
+        self.assertEqual((resultado['criados'], resultado['atualizados']), (1, 1))
+        self.assertFalse(Produto.objects.filter(referencia='TOL-003').exists())
+        self.existente.refresh_from_db()
+        self.assertEqual(self.existente.preco_compra, Decimal('10.00'))
+        print("✓ Simulação mostra as diferenças sem gravar")
+
+    def test_erros_por_linha(self):
+        Produto.objects.create(referencia='ZOL-001', descricao='Laque', preco_compra=Decimal('5'), fornecedor=self.outro)
+        arquivo = arquivo_csv(
+            "Référence;Désignation;Prix d'achat\n"
+            "TOL-010;Bâche;abc\n"
+            "ZOL-001;Laque;6\n"
+            "TOL-011;;3\n"
+            "TOL-012;Ruban;2,50\n"
+            "TOL-012;Ruban;2,60\n"
+        )
+        resultado = importar_produtos(arquivo, self.fornecedor, nome='tarif.csv')
+
+        self.assertEqual([linha for linha, _, _ in resultado['erros']], [2, 3, 4, 6])
+        self.assertEqual(resultado['criados'], 1)
+        self.assertEqual(Produto.objects.get(referencia='ZOL-001').fornecedor, self.outro)
+        print("✓ Linhas inválidas relatadas sem interromper a importação")
+
+    def test_lotes_e_codificacao(self):
+        linhas = ''.join(f"TOL-1{i:02d};Désignation {i};{i},50\n" for i in range(5))
+        arquivo = arquivo_csv("Référence;Désignation;Prix d'achat\n" + linhas, codificacao='cp1252')
+        lotes = []
+
+        importador = ImportadorProdutos(
+            self.fornecedor, tamanho_lote=2, ao_processar_lote=lambda resultado, *linhas: lotes.append(linhas)
+        )
+        resultado = importador.importar(arquivo, nome='tarif.csv')
+
+        self.assertEqual(lotes, [(2, 3), (4, 5), (6, 6)])
+        self.assertEqual(resultado['criados'], 5)
+        self.assertEqual(Produto.objects.get(referencia='TOL-104').descricao, 'Désignation 4')
+        print("✓ Arquivo Windows-1252 importado em lotes")
+
+    def test_cabecalho_sem_preco(self):
+        with self.assertRaisesMessage(ValueError, "Prix d'achat"):
+            importar_produtos(arquivo_csv("Référence;Désignation\nX;Y\n"), self.fornecedor, nome='tarif.csv')
+        print("✓ Coluna obrigatória ausente recusada")
+
+
+class ReajustePrecosTestCase(TestCase):
+    """Reajuste percentual dos preços de um fornecedor num UPDATE"""
+
+    def setUp(self):
+        self.fornecedor = Fornecedor.objects.create(nome='Tollens')
+        self.percentual = Produto.objects.create(
+            referencia='TOL-001', descricao='Peinture', preco_compra=Decimal('10.00'),
+            margem_percentual=Decimal('35'), taxa_tva='5.5', fornecedor=self.fornecedor,
+        )
+        self.valor = Produto.objects.create(
+            referencia='TOL-002', descricao='Rouleau', preco_compra=Decimal('0.00'),
+            margem_ht=Decimal('3.00'), fornecedor=self.fornecedor,
+        )
+        self.outro = Produto.objects.create(referencia='ZOL-001', descricao='Laque', preco_compra=Decimal('10.00'))
+
+    def test_reajuste_igual_a_save(self):
+        esperados = {}
+        for produto in (self.percentual, self.valor):
+            esperado = Produto.objects.get(pk=produto.pk)
+            esperado.preco_compra = (produto.preco_compra * Decimal('1.075')).quantize(Decimal('0.01'))
+            esperado.calcular_precos()
+            esperados[produto.pk] = esperado
+
+        resultado = reajustar_precos(self.fornecedor, Decimal('7.5'))
+        self.assertEqual(resultado['produtos'], 2)
+
+        for produto in Produto.objects.filter(fornecedor=self.fornecedor):
+            esperado = esperados[produto.pk]
+            for campo in ('preco_compra', 'margem_ht', 'preco_venda_ht', 'preco_venda_ttc'):
+                self.assertEqual(getattr(produto, campo), getattr(esperado, campo).quantize(Decimal('0.01')), campo)
+
+        self.outro.refresh_from_db()
+        self.assertEqual(self.outro.preco_compra, Decimal('10.00'))
+        print("✓ Reajuste no banco igual ao cálculo de Produto.save()")
+
+    def test_simulacao(self):
+        resultado = reajustar_precos(self.fornecedor, Decimal('10'), simular=True)
+
+        self.assertEqual(resultado['produtos'], 2)
+        primeiro = resultado['alteracoes'][0]
+        self.assertEqual(primeiro['referencia'], 'TOL-001')
+        self.assertEqual(primeiro['campos']['preco_compra'], (Decimal('10.00'), Decimal('11.00')))
+        self.assertEqual(primeiro['campos']['preco_venda_ttc'][1], Decimal('15.67'))
+
+        self.percentual.refresh_from_db()
+        self.assertEqual(self.percentual.preco_compra, Decimal('10.00'))
+        print("✓ Simulação do reajuste sem alterar preços")
+
+
+class ImportacaoViewsTestCase(TestCase):
+    """Upload pelo painel e comando de gerenciamento"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin@test.com', email='admin@test.com', password='x', is_staff=True
+        )
+        self.fornecedor = Fornecedor.objects.create(nome='Tollens')
+        self.client.force_login(self.admin)
+
+    def test_upload(self):
+        arquivo = SimpleUploadedFile('tarif.csv', "Référence;Désignation;Prix d'achat\nTOL-001;Peinture;10\n".encode())
+        url = reverse('orcamentos:importar_produtos')
+
+        response = self.client.post(url, {'fornecedor': self.fornecedor.pk, 'arquivo': arquivo, 'simular': 'on'})
+        self.assertEqual(response.context['resultado']['criados'], 1)
+        self.assertContains(response, 'TOL-001')
+        self.assertFalse(Produto.objects.exists())
+
+        arquivo.seek(0)
+        response = self.client.post(url, {'fornecedor': self.fornecedor.pk, 'arquivo': arquivo})
+        self.assertEqual(Produto.objects.get().fornecedor, self.fornecedor)
+        print("✓ Upload com simulação e importação pelo painel")
+
+    def test_reajuste_view(self):
+        Produto.objects.create(referencia='TOL-001', descricao='Peinture', preco_compra=Decimal('10'), fornecedor=self.fornecedor)
+        url = reverse('orcamentos:reajustar_precos_fornecedor', args=[self.fornecedor.pk])
+
+        response = self.client.post(url, {'percentual': '5'})
+        self.assertRedirects(response, f"{reverse('orcamentos:lista_produtos')}?fornecedor={self.fornecedor.pk}")
+        self.assertEqual(Produto.objects.get().preco_compra, Decimal('10.50'))
+        print("✓ Reajuste aplicado pelo painel")
+
+    def test_comando_dry_run(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8') as arquivo:
+            arquivo.write("Référence;Désignation;Prix d'achat\nTOL-001;Peinture;10\n")
+        self.addCleanup(os.remove, arquivo.name)
+
+        saida = io.StringIO()
+        call_command('importar_produtos', arquivo.name, fornecedor='tollens', dry_run=True, stdout=saida)
+
+        self.assertIn('Produtos criados: 1', saida.getvalue())
+        self.assertFalse(Produto.objects.exists())
+        print("✓ Comando de importação em modo dry-run")
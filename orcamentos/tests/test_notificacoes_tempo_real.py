@@ -0,0 +1,121 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from orcamentos import contador_notificacoes
+from orcamentos.models import Notificacao, TipoNotificacao
+
+User = get_user_model()
+
+
+@override_settings(NOTIFICACOES_SSE_INTERVALO=0.05, NOTIFICACOES_SSE_DURACAO=0.3)
+class NotificacoesTempoRealTestCase(TestCase):
+    """Contador em cache, ETag do polling e stream SSE de notificações"""
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_user(
+            username='cliente@test.com', email='cliente@test.com', password='x'
+        )
+        self.client.force_login(self.usuario)
+
+    def _notificar(self, titulo='Nouveau devis'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Notificacao.objects.create(
+                usuario=self.usuario,
+                tipo=TipoNotificacao.ORCAMENTO_ENVIADO,
+                titulo=titulo,
+                mensagem='Votre devis est disponible',
+            )
+
+    def test_contador_mantido_sem_count(self):
+        """Criar e ler notificações atualiza o contador sem novo COUNT"""
+        self.assertEqual(contador_notificacoes.contar_nao_lidas(self.usuario.id), 0)
+        primeira = self._notificar()
+        self._notificar('Deuxième')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(contador_notificacoes.contar_nao_lidas(self.usuario.id), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            primeira.marcar_como_lida()
+        with self.assertNumQueries(0):
+            self.assertEqual(contador_notificacoes.contar_nao_lidas(self.usuario.id), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/devis/api/notifications/mark-all-read/')
+        with self.assertNumQueries(0):
+            self.assertEqual(contador_notificacoes.contar_nao_lidas(self.usuario.id), 0)
+        print("✓ Contador de não lidas mantido em cache")
+
+    def test_polling_com_etag(self):
+        """If-None-Match devolve 304 sem consultar as notificações"""
+        self._notificar()
+        response = self.client.get('/devis/api/notifications/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_unread'], 1)
+        etag = response['ETag']
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get('/devis/api/notifications/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse([q for q in consultas if 'orcamentos_notificacao' in q['sql']])
+
+        self._notificar('Deuxième')
+        response = self.client.get('/devis/api/notifications/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['total_unread'], 2)
+        print("✓ Polling recebe 304 enquanto nada muda")
+
+    def test_sem_stream_em_wsgi(self):
+        """Em WSGI o stream não prende um worker: 204 e o painel fica no polling"""
+        response = self.client.get('/devis/api/notifications/stream/')
+        self.assertEqual(response.status_code, 204)
+
+        with override_settings(NOTIFICACOES_SSE_ATIVO=True):
+            response = self.client.get('/devis/api/notifications/stream/')
+        self.assertEqual(response.status_code, 204)
+        print("✓ Stream SSE recusado em WSGI")
+
+    @override_settings(NOTIFICACOES_SSE_ATIVO=True)
+    async def test_stream_asgi(self):
+        """Com ASGI o stream é assíncrono e envia o que foi criado depois de Last-Event-ID"""
+        antiga = await sync_to_async(self._notificar)('Ancienne')
+        nova = await sync_to_async(self._notificar)('Nouvelle')
+        await self.async_client.aforce_login(self.usuario)
+
+        response = await self.async_client.get(
+            '/devis/api/notifications/stream/', headers={'Last-Event-ID': str(antiga.pk)}
+        )
+        self.assertTrue(response.is_async)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        corpo = ''
+        async for parte in response.streaming_content:
+            corpo += parte.decode()
+
+        self.assertTrue(corpo.startswith('retry: 5000\n\n'))
+        self.assertIn(f'id: {nova.pk}\nevent: notificacao\n', corpo)
+        self.assertIn('Nouvelle', corpo)
+        self.assertNotIn('Ancienne', corpo)
+        self.assertIn('event: contador\ndata: {"total_unread": 2}', corpo)
+        # Sem mudanças, os ciclos seguintes não repetem os eventos
+        self.assertEqual(corpo.count('event: contador'), 1)
+        print("✓ Stream SSE (ASGI) enviou a notificação nova e o contador")
+
+    async def test_stream_desativado(self):
+        """Sem NOTIFICACOES_SSE_ATIVO nem o ASGI abre o stream"""
+        await self.async_client.aforce_login(self.usuario)
+        response = await self.async_client.get('/devis/api/notifications/stream/')
+        self.assertEqual(response.status_code, 204)
+        print("✓ Stream SSE desativado por padrão")
+
+    def test_nao_autenticado(self):
+        self.client.logout()
+        response = self.client.get('/devis/api/notifications/stream/')
+        self.assertEqual(response.status_code, 302)
+        print("✓ Stream exige login")
+
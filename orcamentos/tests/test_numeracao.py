@@ -0,0 +1,179 @@
+from datetime import date, timedelta
+
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from clientes.models import Cliente
+from orcamentos.models import (
+    SolicitacaoOrcamento, Facture, SequenciaNumeracao, TipoServico
+)
+from orcamentos.numeracao import NumeracaoService
+
+User = get_user_model()
+
+
+class NumeracaoSequencialTestCase(TestCase):
+    """Testes da numeração sequencial dos documentos"""
+
+    def setUp(self):
+        self.ano = timezone.now().year
+
+    def _nova_facture(self, **kwargs):
+        return Facture.objects.create(
+            titulo='Facture',
+            descricao='Desc',
+            data_vencimento=date.today() + timedelta(days=30),
+            **kwargs
+        )
+
+    def _nova_solicitacao(self):
+        return SolicitacaoOrcamento.objects.create(
+            nome_solicitante='Cliente Test',
+            email_solicitante='cliente@email.com',
+            telefone_solicitante='0102030405',
+            endereco='Endereço Test',
+            cidade='Paris',
+            cep='75001',
+            tipo_servico=TipoServico.RENOVACAO_COMPLETA,
+            descricao_servico='Rénovation'
+        )
+
+    def test_factures_sequenciais(self):
+        """As factures recebem números contínuos no ano"""
+        numeros = [self._nova_facture().numero for _ in range(3)]
+
+        self.assertEqual(numeros, [
+            f'FA{self.ano}00001', f'FA{self.ano}00002', f'FA{self.ano}00003'
+        ])
+        self.assertEqual(
+            SequenciaNumeracao.objects.get(prefixo='FA', ano=self.ano).ultimo_numero, 3
+        )
+        print("✓ Factures numeradas em sequência")
+
+    def test_solicitacoes_usam_quatro_digitos(self):
+        """As demandes mantêm o formato DEV + ano + 4 dígitos"""
+        self.assertEqual(self._nova_solicitacao().numero, f'DEV{self.ano}0001')
+        self.assertEqual(self._nova_solicitacao().numero, f'DEV{self.ano}0002')
+        print("✓ Demandes numeradas em sequência")
+
+    def test_continua_apos_numeros_antigos(self):
+        """O contador começa depois do maior número já existente no ano"""
+        self._nova_facture(numero=f'FA{self.ano}48213')
+        self._nova_facture(numero=f'FA{self.ano}9120')
+        self._nova_facture(numero=f'FA{self.ano - 1}99999')
+
+        self.assertEqual(self._nova_facture().numero, f'FA{self.ano}48214')
+        print("✓ Sequência continua após os números antigos")
+
+    def test_contador_por_ano(self):
+        """Cada ano tem sua própria sequência"""
+        self.assertEqual(
+            NumeracaoService.proximo_numero('FA', Facture, ano=2030), 'FA203000001'
+        )
+        self.assertEqual(
+            NumeracaoService.proximo_numero('FA', Facture, ano=2031), 'FA203100001'
+        )
+        self.assertEqual(
+            NumeracaoService.proximo_numero('FA', Facture, ano=2030), 'FA203000002'
+        )
+        print("✓ Sequência por ano")
+
+    def test_falha_na_gravacao_nao_deixa_buraco(self):
+        """Se a gravação da facture falha, o número alocado é devolvido"""
+        existente = self._nova_facture()
+
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                # uuid duplicado faz o INSERT falhar depois da alocação
+                self._nova_facture(uuid=existente.uuid)
+
+        self.assertEqual(self._nova_facture().numero, f'FA{self.ano}00002')
+        print("✓ Nenhum buraco na sequência após falha")
+
+    def test_alocacao_com_custo_constante(self):
+        """Depois da primeira alocação do ano, cada número custa UPDATE + SELECT"""
+        NumeracaoService.proximo_numero('AC', None)
+
+        with self.assertNumQueries(2):
+            NumeracaoService.proximo_numero('AC', None)
+        print("✓ Alocação com custo constante")
+
+
+class CodigoClienteTestCase(TestCase):
+    """Testes da alocação dos códigos CLIxxx"""
+
+    def _novo_cliente(self, **kwargs):
+        dados = {
+            'nom': 'Durand',
+            'adresse': '1 rue de Paris',
+            'code_postal': '75001',
+            'ville': 'Paris',
+        }
+        dados.update(kwargs)
+        return Cliente(**dados)
+
+    def test_codigos_sequenciais(self):
+        """save() atribui códigos CLIxxx contínuos, sem reinício anual"""
+        primeiro = self._novo_cliente()
+        primeiro.save()
+        segundo = self._novo_cliente()
+        segundo.save()
+
+        self.assertEqual([primeiro.code, segundo.code], ['CLI001', 'CLI002'])
+        self.assertTrue(SequenciaNumeracao.objects.filter(
+            prefixo='CLI', ano=NumeracaoService.SEM_ANO
+        ).exists())
+        print("✓ Códigos de cliente sequenciais")
+
+    def test_continua_apos_codigo_existente(self):
+        """O contador parte do maior código existente, não do último id"""
+        self._novo_cliente(code='CLI1040').save()
+        self._novo_cliente(code='CLI998').save()
+
+        cliente = self._novo_cliente()
+        cliente.save()
+        self.assertEqual(cliente.code, 'CLI1041')
+        print("✓ Código continua após os existentes")
+
+    def test_criar_de_usuario(self):
+        """O cadastro de um usuário CLIENT gera o cliente com código do contador"""
+        usuario = User.objects.create_user(
+            username='novo@email.com',
+            email='novo@email.com',
+            password='testpass123',
+            account_type='CLIENT'
+        )
+
+        cliente = Cliente.objects.get(user=usuario)
+        self.assertEqual(cliente.code, 'CLI001')
+        self.assertEqual(Cliente.criar_de_usuario(usuario), cliente)
+        print("✓ Cliente criado a partir do usuário")
+
+    def test_criar_em_lote(self):
+        """A importação reserva um bloco contíguo de códigos de uma só vez"""
+        self._novo_cliente().save()
+        importados = [self._novo_cliente(nom=f'Import {i}') for i in range(300)]
+        importados.append(self._novo_cliente(nom='Manual', code='EXT-1'))
+
+        with CaptureQueriesContext(connection) as contexto:
+            Cliente.criar_em_lote(importados, batch_size=500)
+
+        # Um único incremento do contador para os 300 códigos
+        consultas_contador = [
+            q for q in contexto.captured_queries if 'sequencianumeracao' in q['sql']
+        ]
+        self.assertEqual(len(consultas_contador), 2)
+
+        codigos = [cliente.code for cliente in importados]
+        self.assertEqual(codigos[0], 'CLI002')
+        self.assertEqual(codigos[299], 'CLI301')
+        self.assertEqual(codigos[300], 'EXT-1')
+        self.assertEqual(Cliente.objects.count(), 302)
+
+        proximo = self._novo_cliente()
+        proximo.save()
+        self.assertEqual(proximo.code, 'CLI302')
+        print("✓ Importação em lote com bloco de códigos")
@@ -0,0 +1,126 @@
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from orcamentos.models import (
+    SolicitacaoOrcamento, Orcamento, ItemOrcamento, TipoServico, TipoTVA
+)
+from orcamentos.pdf_cache import CachePDF
+from orcamentos.pdf_generator import OrcamentoPDFGenerator, ESTILOS_PDF, gerar_pdf_orcamento
+
+User = get_user_model()
+
+
+class CachePDFTestCase(TestCase):
+    """Testes do cache em disco dos PDFs de devis"""
+
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.pasta, ignore_errors=True)
+        configuracao = override_settings(PDF_CACHE_DIR=self.pasta)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+        self.admin = User.objects.create_user(
+            username='pdf@test.com',
+            email='pdf@test.com',
+            password='testpass123',
+            account_type='ADMINISTRATOR',
+            is_staff=True
+        )
+        solicitacao = SolicitacaoOrcamento.objects.create(
+            nome_solicitante='Cliente PDF',
+            email_solicitante='cliente.pdf@email.com',
+            telefone_solicitante='0102030405',
+            endereco='Endereço Test',
+            cidade='Paris',
+            cep='75001',
+            tipo_servico=TipoServico.RENOVACAO_COMPLETA,
+            descricao_servico='Rénovation complète'
+        )
+        self.orcamento = Orcamento.objects.create(
+            solicitacao=solicitacao,
+            elaborado_por=self.admin,
+            titulo='Devis PDF',
+            descricao='Desc',
+            prazo_execucao=30,
+            validade_orcamento=date.today() + timedelta(days=30)
+        )
+        ItemOrcamento.objects.create(
+            orcamento=self.orcamento,
+            descricao='Peinture salon',
+            quantidade=Decimal('2.00'),
+            preco_unitario_ht=Decimal('50.00'),
+            taxa_tva=TipoTVA.TVA_20
+        )
+
+    def test_download_repetido_usa_cache(self):
+        """O segundo download não renderiza o documento de novo"""
+        with patch.object(
+            OrcamentoPDFGenerator, 'generate_pdf', autospec=True,
+            side_effect=OrcamentoPDFGenerator.generate_pdf
+        ) as gerar:
+            primeiro = gerar_pdf_orcamento(self.orcamento)
+            segundo = gerar_pdf_orcamento(self.orcamento)
+
+        self.assertEqual(gerar.call_count, 1)
+        self.assertEqual(primeiro, segundo)
+        self.assertTrue(primeiro.startswith(b'%PDF'))
+        print(f"✓ PDF de {len(primeiro)} bytes servido do cache")
+
+    def test_alteracao_do_conteudo_muda_chave(self):
+        """Editar um item do devis gera outra chave de cache"""
+        chave = OrcamentoPDFGenerator.chave_conteudo(self.orcamento)
+        self.assertEqual(chave, OrcamentoPDFGenerator.chave_conteudo(self.orcamento))
+
+        item = self.orcamento.itens.get()
+        item.descricao = 'Peinture chambre'
+        item.save()
+        # O item atualiza o updated_at do devis (versão do modelo de documento)
+        self.orcamento.refresh_from_db()
+
+        self.assertNotEqual(chave, OrcamentoPDFGenerator.chave_conteudo(self.orcamento))
+        print("✓ Chave muda com o conteúdo")
+
+    def test_limite_lru(self):
+        """Acima do tamanho máximo saem os PDFs usados há mais tempo"""
+        cache = CachePDF('teste', tamanho_maximo=300)
+        for i, chave in enumerate(['a', 'b', 'c']):
+            cache.gravar(chave, b'x' * 100)
+            os.utime(cache.caminho(chave), (1000 + i, 1000 + i))
+
+        # 'a' lido agora: passa a ser o mais recente
+        cache.obter('a', lambda: self.fail('não deveria gerar'))
+        cache.gravar('d', b'x' * 100)
+
+        restantes = sorted(p.stem for p in cache.pasta.glob('*.pdf'))
+        self.assertEqual(restantes, ['a', 'c', 'd'])
+        print(f"✓ LRU manteve {restantes}")
+
+    def test_estilos_compartilhados(self):
+        """Todas as instâncias usam a mesma folha de estilos"""
+        self.assertIs(OrcamentoPDFGenerator().styles, ESTILOS_PDF)
+        self.assertIs(OrcamentoPDFGenerator().styles, OrcamentoPDFGenerator().styles)
+        print("✓ Folha de estilos criada uma vez")
+
+    def test_view_admin_serve_arquivo(self):
+        """A view do admin devolve o PDF como FileResponse"""
+        self.client.force_login(self.admin)
+        url = reverse('orcamentos:admin_orcamento_pdf', args=[self.orcamento.numero])
+
+        response = self.client.get(url)
+        conteudo = b''.join(response.streaming_content)
+        response.close()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertIn(f'orcamento_{self.orcamento.numero}.pdf', response['Content-Disposition'])
+        self.assertTrue(conteudo.startswith(b'%PDF'))
+        print("✓ View admin serve o PDF do cache")
@@ -0,0 +1,70 @@
+import io
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from reportlab.platypus import Table
+
+from orcamentos.pdf_generator import CABECALHO_ITENS, OrcamentoPDFGenerator
+
+
+class TabelaItensTestCase(SimpleTestCase):
+    """Tabela de itens do PDF de devis dividida em blocos"""
+
+    def _modelo(self, linhas):
+        return {
+            'items_data': [
+                {
+                    'referencia': f'REF-{i}' if i % 2 else '',
+                    'designation': f'Peinture & enduit <façade> {i}',
+                    'quantite': Decimal('2.00'),
+                    'unidade': 'm2',
+                    'pu_ht': Decimal('10.00'),
+                    'total_ht': Decimal('20.00'),
+                }
+                for i in range(linhas)
+            ],
+            'acomptes': [],
+            'total_acomptes_ttc': Decimal('0.00'),
+        }
+
+    def _tabelas(self, gerador, linhas):
+        gerador.modelo = self._modelo(linhas)
+        return [e for e in gerador._build_items_table(None) if isinstance(e, Table)]
+
+    def test_blocos_com_cabecalho(self):
+        """Cada bloco tem no máximo linhas_por_tabela itens e o próprio cabeçalho"""
+        tabelas = self._tabelas(OrcamentoPDFGenerator(linhas_por_tabela=10), 25)
+
+        self.assertEqual([len(t._cellvalues) for t in tabelas], [11, 11, 6])
+        for tabela in tabelas:
+            self.assertEqual(tabela._cellvalues[0], CABECALHO_ITENS)
+            self.assertEqual(tabela.repeatRows, 1)
+        print(f"✓ 25 itens em {len(tabelas)} tabelas")
+
+    def test_texto_simples_e_escape(self):
+        """Só a descrição vira Paragraph, com o texto escapado"""
+        tabela = self._tabelas(OrcamentoPDFGenerator(linhas_por_tabela=10), 2)[0]
+        primeira, segunda = tabela._cellvalues[1], tabela._cellvalues[2]
+
+        self.assertEqual(primeira[0], 'N/A')
+        self.assertEqual(segunda[0], 'REF-1')
+        self.assertEqual(primeira[2:], ['2.00', 'm2', '10.00 €', '20.00 €'])
+        self.assertIn('&amp;', primeira[1].text)
+        print("✓ Células de texto simples")
+
+    def test_modo_tabela_unica(self):
+        """linhas_por_tabela=None mantém a tabela única"""
+        tabelas = self._tabelas(OrcamentoPDFGenerator(linhas_por_tabela=None), 25)
+        self.assertEqual(len(tabelas), 1)
+        self.assertEqual(len(tabelas[0]._cellvalues), 26)
+        print("✓ Modo de tabela única disponível")
+
+    def test_benchmark(self):
+        """O benchmark gera os PDFs nos dois modos sem tocar no banco"""
+        saida = io.StringIO()
+        call_command('benchmark_pdf_devis', linhas=[5, 60], stdout=saida)
+
+        self.assertIn('60 linhas', saida.getvalue())
+        self.assertIn('Em blocos', saida.getvalue())
+        print("✓ Benchmark executado")
@@ -0,0 +1,133 @@
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+
+from orcamentos.models import Projeto
+from orcamentos.auditoria import LogAuditoria, TipoAcao
+from orcamentos.monitor_auditoria import MonitorOrcamentos
+
+User = get_user_model()
+
+
+class RastreamentoCamposTestCase(TestCase):
+    """Testes do snapshot de campos usado pela auditoria"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='rastreio@test.com',
+            email='rastreio@test.com',
+            password='testpass123',
+            account_type='CLIENT'
+        )
+        self.projeto = Projeto.objects.create(
+            cliente=self.user,
+            titulo='Projeto Rastreado',
+            descricao='Descrição',
+            tipo_servico='pintura_interior',
+            endereco_projeto='Endereço test',
+            cidade_projeto='Paris',
+            cep_projeto='75001'
+        )
+
+    def _selects_projeto(self, queries):
+        tabela = Projeto._meta.db_table
+        return [
+            q['sql'] for q in queries
+            if q['sql'].startswith('SELECT') and f'"{tabela}"' in q['sql']
+        ]
+
+    def test_diff_em_memoria(self):
+        """Alterações calculadas sem consultar o banco"""
+        projeto = Projeto.objects.get(pk=self.projeto.pk)
+        self.assertTrue(projeto.tem_snapshot())
+        self.assertEqual(projeto.campos_alterados(), {})
+
+        projeto.titulo = 'Novo título'
+        projeto.status = 'em_andamento'
+        alteracoes = projeto.campos_alterados()
+        self.assertEqual(set(alteracoes), {'titulo', 'status'})
+        self.assertEqual(alteracoes['titulo']['anterior'], 'Projeto Rastreado')
+
+        # Depois do save o estado gravado vira a nova referência
+        projeto.save()
+        self.assertEqual(projeto.campos_alterados(), {})
+        print(f"✓ Diff em memória: {sorted(alteracoes)}")
+
+    def test_apenas_campos_declarados(self):
+        """Só os campos de campos_rastreados entram no snapshot"""
+        projeto = Projeto.objects.get(pk=self.projeto.pk)
+        valores = projeto.valores_carregados()
+
+        self.assertIn('titulo', valores)
+        self.assertNotIn('cep_projeto', valores)
+        self.assertNotIn('uuid', valores)
+
+        projeto.cep_projeto = '69001'
+        self.assertEqual(projeto.campos_alterados(), {})
+        print(f"✓ {len(valores)} campos rastreados em Projeto")
+
+    def test_update_fields_atualiza_snapshot(self):
+        """save(update_fields=...) só renova os campos gravados"""
+        projeto = Projeto.objects.get(pk=self.projeto.pk)
+        projeto.titulo = 'Gravado'
+        projeto.descricao = 'Não gravado'
+        projeto.save(update_fields=['titulo'])
+
+        self.assertEqual(list(projeto.campos_alterados()), ['descricao'])
+        print("✓ Snapshot parcial com update_fields")
+
+    def test_campos_adiados(self):
+        """Campos adiados (only/defer) ficam fora do snapshot"""
+        projeto = Projeto.objects.only('id', 'titulo').get(pk=self.projeto.pk)
+        valores = projeto.valores_carregados()
+
+        self.assertEqual(set(valores), {'titulo'})
+        print("✓ Campos adiados ignorados")
+
+    def test_monitor_sem_select_extra(self):
+        """O monitor registra a edição sem buscar o estado anterior no banco"""
+        ContentType.objects.get_for_model(Projeto)
+        monitor = MonitorOrcamentos()  # noqa: F841 - mantém os signals conectados
+
+        projeto = Projeto.objects.get(pk=self.projeto.pk)
+        projeto.titulo = 'Título monitorado'
+
+        with CaptureQueriesContext(connection) as ctx:
+            projeto.save()
+
+        self.assertEqual(self._selects_projeto(ctx.captured_queries), [])
+
+        log = LogAuditoria.objects.filter(
+            acao=TipoAcao.EDICAO, object_id=projeto.pk
+        ).latest('timestamp')
+        self.assertEqual(log.dados_anteriores['titulo'], 'Projeto Rastreado')
+        self.assertEqual(log.dados_posteriores['titulo'], 'Título monitorado')
+        self.assertIn('titulo', log.campos_alterados)
+        print(f"✓ Edição auditada com {len(ctx.captured_queries)} queries, nenhum SELECT de Projeto")
+
+    def test_monitor_sem_snapshot(self):
+        """Instância sem snapshot recorre à consulta ao banco"""
+        monitor = MonitorOrcamentos()  # noqa: F841
+
+        projeto = Projeto(
+            pk=self.projeto.pk,
+            uuid=self.projeto.uuid,
+            cliente=self.user,
+            titulo='Montado à mão',
+            descricao='Descrição',
+            tipo_servico='pintura_interior',
+            endereco_projeto='Endereço test',
+            cidade_projeto='Paris',
+            cep_projeto='75001',
+            created_at=self.projeto.created_at
+        )
+        self.assertFalse(projeto.tem_snapshot())
+        projeto.save()
+
+        log = LogAuditoria.objects.filter(
+            acao=TipoAcao.EDICAO, object_id=projeto.pk
+        ).latest('timestamp')
+        self.assertEqual(log.dados_anteriores['titulo'], 'Projeto Rastreado')
+        print("✓ Fallback com consulta para instância sem snapshot")
@@ -0,0 +1,142 @@
+import gzip
+import io
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from orcamentos import contador_notificacoes
+from orcamentos.models import Notificacao, SolicitacaoOrcamento, TipoNotificacao, TipoServico
+from orcamentos.retencao_notificacoes import _apagar_lidas, limpar_notificacoes
+from orcamentos.services import NotificationService
+
+User = get_user_model()
+
+
+class FanOutNotificacoesTestCase(TestCase):
+    """Notificação para vários usuários com bulk_create"""
+
+    def setUp(self):
+        cache.clear()
+        self.admins = [
+            User.objects.create_user(
+                username=f'admin{i}@test.com', email=f'admin{i}@test.com', password='x', is_staff=True
+            )
+            for i in range(5)
+        ]
+
+    def test_um_insert_para_todos(self):
+        """Um INSERT para todos os usuários e contadores atualizados"""
+        for admin in self.admins:
+            contador_notificacoes.contar_nao_lidas(admin.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(1):
+                NotificationService.notificar_usuarios(
+                    self.admins,
+                    tipo=TipoNotificacao.NOVA_SOLICITACAO,
+                    titulo='Nouvelle demande',
+                    mensagem='Une nouvelle demande de devis a été reçue',
+                )
+
+        self.assertEqual(Notificacao.objects.count(), 5)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                [contador_notificacoes.contar_nao_lidas(admin.id) for admin in self.admins], [1] * 5
+            )
+        print("✓ Fan-out com um INSERT e contadores em dia")
+
+    def test_nova_solicitacao(self):
+        """Os admins são notificados de uma nova solicitação"""
+        solicitacao = SolicitacaoOrcamento.objects.create(
+            nome_solicitante='Client',
+            email_solicitante='client@example.com',
+            telefone_solicitante='0102030405',
+            endereco='1 Rue',
+            cidade='Paris',
+            cep='75001',
+            tipo_servico=TipoServico.RENOVACAO_COMPLETA,
+            descricao_servico='Peinture'
+        )
+
+        NotificationService.enviar_email_nova_solicitacao(solicitacao)
+
+        self.assertEqual(
+            sorted(Notificacao.objects.filter(solicitacao=solicitacao).values_list('usuario_id', flat=True)),
+            sorted(admin.id for admin in self.admins)
+        )
+        print("✓ Todos os admins notificados da nova solicitação")
+
+
+class RetencaoNotificacoesTestCase(TestCase):
+    """Remoção em lotes das notificações lidas antigas"""
+
+    def setUp(self):
+        self.pasta = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.pasta, ignore_errors=True)
+        self.usuario = User.objects.create_user(
+            username='cliente@test.com', email='cliente@test.com', password='x'
+        )
+        agora = timezone.now()
+        for i in range(7):
+            Notificacao.objects.create(
+                usuario=self.usuario,
+                tipo=TipoNotificacao.ORCAMENTO_ENVIADO,
+                titulo=f'Notification {i}',
+                mensagem='Votre devis est disponible',
+            )
+        notificacoes = list(Notificacao.objects.order_by('pk'))
+        # 0-3: lidas há 200 dias; 4: lida ontem; 5: não lida antiga; 6: não lida recente
+        for notificacao in notificacoes[:4]:
+            Notificacao.objects.filter(pk=notificacao.pk).update(
+                lida=True, read_at=agora - timedelta(days=200), created_at=agora - timedelta(days=210)
+            )
+        Notificacao.objects.filter(pk=notificacoes[4].pk).update(lida=True, read_at=agora - timedelta(days=1))
+        Notificacao.objects.filter(pk=notificacoes[5].pk).update(created_at=agora - timedelta(days=300))
+        self.limite = agora - timedelta(days=90)
+
+    def test_remove_so_lidas_antigas(self):
+        resultado = limpar_notificacoes(self.limite, tamanho_lote=3)
+
+        self.assertEqual(resultado['notificacoes'], 4)
+        self.assertEqual(
+            sorted(Notificacao.objects.values_list('titulo', flat=True)),
+            ['Notification 4', 'Notification 5', 'Notification 6']
+        )
+        print("✓ Apenas as notificações lidas antigas foram removidas")
+
+    def test_delete_ignora_nao_lidas(self):
+        """O DELETE confere lida de novo: uma notificação que voltou a não lida fica"""
+        ids = list(Notificacao.objects.order_by('pk').values_list('pk', flat=True))
+
+        self.assertEqual(_apagar_lidas(ids[:6]), 5)
+        self.assertEqual(list(Notificacao.objects.values_list('titulo', flat=True).order_by('pk')),
+                         ['Notification 5', 'Notification 6'])
+        print("✓ DELETE em SQL remove só as lidas")
+
+    def test_arquivar(self):
+        with override_settings(NOTIFICACOES_ARQUIVO_DIR=self.pasta):
+            resultado = limpar_notificacoes(self.limite, tamanho_lote=3, arquivar=True)
+
+        self.assertEqual(sum(resultado['arquivos'].values()), 4)
+        linhas = []
+        for nome in resultado['arquivos']:
+            with gzip.open(self.pasta / nome, 'rt', encoding='utf-8') as f:
+                linhas += [json.loads(linha) for linha in f]
+        self.assertEqual(sorted(linha['titulo'] for linha in linhas), [f'Notification {i}' for i in range(4)])
+        print("✓ Notificações arquivadas antes de serem removidas")
+
+    def test_comando_simular(self):
+        saida = io.StringIO()
+        call_command('limpar_notificacoes', dias=90, simular=True, stdout=saida)
+
+        self.assertIn('Notificações removidas: 4', saida.getvalue())
+        self.assertEqual(Notificacao.objects.count(), 7)
+        print("✓ Simulação não altera nada")
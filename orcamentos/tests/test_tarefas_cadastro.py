@@ -0,0 +1,121 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from orcamentos.auditoria import LogAuditoria, TipoAcao
+from orcamentos.models import SolicitacaoOrcamento, TipoServico
+from orcamentos.tarefas import ExecutorTarefas, Tarefa, executor_tarefas
+from orcamentos.vinculacao_orfaos import VinculadorOrfaos
+
+User = get_user_model()
+
+
+def criar_solicitacao(email):
+    return SolicitacaoOrcamento.objects.create(
+        nome_solicitante='Client',
+        email_solicitante=email,
+        telefone_solicitante='0102030405',
+        endereco='1 Rue',
+        cidade='Paris',
+        cep='75001',
+        tipo_servico=TipoServico.RENOVACAO_COMPLETA,
+        descricao_servico='Peinture',
+    )
+
+
+class ExecutorTarefasTestCase(TestCase):
+    """Novas tentativas do executor de tarefas"""
+
+    def test_nova_tentativa_apos_falha(self):
+        chamadas = []
+        concluidas = []
+
+        def instavel():
+            chamadas.append(1)
+            if len(chamadas) < 2:
+                raise RuntimeError('banco ocupado')
+            return 'ok'
+
+        tarefa = Tarefa(instavel, tentativas=3, ao_concluir=lambda *args: concluidas.append(args))
+        resultado = ExecutorTarefas(espera_base=0).executar(tarefa)
+
+        self.assertEqual(resultado, 'ok')
+        self.assertEqual(concluidas, [('ok', None, 2)])
+        print("✓ Tarefa concluída na segunda tentativa")
+
+    def test_desiste_apos_tentativas(self):
+        concluidas = []
+
+        def sempre_falha():
+            raise RuntimeError('falha')
+
+        tarefa = Tarefa(sempre_falha, tentativas=3, ao_concluir=lambda *args: concluidas.append(args))
+        with self.assertLogs('orcamentos.tarefas', level='ERROR'):
+            ExecutorTarefas(espera_base=0).executar(tarefa)
+
+        [(resultado, erro, tentativas)] = concluidas
+        self.assertIsNone(resultado)
+        self.assertIsInstance(erro, RuntimeError)
+        self.assertEqual(tentativas, 3)
+        print("✓ Erro entregue após a última tentativa")
+
+
+@override_settings(TAREFAS_ESPERA_BASE=0)
+class VinculacaoAposCadastroTestCase(TestCase):
+    """Vinculação das órfãs do cadastro fora da transação"""
+
+    def setUp(self):
+        self.solicitacoes = [criar_solicitacao('novo@test.com') for _ in range(3)]
+
+    def criar_usuario(self):
+        return User.objects.create_user(username='novo@test.com', email='novo@test.com', password='x')
+
+    @override_settings(TAREFAS_ASSINCRONAS=True)
+    def test_executada_apos_commit(self):
+        # A thread de fundo não enxerga a transação do teste: executar na própria thread
+        with patch.object(executor_tarefas, 'agendar', side_effect=executor_tarefas.executar):
+            with self.captureOnCommitCallbacks() as callbacks:
+                usuario = self.criar_usuario()
+
+            # Cadastro gravado sem vincular nada
+            self.assertEqual(SolicitacaoOrcamento.objects.filter(cliente__isnull=True).count(), 3)
+
+            for callback in callbacks:
+                callback()
+
+        self.assertEqual(SolicitacaoOrcamento.objects.filter(cliente=usuario).count(), 3)
+        log = LogAuditoria.objects.get(acao=TipoAcao.TAREFA_VINCULACAO)
+        self.assertTrue(log.sucesso)
+        self.assertEqual(log.dados_posteriores['orfas_vinculadas'], 3)
+        self.assertEqual(log.dados_posteriores['tentativas'], 1)
+        print("✓ Órfãs vinculadas depois do commit do cadastro")
+
+    @override_settings(TAREFAS_ESPERA_BASE=60)
+    def test_falha_registrada_na_auditoria(self):
+        with patch.object(VinculadorOrfaos, '_vincular_lote', side_effect=RuntimeError('banco indisponível')), \
+                patch('orcamentos.tarefas.time.sleep') as sleep:
+            with self.assertLogs('orcamentos.tarefas', level='WARNING'):
+                usuario = self.criar_usuario()
+
+        # Execução na própria requisição: novas tentativas sem espera
+        sleep.assert_not_called()
+        # Detecção registrada uma vez, não a cada tentativa
+        self.assertEqual(LogAuditoria.objects.filter(acao=TipoAcao.DETECCAO_ORFAO).count(), 1)
+
+        # O cadastro não é afetado pela falha da tarefa
+        self.assertTrue(User.objects.filter(pk=usuario.pk).exists())
+        self.assertEqual(SolicitacaoOrcamento.objects.filter(cliente__isnull=True).count(), 3)
+
+        log = LogAuditoria.objects.get(acao=TipoAcao.TAREFA_VINCULACAO)
+        self.assertFalse(log.sucesso)
+        self.assertEqual(log.erro_mensagem, 'banco indisponível')
+        self.assertEqual(log.dados_posteriores['tentativas'], 3)
+        print("✓ Falha da tarefa registrada na auditoria, sem espera e com uma detecção")
+
+    def test_sem_orfas_nao_registra(self):
+        SolicitacaoOrcamento.objects.all().delete()
+        self.criar_usuario()
+
+        self.assertFalse(LogAuditoria.objects.filter(acao=TipoAcao.TAREFA_VINCULACAO).exists())
+        print("✓ Cadastro sem órfãs não gera log de tarefa")
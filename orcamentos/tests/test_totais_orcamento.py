@@ -0,0 +1,199 @@
+from decimal import Decimal
+from datetime import date, timedelta
+from io import StringIO
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+
+from orcamentos.models import (
+    SolicitacaoOrcamento, Orcamento, ItemOrcamento, AcompteOrcamento,
+    TipoServico, TipoTVA, StatusAcompte
+)
+
+User = get_user_model()
+
+
+class TotaisOrcamentoTestCase(TestCase):
+    """Testes da gravação em lote de itens e do cálculo de totais do devis"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin@test.com',
+            email='admin@test.com',
+            password='testpass123',
+            first_name='Admin',
+            last_name='Sistema',
+            account_type='ADMINISTRATOR',
+            is_staff=True
+        )
+        solicitacao = SolicitacaoOrcamento.objects.create(
+            nome_solicitante='Cliente Test',
+            email_solicitante='cliente@email.com',
+            telefone_solicitante='0102030405',
+            endereco='Endereço Test',
+            cidade='Paris',
+            cep='75001',
+            tipo_servico=TipoServico.RENOVACAO_COMPLETA,
+            descricao_servico='Rénovation complète'
+        )
+        self.orcamento = Orcamento.objects.create(
+            solicitacao=solicitacao,
+            elaborado_por=self.admin,
+            titulo='Devis Lote',
+            descricao='Desc',
+            prazo_execucao=30,
+            validade_orcamento=date.today() + timedelta(days=30),
+            desconto=Decimal('10.00')
+        )
+
+    def _novos_itens(self, quantidade):
+        return [
+            ItemOrcamento(
+                descricao=f'Ligne {i}',
+                quantidade=Decimal('2.00'),
+                preco_unitario_ht=Decimal('50.00'),
+                taxa_tva=TipoTVA.TVA_20
+            )
+            for i in range(quantidade)
+        ]
+
+    def test_adicionar_itens_calcula_linhas_e_totais(self):
+        """adicionar_itens grava todas as linhas e atualiza o cabeçalho"""
+        self.orcamento.adicionar_itens(self._novos_itens(80))
+
+        self.orcamento.refresh_from_db()
+        self.assertEqual(self.orcamento.itens.count(), 80)
+        self.assertEqual(self.orcamento.subtotal, Decimal('8000.00'))
+        self.assertEqual(self.orcamento.valor_desconto, Decimal('800.00'))
+        self.assertEqual(self.orcamento.total, Decimal('7200.00'))
+
+        item = self.orcamento.itens.first()
+        self.assertEqual(item.total_ht, Decimal('100.00'))
+        self.assertEqual(item.total_ttc, Decimal('120.00'))
+        self.assertEqual(item.preco_unitario_ttc, Decimal('60.00'))
+
+    def test_adicionar_itens_numero_de_queries_constante(self):
+        """O custo da gravação não depende do número de linhas"""
+        with self.assertNumQueries(6):
+            self.orcamento.adicionar_itens(self._novos_itens(10))
+        with self.assertNumQueries(6):
+            self.orcamento.adicionar_itens(self._novos_itens(60))
+
+        self.assertEqual(self.orcamento.itens.count(), 70)
+
+    def test_substituir_itens(self):
+        """substituir_itens remove as linhas antigas e recalcula os totais"""
+        self.orcamento.adicionar_itens(self._novos_itens(5))
+        self.orcamento.substituir_itens(self._novos_itens(2))
+
+        self.orcamento.refresh_from_db()
+        self.assertEqual(self.orcamento.itens.count(), 2)
+        self.assertEqual(self.orcamento.subtotal, Decimal('200.00'))
+        self.assertEqual(self.orcamento.total, Decimal('180.00'))
+
+    def test_save_item_pode_adiar_recalculo(self):
+        """ItemOrcamento.save(recalcular_orcamento=False) não toca no cabeçalho"""
+        item = self._novos_itens(1)[0]
+        item.orcamento = self.orcamento
+        item.save(recalcular_orcamento=False)
+
+        self.orcamento.refresh_from_db()
+        self.assertEqual(self.orcamento.subtotal, Decimal('0.00'))
+
+        self.orcamento.calcular_totais()
+        self.orcamento.refresh_from_db()
+        self.assertEqual(self.orcamento.subtotal, Decimal('100.00'))
+
+    def _novo_acompte(self, valor_ttc, status=StatusAcompte.PENDENTE):
+        return AcompteOrcamento.objects.create(
+            orcamento=self.orcamento,
+            criado_por=self.admin,
+            descricao='Acompte',
+            valor_ht=valor_ttc,
+            valor_ttc=valor_ttc,
+            data_vencimento=date.today(),
+            status=status
+        )
+
+    def test_totais_ttc_persistidos(self):
+        """total_ttc, total_tva e saldo são gravados junto com os totais HT"""
+        self.orcamento.adicionar_itens(self._novos_itens(10))
+
+        self.orcamento.refresh_from_db()
+        self.assertEqual(self.orcamento.total_ttc, Decimal('1080.00'))
+        self.assertEqual(self.orcamento.total_tva, Decimal('180.00'))
+        self.assertEqual(self.orcamento.valor_tva, Decimal('180.00'))
+        self.assertEqual(self.orcamento.saldo, Decimal('1080.00'))
+
+        self.assertTrue(Orcamento.objects.filter(total_ttc__gte=1000).exists())
+        print("✓ Totais TTC gravados no devis")
+
+    def test_acomptes_atualizam_saldo(self):
+        """Pagar ou excluir um acompte atualiza acomptes pagos e saldo gravados"""
+        self.orcamento.adicionar_itens(self._novos_itens(10))
+        acompte = self._novo_acompte(Decimal('300.00'))
+
+        self.orcamento.refresh_from_db()
+        self.assertEqual(self.orcamento.total_acomptes_pagos, Decimal('0.00'))
+
+        acompte.status = StatusAcompte.PAGO
+        acompte.save()
+        self.orcamento.refresh_from_db()
+        self.assertEqual(self.orcamento.total_acomptes_pagos, Decimal('300.00'))
+        self.assertEqual(self.orcamento.saldo, Decimal('780.00'))
+        self.assertEqual(self.orcamento.saldo_em_aberto, Decimal('780.00'))
+
+        # Novas linhas mantêm o abatimento dos acomptes já pagos
+        self.orcamento.adicionar_itens(self._novos_itens(1))
+        self.orcamento.refresh_from_db()
+        self.assertEqual(self.orcamento.saldo, Decimal('888.00'))
+
+        acompte.delete()
+        self.orcamento.refresh_from_db()
+        self.assertEqual(self.orcamento.total_acomptes_pagos, Decimal('0.00'))
+        self.assertEqual(self.orcamento.saldo, Decimal('1188.00'))
+        print("✓ Saldo do devis acompanha os acomptes")
+
+    def test_instancia_desatualizada_nao_sobrescreve_saldo(self):
+        """save() e calcular_totais de uma instância anterior ao acompte mantêm o saldo gravado"""
+        self.orcamento.adicionar_itens(self._novos_itens(10))
+        desatualizado = Orcamento.objects.get(pk=self.orcamento.pk)
+        self._novo_acompte(Decimal('300.00'), status=StatusAcompte.PAGO)
+
+        desatualizado.titulo = 'Devis modifié'
+        desatualizado.save()
+        self.orcamento.refresh_from_db()
+        self.assertEqual(self.orcamento.titulo, 'Devis modifié')
+        self.assertEqual(self.orcamento.total_acomptes_pagos, Decimal('300.00'))
+        self.assertEqual(self.orcamento.saldo, Decimal('780.00'))
+
+        desatualizado.calcular_totais()
+        self.assertEqual(desatualizado.saldo, Decimal('780.00'))
+        self.orcamento.refresh_from_db()
+        self.assertEqual(self.orcamento.saldo, Decimal('780.00'))
+        print("✓ Instância desatualizada não sobrescreve acomptes pagos nem saldo")
+
+    def test_comando_recalcular_totais(self):
+        """O comando detecta e corrige totais divergentes"""
+        self.orcamento.adicionar_itens(self._novos_itens(10))
+        self._novo_acompte(Decimal('100.00'), status=StatusAcompte.PAGO)
+        Orcamento.objects.filter(pk=self.orcamento.pk).update(
+            total_ttc=Decimal('0.00'), saldo=Decimal('0.00')
+        )
+
+        saida = StringIO()
+        call_command('recalcular_totais_documentos', '--verificar', stdout=saida)
+        self.assertIn('Devis com totais divergentes: 1', saida.getvalue())
+        self.orcamento.refresh_from_db()
+        self.assertEqual(self.orcamento.total_ttc, Decimal('0.00'))
+
+        call_command('recalcular_totais_documentos', stdout=StringIO())
+        self.orcamento.refresh_from_db()
+        self.assertEqual(self.orcamento.total_ttc, Decimal('1080.00'))
+        self.assertEqual(self.orcamento.saldo, Decimal('980.00'))
+
+        saida = StringIO()
+        call_command('recalcular_totais_documentos', '--verificar', stdout=saida)
+        self.assertIn('Devis com totais divergentes: 0', saida.getvalue())
+        print("✓ Comando de recálculo de totais")
@@ -0,0 +1,89 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from orcamentos.auditoria import LogAuditoria, TipoAcao
+from orcamentos.models import SolicitacaoOrcamento, TipoServico
+from orcamentos.vinculacao_orfaos import VinculadorOrfaos, anotar_contas, solicitacoes_orfas
+
+User = get_user_model()
+
+
+def criar_solicitacao(email):
+    return SolicitacaoOrcamento.objects.create(
+        nome_solicitante='Client',
+        email_solicitante=email,
+        telefone_solicitante='0102030405',
+        endereco='1 Rue',
+        cidade='Paris',
+        cep='75001',
+        tipo_servico=TipoServico.RENOVACAO_COMPLETA,
+        descricao_servico='Peinture',
+    )
+
+
+class VinculadorOrfaosTestCase(TestCase):
+    """Vinculação de órfãs em lotes pelo email normalizado"""
+
+    def setUp(self):
+        # Solicitações antes das contas: o sinal de cadastro não as vincula
+        self.orfas_marie = [criar_solicitacao(email) for email in ('MARIE@test.com', 'marie@test.com', 'Marie@Test.com')]
+        self.orfas_paul = [criar_solicitacao('paul@test.com') for _ in range(2)]
+        self.sem_conta = criar_solicitacao('inconnu@test.com')
+        SolicitacaoOrcamento.objects.update(cliente=None)
+
+        self.marie = User.objects.create_user(username='marie@test.com', email='marie@test.com', password='x')
+        self.paul = User.objects.create_user(username='paul@test.com', email='paul@test.com', password='x')
+        SolicitacaoOrcamento.objects.update(cliente=None)
+        LogAuditoria.objects.all().delete()
+
+    def test_anotar_contas(self):
+        contas = dict(anotar_contas(solicitacoes_orfas()).values_list('pk', 'conta_id'))
+
+        self.assertEqual({contas[s.pk] for s in self.orfas_marie}, {self.marie.pk})
+        self.assertEqual({contas[s.pk] for s in self.orfas_paul}, {self.paul.pk})
+        self.assertIsNone(contas[self.sem_conta.pk])
+        print("✓ Órfãs casadas com as contas sem diferenciar maiúsculas")
+
+    def test_um_update_por_lote(self):
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as consultas:
+            resultado = VinculadorOrfaos(origem='teste', tamanho_lote=10).vincular()
+
+        updates = [q['sql'] for q in consultas if q['sql'].startswith('UPDATE "orcamentos_solicitacaoorcamento"')]
+        self.assertEqual(len(updates), 1)
+        inserts = [q['sql'] for q in consultas if q['sql'].startswith('INSERT INTO "orcamentos_logauditoria"')]
+        self.assertEqual(len(inserts), 1)
+
+        self.assertEqual(resultado['encontradas'], 6)
+        self.assertEqual(resultado['vinculadas'], 5)
+        self.assertEqual(resultado['por_usuario'], {self.marie.pk: 3, self.paul.pk: 2})
+        self.assertEqual(
+            set(SolicitacaoOrcamento.objects.filter(cliente=self.marie).values_list('pk', flat=True)),
+            {s.pk for s in self.orfas_marie}
+        )
+        self.assertEqual(list(solicitacoes_orfas().values_list('pk', flat=True)), [self.sem_conta.pk])
+        self.assertEqual(LogAuditoria.objects.filter(acao=TipoAcao.VINCULACAO_ORFAO).count(), 5)
+        print("✓ Um UPDATE e um INSERT de auditoria para o lote")
+
+    def test_lotes_e_simulacao(self):
+        lotes = []
+        resultado = VinculadorOrfaos(
+            origem='teste', tamanho_lote=2, simular=True,
+            ao_processar_lote=lambda linhas, usuarios, erro: lotes.append(len(linhas)),
+        ).vincular()
+
+        self.assertEqual(lotes, [2, 2, 2])
+        self.assertEqual(resultado['vinculadas'], 5)
+        self.assertEqual(solicitacoes_orfas().count(), 6)
+        self.assertFalse(LogAuditoria.objects.exists())
+        print("✓ Simulação percorre os lotes sem alterar nada")
+
+    def test_vincular_a_um_usuario(self):
+        resultado = VinculadorOrfaos(origem='teste').vincular(solicitacoes_orfas('MARIE@TEST.COM'), usuario=self.marie)
+
+        self.assertEqual(resultado['vinculadas'], 3)
+        self.assertEqual(SolicitacaoOrcamento.objects.filter(cliente=self.marie).count(), 3)
+        self.assertEqual(SolicitacaoOrcamento.objects.filter(cliente=self.paul).count(), 0)
+        print("✓ Órfãs de um email vinculadas ao usuário informado")
@@ -59,6 +59,7 @@ urlpatterns = [
     # ============ URLs PARA PRODUTOS ============
     path('admin/produtos/', produtos_views.lista_produtos, name='lista_produtos'),
     path('admin/produtos/criar/', produtos_views.criar_produto, name='criar_produto'),
+    path('admin/produtos/importar/', produtos_views.importar_produtos, name='importar_produtos'),
     path('admin/produtos/<int:produto_id>/editar/', produtos_views.editar_produto, name='editar_produto'),
     path('admin/produtos/<int:produto_id>/excluir/', produtos_views.excluir_produto, name='excluir_produto'),
 
@@ -66,6 +67,7 @@ urlpatterns = [
     path('admin/fornecedores/', produtos_views.lista_fornecedores, name='lista_fornecedores'),
     path('admin/fornecedores/criar/', produtos_views.criar_fornecedor, name='criar_fornecedor'),
     path('admin/fornecedores/<int:fornecedor_id>/editar/', produtos_views.editar_fornecedor, name='editar_fornecedor'),
+    path('admin/fornecedores/<int:fornecedor_id>/reajustar-precos/', produtos_views.reajustar_precos_fornecedor, name='reajustar_precos_fornecedor'),
 	
 	# URLs para orçamentos dos clientes
     path('mes-devis/', views.cliente_orcamentos, name='cliente_orcamentos'),
@@ -101,6 +103,7 @@ urlpatterns = [
     # ============ URLs PARA FATURAS ============
     path('admin/faturas/', views_faturas.admin_faturas_list, name='admin_faturas_list'),
     path('admin/faturas/nova/', views_faturas.admin_criar_fatura, name='admin_criar_fatura'),
+    path('admin/faturas/exportar/', views_faturas.admin_faturas_exportar, name='admin_faturas_exportar'),
     path('admin/faturas/nova/orcamento/<str:orcamento_numero>/', views_faturas.admin_criar_fatura_from_orcamento, name='admin_criar_fatura_from_orcamento'),
     path('admin/faturas/<str:numero>/', views_faturas.admin_fatura_detail, name='admin_fatura_detail'),
     path('admin/faturas/<str:numero>/editar/', views_faturas.admin_editar_fatura, name='admin_editar_fatura'),
@@ -115,6 +118,7 @@ urlpatterns = [
 
     # ============ URLs DE NOTIFICAÇÕES (API) ============
     path('api/notifications/', notificacao_views.get_user_notifications, name='get_user_notifications'),
+    path('api/notifications/stream/', notificacao_views.notifications_stream, name='notifications_stream'),
     path('api/notifications/<int:notification_id>/read/', notificacao_views.mark_notification_read, name='mark_notification_read'),
     path('api/notifications/mark-all-read/', notificacao_views.mark_all_notifications_read, name='mark_all_notifications_read'),
 
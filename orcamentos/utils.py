@@ -1,7 +1,7 @@
-from .pdf_generator import OrcamentoPDFGenerator
+from .pdf_generator import OrcamentoPDFGenerator, abrir_pdf_orcamento
 
 
 def gerar_pdf_orcamento(orcamento):
-    """Função utilitária para gerar PDF do orçamento usando ReportLab"""
-    generator = OrcamentoPDFGenerator()
-    return generator.generate_pdf(orcamento)
+    """Função utilitária para gerar PDF do orçamento usando ReportLab (com cache em disco)"""
+    with abrir_pdf_orcamento(orcamento) as arquivo:
+        return arquivo.read()
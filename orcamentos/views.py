@@ -2,7 +2,7 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, FileResponse
 from django.core.paginator import Paginator
 from django.db.models import Q, Sum
 from django.db import models
@@ -24,6 +24,7 @@ from .forms import (
 )
 from .auditoria import TipoAcao
 from .services import NotificationService
+from .documentos import DocumentoService
 
 # Adicionar importações faltantes
 from .auditoria import AuditoriaManager
@@ -56,15 +57,12 @@ def cliente_orcamentos(request):
     ).order_by('-data_elaboracao')
 
     # MELHORIA: Verificar se há orçamentos órfãos com o mesmo email
-    solicitacoes_orfas = SolicitacaoOrcamento.objects.filter(
-        cliente__isnull=True,
-        email_solicitante__iexact=request.user.email
-    )
+    from . import vinculacao_orfaos
+    solicitacoes_orfas = vinculacao_orfaos.solicitacoes_orfas(request.user.email)
+    count = solicitacoes_orfas.count()
 
     # Se encontrar orçamentos órfãos, vincular automaticamente e notificar
-    if solicitacoes_orfas.exists():
-        count = solicitacoes_orfas.count()
-
+    if count:
         # Registrar detecção na auditoria
         from .auditoria import AuditoriaManager
         AuditoriaManager.registrar_deteccao_orcamento_orfao(
@@ -74,16 +72,10 @@ def cliente_orcamentos(request):
             request=request
         )
 
-        # Registrar vinculações individuais na auditoria
-        for solicitacao in solicitacoes_orfas:
-            AuditoriaManager.registrar_vinculacao_orcamento_orfao(
-                usuario=request.user,
-                solicitacao=solicitacao,
-                request=request,
-                origem="dashboard_cliente"
-            )
-
-        solicitacoes_orfas.update(cliente=request.user)
+        # Um UPDATE por lote, com a auditoria de cada vinculação gravada em lote
+        vinculacao_orfaos.VinculadorOrfaos(origem="dashboard_cliente", request=request).vincular(
+            solicitacoes_orfas, usuario=request.user
+        )
 
         messages.info(
             request,
@@ -220,105 +212,20 @@ def cliente_devis_pdf(request, numero):
         messages.error(request, 'Accès non autorisé.')
         return redirect('accounts:dashboard')
 
-    orcamento = get_object_or_404(
-        Orcamento,
+    orcamento = DocumentoService.carregar_devis(
         numero=numero,
         solicitacao__cliente=request.user
     )
 
-    # Usar a mesma lógica do admin_orcamento_pdf_html
     from django.http import HttpResponse
     from django.template.loader import render_to_string
-    from decimal import Decimal
     from datetime import datetime
 
-    # Calcular totais para o PDF
-    subtotal_ht = Decimal('0.00')
-    total_taxe = Decimal('0.00')
-    total_ttc = Decimal('0.00')
-
-    items_data = []
-    for i, item in enumerate(orcamento.itens.all(), 1):
-        # Usar a TVA real do item, não fixa
-        taxa_tva_decimal = Decimal(item.taxa_tva) / 100
-
-        pu_ht = item.preco_unitario_ht
-        pu_ttc = pu_ht * (1 + taxa_tva_decimal)
-        total_item_ht = item.total_ht  # Já calculado com remise
-        total_item_ttc = item.total_ttc  # Já calculado com remise e TVA
-        taxe_item = total_item_ttc - total_item_ht
-
-        subtotal_ht += total_item_ht
-        total_taxe += taxe_item
-        total_ttc += total_item_ttc
-
-        items_data.append({
-            'ref': item.referencia or f"REF{i:03d}",
-            'designation': item.descricao,
-            'unite': item.get_unidade_display(),
-            'quantite': item.quantidade,
-            'pu_ht': pu_ht,
-            'pu_ttc': pu_ttc,
-            'remise': (item.quantidade * pu_ht * item.remise_percentual / 100) if item.remise_percentual else Decimal('0.00'),
-            'total_ht': total_item_ht,
-            'total_ttc': total_item_ttc,
-            'taxe': taxe_item,
-            'taxa_tva': item.taxa_tva  # Adicionar a taxa para usar no template
-        })
-
-    # Aplicar desconto global se houver
-    remise_global = orcamento.desconto or Decimal('0.00')
-    valor_remise_global = (subtotal_ht * remise_global / 100) if remise_global else Decimal('0.00')
-
-    # Calcular taxa média de TVA para exibir no resumo
-    taxa_tva_media = "Variável"
-    if total_ttc > 0 and subtotal_ht > 0:
-        percentual_tva = ((total_taxe / subtotal_ht) * 100)
-        # Se for um valor "redondo", mostrar como percentual fixo
-        if abs(percentual_tva - Decimal('20')) < Decimal('0.01'):
-            taxa_tva_media = "20"
-        elif abs(percentual_tva - Decimal('10')) < Decimal('0.01'):
-            taxa_tva_media = "10"
-        elif abs(percentual_tva - Decimal('5.5')) < Decimal('0.01'):
-            taxa_tva_media = "5.5"
-        elif abs(percentual_tva - Decimal('0')) < Decimal('0.01'):
-            taxa_tva_media = "0"
-        else:
-            taxa_tva_media = f"{percentual_tva:.1f}"
-
-    # Totais finais (já com desconto global aplicado via model)
-    subtotal_final_ht = orcamento.total
-    taxe_finale = orcamento.valor_tva
-    subtotal_final_ttc = orcamento.total_ttc
-
-    # Acomptes e saldo (baseado nos acomptes configurados para este devis)
-    total_acomptes_ttc = sum((a.valor_ttc for a in orcamento.acomptes.all()), Decimal('0.00'))
-    solde_ttc = max(Decimal('0.00'), subtotal_final_ttc - total_acomptes_ttc)
-
+    # Linhas, totais e dados da empresa: modelo compartilhado (em cache por versão do devis)
     context = {
         'orcamento': orcamento,
-        'items_data': items_data,
-        'subtotal_ht': subtotal_ht,
-        'remise_global': remise_global,
-        'valor_remise': valor_remise_global,
-        'subtotal_apres_remise_ht': subtotal_final_ht,
-        'taxe_finale': taxe_finale,
-        'subtotal_apres_remise_ttc': subtotal_final_ttc,
-        'taxa_tva_media': taxa_tva_media,
-        'total_acomptes_ttc': total_acomptes_ttc,
-        'solde_ttc': solde_ttc,
+        **DocumentoService.modelo_devis(orcamento),
         'date_generation': datetime.now(),
-        'company_info': {
-            'name': 'LOPES DE SOUZA fabiano',
-            'address': '261 Chemin de La Castellane',
-            'city': '31790 Saint Sauveur, France',
-            'phone': '+33 7 69 27 37 76',
-            'email': 'contact@lopespeinture.fr',
-            'siret': '978 441 756 00019',
-            'ape': '4334Z',
-            'tva': 'FR35978441756',
-            'site': 'www.lopespeinture.fr'
-        }
     }
 
     html_content = render_to_string('orcamentos/admin/devis_pdf_html.html', context)
@@ -354,14 +261,8 @@ def admin_criar_orcamento(request, numero):
             orcamento.elaborado_por = request.user  # Adicionar o usuário que está criando
             orcamento.save()
 
-            # Salvar itens do orçamento
-            instances = formset.save(commit=False)
-            for instance in instances:
-                instance.orcamento = orcamento
-                instance.save()
-
-            # Recalcular totais
-            orcamento.calcular_totais()
+            # Salvar itens do orçamento (inserção em lote + totais recalculados uma vez)
+            orcamento.adicionar_itens(formset.save(commit=False))
 
             # Atualizar status da solicitação
             solicitacao.status = StatusOrcamento.EM_ELABORACAO
@@ -420,12 +321,12 @@ def admin_criar_orcamento_cliente(request, cliente_id):
 
             # Processar itens do orçamento enviados via AJAX
             itens_data = request.POST.get('itens_json', '[]')
+            novos_itens = []
             try:
                 itens = json.loads(itens_data)
                 for item_data in itens:
                     if item_data.get('descricao'):
-                        ItemOrcamento.objects.create(
-                            orcamento=fatura,
+                        novos_itens.append(ItemOrcamento(
                             produto_id=item_data.get('produto_id') if item_data.get('produto_id') else None,
                             referencia=item_data.get('referencia', ''),
                             descricao=item_data.get('descricao'),
@@ -435,12 +336,12 @@ def admin_criar_orcamento_cliente(request, cliente_id):
                             preco_unitario_ht=Decimal(str(item_data.get('preco_unitario_ht', 0))),
                             remise_percentual=Decimal(str(item_data.get('remise_percentual', 0))),
                             taxa_tva=item_data.get('taxa_tva', '20'),
-                        )
+                        ))
             except (json.JSONDecodeError, ValueError, TypeError) as e:
                 messages.warning(request, f'Erro ao processar itens: {str(e)}')
 
-            # Recalcular totais
-            fatura.calcular_totais()
+            # Gravar itens em lote e recalcular totais uma única vez
+            fatura.adicionar_itens(novos_itens)
 
             action = request.POST.get('action', 'draft')
             if action == 'send':
@@ -547,11 +448,9 @@ def admin_editar_orcamento(request, numero):
             itens_json_str = request.POST.get('itens_json', '[]')
             itens_data = json.loads(itens_json_str)
 
-            # Deletar itens antigos para substituí-los
-            orcamento.itens.all().delete()
-            for item_data in itens_data:
-                ItemOrcamento.objects.create(
-                    orcamento=orcamento,
+            # Substituir os itens antigos numa única transação
+            orcamento.substituir_itens([
+                ItemOrcamento(
                     referencia=item_data.get('referencia'),
                     descricao=item_data.get('descricao'),
                     unidade=item_data.get('unidade'),
@@ -561,6 +460,8 @@ def admin_editar_orcamento(request, numero):
                     taxa_tva=item_data.get('taxa_tva', '20'),
                     remise_percentual=Decimal(str(item_data.get('remise_percentual', '0')))
                 )
+                for item_data in itens_data
+            ])
 
             # Salvar acomptes a partir do JSON
             acomptes_json_str = request.POST.get('acomptes_json', '[]')
@@ -682,7 +583,7 @@ def admin_enviar_orcamento(request, numero):
 @staff_member_required
 def admin_orcamento_pdf(request, numero):
     """Gerar PDF do orçamento para administradores"""
-    orcamento = get_object_or_404(Orcamento, numero=numero)
+    orcamento = DocumentoService.carregar_devis(numero=numero)
 
     # Registrar download na auditoria
     from .auditoria import AuditoriaManager
@@ -694,12 +595,15 @@ def admin_orcamento_pdf(request, numero):
         funcionalidade="Download PDF Admin",
         request=request
     )
-    from .pdf_generator import gerar_pdf_orcamento
+    from .pdf_generator import abrir_pdf_orcamento
     try:
-        pdf_buffer = gerar_pdf_orcamento(orcamento)
-        response = HttpResponse(pdf_buffer, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="orcamento_{numero}.pdf"'
-        return response
+        # PDF servido do cache em disco enquanto o conteúdo do devis não mudar
+        return FileResponse(
+            abrir_pdf_orcamento(orcamento),
+            as_attachment=True,
+            filename=f"orcamento_{numero}.pdf",
+            content_type='application/pdf'
+        )
     except Exception as e:
         messages.error(request, 'Erreur lors de la génération du PDF.')
         import logging
@@ -711,7 +615,7 @@ def admin_orcamento_pdf(request, numero):
 @staff_member_required
 def admin_orcamento_pdf_html(request, numero):
     """Gerar PDF HTML do orçamento para administradores (nova versão completa)"""
-    orcamento = get_object_or_404(Orcamento, numero=numero)
+    orcamento = DocumentoService.carregar_devis(numero=numero)
 
     # Registrar download na auditoria
     from .auditoria import AuditoriaManager
@@ -724,99 +628,15 @@ def admin_orcamento_pdf_html(request, numero):
         request=request
     )
 
-    # Usar a mesma lógica do cliente_devis_pdf mas com template admin
+    # Mesmo modelo de documento do cliente_devis_pdf, com template admin
     from django.http import HttpResponse
     from django.template.loader import render_to_string
-    from decimal import Decimal
     from datetime import datetime
 
-    # Calcular totais para o PDF
-    subtotal_ht = Decimal('0.00')
-    total_taxe = Decimal('0.00')
-    total_ttc = Decimal('0.00')
-
-    items_data = []
-    for i, item in enumerate(orcamento.itens.all(), 1):
-        # Usar a TVA real do item, não fixa
-        taxa_tva_decimal = Decimal(item.taxa_tva) / 100
-
-        pu_ht = item.preco_unitario_ht
-        pu_ttc = pu_ht * (1 + taxa_tva_decimal)
-        total_item_ht = item.total_ht  # Já calculado com remise
-        total_item_ttc = item.total_ttc  # Já calculado com remise e TVA
-        taxe_item = total_item_ttc - total_item_ht
-
-        subtotal_ht += total_item_ht
-        total_taxe += taxe_item
-        total_ttc += total_item_ttc
-
-        items_data.append({
-            'ref': item.referencia or f"REF{i:03d}",
-            'designation': item.descricao,
-            'unite': item.get_unidade_display(),
-            'quantite': item.quantidade,
-            'pu_ht': pu_ht,
-            'pu_ttc': pu_ttc,
-            'remise': (item.quantidade * pu_ht * item.remise_percentual / 100) if item.remise_percentual else Decimal('0.00'),
-            'total_ht': total_item_ht,
-            'total_ttc': total_item_ttc,
-            'taxe': taxe_item,
-            'taxa_tva': item.taxa_tva  # Adicionar a taxa para usar no template
-        })
-
-    # Aplicar desconto global se houver
-    remise_global = orcamento.desconto or Decimal('0.00')
-    valor_remise_global = (subtotal_ht * remise_global / 100) if remise_global else Decimal('0.00')
-
-    # Calcular taxa média de TVA para exibir no resumo
-    taxa_tva_media = "Variável"
-    if total_ttc > 0 and subtotal_ht > 0:
-        percentual_tva = ((total_taxe / subtotal_ht) * 100)
-        # Se for um valor "redondo", mostrar como percentual fixo
-        if abs(percentual_tva - Decimal('20')) < Decimal('0.01'):
-            taxa_tva_media = "20"
-        elif abs(percentual_tva - Decimal('10')) < Decimal('0.01'):
-            taxa_tva_media = "10"
-        elif abs(percentual_tva - Decimal('5.5')) < Decimal('0.01'):
-            taxa_tva_media = "5.5"
-        elif abs(percentual_tva - Decimal('0')) < Decimal('0.01'):
-            taxa_tva_media = "0"
-        else:
-            taxa_tva_media = f"{percentual_tva:.1f}"
-
-    # Totais finais (já com desconto global aplicado via model)
-    subtotal_final_ht = orcamento.total
-    taxe_finale = orcamento.valor_tva
-    subtotal_final_ttc = orcamento.total_ttc
-
-    # Acomptes e saldo
-    total_acomptes_ttc = sum((a.valor_ttc for a in orcamento.acomptes.all()), Decimal('0.00'))
-    solde_ttc = max(Decimal('0.00'), subtotal_final_ttc - total_acomptes_ttc)
-
     context = {
         'orcamento': orcamento,
-        'items_data': items_data,
-        'subtotal_ht': subtotal_ht,
-        'remise_global': remise_global,
-        'valor_remise': valor_remise_global,
-        'subtotal_apres_remise_ht': subtotal_final_ht,
-        'taxe_finale': taxe_finale,
-        'subtotal_apres_remise_ttc': subtotal_final_ttc,
-        'taxa_tva_media': taxa_tva_media,
-        'total_acomptes_ttc': total_acomptes_ttc,
-        'solde_ttc': solde_ttc,
+        **DocumentoService.modelo_devis(orcamento),
         'date_generation': datetime.now(),
-        'company_info': {
-            'name': 'LOPES DE SOUZA fabiano',
-            'address': '261 Chemin de La Castellane',
-            'city': '31790 Saint Sauveur, France',
-            'phone': '+33 7 69 27 37 76',
-            'email': 'contact@lopespeinture.fr',
-            'siret': '978 441 756 00019',
-            'ape': '4334Z',
-            'tva': 'FR35978441756',
-            'site': 'www.lopespeinture.fr'
-        }
     }
 
     html_content = render_to_string('orcamentos/admin/devis_pdf_html.html', context)
@@ -1202,15 +1022,15 @@ def get_cliente_stats(user):
 
 def get_admin_stats():
     """Retorna estatísticas básicas para o dashboard do administrador."""
-    total_projects = Projeto.objects.count()
-    total_clients = Projeto.objects.values('cliente').distinct().count()
-    pending_requests = SolicitacaoOrcamento.objects.filter(status=StatusOrcamento.PENDENTE).count()
-    monthly_revenue = Orcamento.objects.filter(status=StatusOrcamento.ACEITO).aggregate(Sum('total')).get('total__sum') or 0
+    from .estatisticas import EstatisticasService
+
+    projetos = EstatisticasService.projetos_clientes()
     return {
-        'total_projects': total_projects,
-        'total_clients': total_clients,
-        'pending_requests': pending_requests,
-        'monthly_revenue': monthly_revenue,
+        'total_projects': projetos['total_projects'],
+        'total_clients': projetos['total_clients'],
+        'pending_requests': EstatisticasService.solicitacoes()['pendentes'],
+        # Mantido como antes: soma de todos os devis aceitos
+        'monthly_revenue': EstatisticasService.orcamentos()['receita_total'],
     }
 
 # ========================= AGENDAMENTOS (RENDEZ-VOUS) =========================
@@ -55,13 +55,9 @@ def buscar_produtos_ajax(request):
 		return JsonResponse({'produtos': []})
 	
 	try:
-		from .models import Produto
-		produtos = Produto.objects.filter(
-			ativo=True
-		).filter(
-			Q(referencia__icontains=query) |
-			Q(descricao__icontains=query)
-		)[:10]
+		# Índice de busca (trigramas/prefixos, sem acentos) e resultados ordenados por relevância
+		from .busca_produtos import buscar_produtos
+		produtos = buscar_produtos(query, limite=10)
 		
 		produtos_data = []
 		for produto in produtos:
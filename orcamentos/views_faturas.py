@@ -8,20 +8,19 @@ from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
 from django.db.models import Q, Sum
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date
 import json
 from django.shortcuts import render, get_object_or_404, redirect
 
 from . auditoria import AuditoriaManager, TipoAcao
 from . forms import FactureForm
 from . models import Facture, ItemFacture, Orcamento, StatusOrcamento
+from .documentos import DocumentoService
 
 
-@staff_member_required
-def admin_faturas_list(request):
-    """Lista todas as faturas para administradores"""
-    faturas = Facture.objects.all().select_related('cliente', 'orcamento', 'elaborado_por')
-
-    # Filtros
+def _filtrar_faturas(request, faturas):
+    """Filtros da lista de faturas (status, cliente, busca e período de emissão)"""
     status = request.GET.get('status')
     if status:
         faturas = faturas.filter(status=status)
@@ -40,6 +39,26 @@ def admin_faturas_list(request):
             Q(cliente__email__icontains=search)
         )
 
+    try:
+        desde = parse_date(request.GET.get('desde') or '')
+        ate = parse_date(request.GET.get('ate') or '')
+    except ValueError:
+        desde = ate = None
+    if desde:
+        faturas = faturas.filter(data_emissao__gte=desde)
+    if ate:
+        faturas = faturas.filter(data_emissao__lte=ate)
+
+    return faturas
+
+
+@staff_member_required
+def admin_faturas_list(request):
+    """Lista todas as faturas para administradores"""
+    faturas = _filtrar_faturas(
+        request, Facture.objects.all().select_related('cliente', 'orcamento', 'elaborado_por')
+    )
+
     # Ordenação
     ordenar = request.GET.get('ordenar', '-data_criacao')
     faturas = faturas.order_by(ordenar)
@@ -485,68 +504,14 @@ def admin_marcar_fatura_paga(request, numero):
 @staff_member_required
 def admin_fatura_pdf(request, numero):
     """Gerar PDF da fatura para o painel administrativo"""
-    fatura = get_object_or_404(Facture, numero=numero)
+    fatura = DocumentoService.carregar_facture(numero=numero)
 
-    # Usar a mesma lógica do sistema de orçamentos adaptada para faturas
     from django.http import HttpResponse
     from django.template.loader import render_to_string
-    from decimal import Decimal
     from datetime import datetime
 
-    # Calcular totais para o PDF
-    subtotal_ht = Decimal('0.00')
-    total_taxe = Decimal('0.00')
-    total_ttc = Decimal('0.00')
-
-    items_data = []
-    if hasattr(fatura, 'itens') and fatura.itens.exists():
-        for i, item in enumerate(fatura.itens.all(), 1):
-            # Usar a TVA real do item
-            taxa_tva_decimal = Decimal(item.taxa_tva) / 100
-
-            pu_ht = item.preco_unitario_ht
-            pu_ttc = pu_ht * (1 + taxa_tva_decimal)
-            total_item_ht = item.total_ht
-            total_item_ttc = item.total_ttc
-            taxe_item = total_item_ttc - total_item_ht
-
-            subtotal_ht += total_item_ht
-            total_taxe += taxe_item
-            total_ttc += total_item_ttc
-
-            items_data.append({
-                'ref': item.referencia or f"REF{i:03d}",
-                'designation': item.descricao,
-                'unite': item.get_unidade_display(),
-                'quantite': item.quantidade,
-                'pu_ht': pu_ht,
-                'pu_ttc': pu_ttc,
-                'total_ht': total_item_ht,
-                'total_ttc': total_item_ttc,
-                'taxe': taxe_item,
-                'taxa_tva': item.taxa_tva
-            })
-
-    # Context para o template
-    context = {
-        'fatura': fatura,
-        'items': items_data,
-        'subtotal_ht': subtotal_ht,
-        'total_taxe': total_taxe,
-        'total_ttc': total_ttc,
-        'empresa': {
-            'name': 'LOPES DE SOUZA fabiano',
-            'address': '261 Chemin de La Castellane',
-            'city': '31790 Saint Sauveur, France',
-            'phone': '+33 7 69 27 37 76',
-            'email': 'contact@lopespeinture.fr',
-            'siret': '978 441 756 00019',
-            'ape': '4334Z',
-            'tva': 'FR35978441756',
-            'site': 'www.lopespeinture.fr'
-        },
-        'data_impressao': datetime.now(),
-    }
+    context = DocumentoService.contexto_facture(fatura)
+    context['data_impressao'] = datetime.now()
 
     # Renderizar template HTML
     html_content = render_to_string('orcamentos/admin/fatura_pdf.html', context)
@@ -567,6 +532,24 @@ def admin_fatura_pdf(request, numero):
         response['Content-Disposition'] = f'inline; filename="{filename}"'
         return response
     
+@staff_member_required
+def admin_faturas_exportar(request):
+    """Baixar num ZIP os documentos das faturas filtradas na lista (ex.: um trimestre)"""
+    from .exportacao import ExportacaoDocumentos
+
+    faturas = _filtrar_faturas(
+        request,
+        Facture.objects.select_related('cliente', 'cliente__profile', 'orcamento', 'orcamento__solicitacao')
+    ).order_by('numero')
+
+    # Sem pool de processos dentro do worker web
+    response = StreamingHttpResponse(
+        ExportacaoDocumentos(processos=1).zip_stream(factures=faturas.iterator(chunk_size=100)),
+        content_type='application/zip'
+    )
+    response['Content-Disposition'] = f'attachment; filename="factures_{timezone.localdate():%Y%m%d}.zip"'
+    return response
+
 # ============ VIEWS PARA FATURAS DOS CLIENTES ============
 
 @login_required
@@ -653,71 +636,17 @@ def cliente_fatura_pdf(request, numero):
         messages.error(request, 'Accès non autorisé.')
         return redirect('accounts:dashboard')
 
-    fatura = get_object_or_404(
-        Facture,
+    fatura = DocumentoService.carregar_facture(
         numero=numero,
         cliente=request.user
     )
 
-    # Usar a mesma lógica do admin_orcamento_pdf
     from django.http import HttpResponse
     from django.template.loader import render_to_string
-    from decimal import Decimal
     from datetime import datetime
 
-    # Calcular totais para o PDF
-    subtotal_ht = Decimal('0.00')
-    total_taxe = Decimal('0.00')
-    total_ttc = Decimal('0.00')
-
-    items_data = []
-    for i, item in enumerate(fatura.itens.all(), 1):
-        # Usar a TVA real do item
-        taxa_tva_decimal = Decimal(item.taxa_tva) / 100
-
-        pu_ht = item.preco_unitario_ht
-        pu_ttc = pu_ht * (1 + taxa_tva_decimal)
-        total_item_ht = item.total_ht
-        total_item_ttc = item.total_ttc
-        taxe_item = total_item_ttc - total_item_ht
-
-        subtotal_ht += total_item_ht
-        total_taxe += taxe_item
-        total_ttc += total_item_ttc
-
-        items_data.append({
-            'ref': item.referencia or f"REF{i:03d}",
-            'designation': item.descricao,
-            'unite': item.get_unidade_display(),
-            'quantite': item.quantidade,
-            'pu_ht': pu_ht,
-            'pu_ttc': pu_ttc,
-            'total_ht': total_item_ht,
-            'total_ttc': total_item_ttc,
-            'taxe': taxe_item,
-            'taxa_tva': item.taxa_tva
-        })
-
-    # Context para o template
-    context = {
-        'fatura': fatura,
-        'items': items_data,
-        'subtotal_ht': subtotal_ht,
-        'total_taxe': total_taxe,
-        'total_ttc': total_ttc,
-        'empresa': {
-            'name': 'LOPES DE SOUZA fabiano',
-            'address': '261 Chemin de La Castellane',
-            'city': '31790 Saint Sauveur, France',
-            'phone': '+33 7 69 27 37 76',
-            'email': 'contact@lopespeinture.fr',
-            'siret': '978 441 756 00019',
-            'ape': '4334Z',
-            'tva': 'FR35978441756',
-            'site': 'www.lopespeinture.fr'
-        },
-        'data_impressao': datetime.now(),
-    }
+    context = DocumentoService.contexto_facture(fatura)
+    context['data_impressao'] = datetime.now()
 
     # Renderizar template HTML (reutilizado do admin para manter consistência visual)
     html_content = render_to_string('orcamentos/admin/fatura_pdf.html', context)
@@ -4,7 +4,13 @@ from django.http import JsonResponse, HttpResponseNotAllowed
 from django.shortcuts import render
 from urllib.parse import parse_qs
 
+from django.contrib.auth import get_user_model
+from django.db.models import Count
+
 from orcamentos.models import SolicitacaoOrcamento
+from orcamentos import vinculacao_orfaos
+
+User = get_user_model()
 
 
 @staff_member_required
@@ -20,32 +26,31 @@ def admin_orcamentos_orfaos(request):
 
     # Estatísticas
     total_orfas = qs_orfas.count()
-    emails_orfaos = list(qs_orfas.values_list('email_solicitante', flat=True))
-    emails_unicos = len(set(emails_orfaos))
 
-    # Agrupar por email com contagem
-    from collections import Counter
-    contagem = Counter(emails_orfaos)
-
-    # Verificar usuários existentes por email
-    from django.contrib.auth import get_user_model
-    User = get_user_model()
+    # Emails distintos com a conta correspondente, numa consulta (sem um User.get por email)
+    por_email = list(
+        vinculacao_orfaos.anotar_contas(vinculacao_orfaos.solicitacoes_orfas())
+        .order_by('email_solicitante')
+        .values('email_solicitante', 'conta_id')
+        .annotate(count=Count('pk'))
+    )
+    emails_unicos = len(por_email)
+    usuarios = User.objects.in_bulk({item['conta_id'] for item in por_email if item['conta_id']})
 
     emails_com_usuarios = []
     emails_sem_usuarios = []
-    for email, count in contagem.items():
-        try:
-            usuario = User.objects.get(email__iexact=email)
+    for item in por_email:
+        if item['conta_id']:
             emails_com_usuarios.append({
-                'email_solicitante': email,
-                'count': count,
+                'email_solicitante': item['email_solicitante'],
+                'count': item['count'],
                 'pode_vincular': True,
-                'usuario': usuario,
+                'usuario': usuarios[item['conta_id']],
             })
-        except User.DoesNotExist:
+        else:
             emails_sem_usuarios.append({
-                'email_solicitante': email,
-                'count': count,
+                'email_solicitante': item['email_solicitante'],
+                'count': item['count'],
                 'pode_vincular': False,
             })
 
@@ -101,38 +106,29 @@ def admin_vincular_orcamentos_orfaos(request):
         return JsonResponse({'success': False, 'error': 'Email não fornecido'})
 
     # Buscar usuário com esse email
-    from django.contrib.auth import get_user_model
-    User = get_user_model()
-
     try:
         usuario = User.objects.get(email__iexact=email)
     except User.DoesNotExist:
         return JsonResponse({'success': False, 'error': 'Aucun utilisateur trouvé'})
 
-    # Buscar solicitações órfãs do email
-    solicitacoes_orfas = SolicitacaoOrcamento.objects.filter(
-        cliente__isnull=True,
-        email_solicitante__iexact=email
-    )
+    # Vincular as órfãs do email: um UPDATE por lote, auditoria gravada em lote
+    numeros_vinculados = []
 
-    if not solicitacoes_orfas.exists():
-        return JsonResponse({'success': False, 'error': 'Aucune demande orpheline trouvée'})
+    def registrar_numeros(linhas, usuarios, erro):
+        if erro is None:
+            numeros_vinculados.extend(linha['numero'] for linha in linhas)
 
-    count = solicitacoes_orfas.count()
-    numeros_vinculados = list(solicitacoes_orfas.values_list('numero', flat=True))
+    vinculador = vinculacao_orfaos.VinculadorOrfaos(
+        origem="admin_manual", request=request, ao_processar_lote=registrar_numeros
+    )
+    vinculador.vincular(vinculacao_orfaos.solicitacoes_orfas(email), usuario=usuario)
+    count = len(numeros_vinculados)
 
-    # Registrar vinculações na auditoria e vincular
-    from .auditoria import AuditoriaManager
-    for solicitacao in solicitacoes_orfas:
-        AuditoriaManager.registrar_vinculacao_orcamento_orfao(
-            usuario=usuario,
-            solicitacao=solicitacao,
-            request=request,
-            origem="admin_manual"
-        )
-    solicitacoes_orfas.update(cliente=usuario)
+    if not count:
+        return JsonResponse({'success': False, 'error': 'Aucune demande orpheline trouvée'})
 
     # Registrar processamento em lote
+    from .auditoria import AuditoriaManager
     AuditoriaManager.registrar_processamento_lote_orfaos(
         usuario_comando=request.user,
         total_processadas=count,
@@ -5,13 +5,13 @@ from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
-from django.db.models import Sum
 import json
 from django.shortcuts import render, get_object_or_404, redirect
 from django.utils import timezone
 
 from orcamentos.forms import OrcamentoForm, ItemOrcamentoFormSet
 from orcamentos.models import SolicitacaoOrcamento, StatusOrcamento, Orcamento, ItemOrcamento
+from orcamentos.estatisticas import EstatisticasService
 from orcamentos.services import NotificationService
 # NOVO: importar agendamentos
 from orcamentos.models import AgendamentoOrcamento, StatusAgendamento
@@ -20,22 +20,9 @@ from orcamentos.models import AgendamentoOrcamento, StatusAgendamento
 @staff_member_required
 def admin_dashboard(request):
     """Dashboard administrativo"""
-    # Estatísticas gerais
-    total_solicitacoes = SolicitacaoOrcamento.objects.count()
-    solicitacoes_pendentes = SolicitacaoOrcamento.objects.filter(status=StatusOrcamento.PENDENTE).count()
-    orcamentos_enviados = Orcamento.objects.filter(status=StatusOrcamento.ENVIADO).count()
-    orcamentos_aceitos = Orcamento.objects.filter(status=StatusOrcamento.ACEITO).count()
-
-    # Estatísticas de órfãos adicionais exigidas pelos testes
-    qs_orfas = SolicitacaoOrcamento.objects.filter(cliente__isnull=True)
-    solicitacoes_orfas = qs_orfas.count()
-
-    # Emails de órfãos que possuem usuários correspondentes (vinculáveis)
-    emails_orfas = list(qs_orfas.values_list('email_solicitante', flat=True))
-    emails_unicos = set(emails_orfas)
-    from django.contrib.auth import get_user_model
-    User = get_user_model()
-    orfaos_vinculaveis = sum(1 for email in emails_unicos if User.objects.filter(email__iexact=email).exists())
+    # Estatísticas gerais (agregadas em poucas consultas e em cache por alguns segundos)
+    solicitacoes = EstatisticasService.solicitacoes()
+    orcamentos = EstatisticasService.orcamentos()
 
     # Solicitações recentes
     solicitacoes_recentes = SolicitacaoOrcamento.objects.order_by('-created_at')[:5]
@@ -43,12 +30,6 @@ def admin_dashboard(request):
     # Orçamentos recentes
     orcamentos_recentes = Orcamento.objects.order_by('-data_elaboracao')[:5]
 
-    # Receita do mês
-    receita_mes = Orcamento.objects.filter(
-        status=StatusOrcamento.ACEITO,
-        data_resposta_cliente__month=timezone.now().month
-    ).aggregate(Sum('total'))['total__sum'] or 0
-
     # Rendez-vous (agendamentos): pendentes e próximos
     agendamentos_pendentes = AgendamentoOrcamento.objects.filter(
         status=StatusAgendamento.PENDENTE
@@ -60,17 +41,17 @@ def admin_dashboard(request):
     ).order_by('data_horario')[:5]
 
     context = {
-        'total_solicitacoes': total_solicitacoes,
-        'solicitacoes_pendentes': solicitacoes_pendentes,
-        'orcamentos_enviados': orcamentos_enviados,
-        'orcamentos_aceitos': orcamentos_aceitos,
+        'total_solicitacoes': solicitacoes['total'],
+        'solicitacoes_pendentes': solicitacoes['pendentes'],
+        'orcamentos_enviados': orcamentos['enviados'],
+        'orcamentos_aceitos': orcamentos['aceitos'],
         'solicitacoes_recentes': solicitacoes_recentes,
         'orcamentos_recentes': orcamentos_recentes,
-        'receita_mes': receita_mes,
+        'receita_mes': orcamentos['receita_mes'],
         'page_title': 'Dashboard Admin',
         # novas chaves para testes
-        'solicitacoes_orfas': solicitacoes_orfas,
-        'orfaos_vincuLaveis': orfaos_vinculaveis,
+        'solicitacoes_orfas': solicitacoes['orfas'],
+        'orfaos_vincuLaveis': EstatisticasService.orfaos_vinculaveis(),
         # NOVO: agendamentos
         'agendamentos_pendentes': agendamentos_pendentes,
         'agendamentos_proximos': agendamentos_proximos,
@@ -146,6 +127,7 @@ def admin_elaborar_orcamento(request, numero):
             itens_data = request.POST.get('itens_json', '[]')
             print(f"DEBUG: itens_data recebido: {itens_data}")  # Debug
 
+            novos_itens = []
             try:
                 itens = json.loads(itens_data)
                 print(f"DEBUG: itens parseados: {itens}")  # Debug
@@ -153,8 +135,7 @@ def admin_elaborar_orcamento(request, numero):
                 for item in itens:
                     print(f"DEBUG: processando item: {item}")  # Debug
                     if item.get('descricao'):  # Só criar se tiver descrição
-                        item_criado = ItemOrcamento.objects.create(
-                            orcamento=orcamento,
+                        novos_itens.append(ItemOrcamento(
                             produto_id=item.get('produto_id') if item.get('produto_id') else None,
                             referencia=item.get('referencia', ''),
                             descricao=item.get('descricao'),
@@ -164,8 +145,7 @@ def admin_elaborar_orcamento(request, numero):
                             preco_unitario_ht=Decimal(str(item.get('preco_unitario_ht', 0))),
                             remise_percentual=Decimal(str(item.get('remise_percentual', 0))),
                             taxa_tva=item.get('taxa_tva', '20'),
-                        )
-                        print(f"DEBUG: item criado com ID: {item_criado.id}")  # Debug
+                        ))
                     else:
                         print(f"DEBUG: item ignorado - sem descrição")  # Debug
             except (json.JSONDecodeError, ValueError, TypeError) as e:
@@ -173,6 +153,9 @@ def admin_elaborar_orcamento(request, numero):
                 messages.warning(request, f'Erro ao processar itens: {str(e)}')
                 pass
 
+            # Gravar itens em lote (totais recalculados uma única vez)
+            orcamento.adicionar_itens(novos_itens)
+
             # Processar acomptes atualizados
             acomptes_data = request.POST.get('acomptes_json', '[]')
             print(f"DEBUG: acomptes_data recebido: {acomptes_data}") # Debug
@@ -272,14 +255,8 @@ def admin_criar_orcamento(request, numero):
             orcamento.elaborado_por = request.user  # Adicionar o usuário que está criando
             orcamento.save()
 
-            # Salvar itens do orçamento
-            instances = formset.save(commit=False)
-            for instance in instances:
-                instance.orcamento = orcamento
-                instance.save()
-
-            # Recalcular totais
-            orcamento.calcular_totais()
+            # Salvar itens do orçamento (inserção em lote + totais recalculados uma vez)
+            orcamento.adicionar_itens(formset.save(commit=False))
 
             # Atualizar status da solicitação
             solicitacao.status = StatusOrcamento.EM_ELABORACAO
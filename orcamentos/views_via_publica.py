@@ -5,7 +5,8 @@ from django.shortcuts import redirect, render, get_object_or_404
 from orcamentos.forms import SolicitacaoOrcamentoPublicoForm
 from orcamentos.models import SolicitacaoOrcamento, Orcamento, StatusOrcamento, StatusProjeto
 from orcamentos.services import NotificationService
-from django.http import HttpResponse, HttpResponseBadRequest
+from orcamentos.documentos import DocumentoService, dados_empresa, obter_configuracao_empresa
+from django.http import FileResponse, HttpResponse, HttpResponseBadRequest
 from django.views.decorators.http import require_http_methods
 from django.utils import timezone
 from django.core.signing import TimestampSigner, BadSignature, SignatureExpired
@@ -84,13 +85,14 @@ def sucesso_solicitacao(request, numero):
 # ============ NOVAS VIEWS PÚBLICAS PARA DEVIS ============
 
 def _empresa_context():
+    empresa = dados_empresa(obter_configuracao_empresa())
     return {
-        'nome': 'LOPES DE SOUZA fabiano',
-        'endereco': '261 Chemin de La Castellane',
-        'telefone': '+33 7 69 27 37 76',
-        'email': 'contact@lopespeinture.fr',
-        'site': 'www.lopespeinture.fr',
-        'siret': '978 441 756 00019',
+        'nome': empresa['name'],
+        'endereco': empresa['address'],
+        'telefone': empresa['phone'],
+        'email': empresa['email'],
+        'site': empresa['site'],
+        'siret': empresa['siret'],
     }
 
 
@@ -258,13 +260,16 @@ def orcamento_publico_pdf(request, uuid):
     if error:
         return error
 
-    orcamento = get_object_or_404(Orcamento, uuid=uuid)
+    orcamento = DocumentoService.carregar_devis(uuid=uuid)
 
     try:
-        from .utils import gerar_pdf_orcamento
-        pdf_bytes = gerar_pdf_orcamento(orcamento)
-        response = HttpResponse(pdf_bytes, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="devis_{orcamento.numero}.pdf"'
+        from .pdf_generator import abrir_pdf_orcamento
+        response = FileResponse(
+            abrir_pdf_orcamento(orcamento),
+            as_attachment=True,
+            filename=f"devis_{orcamento.numero}.pdf",
+            content_type='application/pdf'
+        )
 
         # Auditoria de download
         try:
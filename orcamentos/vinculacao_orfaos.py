@@ -0,0 +1,236 @@
+"""
+Vinculação de solicitações órfãs (sem cliente) às contas de mesmo email
+
+As solicitações e as contas são comparadas pelo email normalizado
+(Lower(email)) numa única consulta: cada órfã recebe, por subconsulta, o id
+da conta correspondente. Os índices funcionais em Lower(email_solicitante)
+e Lower(email) evitam a varredura das duas tabelas.
+
+A vinculação é feita em lotes de chaves primárias: um UPDATE por lote (a
+conta de cada linha vem da mesma subconsulta) e os logs de auditoria
+gravados com bulk_create na mesma transação. Um lote que falha é desfeito e registrado
+em `erros`; os seguintes continuam.
+
+Num novo cadastro a vinculação roda depois do commit, fora da requisição
+(vincular_orfaos_do_cadastro, agendada pelo sinal via tarefas.py).
+"""
+
+import logging
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Lower
+
+from . import estatisticas
+from .auditoria import AuditoriaManager
+from .models import SolicitacaoOrcamento
+from .tarefas import tarefa_atual
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+
+def solicitacoes_orfas(email=None):
+    """Solicitações sem cliente, opcionalmente só as de um email (sem diferenciar maiúsculas)"""
+    orfas = SolicitacaoOrcamento.objects.filter(cliente__isnull=True).annotate(
+        email_normalizado=Lower('email_solicitante')
+    )
+    if email:
+        orfas = orfas.filter(email_normalizado=Lower(Value(email)))
+    return orfas
+
+
+def _conta_do_email(email_normalizado):
+    """Subconsulta com o id da conta (a mais antiga) cujo email normalizado é `email_normalizado`"""
+    return Subquery(
+        User.objects.annotate(email_normalizado=Lower('email'))
+        .filter(email_normalizado=email_normalizado)
+        .order_by('pk')
+        .values('pk')[:1],
+        output_field=IntegerField(),
+    )
+
+
+def anotar_contas(orfas):
+    """Anota `conta_id`: a conta com o mesmo email normalizado, ou None"""
+    return orfas.annotate(conta_id=_conta_do_email(OuterRef('email_normalizado')))
+
+
+class VinculadorOrfaos:
+    """
+    Vincula solicitações órfãs em lotes
+
+    Args:
+        origem: Origem registrada na auditoria (signal_cadastro, comando_gerenciamento...)
+        tamanho_lote: Solicitações por UPDATE
+        simular: Só calcula o que seria vinculado
+        request: Requisição de onde vêm os metadados da auditoria (ip, sessão)
+        ao_processar_lote: Chamado a cada lote com (linhas, usuarios, erro); cada
+            linha tem pk, numero, email_solicitante e conta_id
+    """
+
+    def __init__(self, origem, tamanho_lote=1000, simular=False, request=None, ao_processar_lote=None):
+        self.origem = origem
+        self.request = request
+        self.tamanho_lote = tamanho_lote
+        self.simular = simular
+        self.ao_processar_lote = ao_processar_lote
+
+    def vincular(self, orfas=None, usuario=None):
+        """
+        Vincula `orfas` (padrão: todas) às contas de mesmo email, ou todas a
+        `usuario` quando informado (o chamador já filtrou pelo email dele)
+
+        Returns:
+            dict com encontradas, vinculadas, por_usuario (Counter id -> quantidade),
+            emails (emails das vinculadas) e erros
+        """
+        if orfas is None:
+            orfas = solicitacoes_orfas()
+        if usuario is not None:
+            orfas = orfas.annotate(conta_id=Value(usuario.pk, output_field=IntegerField()))
+            usuarios = {usuario.pk: usuario}
+        else:
+            orfas = anotar_contas(orfas)
+            usuarios = {}
+
+        resultado = {
+            'encontradas': 0,
+            'vinculadas': 0,
+            'por_usuario': Counter(),
+            'emails': set(),
+            'erros': [],
+        }
+
+        ultimo_pk = 0
+        while True:
+            linhas = list(
+                orfas.filter(pk__gt=ultimo_pk)
+                .order_by('pk')
+                .values('pk', 'numero', 'email_solicitante', 'conta_id')[:self.tamanho_lote]
+            )
+            if not linhas:
+                break
+            ultimo_pk = linhas[-1]['pk']
+            resultado['encontradas'] += len(linhas)
+
+            vinculaveis = [linha for linha in linhas if linha['conta_id']]
+            faltantes = {linha['conta_id'] for linha in vinculaveis} - usuarios.keys()
+            if faltantes:
+                usuarios.update(User.objects.in_bulk(faltantes))
+
+            erro = None
+            if vinculaveis and not self.simular:
+                try:
+                    self._vincular_lote(vinculaveis, usuarios, usuario)
+                except Exception as e:
+                    logger.error(
+                        f"Erro ao vincular o lote de solicitações órfãs "
+                        f"{vinculaveis[0]['numero']}..{vinculaveis[-1]['numero']}: {e}"
+                    )
+                    erro = e
+                    resultado['erros'].append(e)
+
+            if erro is None:
+                resultado['vinculadas'] += len(vinculaveis)
+                for linha in vinculaveis:
+                    resultado['por_usuario'][linha['conta_id']] += 1
+                    resultado['emails'].add(linha['email_solicitante'])
+
+            if self.ao_processar_lote:
+                self.ao_processar_lote(linhas, usuarios, erro)
+
+        if resultado['vinculadas'] and not self.simular:
+            estatisticas.invalidar('solicitacoes', 'orfaos_vinculaveis')
+
+        return resultado
+
+    def _vincular_lote(self, linhas, usuarios, usuario=None):
+        """Um UPDATE para o lote e os logs de auditoria com bulk_create, numa transação"""
+        if usuario is not None:
+            cliente = Value(usuario.pk)
+        else:
+            # O banco resolve a conta de cada linha (a mesma subconsulta da leitura)
+            cliente = _conta_do_email(Lower(OuterRef('email_solicitante')))
+
+        with transaction.atomic():
+            # cliente__isnull: não sobrescrever o que foi vinculado entre a leitura e o UPDATE
+            SolicitacaoOrcamento.objects.filter(
+                pk__in=[linha['pk'] for linha in linhas], cliente__isnull=True
+            ).update(cliente_id=cliente)
+
+            AuditoriaManager.registrar_vinculacoes_orfaos_em_lote(
+                [
+                    (
+                        usuarios[linha['conta_id']],
+                        SolicitacaoOrcamento(
+                            pk=linha['pk'], numero=linha['numero'], email_solicitante=linha['email_solicitante']
+                        ),
+                    )
+                    for linha in linhas
+                ],
+                request=self.request,
+                origem=self.origem,
+            )
+
+
+def vincular_orfaos_do_cadastro(usuario_id):
+    """
+    Tarefa agendada pelo sinal de cadastro: detecção, vinculação e notificação
+
+    Levanta a exceção de um lote que falhou para que o executor tente de novo;
+    as solicitações já vinculadas não entram na nova tentativa.
+    """
+    usuario = User.objects.filter(pk=usuario_id).first()
+    if usuario is None or not usuario.email:
+        # Conta removida antes da execução
+        return None
+
+    orfas = solicitacoes_orfas(usuario.email)
+    count = orfas.count()
+    if not count:
+        logger.info(f"Nenhum orçamento órfão encontrado para {usuario.email}")
+        return {'encontradas': 0, 'vinculadas': 0}
+
+    # Registrar detecção na auditoria (uma vez: as novas tentativas só veem o que sobrou)
+    tarefa = tarefa_atual()
+    if tarefa is None or tarefa.tentativa == 1:
+        AuditoriaManager.registrar_deteccao_orcamento_orfao(
+            usuario=usuario,
+            email=usuario.email,
+            quantidade_encontrada=count
+        )
+
+    resultado = VinculadorOrfaos(origem="signal_cadastro").vincular(orfas, usuario=usuario)
+    if resultado['erros']:
+        raise resultado['erros'][0]
+
+    count = resultado['vinculadas']
+    logger.info(f"Vinculadas {count} solicitações órfãs ao usuário {usuario.email} (ID: {usuario.id})")
+
+    # Notificar o usuário sobre os orçamentos encontrados (falha não gera nova tentativa)
+    from .services import NotificationService
+    try:
+        NotificationService.notificar_orcamentos_vinculados(usuario, count)
+
+        AuditoriaManager.registrar_notificacao_vinculacao(
+            usuario_notificado=usuario,
+            quantidade_orcamentos=count,
+            metodo_vinculacao="signal_automatico"
+        )
+    except Exception as e:
+        logger.error(f"Erro ao notificar sobre orçamentos vinculados: {e}")
+
+    return resultado
+
+
+def registrar_resultado_cadastro(usuario_id, resultado, erro, tentativas):
+    """ao_concluir da tarefa de cadastro: resultado na auditoria quando havia órfãs ou houve falha"""
+    if erro is None and not (resultado and resultado['encontradas']):
+        return
+
+    usuario = User.objects.filter(pk=usuario_id).first()
+    if usuario is not None:
+        AuditoriaManager.registrar_tarefa_vinculacao(usuario, resultado, erro=erro, tentativas=tentativas)
@@ -6,3 +6,7 @@ class SystemConfigConfig(AppConfig):
     name = 'system_config'
     verbose_name = 'Configuration Système'
 
+    def ready(self):
+        """Invalidar o cache da configuração quando qualquer modelo do app mudar"""
+        from .signals import conectar
+        conectar(self.get_models())
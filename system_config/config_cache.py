@@ -0,0 +1,104 @@
+"""
+Cache da configuração do sistema (CompanySettings, EmailSettings e listas)
+
+Dois níveis: um dicionário local do processo e o cache compartilhado do
+Django (Redis em produção). Os valores são guardados sob uma versão
+(`system_config:versao`); qualquer save/delete de um modelo do app troca a
+versão quando a transação é confirmada (ver signals.py), e os valores
+antigos deixam de ser lidos em todos os workers.
+
+Cada processo confere a versão compartilhada no máximo a cada
+SYSTEM_CONFIG_CACHE_VERIFICACAO segundos; entre uma conferência e outra as
+leituras são só acessos ao dicionário. O processo que fez a alteração vê o
+valor novo imediatamente.
+
+Leituras feitas dentro de uma transação vão direto ao banco: podem ver
+dados ainda não confirmados, que não devem ir para o cache.
+"""
+
+import copy
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+CHAVE_VERSAO = 'system_config:versao'
+TEMPO_CACHE = 60 * 60
+
+_AUSENTE = object()
+_local = {'versao': None, 'verificado_em': None, 'valores': {}}
+
+
+def versao_atual():
+    versao = cache.get(CHAVE_VERSAO)
+    if versao is None:
+        # Cache vazio (primeiro acesso ou reinício do Redis): criar uma versão
+        cache.add(CHAVE_VERSAO, uuid.uuid4().hex, None)
+        versao = cache.get(CHAVE_VERSAO)
+    return versao
+
+
+def invalidar():
+    """Nova versão: os valores guardados até aqui deixam de ser usados"""
+    cache.set(CHAVE_VERSAO, uuid.uuid4().hex, None)
+    _local.update(versao=None, verificado_em=None, valores={})
+
+
+def _valores_locais():
+    agora = time.monotonic()
+    intervalo = getattr(settings, 'SYSTEM_CONFIG_CACHE_VERIFICACAO', 5)
+    if _local['verificado_em'] is None or agora - _local['verificado_em'] >= intervalo:
+        versao = versao_atual()
+        if versao != _local['versao']:
+            _local.update(versao=versao, valores={})
+        _local['verificado_em'] = agora
+    return _local['valores']
+
+
+def obter(nome, carregar):
+    """Valor `nome` da configuração; `carregar()` só roda quando nenhum dos níveis o tem"""
+    if connection.in_atomic_block:
+        return carregar()
+
+    valores = _valores_locais()
+    if nome in valores:
+        return valores[nome]
+
+    chave = f"system_config:{_local['versao']}:{nome}"
+    valor = cache.get(chave, _AUSENTE)
+    if valor is _AUSENTE:
+        valor = carregar()
+        cache.set(chave, valor, TEMPO_CACHE)
+    valores[nome] = valor
+    return valor
+
+
+def empresa():
+    """CompanySettings (cópia: pode ser alterada e salva sem afetar o cache)"""
+    from .models import CompanySettings
+    return copy.copy(obter('empresa', CompanySettings.carregar_solo))
+
+
+def email_ativo():
+    """EmailSettings ativo mais recente, ou None"""
+    from .models import EmailSettings
+    configuracao = obter(
+        'email_ativo',
+        lambda: EmailSettings.objects.filter(actif=True).order_by('-updated_at').first()
+    )
+    return copy.copy(configuracao)
+
+
+def lista(modelo, apenas_ativos=True):
+    """Registros de uma lista básica (Civilite, LegalForm, PaymentMode, PaymentCondition, TaxRate)"""
+    registros = obter(f"lista:{modelo._meta.label_lower}", lambda: list(modelo.objects.all()))
+    if apenas_ativos:
+        return [registro for registro in registros if registro.actif]
+    return list(registros)
+
+
+def escolhas(modelo, apenas_ativos=False):
+    """Opções de um <select> de ModelChoiceField a partir do cache"""
+    return [(registro.pk, str(registro)) for registro in lista(modelo, apenas_ativos)]
@@ -1,4 +1,5 @@
 from django import forms
+from .config_cache import escolhas
 from .models import (
     CompanySettings,
     Civilite,
@@ -58,6 +59,13 @@ class CompanySettingsForm(forms.ModelForm):
             'expert_email': forms.EmailInput(attrs={'class': INPUT_CLASSES}),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Opções vindas do cache da configuração; o queryset só é consultado na validação
+        for nome, modelo in (('forme_juridique', LegalForm), ('responsable_civilite', Civilite)):
+            campo = self.fields[nome]
+            campo.choices = [('', campo.empty_label)] + escolhas(modelo)
+
 
 class AutoEntrepreneurParametersForm(forms.ModelForm):
     class Meta:
@@ -192,6 +192,12 @@ class CompanySettings(models.Model):
 
     @classmethod
     def get_solo(cls):
+        """Instância única, lida do cache da configuração (ver config_cache.py)"""
+        from .config_cache import empresa
+        return empresa()
+
+    @classmethod
+    def carregar_solo(cls):
         obj, _ = cls.objects.get_or_create(id=1)
         return obj
 
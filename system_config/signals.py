@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from .config_cache import invalidar
+
+
+def invalidar_cache_configuracao(sender, **kwargs):
+    """Qualquer alteração na configuração troca a versão do cache quando for confirmada"""
+    transaction.on_commit(invalidar)
+
+
+def conectar(modelos):
+    for modelo in modelos:
+        post_save.connect(invalidar_cache_configuracao, sender=modelo, dispatch_uid=f"config_cache_save_{modelo.__name__}")
+        post_delete.connect(invalidar_cache_configuracao, sender=modelo, dispatch_uid=f"config_cache_delete_{modelo.__name__}")
@@ -0,0 +1,104 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+
+from system_config import config_cache
+from system_config.forms import CompanySettingsForm
+from system_config.models import Civilite, CompanySettings, EmailSettings, LegalForm, TaxRate
+from utils.emails.sistema_email import _get_active_email_settings
+
+
+@override_settings(SYSTEM_CONFIG_CACHE_VERIFICACAO=60)
+class ConfigCacheTestCase(TransactionTestCase):
+    """Cache da configuração: leituras sem consulta e invalidação por versão"""
+
+    def setUp(self):
+        cache.clear()
+        # Criar a linha única antes (a criação também invalida o cache)
+        CompanySettings.carregar_solo()
+        config_cache.invalidar()
+
+    def test_empresa_sem_consultas(self):
+        """Depois da primeira leitura, get_solo() não consulta o banco"""
+        CompanySettings.get_solo()
+        with self.assertNumQueries(0):
+            for _ in range(10):
+                CompanySettings.get_solo()
+        print("✓ get_solo() servido do cache")
+
+    def test_save_invalida(self):
+        """Salvar a configuração troca a versão e o próximo get_solo() vê o valor novo"""
+        config = CompanySettings.get_solo()
+        config.raison_sociale = 'Peinture Test SARL'
+        config.save()
+
+        self.assertEqual(CompanySettings.get_solo().raison_sociale, 'Peinture Test SARL')
+        print("✓ Alteração visível logo após o save")
+
+    def test_copia_nao_altera_cache(self):
+        """Alterar a instância devolvida (ex.: formulário inválido) não contamina o cache"""
+        CompanySettings.get_solo().raison_sociale = 'Não salvo'
+        self.assertEqual(CompanySettings.get_solo().raison_sociale, '')
+        print("✓ get_solo() devolve cópias")
+
+    def test_outro_processo(self):
+        """Uma versão nova gravada por outro worker é percebida na próxima conferência"""
+        CompanySettings.get_solo()
+        CompanySettings.objects.filter(pk=1).update(raison_sociale='Alterado em outro worker')
+        cache.set(config_cache.CHAVE_VERSAO, 'versao-de-outro-worker', None)
+
+        # Dentro do intervalo: ainda o dicionário local
+        self.assertEqual(CompanySettings.get_solo().raison_sociale, '')
+
+        with override_settings(SYSTEM_CONFIG_CACHE_VERIFICACAO=0):
+            self.assertEqual(CompanySettings.get_solo().raison_sociale, 'Alterado em outro worker')
+        print("✓ Versão compartilhada invalida os outros processos")
+
+    def test_transacao_le_do_banco(self):
+        """Dentro de uma transação a leitura vai ao banco e nada é guardado"""
+        CompanySettings.get_solo()
+        with transaction.atomic():
+            CompanySettings.objects.filter(pk=1).update(raison_sociale='Não confirmado')
+            self.assertEqual(CompanySettings.get_solo().raison_sociale, 'Não confirmado')
+            transaction.set_rollback(True)
+
+        self.assertEqual(CompanySettings.get_solo().raison_sociale, '')
+        print("✓ Leituras em transação não passam pelo cache")
+
+    def test_email_ativo(self):
+        """As configurações SMTP usadas a cada envio vêm do cache"""
+        EmailSettings.objects.create(host='smtp.example.com', actif=True)
+        self.assertEqual(_get_active_email_settings().host, 'smtp.example.com')
+        with self.assertNumQueries(0):
+            _get_active_email_settings()
+
+        EmailSettings.objects.update(actif=False)
+        EmailSettings.objects.first().save()
+        self.assertIsNone(_get_active_email_settings())
+        print("✓ EmailSettings em cache e invalidado no save")
+
+    def test_listas(self):
+        """Listas básicas em cache, filtradas por actif, e invalidadas no delete"""
+        TaxRate.objects.create(name='TVA 20%', rate=20)
+        inativa = TaxRate.objects.create(name='TVA 5%', rate=5, actif=False)
+
+        self.assertEqual([t.name for t in config_cache.lista(TaxRate)], ['TVA 20%'])
+        with self.assertNumQueries(0):
+            self.assertEqual(len(config_cache.lista(TaxRate, apenas_ativos=False)), 2)
+
+        inativa.delete()
+        self.assertEqual(len(config_cache.lista(TaxRate, apenas_ativos=False)), 1)
+        print("✓ Listas em cache")
+
+    def test_formulario_empresa(self):
+        """As opções dos selects do formulário da empresa não consultam o banco"""
+        Civilite.objects.create(label='Monsieur')
+        LegalForm.objects.create(name='EI')
+        instancia = CompanySettings.get_solo()
+        CompanySettingsForm(instance=instancia).as_p()
+
+        with self.assertNumQueries(0):
+            html = CompanySettingsForm(instance=instancia).as_p()
+        self.assertIn('Monsieur', html)
+        self.assertIn('EI', html)
+        print("✓ Formulário renderizado sem consultas")
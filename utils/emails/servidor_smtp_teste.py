@@ -0,0 +1,99 @@
+"""
+Servidor SMTP local de depuração (testes e benchmark de envio).
+
+Aceita qualquer mensagem sem autenticação nem TLS, descarta o conteúdo e
+conta conexões e mensagens recebidas. `latencia` atrasa a saudação de cada
+conexão nova para simular o custo do handshake (TCP + TLS + AUTH) de um
+servidor real.
+"""
+
+import socketserver
+import threading
+import time
+
+
+class _SessaoSMTP(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        servidor = self.server
+        servidor.registrar_conexao(self.connection)
+        if servidor.latencia:
+            time.sleep(servidor.latencia)
+        self._responder("220 localhost ESMTP depuracao")
+
+        while True:
+            linha = self.rfile.readline()
+            if not linha:
+                return
+            comando = linha.decode("ascii", "replace").strip().upper()
+            if comando.startswith(("EHLO", "HELO")):
+                self._responder("250 localhost")
+            elif comando == "DATA":
+                self._responder("354 End data with <CR><LF>.<CR><LF>")
+                while linha and linha not in (b".\r\n", b".\n"):
+                    linha = self.rfile.readline()
+                servidor.registrar_mensagem()
+                self._responder("250 OK")
+            elif comando == "QUIT":
+                self._responder("221 Bye")
+                return
+            else:
+                # MAIL FROM, RCPT TO, RSET, NOOP
+                self._responder("250 OK")
+
+    def _responder(self, linha):
+        try:
+            self.wfile.write(f"{linha}\r\n".encode("ascii"))
+        except OSError:
+            pass
+
+
+class ServidorSMTPTeste(socketserver.ThreadingTCPServer):
+    """Uso: `with ServidorSMTPTeste() as servidor:` e depois servidor.host/servidor.port"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0, latencia=0):
+        super().__init__((host, port), _SessaoSMTP)
+        self.latencia = latencia
+        self.conexoes = 0
+        self.mensagens = 0
+        self._sockets = []
+        self._lock = threading.Lock()
+
+    @property
+    def host(self):
+        return self.server_address[0]
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def registrar_conexao(self, sock):
+        with self._lock:
+            self.conexoes += 1
+            self._sockets.append(sock)
+
+    def registrar_mensagem(self):
+        with self._lock:
+            self.mensagens += 1
+
+    def derrubar_conexoes(self):
+        """Fecha do lado do servidor as conexões abertas (como um timeout do provedor)"""
+        with self._lock:
+            sockets, self._sockets = self._sockets, []
+        for sock in sockets:
+            try:
+                sock.shutdown(2)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.derrubar_conexoes()
+        self.server_close()
@@ -4,8 +4,14 @@ Centraliza todo o envio de emails do sistema com templates profissionais.
 """
 
 import logging
+import smtplib
+import threading
+import time
+
 from django.conf import settings
-from django.core.mail import send_mail, get_connection
+from django.core.mail import EmailMessage, EmailMultiAlternatives, get_connection
+from django.core.mail.backends.smtp import EmailBackend as SMTPBackend
+from django.db import transaction
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.utils.translation import gettext_lazy as _
@@ -29,13 +35,10 @@ def get_client_ip(request):
 # ==================== INTEGRAÇÃO COM SYSTEM_CONFIG ====================
 
 def _get_active_email_settings():
-    """Obtém as configurações de e-mail ativas do banco (system_config.EmailSettings)."""
+    """Obtém as configurações de e-mail ativas (system_config.EmailSettings, via cache da configuração)."""
     try:
-        from system_config.models import EmailSettings
-        cfg = (
-            EmailSettings.objects.filter(actif=True).order_by("-updated_at").first()
-        )
-        return cfg
+        from system_config.config_cache import email_ativo
+        return email_ativo()
     except Exception as e:
         # Evitar qualquer quebra se app não estiver disponível
         logger.debug(f"EmailSettings indisponível ou erro ao carregar: {e}")
@@ -119,25 +122,156 @@ def _get_smtp_connection():
         return None
 
 
-def _send_mail(subject, plain_message, html_message, recipients):
-    """Wrapper para send_mail usando conexão e remetente dinâmicos, com fallback seguro."""
+# ==================== CONEXÃO SMTP REUTILIZADA ====================
+
+class _ConexaoReutilizada(threading.local):
+    """Conexão SMTP aberta desta thread, com a configuração usada para abri-la"""
+    conexao = None
+    assinatura = None
+    ultimo_uso = 0.0
+
+
+_reutilizada = _ConexaoReutilizada()
+
+
+def _assinatura(conexao):
+    return (conexao.host, conexao.port, conexao.username, conexao.password, conexao.use_tls, conexao.use_ssl)
+
+
+def _conexao_responde(conexao):
+    try:
+        return conexao.connection.noop()[0] == 250
+    except (smtplib.SMTPException, OSError):
+        return False
+
+
+def close_pooled_connection():
+    """Fecha a conexão SMTP reutilizada desta thread (se houver)."""
+    conexao = _reutilizada.conexao
+    _reutilizada.conexao = _reutilizada.assinatura = None
+    if conexao is None:
+        return
+    try:
+        conexao.close()
+    except Exception as e:
+        logger.debug(f"Email: erro ao fechar conexão SMTP reutilizada: {e}")
+
+
+def get_pooled_connection(connection=None):
+    """
+    Conexão de envio reaproveitada entre emails (uma por thread do worker).
+
+    Parte da conexão configurada (EmailSettings ativo, senão EMAIL_BACKEND) ou de
+    `connection`, ainda não aberta. Conexões SMTP ficam abertas e são reutilizadas
+    enquanto a configuração não mudar; são reabertas quando ficam paradas mais de
+    EMAIL_SMTP_IDLE_TIMEOUT segundos ou quando um NOOP (feito se paradas há mais de
+    EMAIL_SMTP_CHECK_AFTER segundos) mostra que o servidor já as fechou.
+    Outros backends (locmem/console/dummy) são devolvidos como estão.
+    """
+    conexao = connection or _get_smtp_connection() or get_connection()
+    if not isinstance(conexao, SMTPBackend):
+        return conexao
+
+    parada = time.monotonic() - _reutilizada.ultimo_uso
+    if _reutilizada.conexao is not None:
+        if _reutilizada.assinatura != _assinatura(conexao):
+            close_pooled_connection()
+        elif parada > getattr(settings, "EMAIL_SMTP_IDLE_TIMEOUT", 60):
+            logger.debug("Email: conexão SMTP ociosa demais, reabrindo.")
+            close_pooled_connection()
+        elif parada > getattr(settings, "EMAIL_SMTP_CHECK_AFTER", 5) and not _conexao_responde(_reutilizada.conexao):
+            logger.debug("Email: conexão SMTP fechada pelo servidor, reabrindo.")
+            close_pooled_connection()
+
+    if _reutilizada.conexao is None:
+        conexao.fail_silently = False
+        conexao.open()
+        _reutilizada.conexao, _reutilizada.assinatura = conexao, _assinatura(conexao)
+    _reutilizada.ultimo_uso = time.monotonic()
+    return _reutilizada.conexao
+
+
+def _montar_email(mensagem, from_email):
+    if isinstance(mensagem, EmailMessage):
+        return mensagem
+    email = EmailMultiAlternatives(
+        subject=mensagem["subject"],
+        body=mensagem["plain_message"],
+        from_email=from_email,
+        to=list(mensagem.get("recipients") or []),
+    )
+    if mensagem.get("html_message"):
+        email.attach_alternative(mensagem["html_message"], "text/html")
+    return email
+
+
+def send_many(messages, connection=None, batch_size=None):
+    """
+    Envia vários emails pela mesma conexão, em lotes de send_messages().
+
+    `messages`: dicts com os argumentos de _send_mail (subject, plain_message,
+    html_message, recipients) ou EmailMessage já montados. Sem `connection`, usa
+    a conexão reutilizada da thread. Devolve quantos emails foram enviados; um
+    lote que falha é registrado no log e não é reenviado (evita duplicatas).
+    """
+    batch_size = batch_size or getattr(settings, "EMAIL_BATCH_SIZE", 50)
     try:
         from_email = _get_from_email()
-        connection = _get_smtp_connection()
-        logger.debug(f"Email: subject={subject!r}, from={from_email}, to={recipients}, using_custom_connection={bool(connection)}")
-        return send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=from_email,
-            recipient_list=list(recipients or []),
-            html_message=html_message,
-            fail_silently=False,
-            connection=connection,
-        )
+        emails = [_montar_email(mensagem, from_email) for mensagem in messages]
+        conexao = connection or get_pooled_connection()
     except Exception as e:
-        logger.error(f"Erro no envio de email (subject={subject!r}) para {recipients}: {e}")
+        logger.error(f"Erro ao preparar envio de emails: {e}")
         return 0
 
+    enviados = 0
+    for inicio in range(0, len(emails), batch_size):
+        lote = emails[inicio:inicio + batch_size]
+        try:
+            enviados += conexao.send_messages(lote) or 0
+        except Exception as e:
+            logger.error(f"Erro no envio de {len(lote)} email(s) para {[d for email in lote for d in email.to]}: {e}")
+            if connection is not None:
+                break
+            # Conexão possivelmente quebrada: descartar e seguir com uma nova
+            close_pooled_connection()
+            try:
+                conexao = get_pooled_connection()
+            except Exception as e:
+                logger.error(f"Erro ao reabrir conexão de email: {e}")
+                break
+        if conexao is _reutilizada.conexao:
+            _reutilizada.ultimo_uso = time.monotonic()
+    return enviados
+
+
+def queue_many(messages):
+    """
+    Entrega os emails à fila de saída (orcamentos.fila_emails) em vez de enviá-los
+    durante a requisição; o comando despachar_emails faz o envio. Aceita os mesmos
+    dicts de send_many. Com EMAIL_OUTBOX_ATIVO=False envia na hora (send_many).
+    """
+    messages = list(messages)
+    try:
+        from orcamentos.fila_emails import enfileirar, fila_ativa
+        if fila_ativa():
+            # Savepoint: uma falha desfaz só a inserção, não a transação de quem chamou
+            with transaction.atomic():
+                return enfileirar(messages, remetente=_get_from_email())
+    except Exception as e:
+        logger.error(f"Erro ao enfileirar {len(messages)} email(s), enviando na hora: {e}")
+    return send_many(messages)
+
+
+def _send_mail(subject, plain_message, html_message, recipients):
+    """Entrega um email à fila de saída (ou envia, sem fila) com remetente dinâmico, com fallback seguro."""
+    logger.debug(f"Email: subject={subject!r}, to={recipients}")
+    return queue_many([{
+        "subject": subject,
+        "plain_message": plain_message,
+        "html_message": html_message,
+        "recipients": recipients,
+    }])
+
 
 def send_password_reset_email(user, reset_url, request):
     """